@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Métricas do processo (contadores e histogramas) no formato texto do Prometheus.
+
+A extração e a montagem dos dashboards eram observadas só pelos logs. Aqui os
+estágios quentes são medidos com `timed(stage)`:
+
+- Sheets: metadados (`spreadsheets().get`) e valores (`values().get/batchGet`),
+  via `InstrumentedSheetsService`, que também conta as chamadas por campanha
+  (total e na janela do último minuto — a unidade da cota da API);
+- parse da aba Report, normalização de datas, cálculo de métricas, extração
+  completa e consolidação multicanal;
+- render dos templates, leituras/gravações no GCS e leituras do Firestore.
+
+Caches registram acerto/erro com `record_cache(cache, hit)`; `/metrics` expõe
+tudo com `render_metrics()`. As métricas são por processo (cada worker do
+gunicorn tem as suas), como é o normal para scrape por instância.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from request_tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Segundos (do acesso a cache local até uma extração multicanal completa)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[Any], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monotônico com rótulos."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_labels_text(self.labelnames, key)} {_number(value)}"
+                for key, value in sorted(self.samples().items())]
+
+
+class Histogram:
+    """Histograma com buckets cumulativos (como o cliente oficial do Prometheus)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos → [contagem por bucket..., soma, total]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, ('le', _number(bound)))} {_number(cumulative)}")
+            lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, ('le', '+Inf'))} {_number(state[-1])}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {_number(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métricas registradas e coletores avaliados na hora do scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        # Coletor: () -> [(nome, tipo, ajuda, [(rótulos, valor)])]
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector: Callable):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in list(self._collectors):
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"⚠️ Coletor de métricas falhou: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels_text(list(labels), list(labels.values()))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class SheetsQuotaTracker:
+    """Chamadas à API do Sheets por campanha: total e na janela do último minuto (unidade da cota)."""
+
+    def __init__(self, window_sec: float = 60.0, max_campaigns: int = 1000):
+        self.window_sec = window_sec
+        self.max_campaigns = max_campaigns
+        self._recent: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, campaign: str, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            calls = self._recent.get(campaign)
+            if calls is None:
+                if len(self._recent) >= self.max_campaigns:
+                    self._prune(now, drop_empty=True)
+                calls = self._recent[campaign] = deque()
+            calls.append(now)
+            while calls and now - calls[0] > self.window_sec:
+                calls.popleft()
+
+    def _prune(self, now: float, drop_empty: bool = False):
+        for campaign in list(self._recent):
+            calls = self._recent[campaign]
+            while calls and now - calls[0] > self.window_sec:
+                calls.popleft()
+            if drop_empty and not calls:
+                del self._recent[campaign]
+
+    def last_window(self) -> Dict[str, int]:
+        with self._lock:
+            self._prune(time.monotonic())
+            return {campaign: len(calls) for campaign, calls in self._recent.items() if calls}
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "southmedia_stage_duration_seconds", "Duração dos estágios de extração e montagem de dashboards", ("stage",))
+STAGE_ERRORS = REGISTRY.counter(
+    "southmedia_stage_errors_total", "Estágios que terminaram com exceção", ("stage",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "southmedia_cache_requests_total", "Consultas aos caches (result=hit|miss)", ("cache", "result"))
+SHEETS_API_CALLS = REGISTRY.counter(
+    "southmedia_sheets_api_calls_total", "Chamadas à API do Google Sheets", ("campaign", "method"))
+SHEETS_QUOTA = SheetsQuotaTracker()
+
+_enabled: Optional[bool] = None
+
+
+def metrics_enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        from config import METRICS_CONFIG
+        _enabled = bool(METRICS_CONFIG["enabled"])
+    return _enabled
+
+
+@contextmanager
+def timed(stage: str, **attributes):
+    """
+    Medir um estágio (duração no histograma; exceções também contadas em STAGE_ERRORS).
+    O estágio também vira um span do trace da requisição; `attributes` vão só para o span.
+    """
+    with span(stage, **attributes):
+        if not metrics_enabled():
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Registrar a duração de um estágio medido fora de `timed` (ex.: blocos longos com vários retornos)."""
+    if metrics_enabled():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def record_cache(cache: str, hit: bool):
+    """Registrar uma consulta a um cache."""
+    if metrics_enabled():
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_sheets_call(campaign: str, method: str):
+    """Registrar uma chamada à API do Sheets (cota por campanha)."""
+    if metrics_enabled():
+        SHEETS_API_CALLS.inc(campaign=campaign or "unknown", method=method)
+        SHEETS_QUOTA.record(campaign or "unknown")
+
+
+# ---------------------------------------------------------------------------
+# Serviço do Sheets instrumentado
+# ---------------------------------------------------------------------------
+
+# Método da API → estágio medido
+_SHEETS_STAGES = {
+    "spreadsheets.get": "sheets_metadata",
+    "values.get": "sheets_values",
+    "values.batchGet": "sheets_values",
+}
+
+
+class _InstrumentedRequest:
+    def __init__(self, request, campaign: str, method: str):
+        self._request = request
+        self._campaign = campaign
+        self._method = method
+
+    def execute(self, *args, **kwargs):
+        record_sheets_call(self._campaign, self._method)
+        with timed(_SHEETS_STAGES.get(self._method, "sheets_other"), method=self._method, campaign=self._campaign):
+            return self._request.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._request, name)
+
+
+class _InstrumentedResource:
+    def __init__(self, resource, campaign: str, prefix: str):
+        self._resource = resource
+        self._campaign = campaign
+        self._prefix = prefix
+
+    def values(self):
+        return _InstrumentedResource(self._resource.values(), self._campaign, "values")
+
+    def __getattr__(self, name):
+        attr = getattr(self._resource, name)
+        if not callable(attr):
+            return attr
+        method = f"{self._prefix}.{name}"
+
+        def call(*args, **kwargs):
+            return _InstrumentedRequest(attr(*args, **kwargs), self._campaign, method)
+        return call
+
+
+class InstrumentedSheetsService:
+    """
+    Envoltório do serviço `googleapiclient` do Sheets: cada `.execute()` de
+    `spreadsheets()` / `spreadsheets().values()` é contado e medido.
+    """
+
+    def __init__(self, service, campaign: str):
+        self._service = service
+        self._campaign = campaign
+
+    def spreadsheets(self):
+        return _InstrumentedResource(self._service.spreadsheets(), self._campaign, "spreadsheets")
+
+    def __getattr__(self, name):
+        return getattr(self._service, name)
+
+
+def instrument_sheets_service(service, campaign: str):
+    """Serviço do Sheets instrumentado (o próprio serviço se as métricas estiverem desligadas)."""
+    if service is None or not metrics_enabled():
+        return service
+    return InstrumentedSheetsService(service, campaign)
+
+
+# ---------------------------------------------------------------------------
+# Coletores e exposição
+# ---------------------------------------------------------------------------
+
+def _derived_families():
+    ratios = {}
+    for (cache, result), value in CACHE_REQUESTS.samples().items():
+        hits, total = ratios.get(cache, (0.0, 0.0))
+        ratios[cache] = (hits + (value if result == "hit" else 0.0), total + value)
+    yield ("southmedia_cache_hit_ratio", "gauge", "Fração de acertos de cada cache desde o início do processo",
+           [({"cache": cache}, hits / total) for cache, (hits, total) in sorted(ratios.items()) if total])
+    yield ("southmedia_sheets_api_calls_last_minute", "gauge", "Chamadas à API do Sheets no último minuto, por campanha",
+           [({"campaign": campaign}, count) for campaign, count in sorted(SHEETS_QUOTA.last_window().items())])
+
+
+REGISTRY.register_collector(_derived_families)
+
+
+def register_collector(collector: Callable):
+    """Registrar um coletor avaliado a cada scrape (ex.: contadores mantidos por outro módulo)."""
+    REGISTRY.register_collector(collector)
+
+
+def render_metrics() -> str:
+    """Texto de exposição do Prometheus (versão 0.0.4)."""
+    return REGISTRY.render()
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Armazenamento de backups dos dashboards por conteúdo (deduplicado).
+
+Cada versão é identificada pelo sha256 do HTML. Versões idênticas não geram
+cópia nova: o índice apenas registra o horário. Uma versão nova é gravada como
+delta de linhas contra a versão anterior do mesmo dashboard (só as linhas que
+mudaram, comprimidas com gzip); a cada `keyframe_interval` deltas encadeados
+é gravada uma cópia completa, limitando o custo de restauração.
+
+Estrutura em `backup_dir`:
+
+    index.json                      versões por dashboard + metadados dos objetos
+    objects/<sha256>.full.gz        HTML completo comprimido
+    objects/<sha256>.delta.gz       operações de cópia/inserção contra a base
+
+Uso pela linha de comando:
+
+    python backup_store.py list [--name dash_sonho.html]
+    python backup_store.py restore dash_sonho.html static/dash_sonho.html [--at 2026-01-02T10:30]
+    python backup_store.py prune [--keep 200] [--max-age-days 90]
+    python backup_store.py import-legacy [--remove]
+"""
+
+import os
+import re
+import gzip
+import json
+import difflib
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'index.json'
+OBJECTS_DIRNAME = 'objects'
+INDEX_VERSION = 1
+
+# Backups antigos: <nome>_backup_YYYYMMDD_HHMMSS.html
+_LEGACY_BACKUP_RE = re.compile(r'^(?P<name>.+)_backup_(?P<ts>\d{8}_\d{6})\.html$')
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _split_lines(data: bytes) -> List[str]:
+    # surrogateescape: qualquer byte sobrevive à ida e volta, mesmo fora de UTF-8
+    return data.decode('utf-8', 'surrogateescape').splitlines(keepends=True)
+
+
+def _join_lines(lines: List[str]) -> bytes:
+    return ''.join(lines).encode('utf-8', 'surrogateescape')
+
+
+def _make_delta(base: bytes, data: bytes) -> List[Any]:
+    """Operações para reconstruir `data` a partir de `base`: ["=", i, j] copia linhas, ["+", texto] insere."""
+    base_lines = _split_lines(base)
+    new_lines = _split_lines(data)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, base_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i1, i2])
+        elif j2 > j1:
+            ops.append(['+', ''.join(new_lines[j1:j2])])
+    return ops
+
+
+def _apply_delta(base: bytes, ops: List[Any]) -> bytes:
+    base_lines = _split_lines(base)
+    parts: List[str] = []
+    for op in ops:
+        if op[0] == '=':
+            parts.extend(base_lines[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return _join_lines(parts)
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+class DashboardBackupStore:
+    """Backups versionados e deduplicados dos arquivos de dashboard."""
+
+    def __init__(self, backup_dir: str, keyframe_interval: int = 20):
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, OBJECTS_DIRNAME)
+        self.index_path = os.path.join(backup_dir, INDEX_FILENAME)
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self._lock = threading.RLock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            index.setdefault("versions", {})
+            index.setdefault("objects", {})
+            return index
+        except FileNotFoundError:
+            return {"version": INDEX_VERSION, "versions": {}, "objects": {}}
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Índice de backups ilegível ({self.index_path}): {e}") from e
+
+    def _save_index(self):
+        fd, temp_path = tempfile.mkstemp(dir=self.backup_dir, prefix='.index.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.index_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _object_path(self, sha: str) -> str:
+        kind = self._index["objects"][sha]["kind"]
+        return os.path.join(self.objects_dir, f"{sha}.{kind}.gz")
+
+    # ------------------------------------------------------------------
+    # Objetos
+    # ------------------------------------------------------------------
+
+    def _write_object(self, sha: str, kind: str, payload: bytes, meta: Dict[str, Any]):
+        path = os.path.join(self.objects_dir, f"{sha}.{kind}.gz")
+        fd, temp_path = tempfile.mkstemp(dir=self.objects_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._index["objects"][sha] = dict(meta, kind=kind, stored=len(payload))
+
+    def _store_object(self, data: bytes, sha: str, base_sha: Optional[str]):
+        """Gravar a versão como delta contra `base_sha` (ou completa, se não compensar)."""
+        full_payload = gzip.compress(data)
+        base_meta = self._index["objects"].get(base_sha) if base_sha else None
+        if base_meta and base_meta.get("depth", 0) + 1 < self.keyframe_interval:
+            ops = _make_delta(self.read_object(base_sha), data)
+            delta_payload = gzip.compress(json.dumps(ops, ensure_ascii=False).encode('utf-8', 'surrogateescape'))
+            if len(delta_payload) < len(full_payload):
+                self._write_object(sha, 'delta', delta_payload, {
+                    "base": base_sha,
+                    "depth": base_meta.get("depth", 0) + 1,
+                    "size": len(data),
+                })
+                return
+        self._write_object(sha, 'full', full_payload, {"base": None, "depth": 0, "size": len(data)})
+
+    def read_object(self, sha: str) -> bytes:
+        """Conteúdo original de uma versão (seguindo a cadeia de deltas até a cópia completa)."""
+        with self._lock:
+            chain = []
+            current = sha
+            while current:
+                if current not in self._index["objects"]:
+                    raise KeyError(f"Objeto de backup não encontrado: {current}")
+                chain.append(current)
+                current = self._index["objects"][current].get("base")
+
+            data = b''
+            for current in reversed(chain):
+                with open(self._object_path(current), 'rb') as f:
+                    payload = gzip.decompress(f.read())
+                if self._index["objects"][current]["kind"] == 'full':
+                    data = payload
+                else:
+                    data = _apply_delta(data, json.loads(payload.decode('utf-8', 'surrogateescape')))
+            if _sha256(data) != sha:
+                raise ValueError(f"Backup corrompido: sha256 de {sha[:12]} não confere")
+            return data
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def backup_bytes(self, name: str, data: bytes, created_at: Optional[datetime] = None) -> Optional[str]:
+        """
+        Registrar uma versão de `name`.
+
+        Retorna o sha256 da versão criada, ou None se o conteúdo é igual à última versão.
+        """
+        sha = _sha256(data)
+        created_at = created_at or datetime.now()
+        with self._lock:
+            versions = self._index["versions"].setdefault(name, [])
+            if versions and versions[-1]["sha256"] == sha:
+                return None
+            if sha not in self._index["objects"]:
+                base_sha = versions[-1]["sha256"] if versions else None
+                self._store_object(data, sha, base_sha)
+            versions.append({"sha256": sha, "created_at": created_at.isoformat(timespec='seconds')})
+            versions.sort(key=lambda version: version["created_at"])
+            self._save_index()
+            return sha
+
+    def backup_file(self, path: str, name: Optional[str] = None) -> Optional[str]:
+        """Registrar o conteúdo atual de um arquivo (nome padrão: basename do arquivo)."""
+        with open(path, 'rb') as f:
+            return self.backup_bytes(name or os.path.basename(path), f.read())
+
+    def versions(self, name: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Versões registradas (de um dashboard ou de todos)."""
+        with self._lock:
+            if name:
+                return {name: [dict(v) for v in self._index["versions"].get(name, [])]}
+            return {key: [dict(v) for v in items] for key, items in self._index["versions"].items()}
+
+    def find_version(self, name: str, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Versão vigente em `at` (a última registrada até esse instante; sem `at`, a mais recente)."""
+        with self._lock:
+            candidates = self._index["versions"].get(name, [])
+            if at is not None:
+                candidates = [v for v in candidates if _parse_datetime(v["created_at"]) <= at]
+            return dict(candidates[-1]) if candidates else None
+
+    def restore(self, name: str, dest_path: str, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Restaurar em `dest_path` a versão de `name` vigente em `at`. Retorna a versão usada."""
+        version = self.find_version(name, at)
+        if not version:
+            return None
+        data = self.read_object(version["sha256"])
+        directory = os.path.dirname(os.path.abspath(dest_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.restore.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, dest_path)
+        return version
+
+    def prune(self, keep_last: Optional[int] = None, max_age_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Aplicar retenção e remover objetos que nenhuma versão usa.
+
+        Por dashboard mantém no máximo `keep_last` versões e descarta as mais antigas
+        que `max_age_days`; a versão mais recente é sempre mantida. Objetos que servem
+        de base para deltas mantidos continuam no disco.
+        """
+        cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days else None
+        removed_versions = 0
+        with self._lock:
+            for name, versions in self._index["versions"].items():
+                kept = versions[-keep_last:] if keep_last else list(versions)
+                if cutoff is not None:
+                    kept = [v for v in kept[:-1] if _parse_datetime(v["created_at"]) >= cutoff] + kept[-1:]
+                removed_versions += len(versions) - len(kept)
+                self._index["versions"][name] = kept
+
+            live = set()
+            for versions in self._index["versions"].values():
+                for version in versions:
+                    current = version["sha256"]
+                    while current and current not in live:
+                        live.add(current)
+                        current = self._index["objects"].get(current, {}).get("base")
+
+            removed_objects = 0
+            for sha in [sha for sha in self._index["objects"] if sha not in live]:
+                path = self._object_path(sha)
+                if os.path.exists(path):
+                    os.remove(path)
+                del self._index["objects"][sha]
+                removed_objects += 1
+
+            if removed_versions or removed_objects:
+                self._save_index()
+        return {"removed_versions": removed_versions, "removed_objects": removed_objects}
+
+    def import_legacy_backups(self, remove: bool = False) -> Dict[str, int]:
+        """
+        Importar backups antigos (`<nome>_backup_<timestamp>.html`) para o armazenamento.
+
+        Os arquivos são processados em ordem cronológica por dashboard; com `remove`,
+        cada arquivo importado é apagado.
+        """
+        legacy = []
+        for filename in os.listdir(self.backup_dir):
+            match = _LEGACY_BACKUP_RE.match(filename)
+            if match:
+                created_at = datetime.strptime(match.group('ts'), "%Y%m%d_%H%M%S")
+                legacy.append((f"{match.group('name')}.html", created_at, filename))
+
+        imported = 0
+        duplicates = 0
+        for name, created_at, filename in sorted(legacy):
+            path = os.path.join(self.backup_dir, filename)
+            with open(path, 'rb') as f:
+                if self.backup_bytes(name, f.read(), created_at=created_at):
+                    imported += 1
+                else:
+                    duplicates += 1
+            if remove:
+                os.remove(path)
+        return {"files": len(legacy), "imported": imported, "duplicates": duplicates}
+
+    def stats(self) -> Dict[str, Any]:
+        """Resumo do armazenamento."""
+        with self._lock:
+            objects = self._index["objects"].values()
+            return {
+                "dashboards": len(self._index["versions"]),
+                "versions": sum(len(v) for v in self._index["versions"].values()),
+                "objects": len(self._index["objects"]),
+                "original_bytes": sum(o.get("size", 0) for o in objects),
+                "stored_bytes": sum(o.get("stored", 0) for o in objects),
+            }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backups deduplicados dos dashboards")
+    parser.add_argument("--dir", default=None, help="Diretório de backups (padrão: AUTOMATION_BACKUP_DIR)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="Listar versões")
+    list_parser.add_argument("--name", help="Dashboard (ex.: dash_sonho.html)")
+
+    restore_parser = subparsers.add_parser("restore", help="Restaurar uma versão")
+    restore_parser.add_argument("name", help="Dashboard (ex.: dash_sonho.html)")
+    restore_parser.add_argument("dest", help="Arquivo de destino")
+    restore_parser.add_argument("--at", help="Instante ISO (ex.: 2026-01-02T10:30); padrão: mais recente")
+
+    prune_parser = subparsers.add_parser("prune", help="Aplicar retenção")
+    prune_parser.add_argument("--keep", type=int, default=None, help="Máximo de versões por dashboard")
+    prune_parser.add_argument("--max-age-days", type=int, default=None, help="Idade máxima das versões")
+
+    import_parser = subparsers.add_parser("import-legacy", help="Importar backups *_backup_<timestamp>.html")
+    import_parser.add_argument("--remove", action="store_true", help="Apagar os arquivos importados")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from config import AUTOMATION_CONFIG
+    store = DashboardBackupStore(args.dir or AUTOMATION_CONFIG["backup_dir"],
+                                 keyframe_interval=AUTOMATION_CONFIG["backup_keyframe_interval"])
+
+    if args.command == "list":
+        for name, versions in sorted(store.versions(args.name).items()):
+            print(f"{name}: {len(versions)} versões")
+            for version in versions:
+                print(f"  {version['created_at']}  {version['sha256'][:12]}")
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "restore":
+        at = _parse_datetime(args.at) if args.at else None
+        version = store.restore(args.name, args.dest, at=at)
+        if not version:
+            print(f"❌ Nenhuma versão de {args.name} encontrada")
+            return 1
+        print(f"✅ {args.name} ({version['created_at']}, {version['sha256'][:12]}) restaurado em {args.dest}")
+    elif args.command == "prune":
+        keep = args.keep if args.keep is not None else AUTOMATION_CONFIG["backup_keep_versions"]
+        max_age = args.max_age_days if args.max_age_days is not None else AUTOMATION_CONFIG["backup_max_age_days"]
+        print(f"🧹 {store.prune(keep_last=keep, max_age_days=max_age)}")
+    elif args.command == "import-legacy":
+        print(f"📦 {store.import_legacy_backups(remove=args.remove)}")
+        print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
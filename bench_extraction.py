@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do caminho de extração (sem acessar o Google Sheets).
+
+As chamadas ao Sheets são respondidas por `sheets_fixtures.FakeSheetsService`,
+a partir de planilhas sintéticas (100 a 100k linhas) ou gravadas de planilhas
+reais. Estágios medidos:
+
+- extract_cold: RealGoogleSheetsExtractor.extract_data sem cache da aba Report;
+- extract_incremental: o mesmo com o cache incremental da aba Report já populado;
+- processor: GoogleSheetsProcessor.get_all_channels_data com os canais de
+  GOOGLE_SHEETS_CONFIG (sheet_ids trocados por planilhas sintéticas);
+- multicanal: consolidação de /data (load_campaign_data) com 3 canais, dois com footfall.
+
+Para cada estágio: tempo de parede (mediana e mínimo de `--repeat` execuções),
+pico e saldo de memória alocada (tracemalloc, numa execução à parte),
+chamadas à API por método e o tempo por span (`timed` de app_metrics; os spans
+são aninhados, então "extraction" inclui "sheets_values", "report_parse" etc.).
+
+Uso:
+    python3 bench_extraction.py                                  # 100, 1k, 10k e 100k linhas
+    python3 bench_extraction.py --sizes 100,1000 --stages extract_cold,multicanal
+    python3 bench_extraction.py --save-baseline bench_extraction_baseline.json
+    python3 bench_extraction.py --baseline bench_extraction_baseline.json   # sai com 1 se houver regressão
+    python3 bench_extraction.py --record SHEET_ID --fixtures gravadas.json  # grava planilhas reais (credenciais)
+    python3 bench_extraction.py --fixtures gravadas.json                    # extração sobre as planilhas gravadas
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import tracemalloc
+from contextlib import ExitStack
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sheets_fixtures import (
+    FakeSheetsService, Workbook, load_workbooks, record_workbook, save_workbooks,
+    synthetic_campaign_workbook, synthetic_channel_workbooks,
+)
+
+STAGES = ("extract_cold", "extract_incremental", "processor", "multicanal")
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+# Diferenças abaixo disso são ruído de medição (ms / KiB)
+_NOISE_MS = 5.0
+_NOISE_KB = 256.0
+
+
+class StageRun:
+    """Estágio preparado: `run()` é o que se mede; `close()` desfaz os patches."""
+
+    def __init__(self, run: Callable[[], Any], service: FakeSheetsService, stack: ExitStack):
+        self.run = run
+        self.service = service
+        self._stack = stack
+
+    def close(self):
+        self._stack.close()
+
+
+def _campaign_config(campaign_key: str, sheet_id: str, use_footfall: bool = False):
+    return SimpleNamespace(
+        campaign_key=campaign_key, client="Benchmark", campaign_name=campaign_key,
+        sheet_id=sheet_id, channel="Video Programática", kpi="CPV", use_footfall=use_footfall,
+    )
+
+
+def _patch_extractor(stack: ExitStack, service: FakeSheetsService, report_cache=None):
+    """RealGoogleSheetsExtractor lendo do serviço local (instrumentado como em produção)."""
+    import real_google_sheets_extractor as extractor_module
+    from app_metrics import instrument_sheets_service
+
+    def initialize_service(extractor):
+        extractor.service = instrument_sheets_service(
+            service, getattr(extractor.config, 'campaign_key', None) or extractor.config.sheet_id
+        )
+        extractor.credentials = None
+
+    stack.enter_context(mock.patch.object(extractor_module, 'GOOGLE_AVAILABLE', True))
+    stack.enter_context(mock.patch.object(
+        extractor_module.RealGoogleSheetsExtractor, '_initialize_service', initialize_service))
+    stack.enter_context(mock.patch.object(extractor_module, 'get_report_row_cache', lambda: report_cache))
+    return extractor_module.RealGoogleSheetsExtractor
+
+
+def prepare_extract(workbook: Workbook, args, incremental: bool = False) -> StageRun:
+    stack = ExitStack()
+    service = FakeSheetsService({workbook['spreadsheetId']: workbook}, latency_sec=args.latency_ms / 1000)
+    report_cache = None
+    if incremental:
+        from report_row_cache import ReportRowCache
+        cache_dir = tempfile.mkdtemp(prefix="bench_report_cache_")
+        stack.callback(shutil.rmtree, cache_dir, True)
+        report_cache = ReportRowCache(cache_dir, tail_rows=args.tail_rows, full_refresh_hours=0)
+    extractor_class = _patch_extractor(stack, service, report_cache)
+    config = _campaign_config(f"bench_{workbook['spreadsheetId']}", workbook['spreadsheetId'],
+                              use_footfall='Footfall' in workbook.get('values', {}))
+
+    def run():
+        return extractor_class(config).extract_data()
+
+    if incremental:
+        # Primeira leitura (completa) popula o cache; as medidas são das leituras incrementais
+        run()
+    return StageRun(run, service, stack)
+
+
+def prepare_processor(rows: int, args) -> StageRun:
+    import google_sheets_processor as processor_module
+    from config import GOOGLE_SHEETS_CONFIG
+
+    stack = ExitStack()
+    channels, workbooks = synthetic_channel_workbooks(GOOGLE_SHEETS_CONFIG, rows, seed=args.seed)
+    service = FakeSheetsService(workbooks, latency_sec=args.latency_ms / 1000)
+    stack.enter_context(mock.patch.object(processor_module, 'GOOGLE_SHEETS_CONFIG', channels))
+
+    # Sem authenticate(): o serviço local dispensa credenciais (e _execute chama request.execute())
+    processor = processor_module.GoogleSheetsProcessor.__new__(processor_module.GoogleSheetsProcessor)
+    processor.credentials_file = None
+    processor.credentials = None
+    processor.service = service
+    processor._thread_local = threading.local()
+    return StageRun(processor.get_all_channels_data, service, stack)
+
+
+class _FakeDocument:
+    def __init__(self, data: Optional[Dict[str, Any]]):
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _FakeFirestore:
+    """Só o necessário para load_campaign_data: collection(...).document(...).get()."""
+
+    def __init__(self, documents: Dict[Tuple[str, str], Dict[str, Any]]):
+        self._documents = documents
+
+    def collection(self, name: str):
+        return SimpleNamespace(document=lambda key: SimpleNamespace(
+            get=lambda: _FakeDocument(self._documents.get((name, key)))))
+
+
+def prepare_multicanal(rows: int, args) -> StageRun:
+    import cloud_run_mvp
+
+    stack = ExitStack()
+    channels = [
+        {"channel_name": "YouTube", "action_description": "Vídeo", "kpi": "CPV", "sheet_id": "bench-youtube"},
+        {"channel_name": "HHS", "action_description": "Display", "sheet_id": "bench-hhs", "use_footfall": 1},
+        {"channel_name": "OHS", "action_description": "Display", "sheet_id": "bench-ohs", "use_footfall": 1},
+    ]
+    footfall_points = min(rows, 1_500)
+    workbooks = {
+        channel["sheet_id"]: synthetic_campaign_workbook(
+            channel["sheet_id"], rows, seed=args.seed,
+            footfall_points=footfall_points if channel.get("use_footfall") else 0,
+        )
+        for channel in channels
+    }
+    service = FakeSheetsService(workbooks, latency_sec=args.latency_ms / 1000)
+    _patch_extractor(stack, service)
+
+    campaign_key = "bench_multicanal"
+    campaigns_collection = "campaigns"
+    firestore = _FakeFirestore({(campaigns_collection, campaign_key): {
+        "campaign_key": campaign_key, "client": "Benchmark", "campaign_name": "Benchmark Multicanal",
+        "channel": "Multicanal", "sheet_id": "", "multicanal_channels": channels,
+    }})
+    stack.enter_context(mock.patch.object(cloud_run_mvp, 'bq_fs_manager', SimpleNamespace(
+        fs_client=firestore, campaigns_collection=campaigns_collection)))
+
+    def run():
+        # Sem usuário na sessão: sem checagem de acesso (como um dashboard compartilhado)
+        with cloud_run_mvp.app.test_request_context(f"/api/{campaign_key}/data"):
+            return cloud_run_mvp.load_campaign_data(campaign_key)
+
+    return StageRun(run, service, stack)
+
+
+def measure(name: str, stage: StageRun, repeat: int) -> Dict[str, Any]:
+    """Tempo (mediana/mínimo), spans, chamadas à API e alocações de um estágio preparado."""
+    from request_tracing import RequestTracer
+
+    tracer = RequestTracer(slow_ms=float('inf'), max_spans=100_000)
+    timings: List[float] = []
+    spans: List[Dict[str, Any]] = []
+    calls: Dict[str, int] = {}
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        stage.service.reset_calls()
+        token = tracer.start(name)
+        started = time.perf_counter()
+        try:
+            stage.run()
+        finally:
+            timings.append((time.perf_counter() - started) * 1000)
+            trace = tracer.finish(token)
+        calls = stage.service.reset_calls()
+        spans = trace.summary() if trace else []
+
+    # Alocações numa execução à parte (tracemalloc deixa tudo várias vezes mais lento)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        stage.run()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        stage.service.reset_calls()
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "runs": len(timings),
+        "alloc_peak_kb": round(peak / 1024, 1),
+        "alloc_retained_kb": round(current / 1024, 1),
+        "api_calls": dict(sorted(calls.items())),
+        "api_calls_total": sum(calls.values()),
+        "spans": spans,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            time_tolerance: float, memory_tolerance: float) -> List[str]:
+    """Regressões em relação à linha de base (chaves ausentes em um dos lados são ignoradas)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if current["median_ms"] - base["median_ms"] > max(_NOISE_MS, base["median_ms"] * time_tolerance):
+            regressions.append(f"{key}: tempo {base['median_ms']:.1f} → {current['median_ms']:.1f} ms")
+        if current["alloc_peak_kb"] - base["alloc_peak_kb"] > max(_NOISE_KB, base["alloc_peak_kb"] * memory_tolerance):
+            regressions.append(f"{key}: pico de memória {base['alloc_peak_kb']:.0f} → {current['alloc_peak_kb']:.0f} KiB")
+        if current["api_calls_total"] > base["api_calls_total"]:
+            regressions.append(f"{key}: chamadas à API {base['api_calls_total']} → {current['api_calls_total']} "
+                               f"({current['api_calls']})")
+    return regressions
+
+
+def _delta(current: float, base: Optional[float]) -> str:
+    if not base:
+        return ""
+    return f"{(current - base) / base * 100:+.0f}%"
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], top_spans: int = 4):
+    print(f"{'estágio':<34} {'mediana ms':>11} {'mín ms':>9} {'Δ tempo':>8} {'pico MiB':>9} {'Δ mem':>7} {'API':>5}")
+    for key, result in results.items():
+        base = baseline.get(key) or {}
+        print(f"{key:<34} {result['median_ms']:>11.1f} {result['min_ms']:>9.1f} "
+              f"{_delta(result['median_ms'], base.get('median_ms')):>8} "
+              f"{result['alloc_peak_kb'] / 1024:>9.1f} {_delta(result['alloc_peak_kb'], base.get('alloc_peak_kb')):>7} "
+              f"{result['api_calls_total']:>5}")
+        spans = result["spans"][:top_spans]
+        if spans:
+            print("    " + ", ".join(f"{entry['name']} {entry['total_ms']:.1f} ms ×{int(entry['count'])}" for entry in spans))
+
+
+def run_benchmarks(args) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def run_stage(key: str, prepare: Callable[[], StageRun]):
+        try:
+            stage = prepare()
+        except Exception as e:
+            print(f"⚠️ {key}: estágio indisponível neste ambiente ({type(e).__name__}: {e})", file=sys.stderr)
+            return
+        try:
+            results[key] = measure(key, stage, args.repeat)
+            print(f"✅ {key}: {results[key]['median_ms']:.1f} ms", file=sys.stderr)
+        finally:
+            stage.close()
+
+    if args.fixtures:
+        for sheet_id, workbook in load_workbooks(args.fixtures).items():
+            rows = max(0, len(workbook.get('values', {}).get('Report', [])) - 1)
+            run_stage(f"extract_recorded:{sheet_id}@{rows}", lambda: prepare_extract(workbook, args))
+        return results
+
+    for rows in args.sizes:
+        workbook = synthetic_campaign_workbook(f"bench-{rows}", rows, seed=args.seed,
+                                               footfall_points=min(rows, 1_500))
+        if "extract_cold" in args.stages:
+            run_stage(f"extract_cold@{rows}", lambda: prepare_extract(workbook, args))
+        if "extract_incremental" in args.stages:
+            run_stage(f"extract_incremental@{rows}", lambda: prepare_extract(workbook, args, incremental=True))
+        if "processor" in args.stages:
+            run_stage(f"processor@{rows}", lambda: prepare_processor(rows, args))
+        if "multicanal" in args.stages:
+            run_stage(f"multicanal@{rows}", lambda: prepare_multicanal(rows, args))
+    return results
+
+
+def record(sheet_ids: List[str], path: str):
+    """Gravar planilhas reais (credenciais do GoogleSheetsService) para repetir a extração offline."""
+    from google_sheets_service import GoogleSheetsService
+    sheets_service = GoogleSheetsService()
+    if not sheets_service.is_configured():
+        raise SystemExit("GoogleSheetsService não configurado (credenciais ausentes)")
+    workbooks = load_workbooks(path) if os.path.exists(path) else {}
+    for sheet_id in sheet_ids:
+        workbooks[sheet_id] = record_workbook(sheets_service._service, sheet_id)
+        tabs = {title: len(rows) for title, rows in workbooks[sheet_id]['values'].items()}
+        print(f"📼 {sheet_id}: {tabs}")
+    save_workbooks(path, workbooks)
+    print(f"✅ {len(sheet_ids)} planilha(s) gravada(s) em {path}")
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline da extração de planilhas")
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in _csv(v)], default=list(DEFAULT_SIZES),
+                        help="Linhas por planilha sintética (ex.: 100,1000,10000,100000)")
+    parser.add_argument("--stages", type=_csv, default=list(STAGES), help=f"Estágios ({','.join(STAGES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções medidas por estágio")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência simulada por chamada à API")
+    parser.add_argument("--tail-rows", type=int, default=300, help="Janela final relida no estágio incremental")
+    parser.add_argument("--fixtures", help="JSON com planilhas gravadas (substitui as sintéticas)")
+    parser.add_argument("--record", action="append", metavar="SHEET_ID",
+                        help="Gravar a planilha real em --fixtures e sair (pode repetir)")
+    parser.add_argument("--output", help="Gravar os resultados em JSON")
+    parser.add_argument("--baseline", help="Comparar com resultados gravados (sai com 1 se houver regressão)")
+    parser.add_argument("--save-baseline", help="Gravar os resultados como nova linha de base")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="Aumento de tempo tolerado (fração)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="Aumento de pico de memória tolerado")
+    parser.add_argument("--verbose", action="store_true", help="Manter os logs da extração")
+    args = parser.parse_args(argv)
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Estágios desconhecidos: {', '.join(sorted(unknown))}")
+    if args.record and not args.fixtures:
+        parser.error("--record exige --fixtures (arquivo de saída)")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # google_sheets_processor grava em logs/dashboard_automation.log
+    os.makedirs("logs", exist_ok=True)
+
+    if args.record:
+        record(args.record, args.fixtures)
+        return 0
+
+    if not args.verbose:
+        # A extração loga cada aba e cada linha descartada; no benchmark isso só distorce o tempo
+        logging.disable(logging.WARNING)
+
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    results = run_benchmarks(args)
+    logging.disable(logging.NOTSET)
+    print_report(results, baseline)
+
+    payload = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "latency_ms": args.latency_ms,
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            print(f"💾 Resultados gravados em {path}")
+
+    if args.baseline:
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print("\n❌ Regressões em relação à linha de base:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print("\n✅ Sem regressões em relação à linha de base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,13 +9,14 @@ import json
 import logging
 import re
 import uuid
-import hashlib
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from google.cloud import bigquery
 from google.cloud import firestore
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from user_lookup_index import SCHEME_WERKZEUG, UserLookupIndex, detect_hash_scheme, match_password
+
 logger = logging.getLogger(__name__)
 
 class BigQueryFirestoreManager:
@@ -57,6 +58,9 @@ class BigQueryFirestoreManager:
             self.clients_collection = 'clients'
             self.client_users_collection = 'client_users'
             
+            # Índice de login (e-mail → documento), montado no primeiro login
+            self._user_index: Optional[UserLookupIndex] = None
+
             # Tabelas (iguais para ambos ambientes)
             self.campaigns_table = 'campaigns'
             self.dashboards_table = 'dashboards'
@@ -589,6 +593,7 @@ class BigQueryFirestoreManager:
                 return False
             ref.update({
                 "password_hash": generate_password_hash(new_password),
+                "password": firestore.DELETE_FIELD,
                 "updated_at": datetime.now(),
             })
             return True
@@ -685,32 +690,18 @@ class BigQueryFirestoreManager:
                 deduped.append(name)
         return deduped
 
-    def _check_password_compat(self, stored_hash: str, password: str) -> bool:
-        if not stored_hash:
-            return False
-
-        # Werkzeug hashes (pbkdf2/scrypt) from current stack.
-        try:
-            if check_password_hash(stored_hash, password):
-                return True
-        except Exception:
-            pass
-
-        # Legacy plaintext or deterministic hash fallback.
-        if stored_hash == password:
-            return True
-        if hashlib.sha256(password.encode("utf-8")).hexdigest() == stored_hash:
-            return True
-
-        # Optional bcrypt fallback for legacy rows.
-        try:
-            import bcrypt  # type: ignore
-            if stored_hash.startswith("$2") and bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8")):
-                return True
-        except Exception:
-            pass
-
-        return False
+    @property
+    def user_index(self) -> Optional[UserLookupIndex]:
+        """Índice de login (None quando AUTH_INDEX_CONFIG desliga)."""
+        if self._user_index is None:
+            from config import AUTH_INDEX_CONFIG
+            if not AUTH_INDEX_CONFIG["enabled"]:
+                return None
+            self._user_index = UserLookupIndex(
+                self.fs_client, self._user_collections, self._normalize_email,
+                ttl_sec=AUTH_INDEX_CONFIG["ttl_sec"],
+            )
+        return self._user_index
 
     def ensure_superadmin_user(self, email: str, password: str, name: str = "Super Admin") -> str:
         email_norm = self._normalize_email(email)
@@ -727,6 +718,7 @@ class BigQueryFirestoreManager:
                 "password_hash": password_hash,
                 "updated_at": now,
             }, merge=True)
+            self._index_user(email_norm, self.users_collection, user_id)
             return user_id
 
         user_id = f"user_{uuid.uuid4().hex[:16]}"
@@ -740,39 +732,107 @@ class BigQueryFirestoreManager:
             "created_at": now,
             "updated_at": now,
         })
+        self._index_user(email_norm, self.users_collection, user_id)
         return user_id
 
-    def verify_user_credentials(self, email: str, password: str) -> Optional[Dict[str, Any]]:
-        email_norm = self._normalize_email(email)
+    def _index_user(self, email: str, collection_name: str, user_id: str, scheme: str = SCHEME_WERKZEUG):
+        """Registrar no índice de login um usuário recém-gravado."""
+        if self._user_index is not None:
+            self._user_index.put(email, collection_name, user_id, scheme)
+
+    def _credentials_payload(self, doc, user: Dict[str, Any], email_norm: str) -> Dict[str, Any]:
+        return {
+            "user_id": user.get("user_id") or doc.id,
+            "email": user.get("email") or email_norm,
+            "name": user.get("name") or "",
+            "role": user.get("role") or "viewer",
+            "client_id": user.get("client_id"),
+        }
+
+    def _upgrade_password_hash(self, collection_name: str, doc_id: str, email_norm: str, password: str):
+        """Regravar uma senha legada (sha256/bcrypt/texto plano) como hash werkzeug."""
+        try:
+            self.fs_client.collection(collection_name).document(doc_id).set({
+                "password_hash": generate_password_hash(password),
+                "password": firestore.DELETE_FIELD,
+                "updated_at": datetime.now(),
+            }, merge=True)
+            self._index_user(email_norm, collection_name, doc_id)
+            logger.info(f"🔐 Senha de {email_norm} migrada para hash werkzeug ({collection_name})")
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao migrar hash de senha ({collection_name}/{doc_id}): {e}")
+
+    def _verify_user_scan(self, email_norm: str, password: str):
+        """Login sem índice: consulta cada coleção de usuários em sequência."""
         for collection_name in self._user_collections():
             doc = self._query_first_by_field(collection_name, "email", email_norm)
             if not doc:
                 continue
 
             user = doc.to_dict() or {}
-            stored_hash = user.get("password_hash") or ""
-            stored_plain = user.get("password") or ""
-            valid = self._check_password_compat(stored_hash, password)
-            if not valid and stored_plain:
-                valid = stored_plain == password
-            if not valid:
-                continue
+            if self._user_index is not None:
+                self._user_index.put(email_norm, collection_name, doc.id, detect_hash_scheme(user))
+            scheme = match_password(user, password)
+            if scheme:
+                return collection_name, doc, user, scheme
+        return None
 
-            return {
-                "user_id": user.get("user_id") or doc.id,
-                "email": user.get("email") or email_norm,
-                "name": user.get("name") or "",
-                "role": user.get("role") or "viewer",
-                "client_id": user.get("client_id"),
-            }
+    def _verify_user_indexed(self, email_norm: str, password: str):
+        """
+        Login pelo índice: lê só os documentos registrados para o e-mail.
+        Retorna False quando o índice não conhece o e-mail ou está desatualizado.
+        """
+        locations = self.user_index.lookup(email_norm)
+        if not locations:
+            return False
+        found = False
+        for location in locations:
+            doc = self.fs_client.collection(location.collection).document(location.doc_id).get()
+            user = (doc.to_dict() or {}) if doc.exists else {}
+            if self._normalize_email(user.get("email")) != email_norm:
+                continue
+            found = True
+            scheme = match_password(user, password)
+            if scheme:
+                return location.collection, doc, user, scheme
+        if not found:
+            # Documento removido ou e-mail alterado em outra instância
+            self.user_index.forget(email=email_norm)
+            return False
         return None
 
+    def verify_user_credentials(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        email_norm = self._normalize_email(email)
+        match = False
+        if self.user_index is not None:
+            try:
+                match = self._verify_user_indexed(email_norm, password)
+            except Exception as e:
+                logger.warning(f"⚠️ Índice de login indisponível, consultando as coleções: {e}")
+                match = False
+        if match is False:
+            match = self._verify_user_scan(email_norm, password)
+        if not match:
+            return None
+
+        collection_name, doc, user, scheme = match
+        # Migra só senhas legadas; um hash werkzeug existente (ex.: senha resetada)
+        # nunca é sobrescrito pelo campo "password" antigo
+        if scheme != SCHEME_WERKZEUG and detect_hash_scheme(user) != SCHEME_WERKZEUG:
+            self._upgrade_password_hash(collection_name, doc.id, email_norm, password)
+        return self._credentials_payload(doc, user, email_norm)
+
     def reset_user_password(self, user_id: str, new_password: str) -> bool:
         try:
+            # Remove a senha legada em texto plano: ela não pode continuar valendo
+            # (nem ser "migrada" por cima do hash novo no próximo login)
             self.fs_client.collection(self.users_collection).document(user_id).set({
                 "password_hash": generate_password_hash(new_password),
+                "password": firestore.DELETE_FIELD,
                 "updated_at": datetime.now(),
             }, merge=True)
+            if self._user_index is not None:
+                self._user_index.forget(doc_id=user_id)
             return True
         except Exception as e:
             logger.error(f"❌ Erro ao resetar senha ({user_id}): {e}")
@@ -907,11 +967,15 @@ class BigQueryFirestoreManager:
         if not existing:
             payload["created_at"] = now
         self.fs_client.collection(self.users_collection).document(user_id).set(payload, merge=True)
+        if self._user_index is not None:
+            self._user_index.forget(email=email_norm)
         return user_id
 
     def remove_client_user(self, user_id: str) -> bool:
         try:
             self.fs_client.collection(self.users_collection).document(user_id).delete()
+            if self._user_index is not None:
+                self._user_index.forget(doc_id=user_id)
             return True
         except Exception as e:
             logger.error(f"❌ Erro ao remover usuário ({user_id}): {e}")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Especificações das campanhas atualizadas pelo campaign_updater.
+
+Cada campanha é um dict declarativo; adicionar uma campanha nova é adicionar
+uma entrada aqui. Campos:
+
+- name, sheet_id, dashboard_path
+- report: aba diária
+    - gid: GID da aba (export CSV público)
+    - columns: campo -> dicas de cabeçalho (substring, sem diferenciar maiúsculas),
+      em ordem de prioridade; um inteiro é a posição da coluna usada como fallback
+    - date_formats: formatos aceitos (strptime) e/ou "excel" (número serial)
+    - date_output: formato da data no DAILY
+    - channel: canal gravado em cada linha
+    - default_creative: criativo para linhas sem criativo
+    - dedupe: manter só a última linha por (data, criativo)
+    - skip_empty: descartar linhas sem impressões e sem investimento
+    - fill_creatives: "expected" (grade fixa em expected_creatives), "detected"
+      (criativos presentes nos dados) ou None
+    - expected_creatives: lista de criativos esperados
+    - min_columns: linhas de planilhas com menos colunas são ignoradas
+- footfall (opcional): aba de pontos com columns lat/lon/name/users/rate
+    - require_users: descartar pontos sem usuários
+- contract (opcional): aba "Informações de contrato" (budget, CPM, meta, período)
+- budget, cpm: valores contratados padrão (a aba de contrato tem prioridade)
+- planning (opcional): reescrever o bloco "PLANNING POPULATION" do HTML
+    - period, impressions_goal: padrões quando a aba de contrato não informa
+- slot_indent: indentação do JSON por slot no HTML
+"""
+
+PORTAL_AUTO_DRIVE_TO_STORE_CREATIVES = [
+    "20251201_ly_Drive-To-Store-360x300_A.png",
+    "20251201_ly_Drive-To-Store_300x250px_A.png",
+    "20251201_ly_Drive-To-Store_300x50px_A.png",
+    "20251201_ly_Drive-To-Store_320x480px_A.png",
+    "20251201_ly_Drive-To-Store_336x336px_A.png",
+]
+
+FOOTFALL_COLUMNS = {
+    "lat": ["lat", 0],
+    "lon": ["long", "lon", 1],
+    "name": ["name", 3],
+    "users": ["footfall users", 4],
+    "rate": ["footfall rate", 5],
+}
+
+DEFAULT_SLOT_INDENT = {"FOOTFALL_POINTS": 2, "CONS": 2, "PER": 2}
+
+CAMPAIGN_SPECS = {
+    "portal_auto_carbank_dez2025": {
+        "name": "Portal Auto Shopping - Carbank Dezembro",
+        "sheet_id": "10AKOXuxx5vC2BlZ3tp1CxTlcIlxIj2-G8av0ramCOeg",
+        "dashboard_path": "static/dash_portal_auto_shopping_carbank_dezembro_footfall.html",
+        "report": {
+            "gid": 304137877,
+            "columns": {"date": [0], "creative": [1], "impressions": [2], "clicks": [3], "spend": [6]},
+            "date_formats": ["%Y-%m-%d"],
+            "date_output": "%d/%m/%Y",
+            "channel": "Footfall Display",
+            "min_columns": 8,
+            "dedupe": True,
+            "fill_creatives": "expected",
+            "expected_creatives": PORTAL_AUTO_DRIVE_TO_STORE_CREATIVES,
+        },
+        "footfall": {"gid": 1714301106, "columns": FOOTFALL_COLUMNS},
+        "budget": 3000.0,
+        "cpm": 25.0,
+        "slot_indent": DEFAULT_SLOT_INDENT,
+    },
+    "portal_auto_carbank_jan2026": {
+        "name": "Portal Auto Shopping - Carbank Janeiro 2026",
+        "sheet_id": "1L9rzKij4eFNhRxFVTQbcaT_73WfD3nTaBkHOQXSWvxE",
+        "dashboard_path": "static/dash_portal_auto_shopping_jan2026_footfall.html",
+        "report": {
+            "gid": 304137877,
+            "columns": {
+                "date": ["date", "data", "day", "dia", 0],
+                "creative": ["creative", "criativo", "format", "formato", 1],
+                "impressions": ["impression", "impress", "imps", 2],
+                "clicks": ["click", "clique", 3],
+                "spend": ["spend", "invest", "gasto", "valor", 6],
+            },
+            "date_formats": ["%Y-%m-%d", "%d/%m/%Y", "excel"],
+            "date_output": "%d/%m/%Y",
+            "channel": "Footfall Display",
+            "dedupe": True,
+            "fill_creatives": "detected",
+            "expected_creatives": PORTAL_AUTO_DRIVE_TO_STORE_CREATIVES,
+        },
+        "footfall": {"gid": 1714301106, "columns": FOOTFALL_COLUMNS},
+        "budget": 3750.0,
+        "cpm": 25.0,
+        "slot_indent": DEFAULT_SLOT_INDENT,
+    },
+    "portal_auto_carnaportal_fev2026": {
+        "name": "Portal Auto Shopping - CarnaPortal Fevereiro",
+        "sheet_id": "1tLz31iH7xVJgIvdGbMlfs8kf0mdeWhZuG8D8x1n3fDY",
+        "dashboard_path": "static/dash_portal_auto_shopping_jan2026_carnaPortal_footfall.html",
+        "report": {
+            "gid": 304137877,
+            "columns": {
+                "date": ["day", "data", "date"],
+                "creative": ["creative", "criativo"],
+                "impressions": ["imp"],
+                "clicks": ["click"],
+                "spend": ["valor investido", "investido", "spend"],
+            },
+            "date_formats": ["%Y-%m-%d", "%d/%m/%Y"],
+            "date_output": "%d/%m/%Y",
+            "channel": "Footfall Display",
+            "default_creative": "Footfall Display",
+            "skip_empty": True,
+        },
+        "footfall": {"gid": 1714301106, "columns": FOOTFALL_COLUMNS, "require_users": True},
+        "contract": {"gid": 1939638014},
+        "budget": 3750.0,
+        "cpm": None,
+        "planning": {"period": ["07/02/2026", "28/02/2026"], "impressions_goal": 150000, "cpm": 25.0},
+        "slot_indent": {"DAILY": 2, "FOOTFALL_POINTS": 2, "CONS": 2, "PER": 2},
+    },
+}
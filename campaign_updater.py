@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Atualizador genérico dos dashboards estáticos de campanha.
+
+Substitui os scripts por campanha (update_portal_auto_dashboard.py,
+update_portal_auto_jan2026_dashboard.py, update_carnaportal_data.py...), que
+repetiam leitura da planilha, `iterrows` com parsing de data linha a linha,
+cálculo de totais e substituição no HTML. Aqui cada campanha é uma
+especificação declarativa (campaign_specs.CAMPAIGN_SPECS) e um único processo
+atualiza quantas campanhas forem pedidas:
+
+- uma sessão HTTP compartilhada; cada aba (sheet_id, gid) é baixada uma vez
+  por execução, em paralelo, mesmo que várias campanhas a usem;
+- colunas resolvidas uma vez por aba (dicas de cabeçalho + posição);
+- datas e números convertidos por coluna (cada valor distinto uma vez);
+- DAILY, CONS, PER e FOOTFALL_POINTS gravados numa passada (dashboard_slots).
+
+Uso:
+
+    python campaign_updater.py                      # todas as campanhas
+    python campaign_updater.py portal_auto_carbank_jan2026
+    python campaign_updater.py --list
+    python campaign_updater.py --dry-run
+"""
+
+import re
+import logging
+import threading
+from io import StringIO
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from config import CAMPAIGN_UPDATER_CONFIG
+from campaign_specs import CAMPAIGN_SPECS
+from dashboard_slots import SlotDocument, write_text_atomic
+from numeric_parsing import parse_numeric_series
+from footfall_parsing import build_footfall_points, log_footfall_diagnostics
+
+logger = logging.getLogger(__name__)
+
+DAILY_VIDEO_FIELDS = ("starts", "q25", "q50", "q75", "q100")
+CSV_EXPORT_URL = "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+# Dias entre 1899-12-30 (época das planilhas) e 1970-01-01
+_EXCEL_EPOCH_OFFSET = 25569
+
+
+class CampaignUpdateError(Exception):
+    """Falha ao atualizar uma campanha (planilha ilegível, colunas ausentes...)."""
+
+
+# ---------------------------------------------------------------------------
+# Leitura das planilhas
+# ---------------------------------------------------------------------------
+
+class SheetTabReader:
+    """Leitura das abas via export CSV público, com uma sessão e cache por execução."""
+
+    def __init__(self, session: Optional[requests.Session] = None, timeout: Optional[int] = None,
+                 verify_ssl: Optional[bool] = None):
+        self.session = session or requests.Session()
+        self.timeout = timeout or CAMPAIGN_UPDATER_CONFIG["request_timeout"]
+        self.verify_ssl = CAMPAIGN_UPDATER_CONFIG["verify_ssl"] if verify_ssl is None else verify_ssl
+        self._cache: Dict[Tuple[str, Any], pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def read(self, sheet_id: str, gid: Any) -> pd.DataFrame:
+        """Aba como DataFrame de strings (a conversão de tipos fica com o atualizador)."""
+        key = (sheet_id, str(gid))
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        url = CSV_EXPORT_URL.format(sheet_id=sheet_id, gid=gid)
+        response = self.session.get(url, timeout=self.timeout, verify=self.verify_ssl)
+        response.raise_for_status()
+        df = pd.read_csv(StringIO(response.text), dtype=str)
+        df.columns = [str(column).strip() for column in df.columns]
+        with self._lock:
+            self._cache[key] = df
+        return df
+
+    def prefetch(self, tabs: Iterable[Tuple[str, Any]], max_workers: Optional[int] = None) -> Dict[Tuple[str, str], Exception]:
+        """Baixar em paralelo as abas ainda não lidas. Retorna os erros por aba."""
+        pending = sorted({(sheet_id, str(gid)) for sheet_id, gid in tabs} - set(self._cache))
+        errors: Dict[Tuple[str, str], Exception] = {}
+        if not pending:
+            return errors
+        workers = max(1, min(max_workers or CAMPAIGN_UPDATER_CONFIG["max_workers"], len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='campaign-sheets') as executor:
+            futures = {executor.submit(self.read, sheet_id, gid): (sheet_id, gid) for sheet_id, gid in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[futures[future]] = e
+        return errors
+
+
+# ---------------------------------------------------------------------------
+# Conversões por coluna
+# ---------------------------------------------------------------------------
+
+def resolve_column(columns: List[str], hints: List[Any]) -> Optional[str]:
+    """Primeira coluna que casa com as dicas, em ordem de prioridade (str = substring, int = posição)."""
+    lowered = [column.lower() for column in columns]
+    for hint in hints:
+        if isinstance(hint, int):
+            if 0 <= hint < len(columns):
+                return columns[hint]
+            continue
+        hint = hint.lower()
+        for column, lower in zip(columns, lowered):
+            if hint in lower:
+                return column
+    return None
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    text = values.fillna('').astype(str).str.strip()
+    return text.where(~text.str.lower().isin(('', 'nan', 'none')), '')
+
+
+def parse_date_column(values: pd.Series, formats: List[str]) -> pd.Series:
+    """Converter datas para datetime testando os formatos em ordem (NaT se nenhum servir)."""
+    text = _blank(values)
+    uniques = pd.Series(pd.unique(text), dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    for date_format in formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        if date_format == 'excel':
+            serial = pd.to_numeric(uniques[missing], errors='coerce')
+            converted = pd.to_datetime((serial - _EXCEL_EPOCH_OFFSET) * 86400, unit='s', errors='coerce')
+        else:
+            converted = pd.to_datetime(uniques[missing], format=date_format, errors='coerce')
+        parsed[missing] = converted
+    mapping = dict(zip(uniques, parsed))
+    return text.map(mapping)
+
+
+# ---------------------------------------------------------------------------
+# Atualizador
+# ---------------------------------------------------------------------------
+
+class CampaignUpdater:
+    """Atualiza os dashboards de uma ou mais campanhas a partir das especificações."""
+
+    def __init__(self, specs: Optional[Dict[str, Dict[str, Any]]] = None, reader: Optional[SheetTabReader] = None):
+        self.specs = specs if specs is not None else CAMPAIGN_SPECS
+        self.reader = reader or SheetTabReader()
+
+    # -- Dados diários -------------------------------------------------------
+
+    def build_daily(self, spec: Dict[str, Any], df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Linhas do DAILY a partir da aba diária."""
+        report = spec["report"]
+        if report.get("min_columns") and len(df.columns) < report["min_columns"]:
+            raise CampaignUpdateError(f"Aba diária com {len(df.columns)} colunas (mínimo {report['min_columns']})")
+
+        columns = {field: resolve_column(list(df.columns), hints) for field, hints in report["columns"].items()}
+        logger.info(f"   Colunas: {columns}")
+        if not columns.get("date"):
+            raise CampaignUpdateError("Coluna de data não encontrada na aba diária")
+
+        def numbers(field: str, integer: bool) -> pd.Series:
+            column = columns.get(field)
+            if not column:
+                return pd.Series(0, index=df.index, dtype='float64')
+            parsed, _ = parse_numeric_series(df[column], integer=integer, default=0.0, column=column)
+            return parsed
+
+        data = pd.DataFrame({
+            "day": parse_date_column(df[columns["date"]], report.get("date_formats", ["%Y-%m-%d", "%d/%m/%Y"])),
+            "creative": _blank(df[columns["creative"]]) if columns.get("creative") else '',
+            "impressions": numbers("impressions", integer=True).astype('int64'),
+            "clicks": numbers("clicks", integer=True).astype('int64'),
+            "spend": numbers("spend", integer=False),
+        }, index=df.index)
+        data = data[data["day"].notna()]
+        default_creative = report.get("default_creative")
+        if default_creative:
+            data.loc[data["creative"] == '', "creative"] = default_creative
+        if report.get("skip_empty"):
+            data = data[(data["impressions"] != 0) | (data["spend"] != 0)]
+        fill = report.get("fill_creatives")
+        if report.get("dedupe") or fill:
+            data = data.drop_duplicates(subset=["day", "creative"], keep='last')
+
+        if fill and not data.empty:
+            expected = list(report.get("expected_creatives") or [])
+            creatives = expected if fill == "expected" else (sorted(data["creative"].unique()) or expected)
+            grid = pd.MultiIndex.from_product([sorted(data["day"].unique()), creatives], names=["day", "creative"])
+            data = (data.set_index(["day", "creative"])
+                        .reindex(grid, fill_value=0)
+                        .reset_index())
+        elif report.get("dedupe") or fill:
+            data = data.sort_values("day", kind='stable')
+
+        dates = data["day"].dt.strftime(report.get("date_output", "%d/%m/%Y"))
+        channel = report.get("channel", "Footfall Display")
+        daily = []
+        for date, creative, spend, impressions, clicks in zip(dates, data["creative"], data["spend"],
+                                                               data["impressions"], data["clicks"]):
+            row = {"date": date, "channel": channel, "creative": creative, "spend": float(spend)}
+            row.update({field: 0 for field in DAILY_VIDEO_FIELDS})
+            row.update({"impressions": int(impressions), "clicks": int(clicks), "visits": 0})
+            daily.append(row)
+        return daily
+
+    # -- Footfall ------------------------------------------------------------
+
+    def build_footfall(self, spec: Dict[str, Any], df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Pontos do FOOTFALL_POINTS (coordenadas inválidas ou fora do globo são descartadas)."""
+        footfall = spec["footfall"]
+        columns = {field: resolve_column(list(df.columns), hints) for field, hints in footfall["columns"].items()}
+        if not columns.get("lat") or not columns.get("lon") or not columns.get("name"):
+            raise CampaignUpdateError(f"Colunas de footfall não encontradas: {columns}")
+
+        if columns.get("users"):
+            users, _ = parse_numeric_series(df[columns["users"]], integer=True, default=0.0, column=columns["users"])
+        else:
+            users = None
+        points, diagnostics = build_footfall_points(
+            names=_blank(df[columns["name"]]),
+            lats=df[columns["lat"]],
+            lons=df[columns["lon"]],
+            users=users,
+            rates=df[columns["rate"]] if columns.get("rate") else None,
+            style="grouped",
+            require_users=bool(footfall.get("require_users")),
+        )
+        log_footfall_diagnostics(diagnostics, source="FOOTFALL_POINTS", log=logger)
+        return points
+
+    # -- Contrato ------------------------------------------------------------
+
+    def build_contract(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Dados da aba "Informações de contrato" (rótulo na 1ª coluna, valores nas seguintes)."""
+        contract: Dict[str, Any] = {}
+        if df.empty:
+            return contract
+        # A aba não tem cabeçalho: a primeira linha lida como cabeçalho também é um registro
+        rows = [list(df.columns)] + df.fillna('').astype(str).values.tolist()
+        for row in rows:
+            label = str(row[0] if row else '').strip().lower()
+            value = str(row[1] if len(row) > 1 else '').strip()
+            extra = str(row[2] if len(row) > 2 else '').strip()
+            number, _ = parse_numeric_series([value], default=0.0)
+            number = float(number.iloc[0])
+            if 'investimento' in label and number > 0:
+                contract['budget'] = number
+            if 'cpm contratado' in label and number > 0:
+                contract['cpm'] = number
+            if 'impress' in label and ('contrado' in label or 'contrat' in label) and number > 0:
+                contract['impressions_goal'] = int(number)
+            if 'periodo' in label or 'veicula' in label:
+                if '/' in value:
+                    contract['period_start'] = value
+                if '/' in extra:
+                    contract['period_end'] = extra
+        return contract
+
+    # -- Consolidados ----------------------------------------------------------
+
+    def build_summary(self, spec: Dict[str, Any], daily: List[Dict[str, Any]],
+                      contract: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """CONS e PER (canal único) a partir do DAILY e do contrato."""
+        spend = sum(row["spend"] for row in daily)
+        impressions = sum(row["impressions"] for row in daily)
+        clicks = sum(row["clicks"] for row in daily)
+        budget = contract.get('budget') or spec.get("budget") or 0.0
+        cpm = contract.get('cpm') or spec.get("cpm") or ((spend / impressions * 1000) if impressions else 0)
+
+        cons = {
+            "Budget Contratado (R$)": budget,
+            "Budget Utilizado (R$)": round(spend, 2),
+            "Impressões": impressions,
+            "Cliques": clicks,
+            "CTR (%)": round(clicks / impressions, 6) if impressions else 0,
+            "VC (100%)": 0,
+            "VTR (100%)": 0,
+            "CPV (R$)": 0,
+            "CPM (R$)": round(cpm, 2),
+            "Pacing (%)": round(spend / budget, 5) if budget else 0,
+        }
+        per = [{
+            "Canal": spec["report"].get("channel", "Footfall Display"),
+            **cons,
+            "Criativos Únicos": len({row["creative"] for row in daily if row["creative"]}),
+        }]
+        return cons, per
+
+    def render_planning(self, html: str, spec: Dict[str, Any], contract: Dict[str, Any]) -> str:
+        """Reescrever o bloco "PLANNING POPULATION" (período, meta de impressões e CPM contratados)."""
+        planning = spec["planning"]
+        default_start, default_end = planning.get("period", ["", ""])
+        period = f"{contract.get('period_start', default_start)} a {contract.get('period_end', default_end)}"
+        meta_imp = contract.get('impressions_goal', planning.get("impressions_goal", 0))
+        cpm = contract.get('cpm', planning.get("cpm", spec.get("cpm") or 0))
+        # Inclui eventual })(); duplicado para não deixar sobra
+        pattern = re.compile(r'// ====== PLANNING POPULATION ======.*?setTxt\([\'"]plan-cpm[\'"], '
+                             r'fmtBR\(cpmContratado\)\);\s*\}\)\(\);(?:\s*\}\)\(\);)?', re.DOTALL)
+        block = f'''// ====== PLANNING POPULATION ======
+(function(){{
+  const period = '{period}';
+  const metaImp = {meta_imp};
+  const cpmContratado = {cpm};
+  const budgetTotal = Number(CONS["Budget Contratado (R$)"]||0);
+  const budgetUsed = Number(CONS["Budget Utilizado (R$)"]||0);
+  const pacingBudget = budgetTotal>0 ? budgetUsed/budgetTotal : 0;
+  const impEnt = Number(CONS["Impressões"]||0);
+  const pacingImp = metaImp>0 ? impEnt/metaImp : 0;
+
+  const setTxt = (id, txt)=>{{ const el=document.getElementById(id); if(el) el.textContent = txt; }};
+  setTxt('plan-periodo', period);
+  setTxt('plan-budget-total', fmtBR(budgetTotal));
+  setTxt('plan-budget-used', fmtBR(budgetUsed));
+  setTxt('plan-pacing', `${{(pacingBudget*100).toFixed(2)}}%`);
+  setTxt('plan-imp-meta', fmtInt(metaImp));
+  setTxt('plan-imp-entregues', fmtInt(impEnt));
+  setTxt('plan-imp-pacing', `${{(pacingImp*100).toFixed(2)}}%`);
+  setTxt('plan-cpm', fmtBR(cpmContratado));
+}})();'''
+        return pattern.sub(lambda _: block, html, count=1)
+
+    # -- Execução --------------------------------------------------------------
+
+    def _tabs(self, spec: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        return [(spec["sheet_id"], spec[section]["gid"])
+                for section in ("report", "footfall", "contract") if spec.get(section)]
+
+    def update_campaign(self, key: str, dry_run: bool = False) -> Dict[str, Any]:
+        """Atualizar o dashboard de uma campanha. Retorna um resumo."""
+        spec = self.specs[key]
+        sheet_id = spec["sheet_id"]
+        logger.info(f"🔄 {key}: {spec.get('name', key)}")
+
+        daily = self.build_daily(spec, self.reader.read(sheet_id, spec["report"]["gid"]))
+        if not daily:
+            raise CampaignUpdateError("Nenhuma linha diária válida")
+
+        footfall_points = None
+        if spec.get("footfall"):
+            try:
+                footfall_points = self.build_footfall(spec, self.reader.read(sheet_id, spec["footfall"]["gid"]))
+            except Exception as e:
+                logger.warning(f"⚠️ {key}: footfall não atualizado ({e})")
+
+        contract: Dict[str, Any] = {}
+        if spec.get("contract"):
+            try:
+                contract = self.build_contract(self.reader.read(sheet_id, spec["contract"]["gid"]))
+            except Exception as e:
+                logger.warning(f"⚠️ {key}: aba de contrato ilegível ({e}), usando valores da especificação")
+
+        cons, per = self.build_summary(spec, daily, contract)
+        slot_values = {"DAILY": daily, "CONS": cons, "PER": per}
+        if footfall_points:
+            slot_values["FOOTFALL_POINTS"] = footfall_points
+
+        summary = {
+            "daily_rows": len(daily),
+            "footfall_points": len(footfall_points or []),
+            "spend": cons["Budget Utilizado (R$)"],
+            "impressions": cons["Impressões"],
+            "clicks": cons["Cliques"],
+        }
+        if dry_run:
+            return summary
+
+        path = spec["dashboard_path"]
+        document = SlotDocument.load(path)
+        html = document.render(slot_values, indent=spec.get("slot_indent"), insert_missing_after="DAILY")
+        if spec.get("planning"):
+            html = self.render_planning(html, spec, contract)
+        write_text_atomic(path, html)
+        return summary
+
+    def run(self, keys: Optional[Iterable[str]] = None, dry_run: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Atualizar várias campanhas num só processo (abas baixadas em paralelo antes)."""
+        keys = list(keys or self.specs)
+        unknown = [key for key in keys if key not in self.specs]
+        if unknown:
+            raise KeyError(f"Campanhas desconhecidas: {', '.join(unknown)}")
+
+        tabs = [tab for key in keys for tab in self._tabs(self.specs[key])]
+        started = datetime.now()
+        errors = self.reader.prefetch(tabs)
+        logger.info(f"📥 {len(set(tabs))} abas lidas em {(datetime.now() - started).total_seconds():.1f}s"
+                    f" ({len(errors)} com erro)")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for key in keys:
+            try:
+                results[key] = {"success": True, **self.update_campaign(key, dry_run=dry_run)}
+                logger.info(f"✅ {key}: {results[key]['daily_rows']} linhas diárias, "
+                            f"{results[key]['footfall_points']} pontos de footfall")
+            except Exception as e:
+                results[key] = {"success": False, "error": str(e)}
+                logger.error(f"❌ {key}: {e}")
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Atualiza dashboards de campanha a partir das planilhas")
+    parser.add_argument("campaigns", nargs="*", help="Chaves de campanha (padrão: todas)")
+    parser.add_argument("--list", action="store_true", help="Listar campanhas configuradas")
+    parser.add_argument("--dry-run", action="store_true", help="Ler e processar sem gravar os dashboards")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.list:
+        for key, spec in CAMPAIGN_SPECS.items():
+            print(f"{key}: {spec.get('name', '')} -> {spec['dashboard_path']}")
+        return 0
+
+    results = CampaignUpdater().run(args.campaigns or None, dry_run=args.dry_run)
+    failed = [key for key, result in results.items() if not result["success"]]
+    print(f"\n{'✅' if not failed else '⚠️'} {len(results) - len(failed)}/{len(results)} campanhas atualizadas")
+    for key in failed:
+        print(f"   ❌ {key}: {results[key]['error']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Checagem da conversão de coordenadas de Footfall (footfall_parsing.py).
+
+- coordenadas comuns: ponto/vírgula decimal, menos Unicode, separadores de milhar;
+- células com dígitos demais (pontilhadas como '9.9.9...' ou só dígitos) estouram
+  para inf e devem virar inválidas, sem travar o reescalonamento por 10.
+
+Cada checagem roda com um limite de tempo: um laço infinito vira falha, não trava.
+
+Uso:
+    python3 check_footfall_parsing.py
+
+Sai com código 1 se alguma checagem falhar.
+"""
+
+import sys
+import math
+import signal
+from typing import Callable, List, Tuple
+
+from footfall_parsing import parse_coordinate_series
+
+CHECK_TIMEOUT_SEC = 5
+
+
+class CheckTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise CheckTimeout(f"não terminou em {CHECK_TIMEOUT_SEC}s")
+
+
+def _same(values, expected) -> bool:
+    return all((math.isnan(a) and b is None) or (b is not None and abs(a - b) < 1e-9)
+               for a, b in zip(values.tolist(), expected))
+
+
+def check_common() -> str:
+    lat, diag = parse_coordinate_series(['-23,55', '−23.55', '-235.500.000', '', 'abc'], 'lat')
+    assert _same(lat, [-23.55, -23.55, -23.55, None, None]), lat
+    assert diag['empty'] == 1 and diag['invalid'] == 1, diag
+    lon, _ = parse_coordinate_series(['-46.633', '-4.663.300.000'], 'lon')
+    assert _same(lon, [-46.633, -46.633]), lon
+    return "vírgula, menos Unicode e separadores de milhar"
+
+
+def check_overflow(axis: str, cell: str) -> Callable[[], str]:
+    def check() -> str:
+        num, diag = parse_coordinate_series(['-23.5', cell], axis)
+        assert _same(num, [-23.5, None]), num
+        assert diag['invalid'] == 1, diag
+        return f"{cell[:8]}… ({len(cell)} caracteres) → inválida"
+    return check
+
+
+def main(argv=None) -> int:
+    signal.signal(signal.SIGALRM, _on_alarm)
+    checks: List[Tuple[str, Callable[[], str]]] = [
+        ("coordenadas comuns", check_common),
+        ("lat pontilhada gigante", check_overflow('lat', '9.' * 400)),
+        ("lat só dígitos gigante", check_overflow('lat', '9' * 400)),
+        ("lon pontilhada gigante", check_overflow('lon', '9.' * 400)),
+        ("lon só dígitos gigante", check_overflow('lon', '9' * 400)),
+    ]
+    failures = 0
+    for name, check in checks:
+        signal.alarm(CHECK_TIMEOUT_SEC)
+        try:
+            print(f"✅ {name}: {check()}")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+        finally:
+            signal.alarm(0)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Checagem da fila de commits em lote (git_commit_queue.py) contra um repositório local.
+
+Cria num diretório temporário um remoto `git init --bare`, um clone de trabalho
+(o do Git Manager) e um segundo clone (outra instância que também faz push) e roda
+a GitCommitQueue com push habilitado:
+
+- lote: notificações concorrentes viram um commit e um push;
+- deduplicação: o mesmo arquivo notificado várias vezes entra uma vez só;
+- remoto divergente: o push rejeitado é refeito com pull --rebase --autostash,
+  mesmo com um dashboard modificado (não staged) esperando em static/;
+- arquivo atrasado: notificado antes de existir, é commitado quando aparece;
+- fila cheia: acima de max_pending, submit levanta CommitQueueFull;
+- index.lock: a falha de commit é refeita com backoff.
+
+Uso:
+    python3 check_git_commit_queue.py
+    python3 check_git_commit_queue.py --files 100 --keep   # mantém o diretório temporário
+
+Sai com código 1 se alguma checagem falhar.
+"""
+
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from git_commit_queue import CommitQueueFull, GitCommitQueue
+
+RESULT_TIMEOUT = 30
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def clone(bare: Path, target: Path) -> Path:
+    git(bare.parent, 'clone', '-q', str(bare), str(target))
+    git(target, 'config', 'user.name', 'Check Bot')
+    git(target, 'config', 'user.email', 'check@example.com')
+    return target
+
+
+def commit_count(bare: Path) -> int:
+    return int(git(bare, 'rev-list', '--count', 'main'))
+
+
+def make_queue(work: Path, **options) -> GitCommitQueue:
+    defaults = dict(push=True, batch_window=0.5, stability_delay=0.1, retry_delay=0.2)
+    defaults.update(options)
+    return GitCommitQueue(work, **defaults)
+
+
+def check_batch(bare: Path, work: Path, files: int) -> str:
+    queue = make_queue(work).start()
+    before = commit_count(bare)
+    paths = [work / 'static' / f'dash_batch_{i:03d}.html' for i in range(files)]
+    for path in paths:
+        path.write_text(f'<html>{path.stem}</html>')
+    futures = []
+    lock = threading.Lock()
+
+    def notify(path: Path):
+        future = queue.submit(path)
+        with lock:
+            futures.append(future)
+
+    # Cada arquivo notificado duas vezes, como quando o gerador reenvia
+    threads = [threading.Thread(target=notify, args=(path,)) for path in paths + paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results = [future.result(RESULT_TIMEOUT) for future in futures]
+    queue.stop(RESULT_TIMEOUT)
+    status = queue.status()
+
+    assert all(result['success'] for result in results), [r for r in results if not r['success']][:3]
+    assert commit_count(bare) - before == 1, f"{commit_count(bare) - before} commits no remoto"
+    assert status['pushes'] == 1, f"{status['pushes']} pushes"
+    assert status['deduplicated'] == files, f"{status['deduplicated']} deduplicadas"
+    assert status['files_committed'] == files
+    return f"{len(results)} notificações → 1 commit, 1 push ({status['deduplicated']} deduplicadas)"
+
+
+def check_diverged_remote(bare: Path, work: Path, other: Path) -> str:
+    # Outra instância publica antes: o primeiro push da fila é rejeitado
+    git(other, 'pull', '-q', '--rebase', 'origin', 'main')
+    (other / 'outra_instancia.txt').write_text('outra instância')
+    git(other, 'add', '.')
+    git(other, 'commit', '-qm', 'outra instância')
+    git(other, 'push', '-q', 'origin', 'HEAD:main')
+
+    # Dashboard já versionado, regenerado e ainda não commitado (mudança não staged)
+    dirty = work / 'static' / 'dash_batch_000.html'
+    dirty.write_text('<html>regenerado, esperando na fila</html>')
+
+    queue = make_queue(work).start()
+    path = work / 'static' / 'dash_diverged.html'
+    path.write_text('<html>diverged</html>')
+    result = queue.submit(path).result(RESULT_TIMEOUT)
+    queue.stop(RESULT_TIMEOUT)
+    status = queue.status()
+
+    assert result['success'], result
+    assert status['push_failures'] == 1, f"{status['push_failures']} falhas de push"
+    assert result['commit'] == git(bare, 'rev-parse', 'main'), "SHA reportado diferente do remoto"
+    assert dirty.read_text() == '<html>regenerado, esperando na fila</html>', "autostash perdeu a mudança local"
+    assert queue._consecutive_failures == 0, "backoff não zerado após o push"
+    return "push rejeitado → rebase com autostash → push (SHA e mudança local preservados)"
+
+
+def check_late_file(bare: Path, work: Path) -> str:
+    queue = make_queue(work).start()
+    path = work / 'static' / 'dash_late.html'
+    future = queue.submit(path)
+    time.sleep(1.0)
+    path.write_text('<html>late</html>')
+    result = future.result(RESULT_TIMEOUT)
+    queue.stop(RESULT_TIMEOUT)
+
+    assert result['success'], result
+    assert 'dash_late' in git(bare, 'log', '--format=%s', '-n', '1', 'main')
+    return "notificado antes de existir → commitado no lote seguinte"
+
+
+def check_queue_full(work: Path) -> str:
+    queue = make_queue(work, max_pending=3, batch_window=60)  # sem start: nada sai da fila
+    for i in range(3):
+        queue.submit(work / 'static' / f'dash_full_{i}.html')
+    queue.submit(work / 'static' / 'dash_full_0.html')  # repetido não ocupa vaga
+    try:
+        queue.submit(work / 'static' / 'dash_full_9.html')
+    except CommitQueueFull as e:
+        assert queue.status()['rejected'] == 1
+        return f"4º arquivo distinto rejeitado (retry_after={e.retry_after:.0f}s)"
+    raise AssertionError("submit acima de max_pending não foi rejeitado")
+
+
+def check_index_lock(bare: Path, work: Path) -> str:
+    queue = make_queue(work).start()
+    lock = work / '.git' / 'index.lock'
+    lock.write_text('')
+    path = work / 'static' / 'dash_locked.html'
+    path.write_text('<html>locked</html>')
+    future = queue.submit(path)
+    time.sleep(1.2)
+    lock.unlink()
+    result = future.result(RESULT_TIMEOUT)
+    queue.stop(RESULT_TIMEOUT)
+
+    assert result['success'], result
+    assert 'dash_locked' in git(bare, 'log', '--format=%s', '-n', '1', 'main')
+    return "commit falhou com index.lock → refeito com backoff"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Checa a GitCommitQueue contra um remoto bare local")
+    parser.add_argument("--files", type=int, default=25, help="arquivos no teste de lote")
+    parser.add_argument("--keep", action="store_true", help="não apagar o diretório temporário")
+    parser.add_argument("--verbose", action="store_true", help="mostrar os logs da fila")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    root = Path(tempfile.mkdtemp(prefix="git_commit_queue_"))
+    bare = root / 'remote.git'
+    git(root, 'init', '-q', '--bare', '-b', 'main', str(bare))
+    work = clone(bare, root / 'work')
+    (work / 'static').mkdir()
+    (work / 'README.md').write_text('dashboards\n')
+    git(work, 'add', '.')
+    git(work, 'commit', '-qm', 'init')
+    git(work, 'push', '-q', 'origin', 'HEAD:main')
+    other = clone(bare, root / 'other')
+
+    checks: List[Tuple[str, Callable[[], str]]] = [
+        ("lote + deduplicação", lambda: check_batch(bare, work, args.files)),
+        ("remoto divergente", lambda: check_diverged_remote(bare, work, other)),
+        ("arquivo atrasado", lambda: check_late_file(bare, work)),
+        ("fila cheia", lambda: check_queue_full(work)),
+        ("index.lock", lambda: check_index_lock(bare, work)),
+    ]
+    failures = 0
+    try:
+        for name, check in checks:
+            try:
+                print(f"✅ {name}: {check()}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {name}: {type(e).__name__}: {e}")
+    finally:
+        if args.keep:
+            print(f"📁 Repositórios em {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Checagem da detecção de mudanças por revisão do Drive (sheet_revisions.py) sem acessar o Google.
+
+A sondagem usa `sheets_fixtures.FakeDriveService` (files.get + lotes) e roda o
+`DashboardAutomation.run_update` real, com o processamento dos canais, o download,
+o backup e a publicação no GitHub substituídos por contadores:
+
+- primeira execução: processa, publica e registra as revisões;
+- sem mudanças: pula os canais, mas ainda aciona o footfall;
+- planilha alterada: processa de novo;
+- publicação falhou: as revisões não são registradas e a próxima execução reprocessa;
+- max_skip_hours: última execução completa antiga força o reprocessamento;
+- revisão indisponível: planilha sem revisão é tratada como alterada;
+- extração sob demanda: RealGoogleSheetsExtractor reaproveita o resultado enquanto
+  a revisão não muda (FakeSheetsService conta as leituras).
+
+Uso:
+    python3 check_sheet_revisions.py
+    python3 check_sheet_revisions.py --keep   # mantém o diretório temporário
+
+Sai com código 1 se alguma checagem falhar.
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, List, Tuple
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+
+from config import GOOGLE_SHEETS_CONFIG
+from sheet_revisions import RevisionMemo, SheetChangeTracker, SheetRevisionProbe
+from sheets_fixtures import FakeDriveService, FakeSheetsService, synthetic_campaign_workbook
+
+SCOPE = 'dashboard_automation'
+SHEET_IDS = list(dict.fromkeys(config['sheet_id'].strip() for config in GOOGLE_SHEETS_CONFIG.values()))
+
+
+class OfflineRun:
+    """DashboardAutomation com a sondagem no Drive local e o resto do fluxo contado."""
+
+    def __init__(self, drive: FakeDriveService, state_file: str, max_skip_hours: float = 24):
+        from dashboard_automation import DashboardAutomation
+
+        self.extractions = 0
+        self.publishes = 0
+        self.footfall_triggers = 0
+        self.publish_ok = True
+        automation = DashboardAutomation()
+        automation.processor = SimpleNamespace(credentials=None, get_all_channels_data=self._channels_data)
+        automation.change_tracker = SheetChangeTracker(
+            SCOPE, SheetRevisionProbe(service=drive), state_file, max_skip_hours=max_skip_hours)
+        automation.download_dashboard_from_github = lambda: True
+        automation.create_backup = lambda: None
+        automation.update_dashboards = lambda daily_data: True
+        automation.commit_and_push_to_github = self._publish
+        automation.trigger_footfall_update = self._footfall
+        self.automation = automation
+
+    def _channels_data(self):
+        self.extractions += 1
+        return [{'channel': 'YouTube', 'spend': 10.0, 'impressions': 1000, 'clicks': 10}]
+
+    def _publish(self):
+        self.publishes += 1
+        return self.publish_ok
+
+    def _footfall(self):
+        self.footfall_triggers += 1
+        return True
+
+    def run(self) -> Tuple[int, int, int]:
+        """Executar uma atualização; devolve (extrações, publicações, acionamentos do footfall) desta execução."""
+        before = (self.extractions, self.publishes, self.footfall_triggers)
+        assert self.automation.run_update(), "run_update falhou"
+        return (self.extractions - before[0], self.publishes - before[1], self.footfall_triggers - before[2])
+
+
+def expect_run(run: OfflineRun, expected: Tuple[int, int, int], what: str = ''):
+    got = run.run()
+    assert got == expected, f"{what} (extrações, publicações, footfall) = {got}, esperado {expected}".strip()
+
+
+def recorded(state_file: str) -> dict:
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get(SCOPE, {})
+
+
+def check_first_run(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    expect_run(run, (1, 1, 1))
+    sheets = recorded(state_file)['sheets']
+    assert set(sheets) == set(SHEET_IDS), sorted(sheets)
+    return f"{len(SHEET_IDS)} planilhas processadas, publicadas e registradas"
+
+
+def check_unchanged(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    drive.reset_calls()
+    expect_run(run, (0, 0, 1), "planilhas sem mudança:")
+    calls = drive.reset_calls()
+    assert calls == {'batch': 1}, calls
+    return "canais pulados, footfall acionado (1 lote no Drive)"
+
+
+def check_changed(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    drive.touch(SHEET_IDS[0])
+    expect_run(run, (1, 1, 1))
+    assert recorded(state_file)['sheets'][SHEET_IDS[0]]['version'] == drive.metadata(SHEET_IDS[0])['version']
+    expect_run(run, (0, 0, 1))
+    return "planilha editada → reprocessada e registrada; depois pulada de novo"
+
+
+def check_record_after_publish(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    drive.touch(SHEET_IDS[-1])
+    before = recorded(state_file)
+    run.publish_ok = False
+    expect_run(run, (1, 1, 1))
+    assert recorded(state_file) == before, "revisões registradas sem publicação"
+    run.publish_ok = True
+    expect_run(run, (1, 1, 1), "publicação falha não foi refeita")
+    expect_run(run, (0, 0, 1))
+    return "push falhou → nada registrado → próxima execução reprocessa"
+
+
+def check_max_skip_hours(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    with open(state_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    state[SCOPE]['recorded_at'] = (datetime.now() - timedelta(hours=25)).isoformat(timespec='seconds')
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    expect_run(run, (1, 1, 1), "execução antiga não forçou o reprocessamento")
+    expect_run(run, (0, 0, 1))
+    return "última execução completa há 25h (limite 24h) → reprocessada sem mudanças"
+
+
+def check_unknown_revision(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    drive.failing.add(SHEET_IDS[1])
+    try:
+        expect_run(run, (1, 1, 1), "planilha sem revisão não foi tratada como alterada")
+        assert SHEET_IDS[1] not in recorded(state_file)['sheets']
+    finally:
+        drive.failing.discard(SHEET_IDS[1])
+    expect_run(run, (1, 1, 1))
+    expect_run(run, (0, 0, 1))
+    return "revisão indisponível → reprocessada e não registrada"
+
+
+def check_extraction_memo(run: OfflineRun, drive: FakeDriveService, state_file: str) -> str:
+    import sheet_revisions
+    import real_google_sheets_extractor as extractor_module
+
+    sheet_id = 'check-revisions-sheet'
+    sheets = FakeSheetsService({sheet_id: synthetic_campaign_workbook(sheet_id, 200)})
+    drive.touch(sheet_id)
+
+    def initialize_service(extractor):
+        extractor.service = sheets
+        extractor.credentials = None
+
+    config = SimpleNamespace(campaign_key='check_revisions', client='Checagem', campaign_name='Checagem',
+                             sheet_id=sheet_id, channel='Video Programática', kpi='CPV', use_footfall=False)
+    with mock.patch.object(extractor_module, 'GOOGLE_AVAILABLE', True), \
+            mock.patch.object(extractor_module.RealGoogleSheetsExtractor, '_initialize_service', initialize_service), \
+            mock.patch.object(extractor_module, 'get_report_row_cache', lambda: None), \
+            mock.patch.object(sheet_revisions, '_shared_probe', SheetRevisionProbe(service=drive)), \
+            mock.patch.object(sheet_revisions, '_shared_memo', RevisionMemo(max_entries=4)):
+        reads = []
+        for edit in (False, False, True):
+            if edit:
+                drive.touch(sheet_id)
+            result = extractor_module.RealGoogleSheetsExtractor(config).extract_data()
+            assert result and result.get('daily_data'), "extração vazia"
+            reads.append(sum(sheets.reset_calls().values()))
+    assert reads[0] > 0 and reads[1] == 0 and reads[2] > 0, reads
+    return f"leituras no Sheets por extração: {reads[0]} → {reads[1]} (sem mudança) → {reads[2]} (editada)"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Checa a detecção de mudanças por revisão com um Drive local")
+    parser.add_argument("--keep", action="store_true", help="não apagar o diretório temporário")
+    parser.add_argument("--verbose", action="store_true", help="mostrar os logs")
+    args = parser.parse_args(argv)
+
+    # dashboard_automation grava logs/ e backups/ no diretório atual
+    root = tempfile.mkdtemp(prefix="sheet_revisions_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    os.makedirs('logs', exist_ok=True)
+    failures = 0
+    try:
+        import dashboard_automation  # noqa: F401  (configura o logging ao importar)
+        logging.getLogger().setLevel(logging.INFO if args.verbose else logging.CRITICAL)
+
+        drive = FakeDriveService(SHEET_IDS)
+        state_file = os.path.join(root, 'sheet_revisions.json')
+        run = OfflineRun(drive, state_file, max_skip_hours=24)
+        checks: List[Tuple[str, Callable[..., str]]] = [
+            ("primeira execução", check_first_run),
+            ("sem mudanças", check_unchanged),
+            ("planilha alterada", check_changed),
+            ("registro só após publicar", check_record_after_publish),
+            ("max_skip_hours", check_max_skip_hours),
+            ("revisão indisponível", check_unknown_revision),
+            ("extração sob demanda", check_extraction_memo),
+        ]
+        for name, check in checks:
+            try:
+                print(f"✅ {name}: {check(run, drive, state_file)}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {name}: {type(e).__name__}: {e}")
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"📁 Estado e logs em {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
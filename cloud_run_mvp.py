@@ -7,16 +7,19 @@ Foca apenas na geração de dashboards, sem lógica de commit
 import os
 import sys
 import logging
-import json
 import sqlite3
 import tempfile
 import time
+import math
 import re
+import hmac
+import threading
+import contextvars
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
-from functools import wraps
-from flask import Flask, request, jsonify, send_from_directory, render_template_string, session, redirect, make_response
+from typing import Dict, Any, Optional, List, Tuple
+from functools import wraps, lru_cache
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory, render_template_string, session, redirect, make_response
 from flask_cors import CORS
 import pandas as pd
 
@@ -29,15 +32,26 @@ sys.path.append(os.path.dirname(__file__))
 
 # Importar módulos do MVP
 from real_google_sheets_extractor import RealGoogleSheetsExtractor
+from daily_columns import DailyColumns
 from google_sheets_service import GoogleSheetsService
-from config import get_api_endpoint, get_git_manager_url, is_production, is_development, get_port, is_debug
+from config import get_api_endpoint, get_git_manager_url, is_production, is_development, get_port, is_debug, DASHBOARD_CACHE_CONFIG, DASHBOARD_SYNC_CONFIG, FOOTFALL_CLUSTER_CONFIG, METRICS_CONFIG
 from bigquery_firestore_manager import BigQueryFirestoreManager
+from dashboard_cache import DashboardDiskCache
+from gcs_artifact_reader import get_artifact, gunzip_chunks, STATUS_MISSING, STATUS_NOT_MODIFIED
+from gcs_storage import get_bucket, call_with_retry, DASHBOARDS_BUCKET
+from dashboard_manifest import sync_cache_from_manifest, update_manifest
+from json_payload import script_json, json_response, columnar_daily
+from footfall_clusters import get_cluster_cache, trim_footfall_payload, select_footfall_points
+from footfall_merge import merge_footfall_points
+from app_metrics import timed, observe_stage, record_cache, render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+import request_tracing
 try:
     from templates_client_admin import get_admin_clients_html, get_client_portal_html
 except ImportError:
     get_admin_clients_html = get_client_portal_html = None
 
-app = Flask(__name__)
+# Rota /static/ própria (serve_static) com fallback para o GCS; a rota estática padrão do Flask a encobriria.
+app = Flask(__name__, static_folder=None)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "south-media-dev-secret-change-in-production")
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
@@ -58,6 +72,9 @@ def assets_files(filename):
 
 CORS(app)
 
+# Trace por requisição (spans de Sheets/GCS/Firestore/SQLite); lentas ficam em /api/admin/traces
+request_tracing.init_app(app)
+
 # Configuração do ambiente
 PORT = get_port()
 DEBUG = is_debug()
@@ -177,30 +194,19 @@ def superadmin_required_page(fn):
     return wrapper
 
 
-def with_superadmin_sidebar(page_html: str, active_menu: str = "") -> str:
-    """Inject persistent superadmin sidebar into full HTML pages."""
-    if not page_html or "<html" not in page_html or "<body" not in page_html:
-        return page_html
-    user = get_current_session_user() or {}
-    user_label = user.get("name") or user.get("email") or "Usuário"
+# Itens da sidebar do superadmin: (chave do menu, href, ícone SVG, rótulo)
+_SUPERADMIN_NAV_ITEMS = [
+    ("panel", "/panel", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="M3 10.5 12 3l9 7.5"></path><path d="M5 9.5V21h14V9.5"></path></svg>', "Painel"),
+    ("dashboards", "/dashboards-list", '<svg class="nav-icon" viewBox="0 0 24 24"><rect x="3" y="3" width="8" height="8" rx="1.5"></rect><rect x="13" y="3" width="8" height="5" rx="1.5"></rect><rect x="13" y="10" width="8" height="11" rx="1.5"></rect><rect x="3" y="13" width="8" height="8" rx="1.5"></rect></svg>', "Dashboards"),
+    ("generator", "/dash-generator-pro", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="m13 3-7 10h5l-1 8 8-12h-5l1-6z"></path></svg>', "Gerador"),
+    ("multichannel", "/dash-generator-pro-multicanal", '<svg class="nav-icon" viewBox="0 0 24 24"><circle cx="6" cy="6" r="2"></circle><circle cx="18" cy="6" r="2"></circle><circle cx="12" cy="18" r="2"></circle><path d="M8 7.5 10.7 15M16 7.5 13.3 15M8 6h8"></path></svg>', "Gerador Multicanal"),
+    ("clients", "/admin/clients", '<svg class="nav-icon" viewBox="0 0 24 24"><circle cx="9" cy="8" r="3"></circle><path d="M3.5 19a5.5 5.5 0 0 1 11 0"></path><circle cx="17.5" cy="9" r="2.5"></circle><path d="M16 14.8a4.5 4.5 0 0 1 4.5 4.2"></path></svg>', "Clientes"),
+    ("users", "/admin/users", '<svg class="nav-icon" viewBox="0 0 24 24"><rect x="3" y="11" width="18" height="10" rx="2"></rect><path d="M7 11V8a5 5 0 0 1 10 0v3"></path></svg>', "Usuários"),
+    ("me", "/me/dashboards", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="M3 6.5A2.5 2.5 0 0 1 5.5 4H10l2 2h6.5A2.5 2.5 0 0 1 21 8.5v9A2.5 2.5 0 0 1 18.5 20h-13A2.5 2.5 0 0 1 3 17.5z"></path></svg>', "Meus Dashboards"),
+    ("logout", "/logout", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="M9 21H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h4"></path><path d="M16 17l5-5-5-5"></path><path d="M21 12H9"></path></svg>', "Sair"),
+]
 
-    nav_items = [
-        ("panel", "/panel", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="M3 10.5 12 3l9 7.5"></path><path d="M5 9.5V21h14V9.5"></path></svg>', "Painel"),
-        ("dashboards", "/dashboards-list", '<svg class="nav-icon" viewBox="0 0 24 24"><rect x="3" y="3" width="8" height="8" rx="1.5"></rect><rect x="13" y="3" width="8" height="5" rx="1.5"></rect><rect x="13" y="10" width="8" height="11" rx="1.5"></rect><rect x="3" y="13" width="8" height="8" rx="1.5"></rect></svg>', "Dashboards"),
-        ("generator", "/dash-generator-pro", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="m13 3-7 10h5l-1 8 8-12h-5l1-6z"></path></svg>', "Gerador"),
-        ("multichannel", "/dash-generator-pro-multicanal", '<svg class="nav-icon" viewBox="0 0 24 24"><circle cx="6" cy="6" r="2"></circle><circle cx="18" cy="6" r="2"></circle><circle cx="12" cy="18" r="2"></circle><path d="M8 7.5 10.7 15M16 7.5 13.3 15M8 6h8"></path></svg>', "Gerador Multicanal"),
-        ("clients", "/admin/clients", '<svg class="nav-icon" viewBox="0 0 24 24"><circle cx="9" cy="8" r="3"></circle><path d="M3.5 19a5.5 5.5 0 0 1 11 0"></path><circle cx="17.5" cy="9" r="2.5"></circle><path d="M16 14.8a4.5 4.5 0 0 1 4.5 4.2"></path></svg>', "Clientes"),
-        ("users", "/admin/users", '<svg class="nav-icon" viewBox="0 0 24 24"><rect x="3" y="11" width="18" height="10" rx="2"></rect><path d="M7 11V8a5 5 0 0 1 10 0v3"></path></svg>', "Usuários"),
-        ("me", "/me/dashboards", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="M3 6.5A2.5 2.5 0 0 1 5.5 4H10l2 2h6.5A2.5 2.5 0 0 1 21 8.5v9A2.5 2.5 0 0 1 18.5 20h-13A2.5 2.5 0 0 1 3 17.5z"></path></svg>', "Meus Dashboards"),
-        ("logout", "/logout", '<svg class="nav-icon" viewBox="0 0 24 24"><path d="M9 21H5a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h4"></path><path d="M16 17l5-5-5-5"></path><path d="M21 12H9"></path></svg>', "Sair"),
-    ]
-    nav_links = []
-    for key, href, icon, label in nav_items:
-        class_attr = ' class="active"' if key == active_menu else ""
-        nav_links.append(f'<a{class_attr} href="{href}">{icon} {label}</a>')
-    nav_html = "".join(nav_links)
-
-    style_block = """
+_SUPERADMIN_SHELL_STYLE = """
 <style id="superadmin-shell-style">
   :root{
     --bg:#0F1023;
@@ -277,23 +283,198 @@ def with_superadmin_sidebar(page_html: str, active_menu: str = "") -> str:
   }
 </style>
 """
-    shell_start = f"<div class=\"sa-shell\"><aside class=\"sa-sidebar\"><div class=\"sa-brand\"><img src=\"/assets/logo_southmedia.png\" alt=\"\" class=\"sa-logo\" onerror=\"this.style.display='none'\" /></div><nav class=\"sa-menu\">{nav_html}</nav><div class=\"sa-footer\"><svg class=\"sa-footer-icon\" viewBox=\"0 0 24 24\"><circle cx=\"12\" cy=\"8\" r=\"3.5\"></circle><path d=\"M4 20a8 8 0 0 1 16 0\"></path></svg><span class=\"sa-footer-name\">{user_label}</span></div></aside><main class=\"sa-content\">"
-    shell_end = "</main></div>"
+
+# Único fragmento por usuário do shell; o restante da página é estático e pode ficar em cache.
+_SUPERADMIN_USER_SLOT = "<!--sa-user-label-->"
+_SUPERADMIN_SHELL_END = "</main></div>"
+
+# Menus internos duplicados; navegação fica exclusivamente na sidebar.
+_SUPERADMIN_STRIP_PATTERNS = [
+    re.compile(r'<div class="admin-links">.*?</div>', re.DOTALL),
+    re.compile(r'<a[^>]*class="[^"]*back-link[^"]*"[^>]*>.*?</a>', re.DOTALL),
+    re.compile(r'<a[^>]*class="[^"]*view-dashboards-btn[^"]*"[^>]*>.*?</a>', re.DOTALL),
+    re.compile(r'<div[^>]*style="[^"]*margin-top:10px[^"]*flex-wrap:wrap[^"]*"[^>]*>.*?</div>', re.DOTALL),
+]
+
+
+@lru_cache(maxsize=None)
+def _superadmin_shell_start(active_menu: str) -> str:
+    """Abertura do shell (sidebar + menu) para o menu ativo, montada uma única vez."""
+    nav_links = []
+    for key, href, icon, label in _SUPERADMIN_NAV_ITEMS:
+        class_attr = ' class="active"' if key == active_menu else ""
+        nav_links.append(f'<a{class_attr} href="{href}">{icon} {label}</a>')
+    nav_html = "".join(nav_links)
+    return f"<div class=\"sa-shell\"><aside class=\"sa-sidebar\"><div class=\"sa-brand\"><img src=\"/assets/logo_southmedia.png\" alt=\"\" class=\"sa-logo\" onerror=\"this.style.display='none'\" /></div><nav class=\"sa-menu\">{nav_html}</nav><div class=\"sa-footer\"><svg class=\"sa-footer-icon\" viewBox=\"0 0 24 24\"><circle cx=\"12\" cy=\"8\" r=\"3.5\"></circle><path d=\"M4 20a8 8 0 0 1 16 0\"></path></svg><span class=\"sa-footer-name\">{_SUPERADMIN_USER_SLOT}</span></div></aside><main class=\"sa-content\">"
+
+
+def _superadmin_skeleton(page_html: str, active_menu: str = "") -> str:
+    """Página com a sidebar injetada, sem dados do usuário (seguro para cache)."""
+    if not page_html or "<html" not in page_html or "<body" not in page_html:
+        return page_html
 
     html = page_html
-    # Remove menus internos duplicados; navegação fica exclusivamente na sidebar.
-    html = re.sub(r'<div class="admin-links">.*?</div>', '', html, flags=re.DOTALL)
-    html = re.sub(r'<a[^>]*class="[^"]*back-link[^"]*"[^>]*>.*?</a>', '', html, flags=re.DOTALL)
-    html = re.sub(r'<a[^>]*class="[^"]*view-dashboards-btn[^"]*"[^>]*>.*?</a>', '', html, flags=re.DOTALL)
-    html = re.sub(r'<div[^>]*style="[^"]*margin-top:10px[^"]*flex-wrap:wrap[^"]*"[^>]*>.*?</div>', '', html, flags=re.DOTALL)
+    for pattern in _SUPERADMIN_STRIP_PATTERNS:
+        html = pattern.sub('', html)
     if "</head>" in html and "superadmin-shell-style" not in html:
-        html = html.replace("</head>", style_block + "</head>", 1)
+        html = html.replace("</head>", _SUPERADMIN_SHELL_STYLE + "</head>", 1)
     if "<body>" in html:
-        html = html.replace("<body>", "<body>" + shell_start, 1)
+        html = html.replace("<body>", "<body>" + _superadmin_shell_start(active_menu), 1)
     if "</body>" in html:
-        html = html.replace("</body>", shell_end + "</body>", 1)
+        html = html.replace("</body>", _SUPERADMIN_SHELL_END + "</body>", 1)
     return html
 
+
+def _fill_superadmin_user(skeleton: str) -> str:
+    """Preencher o fragmento por usuário (nome no rodapé da sidebar)."""
+    if _SUPERADMIN_USER_SLOT not in skeleton:
+        return skeleton
+    user = get_current_session_user() or {}
+    user_label = user.get("name") or user.get("email") or "Usuário"
+    return skeleton.replace(_SUPERADMIN_USER_SLOT, user_label, 1)
+
+
+def with_superadmin_sidebar(page_html: str, active_menu: str = "") -> str:
+    """Inject persistent superadmin sidebar into full HTML pages."""
+    if not page_html or "<html" not in page_html or "<body" not in page_html:
+        return page_html
+    return _fill_superadmin_user(_superadmin_skeleton(page_html, active_menu))
+
+
+# Esqueletos das páginas do superadmin: page_key -> (version, html com sidebar, sem dados do usuário)
+_SUPERADMIN_PAGE_CACHE: Dict[str, tuple] = {}
+
+
+def render_cached_superadmin_page(page_key: str, active_menu: str, render_fn, version: Any = 0) -> str:
+    """
+    Servir uma página do superadmin a partir do esqueleto em cache.
+
+    render_fn só é chamado quando não há esqueleto para a versão pedida (ex.: versão da
+    lista de clientes); a cada requisição resta apenas preencher o fragmento do usuário.
+    """
+    cached = _SUPERADMIN_PAGE_CACHE.get(page_key)
+    if cached and cached[0] == version:
+        skeleton = cached[1]
+    else:
+        skeleton = _superadmin_skeleton(render_fn(), active_menu)
+        _SUPERADMIN_PAGE_CACHE[page_key] = (version, skeleton)
+    return _fill_superadmin_user(skeleton)
+
+
+# Lista de clientes (Firestore) usada nas páginas do superadmin.
+# TTL limita divergência entre instâncias; CRUD de clientes invalida o cache local.
+_CLIENTS_CACHE: Dict[str, Any] = {"loaded_at": 0.0, "version": 0, "clients": None}
+_CLIENTS_CACHE_TTL_SEC = 300
+_CLIENTS_CACHE_LOCK = threading.Lock()
+
+
+def get_cached_clients() -> List[Dict[str, Any]]:
+    """Listar clientes com cache em memória (evita round trip ao Firestore por página)."""
+    if not bq_fs_manager:
+        return []
+    now = time.time()
+    with _CLIENTS_CACHE_LOCK:
+        clients = _CLIENTS_CACHE["clients"]
+        hit = clients is not None and (now - _CLIENTS_CACHE["loaded_at"]) < _CLIENTS_CACHE_TTL_SEC
+        record_cache("clients", hit)
+        if hit:
+            return clients
+
+        fresh = bq_fs_manager.list_clients() or []
+        if fresh != clients:
+            _CLIENTS_CACHE["version"] += 1
+        _CLIENTS_CACHE["clients"] = fresh
+        _CLIENTS_CACHE["loaded_at"] = now
+        return fresh
+
+
+def get_clients_cache_version() -> int:
+    """Versão da lista de clientes em cache (muda quando o conteúdo muda)."""
+    return _CLIENTS_CACHE["version"]
+
+
+def invalidate_clients_cache() -> None:
+    """Descartar a lista de clientes em cache (chamado após criar/editar/excluir cliente)."""
+    with _CLIENTS_CACHE_LOCK:
+        _CLIENTS_CACHE["clients"] = None
+        _CLIENTS_CACHE["loaded_at"] = 0.0
+
+
+# Controle de acesso de usuários de cliente aos dashboards: (client_id do usuário, campaign_key) → permitido.
+# O dashboard e o /data da mesma página fazem a mesma checagem; o TTL curto limita divergência entre
+# instâncias e vincular/desvincular dashboards invalida a entrada local.
+_DASHBOARD_ACCESS_CACHE: Dict[Tuple[Optional[str], str], Tuple[float, bool]] = {}
+_DASHBOARD_ACCESS_CHANGED_AT: Dict[str, float] = {}
+_DASHBOARD_ACCESS_TTL_SEC = 60
+_DASHBOARD_ACCESS_MAX_ENTRIES = 4096
+_DASHBOARD_ACCESS_LOCK = threading.Lock()
+# Dashboards do cliente guardados na sessão (login e portal), válidos por este tempo
+_SESSION_DASHBOARDS_TTL_SEC = 300
+_SESSION_DASHBOARDS_MAX = 200
+
+
+def remember_session_dashboards(dashboards: List[Dict[str, Any]]) -> None:
+    """Guardar na sessão os dashboards vinculados ao cliente do usuário (liberados sem consultar o Firestore)."""
+    keys = [d.get("campaign_key") for d in dashboards or [] if d.get("campaign_key")]
+    if len(keys) > _SESSION_DASHBOARDS_MAX:
+        # Cookie de sessão tem tamanho limitado; acima disso a checagem usa só o cache em memória
+        session.pop("dashboard_keys", None)
+        session.pop("dashboard_keys_at", None)
+        return
+    session["dashboard_keys"] = keys
+    session["dashboard_keys_at"] = time.time()
+
+
+def _session_allows_dashboard(campaign_key: str) -> bool:
+    keys = session.get("dashboard_keys")
+    loaded_at = session.get("dashboard_keys_at") or 0.0
+    if not keys or campaign_key not in keys:
+        return False
+    if time.time() - loaded_at >= _SESSION_DASHBOARDS_TTL_SEC:
+        return False
+    # Vínculo alterado nesta instância depois que a sessão guardou a lista
+    return loaded_at > _DASHBOARD_ACCESS_CHANGED_AT.get(campaign_key, 0.0)
+
+
+def user_can_access_dashboard(user: Dict[str, Any], campaign_key: str) -> bool:
+    """
+    Usuário de cliente pode ver o dashboard? (superadmin e dashboards sem vínculo: sempre).
+    Consulta a sessão, depois o cache em memória e só então o Firestore.
+    """
+    if not bq_fs_manager or user.get("role") == "super_admin":
+        return True
+    if _session_allows_dashboard(campaign_key):
+        record_cache("dashboard_access", True)
+        return True
+
+    cache_key = (user.get("client_id"), campaign_key)
+    now = time.time()
+    with _DASHBOARD_ACCESS_LOCK:
+        cached = _DASHBOARD_ACCESS_CACHE.get(cache_key)
+    hit = bool(cached and now - cached[0] < _DASHBOARD_ACCESS_TTL_SEC)
+    record_cache("dashboard_access", hit)
+    if hit:
+        return cached[1]
+
+    with timed("firestore_read"):
+        linked_dashboard = bq_fs_manager.get_dashboard(campaign_key)
+    linked_client_id = (linked_dashboard or {}).get("client_id")
+    allowed = not linked_client_id or linked_client_id == user.get("client_id")
+
+    with _DASHBOARD_ACCESS_LOCK:
+        if len(_DASHBOARD_ACCESS_CACHE) >= _DASHBOARD_ACCESS_MAX_ENTRIES:
+            _DASHBOARD_ACCESS_CACHE.clear()
+        _DASHBOARD_ACCESS_CACHE[cache_key] = (now, allowed)
+    return allowed
+
+
+def invalidate_dashboard_access(campaign_key: str) -> None:
+    """Descartar as decisões de acesso de um dashboard (chamado após alterar o vínculo com cliente)."""
+    with _DASHBOARD_ACCESS_LOCK:
+        for key in [key for key in _DASHBOARD_ACCESS_CACHE if key[1] == campaign_key]:
+            _DASHBOARD_ACCESS_CACHE.pop(key, None)
+        _DASHBOARD_ACCESS_CHANGED_AT[campaign_key] = time.time()
+
 class CampaignConfig:
     """Configuração de uma campanha"""
     def __init__(self, campaign_key: str, client: str, campaign_name: str, sheet_id: str, channel: Optional[str] = None, kpi: Optional[str] = None, tabs: Optional[Dict] = None):
@@ -316,7 +497,7 @@ class CloudRunDatabaseManager:
     def __init__(self):
         # Usar diretório persistente do Cloud Run
         self.db_path = os.path.join('/tmp', 'campaigns.db')
-        self.gcs_bucket = 'south-media-ia-database-452311'
+        self.gcs_bucket = DASHBOARDS_BUCKET
         self.gcs_db_path = 'campaigns.db'
         self.backup_path = f"{self.db_path}.backup"
         
@@ -355,15 +536,13 @@ class CloudRunDatabaseManager:
     def _load_from_gcs(self):
         """Carregar banco de dados do Google Cloud Storage com fallback"""
         try:
-            from google.cloud import storage
-            client = storage.Client()
-            bucket = client.bucket(self.gcs_bucket)
+            bucket = get_bucket(self.gcs_bucket)
             blob = bucket.blob(self.gcs_db_path)
             
-            if blob.exists():
+            if call_with_retry(blob.exists):
                 # Fazer download para arquivo temporário primeiro
                 temp_path = f"{self.db_path}.temp"
-                blob.download_to_filename(temp_path)
+                call_with_retry(blob.download_to_filename, temp_path)
                 
                 # Verificar se o arquivo é válido
                 try:
@@ -406,8 +585,6 @@ class CloudRunDatabaseManager:
     def _save_to_gcs(self):
         """Salvar banco de dados no Google Cloud Storage com backup"""
         try:
-            from google.cloud import storage
-            
             # Verificar se o arquivo existe
             if not os.path.exists(self.db_path):
                 logger.warning("⚠️ Arquivo de banco não existe, não é possível salvar")
@@ -419,40 +596,24 @@ class CloudRunDatabaseManager:
                 shutil.copy2(self.db_path, self.backup_path)
             
             # Upload para GCS
-            client = storage.Client()
-            bucket = client.bucket(self.gcs_bucket)
+            bucket = get_bucket(self.gcs_bucket)
             blob = bucket.blob(self.gcs_db_path)
             
-            # Upload com retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    blob.upload_from_filename(self.db_path)
-                    
-                    # Verificar se o upload foi bem-sucedido
-                    if blob.exists():
-                        # Obter metadados
-                        blob.reload()
-                        size = blob.size
-                        logger.info(f"✅ Banco de dados salvo no GCS ({size:,} bytes)")
-                        
-                        # Contar registros salvos
-                        conn = sqlite3.connect(self.db_path)
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT COUNT(*) FROM campaigns")
-                        count = cursor.fetchone()[0]
-                        conn.close()
-                        logger.info(f"📊 {count} campanhas persistidas")
-                        return True
-                    else:
-                        raise Exception("Upload não confirmado")
-                        
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        logger.warning(f"⚠️ Tentativa {attempt + 1} falhou: {e}, tentando novamente...")
-                        time.sleep(1)
-                    else:
-                        raise e
+            # Upload com retry (backoff centralizado na camada de storage)
+            with timed("gcs_write"):
+                call_with_retry(blob.upload_from_filename, self.db_path)
+            
+            # O upload atualiza os metadados do blob (tamanho, geração)
+            logger.info(f"✅ Banco de dados salvo no GCS ({blob.size or 0:,} bytes)")
+            
+            # Contar registros salvos
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM campaigns")
+            count = cursor.fetchone()[0]
+            conn.close()
+            logger.info(f"📊 {count} campanhas persistidas")
+            return True
                         
         except ImportError as e:
             logger.warning(f"⚠️ Google Cloud Storage não disponível: {e}")
@@ -483,16 +644,14 @@ class CloudRunDatabaseManager:
                 conn.close()
             
             # Verificar GCS
-            from google.cloud import storage
-            client = storage.Client()
-            bucket = client.bucket(self.gcs_bucket)
-            blob = bucket.blob(self.gcs_db_path)
+            bucket = get_bucket(self.gcs_bucket)
             
             status["gcs_available"] = True
-            status["gcs_file_exists"] = blob.exists()
+            # get_blob traz existência e metadados numa única chamada
+            blob = call_with_retry(bucket.get_blob, self.gcs_db_path)
+            status["gcs_file_exists"] = blob is not None
             
-            if blob.exists():
-                blob.reload()
+            if blob is not None:
                 status["gcs_size"] = blob.size
                 
         except Exception as e:
@@ -553,12 +712,13 @@ class CloudRunDatabaseManager:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT campaign_key, client, campaign_name, sheet_id, channel, kpi, use_quartiles, use_footfall, created_at, updated_at
-                FROM campaigns WHERE campaign_key = ?
-            ''', (campaign_key,))
-            
-            result = cursor.fetchone()
+            with timed("sqlite_read"):
+                cursor.execute('''
+                    SELECT campaign_key, client, campaign_name, sheet_id, channel, kpi, use_quartiles, use_footfall, created_at, updated_at
+                    FROM campaigns WHERE campaign_key = ?
+                ''', (campaign_key,))
+                
+                result = cursor.fetchone()
             conn.close()
             
             if result:
@@ -649,42 +809,113 @@ def backup_worker():
         except Exception as e:
             logger.error(f"❌ Erro no backup automático: {e}")
 
+# Cache local (LRU, com orçamento de bytes) para dashboards publicados no GCS
+dashboard_cache = DashboardDiskCache(**DASHBOARD_CACHE_CONFIG)
+
 # Sistema de sincronização de dashboards
 def sync_dashboards_from_gcs():
-    """Sincronizar dashboards do GCS para o sistema local"""
+    """Pré-aquecer o cache local com dashboards do GCS, guiado pelo manifesto (sem ultrapassar o orçamento)"""
     try:
-        from google.cloud import storage
-        client = storage.Client()
-        bucket = client.bucket('south-media-ia-database-452311')
-        
-        # Listar todos os dashboards no GCS
-        blobs = bucket.list_blobs(prefix='dashboards/')
-        dashboard_count = 0
-        
-        for blob in blobs:
-            if blob.name.endswith('.html') and blob.name.startswith('dashboards/dash_'):
-                filename = blob.name.split('/')[-1]  # Extrair apenas o nome do arquivo
-                local_path = os.path.join('static', filename)
-                
-                # Se não existir localmente, baixar do GCS
-                if not os.path.exists(local_path):
-                    os.makedirs('static', exist_ok=True)
-                    content = blob.download_as_text()
-                    
-                    with open(local_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                    
-                    dashboard_count += 1
-                    logger.info(f"📥 Dashboard sincronizado: {filename}")
+        bucket = get_bucket(DASHBOARDS_BUCKET)
+        result = sync_cache_from_manifest(bucket, dashboard_cache, max_workers=DASHBOARD_SYNC_CONFIG["max_workers"])
         
-        if dashboard_count > 0:
-            logger.info(f"🔄 {dashboard_count} dashboards sincronizados do GCS")
+        if result["downloaded"] or result["adopted"]:
+            logger.info(f"🔄 {result['downloaded']} dashboards baixados e {result['adopted']} revalidados do GCS em {result['elapsed_sec']}s")
         else:
             logger.info("✅ Todos os dashboards já estão sincronizados")
+        if result["skipped_budget"]:
+            logger.info(f"ℹ️ Orçamento do cache local atingido; {result['skipped_budget']} dashboards serão baixados sob demanda")
+        if result["failed"]:
+            logger.warning(f"⚠️ {result['failed']} dashboards não puderam ser sincronizados")
             
     except Exception as e:
         logger.warning(f"⚠️ Erro ao sincronizar dashboards do GCS: {e}")
 
+
+def _record_published_dashboard(bucket, blob, dashboard_filename: str, dashboard_content: str):
+    """Manter cache local e manifesto coerentes com a nova geração do blob publicado."""
+    dashboard_cache.put_bytes(dashboard_filename, dashboard_content.encode('utf-8'),
+                              generation=blob.generation, md5=blob.md5_hash)
+    try:
+        update_manifest(bucket, blob)
+    except Exception as e:
+        logger.warning(f"⚠️ Não foi possível atualizar o manifesto de dashboards: {e}")
+
+
+def _client_accepts_encoding(encoding: Optional[str]) -> bool:
+    """O cliente aceita o Content-Encoding armazenado? (sem encoding: sempre)"""
+    if not encoding or encoding == "identity":
+        return True
+    return request.accept_encodings.quality(encoding) > 0
+
+
+def _cached_dashboard_response(entry: Dict[str, Any]) -> Response:
+    encoding = entry.get("content_encoding")
+    if encoding == 'gzip' and not _client_accepts_encoding(encoding):
+        # Cliente sem gzip: descompactar a cópia local, como read_published_dashboard_text
+        import gzip
+        with open(entry["path"], 'rb') as f:
+            response = Response(gzip.decompress(f.read()), mimetype='text/html')
+    else:
+        response = send_file(entry["path"], mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    if encoding:
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def published_dashboard_response(dashboard_filename: str, bucket=None) -> Optional[Response]:
+    """
+    Responder com um dashboard publicado no GCS sem carregá-lo inteiro em memória.
+
+    Usa o cache local quando válido; caso contrário faz um único GET condicional
+    (404 = inexistente, 304 = cache válido) e repassa o corpo em blocos, preservando
+    o Content-Encoding armazenado, enquanto grava a cópia no cache.
+    Retorna None se o dashboard não existe no GCS.
+    """
+    entry = dashboard_cache.lookup(dashboard_filename)
+    if entry and dashboard_cache.is_fresh(entry):
+        record_cache("dashboard_disk", True)
+        return _cached_dashboard_response(entry)
+
+    if bucket is None:
+        bucket = get_bucket(DASHBOARDS_BUCKET)
+    artifact = get_artifact(bucket, f"dashboards/{dashboard_filename}",
+                            if_generation_not_match=(entry or {}).get("generation"))
+    if artifact.status == STATUS_MISSING:
+        dashboard_cache.invalidate(dashboard_filename)
+        return None
+    if artifact.status == STATUS_NOT_MODIFIED:
+        dashboard_cache.mark_checked(dashboard_filename)
+        record_cache("dashboard_disk", True)
+        return _cached_dashboard_response(entry)
+
+    record_cache("dashboard_disk", False)
+    # O cache local guarda o corpo como armazenado; só a resposta é descompactada se preciso
+    decode = artifact.content_encoding == 'gzip' and not _client_accepts_encoding(artifact.content_encoding)
+    headers = artifact.http_headers(decode=decode)
+    headers['Content-Type'] = 'text/html; charset=utf-8'
+    body = dashboard_cache.stream_into_cache(dashboard_filename, artifact)
+    return Response(gunzip_chunks(body) if decode else body, headers=headers)
+
+
+def read_published_dashboard_text(dashboard_filename: str, bucket=None) -> Optional[str]:
+    """Ler o HTML publicado (via cache local) quando é preciso inspecionar o conteúdo."""
+    if bucket is None:
+        bucket = get_bucket(DASHBOARDS_BUCKET)
+    local_path = dashboard_cache.fetch(dashboard_filename, bucket, f"dashboards/{dashboard_filename}")
+    if not local_path:
+        return None
+    entry = dashboard_cache.lookup(dashboard_filename) or {}
+    with open(local_path, 'rb') as f:
+        data = f.read()
+    if entry.get("content_encoding") == 'gzip':
+        import gzip
+        data = gzip.decompress(data)
+    return data.decode('utf-8')
+
 # Sincronizar dashboards na inicialização
 sync_dashboards_from_gcs()
 
@@ -694,6 +925,14 @@ if is_production():
     backup_thread.start()
     logger.info("🔄 Sistema de backup automático iniciado")
 
+def channel_quartile_totals(channel_data: Dict[str, Any]) -> Tuple[int, int, int]:
+    """Totais de quartis (25/50/75%) de um canal: do resumo da extração ou, em dados antigos, somando os registros"""
+    summary = channel_data.get("campaign_summary") or {}
+    if all(key in summary for key in ("total_video_25", "total_video_50", "total_video_75")):
+        return summary["total_video_25"], summary["total_video_50"], summary["total_video_75"]
+    totals = DailyColumns.from_records(channel_data.get("daily_data") or []).totals(("video_25", "video_50", "video_75"))
+    return totals["video_25"], totals["video_50"], totals["video_75"]
+
 def generate_campaign_key(client: str, campaign_name: str) -> str:
     """Gerar chave única para a campanha"""
     import re
@@ -765,7 +1004,9 @@ def generate_dashboard(campaign_key: str, client: str, campaign_name: str, sheet
             
             if extracted_data:
                 # Converter dados para JSON e inserir no HTML
-                data_json = json.dumps(extracted_data, ensure_ascii=False, default=str)
+                # Redes grandes de lojas: o mapa busca clusters por bbox em vez de receber todos os pontos
+                with timed("template_render"):
+                    data_json = script_json(trim_footfall_payload(extracted_data, FOOTFALL_CLUSTER_CONFIG['inline_max_points']))
                 embedded_data_script = f'<script>window.EMBEDDED_CAMPAIGN_DATA = {data_json};</script>'
                 
                 # Inserir dados embutidos antes do fechamento do </head> ou no início do <body>
@@ -803,18 +1044,20 @@ def generate_dashboard(campaign_key: str, client: str, campaign_name: str, sheet
         
         # Salvar no Google Cloud Storage (backup)
         try:
-            from google.cloud import storage
-            client = storage.Client()
-            bucket = client.bucket('south-media-ia-database-452311')
+            bucket = get_bucket(DASHBOARDS_BUCKET)
             
             # Upload do dashboard para GCS como backup
             dashboard_filename = f"dash_{campaign_key}.html"
             gcs_path = f"dashboards/{dashboard_filename}"
             blob = bucket.blob(gcs_path)
-            blob.upload_from_string(dashboard_content, content_type='text/html')
+            with timed("gcs_write"):
+                call_with_retry(blob.upload_from_string, dashboard_content, content_type='text/html')
             
             logger.info(f"💾 Dashboard persistido no GCS: {gcs_path}")
             
+            # Manter o cache local e o manifesto coerentes com a nova geração do blob
+            _record_published_dashboard(bucket, blob, dashboard_filename, dashboard_content)
+            
         except Exception as e:
             logger.warning(f"⚠️ Não foi possível salvar dashboard no GCS: {e}")
         
@@ -885,6 +1128,23 @@ def health_check():
         logger.error(f"Erro no health check: {e}")
         return jsonify({"status": "unhealthy", "error": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Métricas do processo (estágios, caches, cota do Sheets) no formato do Prometheus.
+
+    As séries levam a chave da campanha (ou o sheet_id): com METRICS_TOKEN o acesso é
+    por "Authorization: Bearer <token>"; sem ele, em produção só um superadmin logado lê.
+    """
+    token = METRICS_CONFIG["token"]
+    if token:
+        authorized = hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        authorized = not is_production()
+    if not (authorized or is_super_admin()):
+        return Response("unauthorized\n", status=401, mimetype='text/plain')
+    return Response(render_metrics(), status=200, headers={"Content-Type": METRICS_CONTENT_TYPE})
+
 # Endpoint persistence-status já definido acima
 
 @app.route('/force-save', methods=['POST'])
@@ -927,9 +1187,7 @@ def dashboard_status():
         gcs_dashboards = []
         gcs_count = 0
         try:
-            from google.cloud import storage
-            client = storage.Client()
-            bucket = client.bucket('south-media-ia-database-452311')
+            bucket = get_bucket(DASHBOARDS_BUCKET)
             
             blobs = bucket.list_blobs(prefix='dashboards/')
             for blob in blobs:
@@ -946,6 +1204,7 @@ def dashboard_status():
                 "count": len(local_dashboards),
                 "files": local_dashboards
             },
+            "local_cache": dashboard_cache.stats(),
             "gcs_dashboards": {
                 "count": gcs_count,
                 "files": gcs_dashboards
@@ -1123,6 +1382,11 @@ def api_auth_login():
         session["name"] = user.get("name", "")
         session["role"] = user.get("role", "viewer")
         session["client_id"] = user.get("client_id")
+        if user.get("client_id") and user.get("role") != "super_admin":
+            try:
+                remember_session_dashboards(bq_fs_manager.get_dashboards_by_client(user.get("client_id")))
+            except Exception as e:
+                logger.warning(f"⚠️ Não foi possível carregar os dashboards do cliente no login: {e}")
 
         return jsonify({
             "success": True,
@@ -1242,20 +1506,21 @@ def dash_generator_pro():
     clients_for_select = []
     if bq_fs_manager:
         try:
-            clients_for_select = bq_fs_manager.list_clients() or []
+            clients_for_select = get_cached_clients()
         except Exception as e:
             logger.warning(f"⚠️ Erro ao carregar clientes para o gerador: {e}")
 
-    client_options_html = ''.join(
-        '<option value="{client_id}" data-client-name="{client_name}">{client_name} ({client_id})</option>'.format(
-            client_id=html_escape(str(c.get("client_id") or "")),
-            client_name=html_escape(str(c.get("name") or c.get("client_id") or "")),
+    def _render_page():
+        client_options_html = ''.join(
+            '<option value="{client_id}" data-client-name="{client_name}">{client_name} ({client_id})</option>'.format(
+                client_id=html_escape(str(c.get("client_id") or "")),
+                client_name=html_escape(str(c.get("name") or c.get("client_id") or "")),
+            )
+            for c in clients_for_select
+            if c.get("client_id")
         )
-        for c in clients_for_select
-        if c.get("client_id")
-    )
 
-    page_html = render_template_string(''' 
+        return render_template_string(''' 
 <!DOCTYPE html>
 <html lang="pt-BR">
 <head>
@@ -1752,7 +2017,11 @@ def dash_generator_pro():
 </body>
 </html>
     ''', client_options_html=client_options_html)
-    return with_superadmin_sidebar(page_html, active_menu="generator")
+
+    # Esqueleto em cache por versão da lista de clientes; por requisição só entra o nome do usuário.
+    return render_cached_superadmin_page(
+        "dash_generator_pro", "generator", _render_page, version=get_clients_cache_version()
+    )
 
 @app.route('/api/generate-dashboard', methods=['POST'])
 @superadmin_required_api
@@ -1827,6 +2096,8 @@ def generate_dashboard_endpoint():
                 # Se um client_id foi informado, persistir o vínculo do dashboard com o cliente
                 if client_id:
                     bq_fs_manager.set_dashboard_client(campaign_key, client_id=client_id)
+                # save_dashboard regrava o documento (e o vínculo com cliente)
+                invalidate_dashboard_access(campaign_key)
                 logger.info(f"✅ Dashboard {dashboard_id} salvo no BigQuery + Firestore")
             except Exception as e:
                 logger.warning(f"⚠️ Erro ao salvar dashboard no BigQuery/Firestore: {e}")
@@ -1852,36 +2123,26 @@ def get_dashboard_html(campaign_key):
 
         # Controle de acesso por client_id apenas quando houver sessão (superadmin vê tudo).
         # Dashboards devem ser acessíveis por link direto (sem login) para compartilhamento.
-        if user and (not is_super_admin()) and bq_fs_manager:
-            linked_dashboard = bq_fs_manager.get_dashboard(campaign_key)
-            linked_client_id = (linked_dashboard or {}).get("client_id")
-            user_client_id = user.get("client_id")
-            if linked_client_id and linked_client_id != user_client_id:
-                return "<h1>Acesso negado</h1>", 403
-
-        def _load_published_dashboard_fallback() -> Optional[str]:
-            """Try loading previously published dashboard HTML from local static or GCS."""
+        if user and not user_can_access_dashboard(user, campaign_key):
+            return "<h1>Acesso negado</h1>", 403
+
+        def _load_published_dashboard_fallback() -> Optional[Response]:
+            """Try serving previously published dashboard HTML from local static or GCS."""
             dashboard_filename = f"dash_{campaign_key}.html"
             local_path = os.path.join("static", dashboard_filename)
 
             try:
                 if os.path.exists(local_path):
-                    with open(local_path, "r", encoding="utf-8") as f:
-                        logger.info(f"✅ Dashboard fallback local carregado: {local_path}")
-                        return f.read()
+                    logger.info(f"✅ Dashboard fallback local carregado: {local_path}")
+                    return send_from_directory("static", dashboard_filename, mimetype="text/html")
             except Exception as local_err:
                 logger.warning(f"⚠️ Falha ao ler fallback local ({local_path}): {local_err}")
 
             try:
-                from google.cloud import storage
-                client_storage = storage.Client()
-                bucket = client_storage.bucket('south-media-ia-database-452311')
-                gcs_path = f"dashboards/{dashboard_filename}"
-                blob = bucket.blob(gcs_path)
-                if blob.exists():
-                    html_content = blob.download_as_text()
-                    logger.info(f"✅ Dashboard fallback carregado do GCS: {gcs_path}")
-                    return html_content
+                response = published_dashboard_response(dashboard_filename)
+                if response is not None:
+                    logger.info(f"✅ Dashboard fallback carregado do GCS: dashboards/{dashboard_filename}")
+                    return response
             except Exception as gcs_err:
                 logger.warning(f"⚠️ Falha ao carregar fallback do GCS para {campaign_key}: {gcs_err}")
 
@@ -1890,7 +2151,8 @@ def get_dashboard_html(campaign_key):
         # Obter dados da campanha do Firestore primeiro
         campaign = None
         if bq_fs_manager:
-            doc = bq_fs_manager.fs_client.collection(bq_fs_manager.campaigns_collection).document(campaign_key).get()
+            with timed("firestore_read"):
+                doc = bq_fs_manager.fs_client.collection(bq_fs_manager.campaigns_collection).document(campaign_key).get()
             if doc.exists:
                 campaign = doc.to_dict()
         
@@ -1960,21 +2222,26 @@ def get_dashboard_html(campaign_key):
         if is_multicanal:
             # Para dashboards multicanal, carregar do GCS (e regenerar se detectar HTML antigo)
             try:
-                from google.cloud import storage
-                client_storage = storage.Client()
-                bucket = client_storage.bucket('south-media-ia-database-452311')
+                bucket = get_bucket(DASHBOARDS_BUCKET)
                 
                 dashboard_filename = f"dash_{campaign_key}.html"
                 gcs_path = f"dashboards/{dashboard_filename}"
-                blob = bucket.blob(gcs_path)
                 
-                if blob.exists():
-                    html_content = blob.download_as_text()
-
+                multicanal_channels = campaign.get("multicanal_channels") if isinstance(campaign, dict) else None
+                if not (isinstance(multicanal_channels, list) and multicanal_channels):
+                    # Sem configuração para regenerar: repassar o HTML publicado em streaming
+                    response = published_dashboard_response(dashboard_filename, bucket)
+                    if response is not None:
+                        logger.info(f"✅ Dashboard multicanal carregado do GCS: {gcs_path}")
+                        return response
+                    html_content = None
+                else:
+                    html_content = read_published_dashboard_text(dashboard_filename, bucket)
+                
+                if html_content is not None:
                     # Se o HTML parece ser o modelo genérico antigo, e temos config persistida,
                     # regenerar usando o template multicanal novo (baseado no sonho_v3).
                     try:
-                        multicanal_channels = campaign.get("multicanal_channels") if isinstance(campaign, dict) else None
                         looks_legacy = ("Extraindo dados atualizados" in html_content) or ("Carregando Dashboard" in html_content) or ("Período:" in html_content)
                         wants_footfall = False
                         if isinstance(multicanal_channels, list) and multicanal_channels:
@@ -2059,10 +2326,11 @@ def get_dashboard_html(campaign_key):
                                     total_video_starts += summary.get('total_video_starts', 0) or 0
                                     total_complete_views_contracted += contract.get('complete_views_contracted', 0) or 0
 
-                                    for record in daily_data:
-                                        total_q25 += record.get('video_25', 0) or 0
-                                        total_q50 += record.get('video_50', 0) or 0
-                                        total_q75 += record.get('video_75', 0) or 0
+                                    # Quartis (totais já calculados na extração)
+                                    q25, q50, q75 = channel_quartile_totals(channel_data)
+                                    total_q25 += q25
+                                    total_q50 += q50
+                                    total_q75 += q75
 
                                     pubs = channel_data.get('publishers', []) or []
                                     if pubs:
@@ -2138,23 +2406,13 @@ def get_dashboard_html(campaign_key):
                                 }
 
                                 if all_footfall_points:
-                                    seen = set()
-                                    dedup = []
-                                    for p in all_footfall_points:
-                                        try:
-                                            key = (str(p.get("name") or ""), float(p.get("lat")), float(p.get("lon")))
-                                        except Exception:
-                                            continue
-                                        if key in seen:
-                                            continue
-                                        seen.add(key)
-                                        dedup.append(p)
-                                    consolidated_data["footfall_points"] = dedup
+                                    consolidated_data["footfall_points"] = merge_footfall_points(all_footfall_points)
 
                                 generate_dashboard_multicanal_html(campaign_key, campaign.get("client") or "", campaign.get("campaign_name") or "", consolidated_data, primary_kpi)
-                                # Recarregar do GCS após regenerar
-                                if blob.exists():
-                                    html_content = blob.download_as_text()
+                                # Recarregar após regenerar (o cache local já recebeu a nova versão)
+                                regenerated_html = read_published_dashboard_text(dashboard_filename, bucket)
+                                if regenerated_html is not None:
+                                    html_content = regenerated_html
                     except Exception as regen_err:
                         logger.warning(f"⚠️ Falha ao validar/regenerar HTML multicanal {campaign_key}: {regen_err}")
 
@@ -2197,9 +2455,9 @@ def get_dashboard_html(campaign_key):
             logger.warning(f"⚠️ Erro na extração em tempo real para {campaign_key}: {extraction_err}")
 
         if not data:
-            fallback_html = _load_published_dashboard_fallback()
-            if fallback_html:
-                return fallback_html, 200, {'Content-Type': 'text/html; charset=utf-8'}
+            fallback_response = _load_published_dashboard_fallback()
+            if fallback_response is not None:
+                return fallback_response
             return f"<html><body><h1>Falha ao extrair dados da planilha para '{campaign_key}'</h1></body></html>", 500
         
         # Garantir que o KPI da campanha sobrescreva o do contrato
@@ -2219,30 +2477,47 @@ def get_dashboard_html(campaign_key):
         logger.error(traceback.format_exc())
         return f"<html><body><h1>Erro ao carregar dashboard</h1><p>{str(e)}</p></body></html>", 500
 
-@app.route('/api/<campaign_key>/data', methods=['GET'])
-def get_campaign_data(campaign_key):
-    """Obter dados de uma campanha específica"""
+def _campaign_data_response(data: Dict[str, Any]) -> Response:
+    """
+    Resposta de /data; `?daily=columns` devolve daily_data em formato colunar e
+    `?footfall=clusters` troca listas grandes de pontos por um resumo (mapa via /footfall/clusters).
+    """
+    if request.args.get("daily") == "columns":
+        data = columnar_daily(data)
+    if request.args.get("footfall") == "clusters":
+        data = trim_footfall_payload(data, FOOTFALL_CLUSTER_CONFIG['inline_max_points'])
+    return json_response({"success": True, "data": data})
+
+class CampaignDataError(Exception):
+    """Falha ao montar os dados de uma campanha (mensagem e status HTTP da resposta)."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+def load_campaign_data(campaign_key: str) -> Dict[str, Any]:
+    """
+    Dados de uma campanha (extraídos da planilha ou consolidados do multicanal),
+    respeitando o controle de acesso da sessão. Falhas levantam CampaignDataError.
+    """
     try:
         user = get_current_session_user()
 
         # Controle de acesso por client_id apenas quando houver sessão.
         # Permitimos acesso público para dashboards compartilháveis.
-        if user and (not is_super_admin()) and bq_fs_manager:
-            linked_dashboard = bq_fs_manager.get_dashboard(campaign_key)
-            linked_client_id = (linked_dashboard or {}).get("client_id")
-            user_client_id = user.get("client_id")
-            if linked_client_id and linked_client_id != user_client_id:
-                return jsonify({"success": False, "message": "Acesso negado"}), 403
+        if user and not user_can_access_dashboard(user, campaign_key):
+            raise CampaignDataError("Acesso negado", 403)
 
         # Buscar campanha do Firestore
         campaign = None
         if bq_fs_manager:
-            doc = bq_fs_manager.fs_client.collection(bq_fs_manager.campaigns_collection).document(campaign_key).get()
+            with timed("firestore_read"):
+                doc = bq_fs_manager.fs_client.collection(bq_fs_manager.campaigns_collection).document(campaign_key).get()
             if doc.exists:
                 campaign = doc.to_dict()
         
         if not campaign:
-            return jsonify({"success": False, "message": f"Campanha '{campaign_key}' não encontrada"}), 404
+            raise CampaignDataError(f"Campanha '{campaign_key}' não encontrada", 404)
 
         # Multicanal: não existe sheet_id único. Precisamos consolidar a partir da configuração persistida.
         is_multicanal = (
@@ -2254,13 +2529,15 @@ def get_campaign_data(campaign_key):
             multicanal_sources = campaign.get("multicanal_sources")
 
             if not isinstance(multicanal_channels, list) and not isinstance(multicanal_sources, list):
-                return jsonify({
-                    "success": False,
-                    "message": "Campanha multicanal sem configuração (multicanal_channels/multicanal_sources). Gere novamente no gerador.",
-                }), 400
+                raise CampaignDataError(
+                    "Campanha multicanal sem configuração (multicanal_channels/multicanal_sources). Gere novamente no gerador.",
+                    400,
+                )
 
             # Consolidação (modo manual via multicanal_channels)
             if isinstance(multicanal_channels, list) and multicanal_channels:
+                # Inclui a extração de cada canal (medida também em "extraction")
+                consolidation_started = time.perf_counter()
                 all_daily_data = []
                 all_channels_data = []
                 all_publishers = []
@@ -2323,10 +2600,11 @@ def get_campaign_data(campaign_key):
                         total_video_starts += summary.get("total_video_starts", 0) or 0
                         total_complete_views_contracted += contract.get("complete_views_contracted", 0) or 0
 
-                        for record in daily_data:
-                            total_q25 += record.get("video_25", 0) or 0
-                            total_q50 += record.get("video_50", 0) or 0
-                            total_q75 += record.get("video_75", 0) or 0
+                        # Quartis (totais já calculados na extração)
+                        q25, q50, q75 = channel_quartile_totals(channel_data)
+                        total_q25 += q25
+                        total_q50 += q50
+                        total_q75 += q75
 
                         pubs = channel_data.get("publishers", []) or []
                         if pubs:
@@ -2361,7 +2639,7 @@ def get_campaign_data(campaign_key):
                         continue
 
                 if not all_channels_data:
-                    return jsonify({"success": False, "message": "Nenhum canal multicanal pôde ser processado"}), 500
+                    raise CampaignDataError("Nenhum canal multicanal pôde ser processado", 500)
 
                 total_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0.0
                 total_vtr = (total_video_completions / total_video_starts * 100) if total_video_starts > 0 else 0.0
@@ -2407,27 +2685,18 @@ def get_campaign_data(campaign_key):
                 }
 
                 if all_footfall_points:
-                    seen = set()
-                    dedup = []
-                    for p in all_footfall_points:
-                        try:
-                            key = (str(p.get("name") or ""), float(p.get("lat")), float(p.get("lon")))
-                        except Exception:
-                            continue
-                        if key in seen:
-                            continue
-                        seen.add(key)
-                        dedup.append(p)
-                    consolidated_data["footfall_points"] = dedup
+                    with timed("footfall_merge"):
+                        consolidated_data["footfall_points"] = merge_footfall_points(all_footfall_points)
 
-                return jsonify({"success": True, "data": consolidated_data})
+                observe_stage("multicanal_consolidation", time.perf_counter() - consolidation_started)
+                return consolidated_data
 
             # Se for multicanal_sources, por enquanto exigir regeneração pelo gerador (evita duplicação pesada aqui)
             if isinstance(multicanal_sources, list) and multicanal_sources:
-                return jsonify({
-                    "success": False,
-                    "message": "Este multicanal foi criado a partir de existentes. Gere novamente para consolidar (/data) ou abra o HTML (que já embute os dados).",
-                }), 400
+                raise CampaignDataError(
+                    "Este multicanal foi criado a partir de existentes. Gere novamente para consolidar (/data) ou abra o HTML (que já embute os dados).",
+                    400,
+                )
         
         # Sempre extrair dados frescos da planilha
         logger.info(f"🔄 Extraindo dados frescos da planilha para: {campaign_key}")
@@ -2445,7 +2714,7 @@ def get_campaign_data(campaign_key):
         extracted_data = extractor.extract_data()
         
         if not extracted_data:
-            return jsonify({"success": False, "message": "Falha ao extrair dados da planilha"}), 500
+            raise CampaignDataError("Falha ao extrair dados da planilha", 500)
         
         # Garantir que o KPI da campanha sobrescreva o do contrato (CRÍTICO!)
         campaign_kpi = campaign.get('kpi')
@@ -2453,10 +2722,60 @@ def get_campaign_data(campaign_key):
             extracted_data['contract']['kpi'] = campaign_kpi
             logger.info(f"✅ KPI da campanha ({campaign_kpi}) aplicado ao contrato na API /data")
         
-        return jsonify({"success": True, "data": extracted_data})
+        return extracted_data
+    except CampaignDataError:
+        raise
     except Exception as e:
         logger.error(f"❌ Erro ao obter dados da campanha {campaign_key}: {e}")
-        return jsonify({"success": False, "message": f"Erro interno: {str(e)}"}), 500
+        raise CampaignDataError(f"Erro interno: {str(e)}", 500)
+
+@app.route('/api/<campaign_key>/data', methods=['GET'])
+def get_campaign_data(campaign_key):
+    """Obter dados de uma campanha específica"""
+    try:
+        data = load_campaign_data(campaign_key)
+    except CampaignDataError as e:
+        return jsonify({"success": False, "message": str(e)}), e.status
+    return _campaign_data_response(data)
+
+@app.route('/api/<campaign_key>/footfall/clusters', methods=['GET'])
+def get_footfall_clusters(campaign_key):
+    """Clusters de Footfall visíveis no mapa (?bbox=oeste,sul,leste,norte&zoom=12[&source=fonte multicanal])"""
+    try:
+        zoom = float(request.args.get("zoom", 12))
+        bbox_arg = request.args.get("bbox")
+        bbox = [float(v) for v in bbox_arg.split(",")] if bbox_arg else None
+        if bbox is not None and len(bbox) != 4:
+            raise ValueError(bbox_arg)
+        if not all(math.isfinite(v) for v in [zoom] + (bbox or [])):
+            raise ValueError("inf/nan")
+    except ValueError:
+        return jsonify({"success": False, "message": "Parâmetros inválidos: use bbox=oeste,sul,leste,norte e zoom numérico"}), 400
+
+    user = get_current_session_user()
+    if user and not user_can_access_dashboard(user, campaign_key):
+        return jsonify({"success": False, "message": "Acesso negado"}), 403
+
+    # Cada moveend do mapa chega aqui: com o índice no cache, não recarrega a campanha
+    source = request.args.get("source") or ""
+    cache = get_cluster_cache()
+    cache_key = f"{campaign_key}\x00{source}"
+    index = cache.lookup(cache_key)
+    if index is None:
+        try:
+            data = load_campaign_data(campaign_key)
+        except CampaignDataError as e:
+            return jsonify({"success": False, "message": str(e)}), e.status
+
+        points = select_footfall_points(data, source)
+        if points is None:
+            return jsonify({"success": False, "message": f"Fonte de footfall '{source}' não encontrada"}), 404
+        index = cache.get(cache_key, points)
+    # Acima de max_zoom os pontos já vêm individualmente: max_zoom + 1 basta
+    zoom = min(max(zoom, FOOTFALL_CLUSTER_CONFIG["min_zoom"]), FOOTFALL_CLUSTER_CONFIG["max_zoom"] + 1)
+    result = index.query(bbox, zoom)
+    result["bounds"] = index.bounds
+    return json_response({"success": True, "data": result})
 
 @app.route('/api/campaigns', methods=['GET'])
 @superadmin_required_api
@@ -2496,6 +2815,7 @@ def api_create_client():
             return jsonify({"success": False, "message": "Campo 'name' obrigatório"}), 400
         slug = data.get('slug') or request.form.get('slug')
         client_id = bq_fs_manager.create_client(name=name.strip(), slug=slug.strip() if slug else None)
+        invalidate_clients_cache()
         if not client_id:
             return jsonify({"success": False, "message": "Falha ao criar cliente"}), 500
         return jsonify({"success": True, "client_id": client_id, "client": bq_fs_manager.get_client(client_id)})
@@ -2527,6 +2847,7 @@ def api_update_client(client_id):
         name = data.get('name')
         slug = data.get('slug')
         ok = bq_fs_manager.update_client(client_id, name=name, slug=slug)
+        invalidate_clients_cache()
         if not ok:
             return jsonify({"success": False, "message": "Cliente não encontrado"}), 404
         return jsonify({"success": True, "client": bq_fs_manager.get_client(client_id)})
@@ -2540,6 +2861,7 @@ def api_delete_client(client_id):
         return jsonify({"success": False, "message": "Firestore não disponível"}), 503
     try:
         ok = bq_fs_manager.delete_client(client_id)
+        invalidate_clients_cache()
         if not ok:
             return jsonify({"success": False, "message": "Cliente não encontrado"}), 404
         return jsonify({"success": True})
@@ -2652,7 +2974,8 @@ def enrich_client_portal_dashboards_from_sheets(dashboards: List[Dict[str, Any]]
     metrics_by_key: Dict[str, Dict[str, Any]] = {}
     max_workers = min(3, max(1, len(keys)))
     with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        future_map = {pool.submit(_extract_portal_metrics_for_campaign, k): k for k in keys}
+        # copy_context: spans das extrações entram no trace da requisição
+        future_map = {pool.submit(contextvars.copy_context().run, _extract_portal_metrics_for_campaign, k): k for k in keys}
         for fut in as_completed(future_map):
             ck = future_map[fut]
             try:
@@ -2689,6 +3012,8 @@ def api_list_client_dashboards(client_id):
         return jsonify({"success": False, "message": "Firestore não disponível"}), 503
     try:
         dashboards = bq_fs_manager.get_dashboards_by_client(client_id)
+        if not is_super_admin():
+            remember_session_dashboards(dashboards)
         dashboards = enrich_client_portal_dashboards_from_sheets(dashboards)
         return jsonify({"success": True, "dashboards": dashboards})
     except Exception as e:
@@ -2706,6 +3031,7 @@ def api_link_dashboard_client(campaign_key):
         if client_id is not None and client_id == '':
             client_id = None
         ok = bq_fs_manager.set_dashboard_client(campaign_key, client_id=client_id)
+        invalidate_dashboard_access(campaign_key)
         if not ok:
             return jsonify({"success": False, "message": "Dashboard não encontrado"}), 404
         return jsonify({"success": True, "campaign_key": campaign_key, "client_id": client_id})
@@ -2728,14 +3054,18 @@ def admin_clients():
     """Página de gerenciamento de clientes e usuários"""
     if not bq_fs_manager:
         return "<h1>Firestore não disponível</h1>", 503
-    return with_superadmin_sidebar(_render_admin_clients(), active_menu="clients")
+    return render_cached_superadmin_page("admin_clients", "clients", _render_admin_clients)
 
 
 @app.route('/admin/users')
 @superadmin_required_page
 def admin_users():
     """Página de gerenciamento global de usuários."""
-    page_html = render_template_string("""
+    return render_cached_superadmin_page("admin_users", "users", _render_admin_users)
+
+
+def _render_admin_users():
+    return render_template_string("""
 <!DOCTYPE html>
 <html lang="pt-BR">
 <head>
@@ -2812,7 +3142,6 @@ def admin_users():
 </body>
 </html>
     """)
-    return with_superadmin_sidebar(page_html, active_menu="users")
 
 @app.route('/client/<client_id>/dashboards')
 @login_required_page
@@ -2830,6 +3159,8 @@ def client_dashboards(client_id):
         if not client:
             return "<h1>Cliente não encontrado</h1>", 404
         dashboards = bq_fs_manager.get_dashboards_by_client(client_id)
+        if not is_super_admin():
+            remember_session_dashboards(dashboards)
         dashboards = enrich_client_portal_dashboards_from_sheets(dashboards)
     except Exception as e:
         logger.error(f"Erro ao listar dashboards do cliente: {e}")
@@ -2875,7 +3206,7 @@ def admin_panel():
 
     if bq_fs_manager:
         try:
-            clients = bq_fs_manager.list_clients() or []
+            clients = get_cached_clients()
             for client in clients:
                 client_id = client.get("client_id")
                 if not client_id:
@@ -2944,40 +3275,24 @@ def admin_panel():
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
-    """Servir arquivos estáticos com fallback para GCS"""
+    """Servir arquivos estáticos com fallback para GCS (via cache local limitado)"""
     try:
-        # Primeiro, tentar servir do diretório local
+        # Primeiro, tentar servir do diretório local (templates e arquivos versionados)
         if os.path.exists(os.path.join('static', filename)):
             return send_from_directory('static', filename)
         
-        # Se não existir localmente, tentar carregar do GCS
-        logger.info(f"📥 Arquivo não encontrado localmente: {filename}, tentando GCS...")
-        
-        from google.cloud import storage
-        client = storage.Client()
-        bucket = client.bucket('south-media-ia-database-452311')
-        
-        # Verificar se é um dashboard
-        if filename.startswith('dash_') and filename.endswith('.html'):
-            gcs_path = f"dashboards/{filename}"
-            blob = bucket.blob(gcs_path)
+        # Dashboards publicados: cache local com revalidação por geração do blob
+        if filename.startswith('dash_') and filename.endswith('.html') and '/' not in filename:
+            cached = dashboard_cache.contains(filename)
+            if not cached:
+                logger.info(f"📥 Arquivo não encontrado localmente: {filename}, tentando GCS...")
             
-            if blob.exists():
-                # Baixar do GCS e salvar localmente
-                content = blob.download_as_text()
-                
-                # Criar diretório se não existir
-                os.makedirs('static', exist_ok=True)
-                
-                # Salvar localmente para próximas requisições
-                local_path = os.path.join('static', filename)
-                with open(local_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                logger.info(f"✅ Dashboard carregado do GCS: {filename}")
-                return send_from_directory('static', filename)
-            else:
-                logger.warning(f"❌ Dashboard não encontrado no GCS: {gcs_path}")
+            response = published_dashboard_response(filename)
+            if response is not None:
+                if not cached:
+                    logger.info(f"✅ Dashboard carregado do GCS: {filename}")
+                return response
+            logger.warning(f"❌ Dashboard não encontrado no GCS: dashboards/{filename}")
         
         # Se chegou até aqui, arquivo não encontrado
         return "File not found", 404
@@ -3216,7 +3531,7 @@ def dashboards_list():
         clients_for_link = []
         if bq_fs_manager:
             try:
-                clients_for_link = bq_fs_manager.list_clients()
+                clients_for_link = get_cached_clients()
             except Exception:
                 pass
         
@@ -3838,7 +4153,8 @@ def dashboards_list():
 @superadmin_required_page
 def dash_generator_pro_multicanal():
     """Interface do gerador multicanal - permite múltiplos canais com planilhas distintas"""
-    page_html = render_template_string(r'''
+    def _render_page():
+        return render_template_string(r'''
 <!DOCTYPE html>
 <html lang="pt-BR">
 <head>
@@ -4453,7 +4769,9 @@ def dash_generator_pro_multicanal():
 </body>
 </html>
     ''')
-    return with_superadmin_sidebar(page_html, active_menu="multichannel")
+
+    # Página sem dados dinâmicos: renderizada uma vez por processo.
+    return render_cached_superadmin_page("dash_generator_pro_multicanal", "multichannel", _render_page)
 
 @app.route('/api/generate-dashboard-multicanal', methods=['POST'])
 @superadmin_required_api
@@ -4554,11 +4872,11 @@ def generate_dashboard_multicanal():
                     total_video_starts += summary.get('total_video_starts', 0) or 0
                     total_complete_views_contracted += contract.get('complete_views_contracted', 0) or 0
                     
-                    # Quartis
-                    for record in daily_data:
-                        total_q25 += record.get('video_25', 0) or 0
-                        total_q50 += record.get('video_50', 0) or 0
-                        total_q75 += record.get('video_75', 0) or 0
+                    # Quartis (totais já calculados na extração)
+                    q25, q50, q75 = channel_quartile_totals(channel_data)
+                    total_q25 += q25
+                    total_q50 += q50
+                    total_q75 += q75
                     
                     # Agregar publishers, strategies e insights
                     channel_publishers = channel_data.get('publishers', [])
@@ -4687,20 +5005,9 @@ def generate_dashboard_multicanal():
             "data_source": "google_sheets_multicanal"
         }
 
-        # Deduplicar footfall_points por (name,lat,lon)
+        # Consolidar footfall_points (mesma loja em canais diferentes / coordenadas arredondadas)
         if all_footfall_points:
-            seen = set()
-            dedup = []
-            for p in all_footfall_points:
-                try:
-                    key = (str(p.get("name") or ""), float(p.get("lat")), float(p.get("lon")))
-                except Exception:
-                    continue
-                if key in seen:
-                    continue
-                seen.add(key)
-                dedup.append(p)
-            consolidated_data["footfall_points"] = dedup
+            consolidated_data["footfall_points"] = merge_footfall_points(all_footfall_points)
 
         # Footfall por canal/planilha (abas dinâmicas no template)
         if footfall_sources:
@@ -4757,6 +5064,29 @@ def generate_dashboard_multicanal():
         return jsonify({"success": False, "message": f"Erro interno: {str(e)}"}), 500
 
 
+@app.route('/api/admin/traces', methods=['GET'])
+@superadmin_required_api
+def api_admin_traces():
+    """Requisições lentas recentes (acima de TRACING_CONFIG["slow_ms"]), com o tempo por tipo de span"""
+    tracer = request_tracing.get_tracer()
+    return jsonify({
+        "success": True,
+        "slow_ms": tracer.slow_ms,
+        "enabled": tracer.enabled,
+        "traces": tracer.buffer.list(),
+    })
+
+
+@app.route('/api/admin/traces/<trace_id>', methods=['GET'])
+@superadmin_required_api
+def api_admin_trace_detail(trace_id):
+    """Trace completo (spans no formato OTLP/JSON e perfil do cProfile, se amostrado)"""
+    trace = request_tracing.get_tracer().buffer.get(trace_id)
+    if not trace:
+        return jsonify({"success": False, "message": "Trace não encontrado"}), 404
+    return jsonify({"success": True, "trace": trace})
+
+
 @app.route('/api/admin/campaigns-picker', methods=['GET'])
 @superadmin_required_api
 def api_admin_campaigns_picker():
@@ -4958,10 +5288,11 @@ def generate_dashboard_multicanal_from_existing():
                 total_video_starts += summary.get("total_video_starts", 0) or 0
                 total_complete_views_contracted += contract.get("complete_views_contracted", 0) or 0
 
-                for record in daily_data:
-                    total_q25 += record.get("video_25", 0) or 0
-                    total_q50 += record.get("video_50", 0) or 0
-                    total_q75 += record.get("video_75", 0) or 0
+                # Quartis (totais já calculados na extração)
+                q25, q50, q75 = channel_quartile_totals(channel_data)
+                total_q25 += q25
+                total_q50 += q50
+                total_q75 += q75
 
                 pubs = channel_data.get("publishers", []) or []
                 if pubs:
@@ -5044,18 +5375,7 @@ def generate_dashboard_multicanal_from_existing():
         }
 
         if all_footfall_points:
-            seen = set()
-            dedup = []
-            for p in all_footfall_points:
-                try:
-                    key = (str(p.get("name") or ""), float(p.get("lat")), float(p.get("lon")))
-                except Exception:
-                    continue
-                if key in seen:
-                    continue
-                seen.add(key)
-                dedup.append(p)
-            consolidated_data["footfall_points"] = dedup
+            consolidated_data["footfall_points"] = merge_footfall_points(all_footfall_points)
 
         if footfall_sources:
             consolidated_data["footfall_sources"] = footfall_sources
@@ -5104,7 +5424,7 @@ def generate_dashboard_multicanal_html(campaign_key: str, client: str, campaign_
                 return s
 
         def _js_obj(name: str, obj: Any) -> str:
-            return f"const {name} = {json.dumps(obj, ensure_ascii=False, indent=2, default=str)};"
+            return f"const {name} = {script_json(obj)};"
 
         def _per_row(ch_name: str, ch_kpi: str, data: Dict[str, Any]) -> Dict[str, Any]:
             s = data.get("campaign_summary") or {}
@@ -5268,11 +5588,12 @@ def generate_dashboard_multicanal_html(campaign_key: str, client: str, campaign_
         with open(template_path, 'r', encoding='utf-8') as f:
             dashboard_content = f.read()
 
-        # Injetar dados no formato esperado pelo modelo v1 (CONS/PER/DAILY/FOOTFALL)
-        dashboard_content = _inject_multicanal_v1_data(dashboard_content, consolidated_data or {})
-        
-        # Converter dados para JSON e inserir no HTML
-        data_json = json.dumps(consolidated_data, ensure_ascii=False, default=str)
+        with timed("template_render"):
+            # Injetar dados no formato esperado pelo modelo v1 (CONS/PER/DAILY/FOOTFALL)
+            dashboard_content = _inject_multicanal_v1_data(dashboard_content, consolidated_data or {})
+
+            # Converter dados para JSON e inserir no HTML
+            data_json = script_json(consolidated_data)
         embedded_data_script = f'<script>window.EMBEDDED_CAMPAIGN_DATA = {data_json};</script>'
         
         # Inserir dados embutidos
@@ -5292,18 +5613,20 @@ def generate_dashboard_multicanal_html(campaign_key: str, client: str, campaign_
         
         # Salvar no Google Cloud Storage (backup)
         try:
-            from google.cloud import storage
-            client_storage = storage.Client()
-            bucket = client_storage.bucket('south-media-ia-database-452311')
+            bucket = get_bucket(DASHBOARDS_BUCKET)
             
             # Upload do dashboard para GCS como backup
             dashboard_filename = f"dash_{campaign_key}.html"
             gcs_path = f"dashboards/{dashboard_filename}"
             blob = bucket.blob(gcs_path)
-            blob.upload_from_string(dashboard_content, content_type='text/html')
+            with timed("gcs_write"):
+                call_with_retry(blob.upload_from_string, dashboard_content, content_type='text/html')
             
             logger.info(f"💾 Dashboard multicanal persistido no GCS: {gcs_path}")
             
+            # Manter o cache local e o manifesto coerentes com a nova geração do blob
+            _record_published_dashboard(bucket, blob, dashboard_filename, dashboard_content)
+            
         except Exception as e:
             logger.warning(f"⚠️ Não foi possível salvar dashboard multicanal no GCS: {e}")
         
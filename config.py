@@ -241,7 +241,130 @@ AUTOMATION_CONFIG = {
     "dashboard_file": os.environ.get("AUTOMATION_DASHBOARD_FILE", "static/dash_sonho.html"),
     "backup_enabled": os.environ.get("AUTOMATION_BACKUP_ENABLED", "true").lower() == "true",
     "backup_dir": os.environ.get("AUTOMATION_BACKUP_DIR", "backups"),
-    "update_interval_hours": int(os.environ.get("AUTOMATION_UPDATE_INTERVAL_HOURS", "3"))
+    # Retenção do armazenamento de backups deduplicado (0 = sem limite)
+    "backup_keep_versions": int(os.environ.get("AUTOMATION_BACKUP_KEEP_VERSIONS", "200")),
+    "backup_max_age_days": int(os.environ.get("AUTOMATION_BACKUP_MAX_AGE_DAYS", "90")),
+    # A cada N deltas encadeados é gravada uma cópia completa
+    "backup_keyframe_interval": int(os.environ.get("AUTOMATION_BACKUP_KEYFRAME_INTERVAL", "20")),
+    "update_interval_hours": int(os.environ.get("AUTOMATION_UPDATE_INTERVAL_HOURS", "3")),
+    # Planilhas lidas em paralelo na coleta de canais
+    "channel_workers": int(os.environ.get("AUTOMATION_CHANNEL_WORKERS", "4"))
+}
+
+# Cache local de dashboards vindos do GCS (no Cloud Run o disco é tmpfs em memória)
+DASHBOARD_CACHE_CONFIG = {
+    "cache_dir": os.environ.get("DASHBOARD_CACHE_DIR", "/tmp/dashboard_cache"),
+    "max_bytes": int(os.environ.get("DASHBOARD_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    "revalidate_after_sec": int(os.environ.get("DASHBOARD_CACHE_REVALIDATE_SEC", "60"))
+}
+
+# Aquecimento do cache local a partir do manifesto de dashboards no GCS
+DASHBOARD_SYNC_CONFIG = {
+    "max_workers": int(os.environ.get("DASHBOARD_SYNC_WORKERS", "8"))
+}
+
+# Acesso ao Google Cloud Storage (cliente único por processo)
+GCS_STORAGE_CONFIG = {
+    # "gcs" em produção; "local" usa um diretório como substituto do bucket (testes/benchmarks)
+    "backend": os.environ.get("STORAGE_BACKEND", "gcs").lower(),
+    "local_root": os.environ.get("STORAGE_LOCAL_ROOT", "/tmp/gcs_local"),
+    "pool_maxsize": int(os.environ.get("GCS_POOL_MAXSIZE", "32")),
+    "retry_attempts": int(os.environ.get("GCS_RETRY_ATTEMPTS", "3")),
+    "retry_base_delay": float(os.environ.get("GCS_RETRY_BASE_DELAY", "0.5")),
+    "retry_max_delay": float(os.environ.get("GCS_RETRY_MAX_DELAY", "8"))
+}
+
+# Atualizador genérico de dashboards de campanha (campaign_updater.py)
+CAMPAIGN_UPDATER_CONFIG = {
+    # Abas de planilha baixadas em paralelo (todas as campanhas da execução)
+    "max_workers": int(os.environ.get("CAMPAIGN_UPDATER_WORKERS", "4")),
+    "request_timeout": int(os.environ.get("CAMPAIGN_UPDATER_TIMEOUT_SEC", "30")),
+    "verify_ssl": os.environ.get("CAMPAIGN_UPDATER_VERIFY_SSL", "true").lower() == "true"
+}
+
+# Detecção de mudanças nas planilhas pela revisão do Drive (sheet_revisions.py)
+SHEET_CHANGE_CONFIG = {
+    "enabled": os.environ.get("SHEET_CHANGE_DETECTION_ENABLED", "true").lower() == "true",
+    # Revisões processadas por último em cada atualização agendada
+    "state_file": os.environ.get("SHEET_CHANGE_STATE_FILE", "logs/sheet_revisions.json"),
+    # Mesmo sem mudanças, reprocessar tudo se a última execução completa for mais antiga (0 = nunca)
+    "max_skip_hours": float(os.environ.get("SHEET_CHANGE_MAX_SKIP_HOURS", "24")),
+    # Extrações sob demanda: revisão reaproveitada por N segundos e resultados memorizados (0 = desligado)
+    "probe_ttl_sec": float(os.environ.get("SHEET_CHANGE_PROBE_TTL_SEC", "30")),
+    "memo_entries": int(os.environ.get("SHEET_CHANGE_MEMO_ENTRIES", "64"))
+}
+
+# Leitura incremental da aba Report (report_row_cache.py)
+REPORT_ROW_CACHE_CONFIG = {
+    "enabled": os.environ.get("REPORT_ROW_CACHE_ENABLED", "true").lower() == "true",
+    "cache_dir": os.environ.get("REPORT_ROW_CACHE_DIR", "/tmp/report_row_cache"),
+    # Linhas finais sempre relidas (os últimos dias ainda mudam)
+    "tail_rows": int(os.environ.get("REPORT_ROW_CACHE_TAIL_ROWS", "300")),
+    # Linhas do prefixo relidas junto com a janela para conferir continuidade
+    "overlap_rows": int(os.environ.get("REPORT_ROW_CACHE_OVERLAP_ROWS", "5")),
+    # Linhas antigas sorteadas e conferidas a cada leitura incremental
+    "sample_rows": int(os.environ.get("REPORT_ROW_CACHE_SAMPLE_ROWS", "3")),
+    # Leitura completa periódica, mesmo sem divergência (0 = nunca)
+    "full_refresh_hours": float(os.environ.get("REPORT_ROW_CACHE_FULL_REFRESH_HOURS", "24"))
+}
+
+# Clusters de Footfall no servidor (footfall_clusters.py)
+FOOTFALL_CLUSTER_CONFIG = {
+    # Listas de pontos maiores que isso saem do payload (?footfall=clusters) e o mapa busca clusters por bbox
+    "inline_max_points": int(os.environ.get("FOOTFALL_INLINE_MAX_POINTS", "500")),
+    # Tamanho da célula da grade em pixels de tela
+    "cell_px": int(os.environ.get("FOOTFALL_CLUSTER_CELL_PX", "64")),
+    "min_zoom": int(os.environ.get("FOOTFALL_CLUSTER_MIN_ZOOM", "2")),
+    # Acima deste zoom os pontos vão individualmente
+    "max_zoom": int(os.environ.get("FOOTFALL_CLUSTER_MAX_ZOOM", "16")),
+    # Índices mantidos em memória (campanha/fonte)
+    "cache_entries": int(os.environ.get("FOOTFALL_CLUSTER_CACHE_ENTRIES", "32")),
+    # Segundos em que o índice é reutilizado sem recarregar os dados da campanha
+    "ttl_sec": float(os.environ.get("FOOTFALL_CLUSTER_TTL_SEC", "60"))
+}
+
+# Consolidação dos pontos de Footfall do multicanal (footfall_merge.py)
+FOOTFALL_MERGE_CONFIG = {
+    # Casas decimais mantidas nas coordenadas (6 ≈ 0,1 m)
+    "precision": int(os.environ.get("FOOTFALL_MERGE_PRECISION", "6")),
+    # Pontos a até N metros com nome equivalente são a mesma loja (0 = só coordenada exata)
+    "radius_m": float(os.environ.get("FOOTFALL_MERGE_RADIUS_M", "15")),
+    # Similaridade mínima entre nomes normalizados (0-1); nomes com números diferentes nunca se juntam
+    "name_similarity": float(os.environ.get("FOOTFALL_MERGE_NAME_SIMILARITY", "0.92"))
+}
+
+# Serialização JSON dos payloads de campanha (json_payload.py)
+JSON_SERIALIZER_CONFIG = {
+    # auto (orjson se instalado), orjson ou stdlib
+    "backend": os.environ.get("JSON_SERIALIZER", "auto")
+}
+
+# Índice de login (user_lookup_index.py)
+AUTH_INDEX_CONFIG = {
+    # false = login consulta as coleções de usuários a cada tentativa (comportamento anterior)
+    "enabled": os.environ.get("AUTH_INDEX_ENABLED", "true").lower() == "true",
+    # Idade máxima do índice antes de reler as coleções (usuários criados por outras instâncias)
+    "ttl_sec": int(os.environ.get("AUTH_INDEX_TTL_SEC", "600"))
+}
+
+# Métricas do processo expostas em /metrics (app_metrics.py)
+METRICS_CONFIG = {
+    "enabled": os.environ.get("METRICS_ENABLED", "true").lower() == "true",
+    # Se definido, /metrics exige "Authorization: Bearer <token>" (ou sessão de superadmin);
+    # sem token, em produção só superadmin logado (os rótulos expõem chaves de campanha)
+    "token": os.environ.get("METRICS_TOKEN", "")
+}
+
+# Trace por requisição e amostragem de requisições lentas (request_tracing.py)
+TRACING_CONFIG = {
+    "enabled": os.environ.get("TRACING_ENABLED", "true").lower() == "true",
+    # Requisições acima disso vão para o buffer de /api/admin/traces
+    "slow_ms": float(os.environ.get("TRACING_SLOW_MS", "1500")),
+    "buffer_size": int(os.environ.get("TRACING_BUFFER_SIZE", "50")),
+    # Spans por requisição (os excedentes são só contados)
+    "max_spans": int(os.environ.get("TRACING_MAX_SPANS", "500")),
+    # Fração das requisições executadas com cProfile (0 = desligado)
+    "profile_rate": float(os.environ.get("TRACING_PROFILE_RATE", "0"))
 }
 
 # Log da configuração
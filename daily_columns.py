@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Representação colunar dos dados diários de campanha.
+
+Os registros diários circulavam como uma lista de dicts de 16 chaves por linha:
+montados linha a linha na extração, reconvertidos em DataFrame para os totais
+e percorridos de novo para as somas de quartis. DailyColumns guarda cada campo
+numérico num array NumPy e os campos de texto (date, line_item, creative,
+channel) como códigos inteiros mais um pequeno dicionário de strings, com
+agregações vetorizadas (totais, por dia, por criativo).
+
+A lista de dicts no formato original (`to_records`) só é montada na fronteira
+da API, ao devolver o resultado da extração.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Campos (e ordem) dos registros diários da aba Report
+DAILY_FIELDS = (
+    "date", "line_item", "creative", "spend", "impressions", "disparos", "clicks",
+    "cpv", "cpc", "cpd", "ctr", "video_25", "video_50", "video_75",
+    "video_completions", "video_starts",
+)
+STRING_FIELDS = frozenset(("date", "line_item", "creative", "channel"))
+FLOAT_FIELDS = frozenset(("spend", "cpv", "cpc", "cpd", "ctr"))
+INT_FIELDS = frozenset(("impressions", "disparos", "clicks", "video_25", "video_50", "video_75",
+                        "video_completions", "video_starts"))
+# Somados nos totais (as taxas por linha não se somam)
+SUM_FIELDS = ("spend", "impressions", "disparos", "clicks", "video_25", "video_50", "video_75",
+              "video_completions", "video_starts")
+
+
+class StringColumn:
+    """Coluna de texto codificada: códigos int32 que apontam para um dicionário de strings."""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: np.ndarray, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def encode(cls, values: Iterable[Any]) -> "StringColumn":
+        codes, uniques = pd.factorize(pd.Series(list(values), dtype=object).map(str), use_na_sentinel=False)
+        return cls(codes.astype(np.int32, copy=False), [str(value) for value in uniques])
+
+    @classmethod
+    def constant(cls, value: str, length: int) -> "StringColumn":
+        return cls(np.zeros(length, dtype=np.int32), [str(value)])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def take(self, indices: np.ndarray) -> "StringColumn":
+        return StringColumn(self.codes[indices], self.categories)
+
+    def to_list(self) -> List[str]:
+        categories = self.categories
+        return [categories[code] for code in self.codes.tolist()]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes) + sum(len(value) for value in self.categories)
+
+
+Column = Union[np.ndarray, StringColumn]
+
+
+def _numeric_array(values: Sequence[Any], name: str) -> np.ndarray:
+    array = pd.to_numeric(pd.Series(list(values), dtype=object), errors='coerce').fillna(0).to_numpy()
+    if name in INT_FIELDS:
+        return array.astype(np.int64)
+    if name in FLOAT_FIELDS:
+        return array.astype(np.float64)
+    # Campo desconhecido: inteiro se todos os valores forem inteiros
+    return array.astype(np.int64) if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values) \
+        else array.astype(np.float64)
+
+
+def _is_string_field(name: str, values: Sequence[Any]) -> bool:
+    if name in STRING_FIELDS:
+        return True
+    if name in FLOAT_FIELDS or name in INT_FIELDS:
+        return False
+    return any(isinstance(value, str) for value in values)
+
+
+class DailyColumns:
+    """Registros diários em colunas (arrays NumPy + dicionário de strings)."""
+
+    def __init__(self, columns: Dict[str, Column], length: Optional[int] = None):
+        self.columns = columns
+        if length is None:
+            length = len(next(iter(columns.values()))) if columns else 0
+        self._length = int(length)
+
+    # ------------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------------
+    @classmethod
+    def empty(cls, fields: Sequence[str] = DAILY_FIELDS) -> "DailyColumns":
+        columns: Dict[str, Column] = {}
+        for name in fields:
+            if name in STRING_FIELDS:
+                columns[name] = StringColumn(np.zeros(0, dtype=np.int32), [])
+            else:
+                columns[name] = np.zeros(0, dtype=np.int64 if name in INT_FIELDS else np.float64)
+        return cls(columns, 0)
+
+    @classmethod
+    def from_lists(cls, lists: Dict[str, Sequence[Any]]) -> "DailyColumns":
+        """A partir de {campo: lista de valores} (ex.: JSON colunar do cache)."""
+        columns: Dict[str, Column] = {}
+        for name, values in lists.items():
+            columns[name] = StringColumn.encode(values) if _is_string_field(name, values) else _numeric_array(values, name)
+        length = len(next(iter(lists.values()))) if lists else 0
+        return cls(columns, length)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "DailyColumns":
+        """A partir da lista de dicts (formato da API)."""
+        if not records:
+            return cls.empty()
+        fields: Dict[str, None] = {}
+        for record in records:
+            fields.update(dict.fromkeys(record))
+        return cls.from_lists({name: [record.get(name) for record in records] for name in fields})
+
+    @classmethod
+    def concat(cls, parts: Sequence["DailyColumns"]) -> "DailyColumns":
+        """Concatenar (campos ausentes numa parte ficam vazios/zerados)."""
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return cls.empty()
+        fields: Dict[str, None] = {}
+        for part in parts:
+            fields.update(dict.fromkeys(part.columns))
+        columns: Dict[str, Column] = {}
+        for name in fields:
+            if name in STRING_FIELDS or any(isinstance(part.columns.get(name), StringColumn) for part in parts):
+                categories: Dict[str, int] = {}
+                codes = []
+                for part in parts:
+                    column = part.columns.get(name)
+                    if not isinstance(column, StringColumn):
+                        column = StringColumn.constant('', len(part))
+                    remap = np.array([categories.setdefault(value, len(categories)) for value in column.categories],
+                                     dtype=np.int32)
+                    codes.append(remap[column.codes] if len(column.codes) else column.codes)
+                columns[name] = StringColumn(np.concatenate(codes).astype(np.int32, copy=False), list(categories))
+            else:
+                dtype = np.result_type(*[part.columns[name].dtype for part in parts if name in part.columns])
+                columns[name] = np.concatenate([
+                    part.columns[name] if name in part.columns else np.zeros(len(part), dtype=dtype)
+                    for part in parts
+                ]).astype(dtype, copy=False)
+        return cls(columns, sum(len(part) for part in parts))
+
+    # ------------------------------------------------------------------
+    # Acesso
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    def values(self, name: str) -> np.ndarray:
+        """Array NumPy do campo (texto decodificado como array de objetos)."""
+        column = self.columns[name]
+        if isinstance(column, StringColumn):
+            return np.array(column.categories, dtype=object)[column.codes] if len(column) else np.array([], dtype=object)
+        return column
+
+    def take(self, indices: np.ndarray) -> "DailyColumns":
+        """Linhas selecionadas (índices ou máscara booleana)."""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        columns = {name: column.take(indices) if isinstance(column, StringColumn) else column[indices]
+                   for name, column in self.columns.items()}
+        return DailyColumns(columns, len(indices))
+
+    def with_string(self, name: str, value: str) -> "DailyColumns":
+        """Cópia rasa com um campo de texto constante (ex.: channel de um canal multicanal)."""
+        columns = dict(self.columns)
+        columns[name] = StringColumn.constant(value, len(self))
+        return DailyColumns(columns, len(self))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    # ------------------------------------------------------------------
+    # Agregações
+    # ------------------------------------------------------------------
+    def totals(self, fields: Sequence[str] = SUM_FIELDS) -> Dict[str, Any]:
+        """Soma de cada campo numérico (tipos nativos; campo ausente = 0)."""
+        result = {}
+        for name in fields:
+            column = self.columns.get(name)
+            result[name] = column.sum().item() if isinstance(column, np.ndarray) else 0
+        return result
+
+    def group_totals(self, key: str, fields: Sequence[str] = SUM_FIELDS, sort: bool = True) -> List[Dict[str, Any]]:
+        """Somas por valor de um campo de texto: [{key: valor, campo: soma, ..., "rows": n}]."""
+        column = self.columns.get(key)
+        if not isinstance(column, StringColumn) or not len(column):
+            return []
+        size = len(column.categories)
+        counts = np.bincount(column.codes, minlength=size)
+        sums = {}
+        for name in fields:
+            values = self.columns.get(name)
+            if not isinstance(values, np.ndarray):
+                continue
+            summed = np.bincount(column.codes, weights=values, minlength=size)
+            sums[name] = summed.round().astype(np.int64) if values.dtype.kind in 'iu' else summed
+        groups = []
+        for code in np.flatnonzero(counts).tolist():
+            group = {key: column.categories[code]}
+            for name, summed in sums.items():
+                group[name] = summed[code].item()
+            group["rows"] = int(counts[code])
+            groups.append(group)
+        if sort:
+            groups.sort(key=lambda group: group[key])
+        return groups
+
+    def by_day(self, fields: Sequence[str] = SUM_FIELDS) -> List[Dict[str, Any]]:
+        return self.group_totals("date", fields)
+
+    def by_creative(self, fields: Sequence[str] = SUM_FIELDS) -> List[Dict[str, Any]]:
+        return self.group_totals("creative", fields)
+
+    # ------------------------------------------------------------------
+    # Serialização (fronteira da API)
+    # ------------------------------------------------------------------
+    def to_lists(self) -> Dict[str, List[Any]]:
+        """{campo: lista de valores nativos} (JSON colunar)."""
+        return {name: column.to_list() if isinstance(column, StringColumn) else column.tolist()
+                for name, column in self.columns.items()}
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Lista de dicts no formato original dos registros diários."""
+        lists = self.to_lists()
+        fields = list(lists)
+        if not fields:
+            return []
+        return [dict(zip(fields, row)) for row in zip(*(lists[name] for name in fields))]
@@ -5,9 +5,6 @@ Atualiza dados do dashboard a cada 3 horas usando Google Sheets
 """
 
 import os
-import json
-import re
-import shutil
 import subprocess
 from datetime import datetime
 import logging
@@ -15,7 +12,10 @@ import schedule
 import time
 import requests
 from google_sheets_processor import GoogleSheetsProcessor
-from config import AUTOMATION_CONFIG
+from dashboard_slots import SlotDocument, DashboardSlotError
+from backup_store import DashboardBackupStore
+from sheet_revisions import build_change_tracker, config_fingerprint
+from config import AUTOMATION_CONFIG, GOOGLE_SHEETS_CONFIG
 
 # Configuração de logging
 os.makedirs('logs', exist_ok=True)
@@ -29,6 +29,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# DAILY fica compacto (maior slot); CONS e PER indentados para facilitar a leitura dos diffs
+DASHBOARD_SLOT_INDENT = {'CONS': 2, 'PER': 2}
+
 class DashboardAutomation:
     """Classe principal para automação do dashboard"""
     
@@ -55,10 +58,16 @@ class DashboardAutomation:
             self.backup_dir = 'backups'
         
         self.processor = None
+        # Revisões das planilhas (Drive) da última atualização publicada
+        self.change_tracker = None
         
-        # Criar diretório de backup se necessário
+        # Armazenamento de backups deduplicado (cria o diretório se necessário)
+        self.backup_store = None
         if self.backup_enabled:
-            os.makedirs(self.backup_dir, exist_ok=True)
+            self.backup_store = DashboardBackupStore(
+                self.backup_dir,
+                keyframe_interval=AUTOMATION_CONFIG.get('backup_keyframe_interval', 20)
+            )
     
     def download_dashboard_from_github(self):
         """Baixa os arquivos do dashboard do GitHub antes de fazer atualizações"""
@@ -97,151 +106,106 @@ class DashboardAutomation:
             return False
     
     def create_backup(self):
-        """Cria backup dos dashboards atuais"""
+        """Cria backup dos dashboards atuais (versões idênticas à anterior não são duplicadas)"""
         if not self.backup_enabled:
             return
         
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
             for dashboard_file in self.dashboard_files:
                 if not os.path.exists(dashboard_file):
                     continue
                 
                 filename = os.path.basename(dashboard_file)
-                backup_filename = f"{filename.replace('.html', '')}_backup_{timestamp}.html"
-                backup_path = os.path.join(self.backup_dir, backup_filename)
-                
-                shutil.copy2(dashboard_file, backup_path)
-                logger.info(f"✅ Backup criado: {backup_filename}")
+                sha = self.backup_store.backup_file(dashboard_file)
+                if sha:
+                    logger.info(f"✅ Backup criado: {filename} ({sha[:12]})")
+                else:
+                    logger.info(f"ℹ️ {filename} sem alterações desde o último backup")
+            
+            pruned = self.backup_store.prune(
+                keep_last=AUTOMATION_CONFIG.get('backup_keep_versions'),
+                max_age_days=AUTOMATION_CONFIG.get('backup_max_age_days')
+            )
+            if pruned["removed_versions"]:
+                logger.info(f"🧹 Retenção de backups: {pruned['removed_versions']} versões e {pruned['removed_objects']} objetos removidos")
             
         except Exception as e:
             logger.error(f"❌ Erro ao criar backup: {e}")
     
-    def format_js_value(self, value):
-        """Formata valor para JavaScript"""
-        if isinstance(value, (int, float)):
-            if value == float('inf'):
-                return 'null'
-            elif value != value:  # NaN check
-                return 'null'
-            else:
-                return str(value)
-        elif value is None:
-            return 'null'
-        elif isinstance(value, str):
-            return f'"{value}"'
-        else:
-            return 'null'
+    def _read_existing_daily(self, document, dashboard_name):
+        """Lê o slot DAILY atual do dashboard (lista vazia se ausente ou ilegível)"""
+        if not document.has_slot('DAILY'):
+            logger.info(f"⚠️ Array DAILY não encontrado no arquivo {dashboard_name}")
+            return []
+        try:
+            existing_daily_data = document.read_slot('DAILY')
+        except DashboardSlotError as e:
+            logger.warning(f"⚠️ Erro ao parsear dados existentes: {e}")
+            logger.warning("   Usando apenas dados novos")
+            return []
+        logger.info(f"📋 Extraídos {len(existing_daily_data)} registros existentes de {dashboard_name}")
+        existing_channels = set(item.get('channel', '') for item in existing_daily_data)
+        logger.info(f"   Canais existentes: {', '.join(sorted(existing_channels))}")
+        return existing_daily_data
     
-    def update_dashboard_data(self, daily_data):
-        """Atualiza apenas dados de canais (DAILY) dos dashboards, preservando FOOTFALL_POINTS e dados existentes"""
+    def _merge_daily_data(self, existing_daily_data, daily_data):
+        """Substitui os registros dos canais processados e preserva os dos demais canais"""
+        processed_channels = set(item['channel'] for item in daily_data)
+        merged_daily_data = [item for item in existing_daily_data if item.get('channel', '') not in processed_channels]
+        preserved_channels = set(item.get('channel', '') for item in merged_daily_data)
+        if preserved_channels:
+            logger.info(f"✅ Preservados dados de canais não processados: {', '.join(sorted(preserved_channels))}")
+        merged_daily_data.extend(daily_data)
+        return merged_daily_data
+    
+    def update_dashboards(self, daily_data, include_daily=True, include_cons_per=True):
+        """Atualiza os slots DAILY, CONS e PER de cada dashboard numa única gravação, preservando FOOTFALL_POINTS"""
         try:
-            logger.info(f"🔧 Atualizando dados de canais de {len(self.dashboard_files)} dashboards (preservando footfall e dados existentes)...")
-            
-            # Identificar canais que foram processados com sucesso
-            processed_channels = set(item['channel'] for item in daily_data)
-            logger.info(f"📊 Canais processados com sucesso: {', '.join(sorted(processed_channels))}")
+            slots = [name for name, enabled in (('DAILY', include_daily), ('CONS/PER', include_cons_per)) if enabled]
+            logger.info(f"🔧 Atualizando {', '.join(slots)} em {len(self.dashboard_files)} dashboards (preservando footfall)...")
+            
+            if include_daily:
+                processed_channels = set(item['channel'] for item in daily_data)
+                logger.info(f"📊 Canais processados com sucesso: {', '.join(sorted(processed_channels))}")
+            
+            # CONS e PER são calculados uma vez para todos os arquivos
+            slot_values = {}
+            if include_cons_per:
+                cons_data = self.calculate_cons_data(daily_data)
+                per_data = self.calculate_per_data(daily_data)
+                if not cons_data or not per_data:
+                    logger.error("❌ Erro ao calcular dados CONS/PER")
+                    return False
+                slot_values = {'CONS': cons_data, 'PER': per_data}
             
-            # Atualizar cada arquivo de dashboard
             success_count = 0
             for dashboard_file in self.dashboard_files:
                 if not os.path.exists(dashboard_file):
                     logger.warning(f"⚠️ Arquivo não encontrado: {dashboard_file}, pulando...")
                     continue
                 
+                dashboard_name = os.path.basename(dashboard_file)
                 try:
-                    # Ler HTML atual
-                    with open(dashboard_file, 'r', encoding='utf-8') as f:
-                        html_content = f.read()
-                    
-                    # Extrair dados existentes do DAILY
-                    # Usar padrão que captura tudo até encontrar o próximo const ou ; seguido de quebra de linha
-                    daily_pattern = r'const DAILY = \[(.*?)\];'
-                    existing_match = re.search(daily_pattern, html_content, re.DOTALL)
-                    
-                    existing_daily_data = []
-                    if existing_match:
-                        try:
-                            # Tentar parsear dados existentes
-                            existing_js = existing_match.group(1).strip()
-                            if existing_js:
-                                # O formato já é JSON válido (array de objetos)
-                                # Adicionar colchetes se necessário
-                                existing_data_str = '[' + existing_js + ']'
-                                try:
-                                    # Usar json.loads para parsear
-                                    existing_daily_data = json.loads(existing_data_str)
-                                    logger.info(f"📋 Extraídos {len(existing_daily_data)} registros existentes de {os.path.basename(dashboard_file)}")
-                                    
-                                    # Estatísticas dos canais existentes
-                                    existing_channels = set(item.get('channel', '') for item in existing_daily_data)
-                                    logger.info(f"   Canais existentes: {', '.join(sorted(existing_channels))}")
-                                except json.JSONDecodeError as je:
-                                    logger.warning(f"⚠️ Erro ao parsear dados existentes como JSON: {je}")
-                                    logger.warning(f"   Usando apenas dados novos (erro na linha {je.lineno}, coluna {je.colno})")
-                                    existing_daily_data = []
-                        except Exception as e:
-                            logger.warning(f"⚠️ Erro ao extrair dados existentes: {e}")
-                            existing_daily_data = []
-                    else:
-                        logger.info(f"⚠️ Array DAILY não encontrado no arquivo {os.path.basename(dashboard_file)}, criando novo")
-                    
-                    # Criar mapa de dados novos por canal e data
-                    new_data_map = {}
-                    for item in daily_data:
-                        channel = item.get('channel', '')
-                        date = item.get('date', '')
-                        key = f"{channel}_{date}"
-                        new_data_map[key] = item
-                    
-                    # Mesclar dados: substituir dados de canais processados, preservar os demais
-                    merged_daily_data = []
-                    preserved_channels = set()
-                    
-                    # Adicionar dados existentes de canais NÃO processados
-                    for item in existing_daily_data:
-                        channel = item.get('channel', '')
-                        if channel not in processed_channels:
-                            merged_daily_data.append(item)
-                            preserved_channels.add(channel)
-                    
-                    # Adicionar dados novos (substituindo dados antigos dos canais processados)
-                    merged_daily_data.extend(daily_data)
-                    
-                    if preserved_channels:
-                        logger.info(f"✅ Preservados dados de canais não processados: {', '.join(sorted(preserved_channels))}")
-                    
-                    # Criar string JavaScript para DAILY mesclado
-                    daily_items = []
-                    for item in merged_daily_data:
-                        item_js = "{"
-                        item_pairs = []
-                        for key, value in item.items():
-                            item_pairs.append(f'"{key}": {self.format_js_value(value)}')
-                        item_js += ", ".join(item_pairs) + "}"
-                        daily_items.append(item_js)
-                    
-                    new_daily_js = "const DAILY = [" + ", ".join(daily_items) + "];"
-                    
-                    # Substituir apenas a seção DAILY, preservando FOOTFALL_POINTS
-                    html_content = re.sub(daily_pattern, new_daily_js, html_content, flags=re.DOTALL)
-                    
-                    # Salvar HTML atualizado
-                    with open(dashboard_file, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    
-                    logger.info(f"✅ Dados de canais atualizados em {os.path.basename(dashboard_file)}: {len(merged_daily_data)} registros totais ({len(daily_data)} novos + {len(existing_daily_data) - len(daily_data) if existing_daily_data else 0} preservados)")
+                    # Indexar os slots uma vez e substituir todos numa passada (gravação atômica)
+                    document = SlotDocument.load(dashboard_file)
+                    values = dict(slot_values)
+                    if include_daily:
+                        existing_daily_data = self._read_existing_daily(document, dashboard_name)
+                        values['DAILY'] = self._merge_daily_data(existing_daily_data, daily_data)
+                    document.save(dashboard_file, values, indent=DASHBOARD_SLOT_INDENT)
+                    
+                    if include_daily:
+                        logger.info(f"✅ {dashboard_name}: {len(values['DAILY'])} registros DAILY ({len(daily_data)} novos + {len(values['DAILY']) - len(daily_data)} preservados)")
+                    if include_cons_per:
+                        logger.info(f"✅ Dados CONS e PER atualizados em {dashboard_name}")
                     success_count += 1
                     
                 except Exception as e:
                     logger.error(f"❌ Erro ao atualizar {dashboard_file}: {e}")
-                    import traceback
-                    logger.error(f"   Traceback: {traceback.format_exc()}")
                     continue
             
             if success_count == len(self.dashboard_files):
-                logger.info(f"✅ Dados de canais atualizados com {len(daily_data)} registros novos em todos os dashboards (dados existentes preservados)")
+                logger.info(f"✅ {', '.join(slots)} atualizados em todos os dashboards (FOOTFALL_POINTS preservado)")
                 return True
             elif success_count > 0:
                 logger.warning(f"⚠️ Dados atualizados em apenas {success_count}/{len(self.dashboard_files)} dashboards")
@@ -251,11 +215,15 @@ class DashboardAutomation:
                 return False
             
         except Exception as e:
-            logger.error(f"❌ Erro ao atualizar dados de canais: {e}")
+            logger.error(f"❌ Erro ao atualizar dados dos dashboards: {e}")
             import traceback
             logger.error(f"   Traceback: {traceback.format_exc()}")
             return False
     
+    def update_dashboard_data(self, daily_data):
+        """Atualiza apenas dados de canais (DAILY) dos dashboards, preservando FOOTFALL_POINTS e dados existentes"""
+        return self.update_dashboards(daily_data, include_daily=True, include_cons_per=False)
+    
     def calculate_cons_data(self, daily_data):
         """Calcula dados consolidadas (CONS) baseados nos dados diários"""
         try:
@@ -593,65 +561,7 @@ class DashboardAutomation:
     
     def update_cons_and_per_data(self, daily_data):
         """Atualiza dados CONS e PER nos dashboards, preservando FOOTFALL_POINTS"""
-        try:
-            logger.info(f"🔧 Atualizando dados CONS e PER em {len(self.dashboard_files)} dashboards (preservando footfall)...")
-            
-            # Calcular dados (uma vez para todos os arquivos)
-            cons_data = self.calculate_cons_data(daily_data)
-            per_data = self.calculate_per_data(daily_data)
-            
-            if not cons_data or not per_data:
-                logger.error("❌ Erro ao calcular dados CONS/PER")
-                return False
-            
-            # Preparar strings JavaScript
-            cons_js = "const CONS = " + json.dumps(cons_data, indent=2, ensure_ascii=False) + ";"
-            per_js = "const PER = " + json.dumps(per_data, indent=2, ensure_ascii=False) + ";"
-            
-            # Atualizar cada arquivo de dashboard
-            success_count = 0
-            for dashboard_file in self.dashboard_files:
-                if not os.path.exists(dashboard_file):
-                    logger.warning(f"⚠️ Arquivo não encontrado: {dashboard_file}, pulando...")
-                    continue
-                
-                try:
-                    # Ler HTML atual
-                    with open(dashboard_file, 'r', encoding='utf-8') as f:
-                        html_content = f.read()
-                    
-                    # Atualizar CONS
-                    cons_pattern = r'const CONS = \{.*?\};'
-                    html_content = re.sub(cons_pattern, cons_js, html_content, flags=re.DOTALL)
-                    
-                    # Atualizar PER
-                    per_pattern = r'const PER = \[.*?\];'
-                    html_content = re.sub(per_pattern, per_js, html_content, flags=re.DOTALL)
-                    
-                    # Salvar HTML atualizado
-                    with open(dashboard_file, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    
-                    logger.info(f"✅ Dados CONS e PER atualizados em {os.path.basename(dashboard_file)}")
-                    success_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"❌ Erro ao atualizar {dashboard_file}: {e}")
-                    continue
-            
-            if success_count == len(self.dashboard_files):
-                logger.info("✅ Dados CONS e PER atualizados em todos os dashboards (FOOTFALL_POINTS preservado)")
-                return True
-            elif success_count > 0:
-                logger.warning(f"⚠️ Dados atualizados em apenas {success_count}/{len(self.dashboard_files)} dashboards")
-                return True
-            else:
-                logger.error("❌ Nenhum dashboard foi atualizado")
-                return False
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao atualizar dados CONS/PER: {e}")
-            return False
+        return self.update_dashboards(daily_data, include_daily=False, include_cons_per=True)
     
     def commit_and_push_to_github(self):
         """Faz commit e push das alterações para o GitHub usando API com validação"""
@@ -805,11 +715,46 @@ class DashboardAutomation:
             logger.error(f"❌ Erro ao acionar atualização de footfall: {e}")
             return False
     
-    def run_update(self):
-        """Executa uma atualização completa do dashboard"""
+    def check_sheet_changes(self, force=False):
+        """
+        Compara a revisão (Drive) das planilhas dos canais com a da última atualização publicada.
+        Retorna o ChangeCheck, ou None se a detecção não estiver disponível (atualizar sempre).
+        """
+        try:
+            if self.change_tracker is None:
+                self.change_tracker = build_change_tracker(
+                    'dashboard_automation', credentials=self.processor.credentials
+                )
+            if self.change_tracker is None:
+                return None
+            sheet_ids = [config['sheet_id'].strip() for config in GOOGLE_SHEETS_CONFIG.values()]
+            context = config_fingerprint({'channels': GOOGLE_SHEETS_CONFIG, 'dashboards': self.dashboard_files})
+            return self.change_tracker.check(sheet_ids, context=context, force=force)
+        except Exception as e:
+            logger.warning(f"⚠️ Detecção de mudanças indisponível, atualizando mesmo assim: {e}")
+            return None
+    
+    def run_update(self, force=False):
+        """Executa uma atualização completa do dashboard (pulada se nenhuma planilha mudou)"""
         try:
             logger.info("🚀 Iniciando atualização automática do dashboard...")
             
+            # Inicializar processador se necessário
+            if not self.processor:
+                self.processor = GoogleSheetsProcessor()
+            
+            # Planilhas sem edição desde a última atualização publicada: nada a fazer
+            change_check = self.check_sheet_changes(force=force)
+            if change_check is not None:
+                if not change_check.should_run:
+                    logger.info(f"⏭️ Nenhuma planilha alterada desde a última atualização ({change_check.summary()}), pulando os canais")
+                    # O footfall tem planilha própria e faz a sua checagem de revisão
+                    logger.info("🔄 Iniciando atualização de footfall...")
+                    if not self.trigger_footfall_update():
+                        logger.warning("⚠️ Canais sem mudanças, mas footfall falhou. Verifique logs.")
+                    return True
+                logger.info(f"🔍 Mudanças nas planilhas: {change_check.summary()}")
+            
             # Baixar arquivo atualizado do GitHub primeiro
             logger.info("📥 Baixando versão mais recente do dashboard do GitHub...")
             if not self.download_dashboard_from_github():
@@ -819,10 +764,6 @@ class DashboardAutomation:
             # Criar backup
             self.create_backup()
             
-            # Inicializar processador se necessário
-            if not self.processor:
-                self.processor = GoogleSheetsProcessor()
-            
             # Obter dados de todos os canais
             daily_data = self.processor.get_all_channels_data()
             
@@ -830,13 +771,8 @@ class DashboardAutomation:
                 logger.error("❌ Nenhum dado foi coletado")
                 return False
             
-            # Atualizar dashboard
-            success = self.update_dashboard_data(daily_data)
-            if not success:
-                return False
-            
-            # Atualizar dados CONS e PER
-            success = self.update_cons_and_per_data(daily_data)
+            # Atualizar DAILY, CONS e PER (uma gravação por dashboard)
+            success = self.update_dashboards(daily_data)
             if not success:
                 return False
             
@@ -867,6 +803,9 @@ class DashboardAutomation:
             github_success = self.commit_and_push_to_github()
             if github_success:
                 logger.info("🌐 Dashboard atualizado no GitHub e disponível via Vercel")
+                # Só uma atualização publicada dispensa as próximas execuções
+                if change_check is not None:
+                    self.change_tracker.record(change_check)
             else:
                 logger.warning("⚠️ Dashboard atualizado localmente, mas falhou o push para GitHub")
             
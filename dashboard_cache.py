@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Cache local (em disco) para dashboards persistidos no Google Cloud Storage.
+
+No Cloud Run o sistema de arquivos local é um tmpfs em memória: tudo que é
+gravado em disco consome a memória da instância. Este cache limita o espaço
+ocupado pelos dashboards baixados do GCS a um orçamento de bytes, despejando
+os menos usados (LRU). As gravações são atômicas (arquivo temporário + rename)
+e cada entrada guarda o número de geração do blob para revalidação.
+
+Os metadados de cada entrada (geração, md5, encoding) ficam num arquivo oculto
+ao lado do conteúdo, para que um worker reciclado retome o cache sem baixar de
+novo o que já está em disco.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional
+
+from gcs_artifact_reader import get_artifact, STATUS_MISSING, STATUS_NOT_MODIFIED
+from app_metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardDiskCache:
+    """Cache LRU de artefatos do GCS em disco, com orçamento de bytes."""
+
+    def __init__(self, cache_dir: str, max_bytes: int, revalidate_after_sec: int = 60):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self.revalidate_after_sec = max(0, int(revalidate_after_sec))
+        # name -> {"path", "size", "generation", "md5", "content_encoding", "checked_at"}; ordem = menos usado primeiro
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Indexar arquivos que já estão no diretório (ex.: worker reciclado na mesma instância)."""
+        try:
+            files = []
+            for filename in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, filename)
+                if filename.startswith('.') or not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                files.append((stat.st_atime, filename, path, stat.st_size))
+            for _, filename, path, size in sorted(files):
+                meta = self._read_meta(filename)
+                # checked_at zerado: revalidado contra o blob no primeiro acesso
+                self._entries[filename] = {
+                    "path": path,
+                    "size": size,
+                    "generation": meta.get("generation"),
+                    "md5": meta.get("md5"),
+                    "content_encoding": meta.get("content_encoding"),
+                    "checked_at": 0.0,
+                }
+                self._total_bytes += size
+            self._evict()
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível indexar cache local ({self.cache_dir}): {e}")
+
+    def _path_for(self, name: str) -> str:
+        return os.path.join(self.cache_dir, os.path.basename(name))
+
+    def _meta_path_for(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f".{os.path.basename(name)}.meta")
+
+    def _read_meta(self, name: str) -> Dict[str, Any]:
+        try:
+            with open(self._meta_path_for(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, name: str, entry: Dict[str, Any]):
+        meta = {k: entry.get(k) for k in ("generation", "md5", "content_encoding")}
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(temp_path, self._meta_path_for(name))
+        except OSError as e:
+            logger.warning(f"⚠️ Falha ao gravar metadados de {name} no cache: {e}")
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Obter entrada do cache (marca como usada recentemente)."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if not entry:
+                return None
+            if not os.path.exists(entry["path"]):
+                self._drop(name)
+                return None
+            self._entries.move_to_end(name)
+            return dict(entry)
+
+    def generation_of(self, name: str) -> Optional[int]:
+        """Geração do blob registrada para a entrada (None se ausente/desconhecida)."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry.get("generation") if entry else None
+
+    def adopt_generation(self, name: str, generation: int, md5: Optional[str]) -> bool:
+        """
+        Atualizar a geração de uma entrada cujo conteúdo não mudou (mesmo md5).
+
+        Evita baixar de novo um dashboard republicado com o mesmo HTML.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if not entry or not md5 or entry.get("md5") != md5:
+                return False
+            entry["generation"] = generation
+            self._write_meta(name, entry)
+            return True
+
+    def contains(self, name: str, generation: Optional[int] = None) -> bool:
+        """Verificar se o arquivo está em cache (e, se informado, na mesma geração)."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if not entry:
+                return False
+            if generation is not None and entry.get("generation") != generation:
+                return False
+            return True
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Entrada verificada contra o GCS há menos de `revalidate_after_sec`."""
+        return (time.time() - entry.get("checked_at", 0.0)) < self.revalidate_after_sec
+
+    def mark_checked(self, name: str):
+        """Registrar que a entrada foi confirmada como atual (ex.: GCS respondeu 304)."""
+        with self._lock:
+            if name in self._entries:
+                self._entries[name]["checked_at"] = time.time()
+
+    def has_room(self, size: int) -> bool:
+        """Indicar se `size` bytes cabem no orçamento sem despejar nada."""
+        with self._lock:
+            return self._total_bytes + max(0, int(size or 0)) <= self.max_bytes
+
+    def put_bytes(self, name: str, data: bytes, generation: Optional[int] = None,
+                  content_encoding: Optional[str] = None, md5: Optional[str] = None) -> Optional[str]:
+        """Gravar conteúdo no cache de forma atômica. Retorna o caminho local."""
+        if len(data) > self.max_bytes:
+            logger.info(f"ℹ️ {name} ({len(data):,} bytes) excede o orçamento do cache, não será armazenado")
+            return None
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            return self._commit(name, temp_path, generation, content_encoding, md5)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def put_from_blob(self, name: str, blob, md5: Optional[str] = None) -> Optional[str]:
+        """Baixar um blob do GCS direto para o cache (arquivo temporário + rename)."""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        os.close(fd)
+        try:
+            generation = getattr(blob, 'generation', None)
+            if generation:
+                # Garante que o conteúdo baixado corresponde à geração registrada
+                blob.download_to_filename(temp_path, if_generation_match=generation)
+            else:
+                blob.download_to_filename(temp_path)
+            if os.path.getsize(temp_path) > self.max_bytes:
+                logger.info(f"ℹ️ {name} excede o orçamento do cache, não será armazenado")
+                os.remove(temp_path)
+                return None
+            return self._commit(name, temp_path, generation, getattr(blob, 'content_encoding', None),
+                                md5 or getattr(blob, 'md5_hash', None))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def stream_into_cache(self, name: str, artifact) -> Iterator[bytes]:
+        """
+        Repassar os blocos de um GcsArtifact e, ao final, gravá-los no cache.
+
+        Permite responder ao cliente enquanto o download acontece; se o stream for
+        interrompido (ou exceder o orçamento), nada é gravado.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        written = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in artifact.iter_chunks():
+                    written += len(chunk)
+                    if written <= self.max_bytes:
+                        f.write(chunk)
+                    yield chunk
+            if written <= self.max_bytes:
+                self._commit(name, temp_path, artifact.generation, artifact.content_encoding, artifact.md5)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def fetch(self, name: str, bucket, gcs_path: str) -> Optional[str]:
+        """
+        Obter o caminho local de um artefato do GCS, baixando se necessário.
+
+        Entradas verificadas há menos de `revalidate_after_sec` são servidas direto;
+        as demais são revalidadas com um único GET condicional pela geração do blob
+        (304 = cópia local válida). Retorna None se o blob não existe.
+        """
+        entry = self.lookup(name)
+        if entry and self.is_fresh(entry):
+            self.hits += 1
+            record_cache("dashboard_disk", True)
+            return entry["path"]
+
+        artifact = get_artifact(bucket, gcs_path, if_generation_not_match=(entry or {}).get("generation"))
+        if artifact.status == STATUS_MISSING:
+            if entry:
+                self.invalidate(name)
+            return None
+        if artifact.status == STATUS_NOT_MODIFIED:
+            self.mark_checked(name)
+            self.hits += 1
+            record_cache("dashboard_disk", True)
+            return entry["path"]
+
+        self.misses += 1
+        record_cache("dashboard_disk", False)
+        for _ in self.stream_into_cache(name, artifact):
+            pass
+        entry = self.lookup(name)
+        return entry["path"] if entry else None
+
+    def invalidate(self, name: str):
+        """Remover um arquivo do cache (ex.: após republicar o dashboard)."""
+        with self._lock:
+            self._drop(name)
+
+    def _commit(self, name: str, temp_path: str, generation: Optional[int],
+                content_encoding: Optional[str] = None, md5: Optional[str] = None) -> str:
+        path = self._path_for(name)
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            os.replace(temp_path, path)
+            previous = self._entries.pop(name, None)
+            if previous:
+                self._total_bytes -= previous["size"]
+            self._entries[name] = {
+                "path": path,
+                "size": size,
+                "generation": generation,
+                "md5": md5,
+                "content_encoding": content_encoding,
+                "checked_at": time.time(),
+            }
+            self._write_meta(name, self._entries[name])
+            self._total_bytes += size
+            self._evict(keep=name)
+        return path
+
+    def _drop(self, name: str):
+        entry = self._entries.pop(name, None)
+        if not entry:
+            return
+        self._total_bytes -= entry["size"]
+        try:
+            if os.path.exists(entry["path"]):
+                os.remove(entry["path"])
+            meta_path = self._meta_path_for(name)
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Falha ao remover {entry['path']} do cache: {e}")
+
+    def _evict(self, keep: Optional[str] = None):
+        """Despejar entradas menos usadas até caber no orçamento."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            name = next(iter(self._entries))
+            if name == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(name)
+                continue
+            self._drop(name)
+            self.evictions += 1
+            logger.info(f"🧹 Cache local: {name} despejado (LRU)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Resumo do estado do cache."""
+        with self._lock:
+            return {
+                "cache_dir": self.cache_dir,
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "files": list(self._entries.keys()),
+            }
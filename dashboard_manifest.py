@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Manifesto de dashboards publicados no GCS e sincronização incremental.
+
+O manifesto (`dashboards/_manifest.json`) lista cada dashboard com geração,
+md5, tamanho e data de atualização. Com ele, aquecer o cache local de uma
+instância nova custa uma única leitura no GCS: a diferença contra o cache é
+calculada em memória e só o que falta é baixado, em paralelo, num pool de
+threads limitado.
+
+A sincronização é retomável: cada arquivo é gravado no cache de forma atômica
+com sua geração, então uma execução interrompida continua de onde parou.
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+
+from gcs_storage import call_with_retry
+
+logger = logging.getLogger(__name__)
+
+DASHBOARDS_PREFIX = 'dashboards/'
+MANIFEST_PATH = 'dashboards/_manifest.json'
+MANIFEST_VERSION = 1
+
+# Tentativas de gravar o manifesto quando outro processo o alterou no meio tempo
+MAX_MANIFEST_CONFLICTS = 5
+
+
+def is_dashboard_blob_name(blob_name: str) -> bool:
+    return blob_name.startswith(f'{DASHBOARDS_PREFIX}dash_') and blob_name.endswith('.html')
+
+
+def _blob_updated(blob) -> Optional[str]:
+    updated = getattr(blob, 'updated', None)
+    return updated.isoformat() if updated else None
+
+
+def _manifest_entry(blob) -> Dict[str, Any]:
+    return {
+        "generation": blob.generation,
+        "md5": blob.md5_hash,
+        "size": blob.size,
+        "updated": _blob_updated(blob),
+    }
+
+
+def load_manifest(bucket) -> Tuple[Optional[Dict[str, Dict[str, Any]]], int]:
+    """
+    Ler o manifesto do bucket.
+
+    Retorna (arquivos, geração do manifesto); arquivos é None se o manifesto não existe
+    ou está ilegível (geração 0 indica que ainda não existe).
+    """
+    from google.api_core.exceptions import NotFound
+
+    blob = bucket.blob(MANIFEST_PATH)
+    try:
+        data = call_with_retry(blob.download_as_bytes)
+    except NotFound:
+        return None, 0
+    generation = blob.generation or 0
+    try:
+        manifest = json.loads(data)
+        return dict(manifest.get("files") or {}), generation
+    except (ValueError, AttributeError) as e:
+        logger.warning(f"⚠️ Manifesto de dashboards ilegível, será reconstruído: {e}")
+        return None, generation
+
+
+def save_manifest(bucket, files: Dict[str, Dict[str, Any]], if_generation_match: int):
+    """Gravar o manifesto com precondição de geração (0 = não pode existir)."""
+    payload = json.dumps({
+        "version": MANIFEST_VERSION,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "files": files,
+    }, separators=(',', ':'), sort_keys=True)
+    blob = bucket.blob(MANIFEST_PATH)
+    call_with_retry(blob.upload_from_string, payload, content_type='application/json',
+                    if_generation_match=if_generation_match)
+
+
+def build_manifest(bucket) -> Dict[str, Dict[str, Any]]:
+    """Montar o manifesto a partir da listagem do bucket (bootstrap/reconstrução)."""
+    files = {}
+    for blob in bucket.list_blobs(prefix=DASHBOARDS_PREFIX):
+        if is_dashboard_blob_name(blob.name):
+            files[blob.name.split('/')[-1]] = _manifest_entry(blob)
+    return files
+
+
+def rebuild_manifest(bucket) -> Dict[str, Dict[str, Any]]:
+    """Reconstruir o manifesto pela listagem e gravá-lo (sobrescreve o atual)."""
+    from google.api_core.exceptions import PreconditionFailed
+
+    files = build_manifest(bucket)
+    _, generation = load_manifest(bucket)
+    try:
+        save_manifest(bucket, files, if_generation_match=generation)
+        logger.info(f"🧾 Manifesto de dashboards reconstruído ({len(files)} arquivos)")
+    except PreconditionFailed:
+        # Outro processo gravou primeiro; o dele também reflete a listagem
+        logger.info("ℹ️ Manifesto de dashboards atualizado por outro processo")
+    return files
+
+
+def update_manifest(bucket, blob, removed: bool = False):
+    """
+    Registrar no manifesto um dashboard recém-publicado (ou removido).
+
+    Usa leitura + gravação condicional pela geração do manifesto, repetindo em caso
+    de conflito com outra instância.
+    """
+    from google.api_core.exceptions import PreconditionFailed
+
+    filename = blob.name.split('/')[-1]
+    for _ in range(MAX_MANIFEST_CONFLICTS):
+        files, generation = load_manifest(bucket)
+        if files is None:
+            # Sem manifesto: reconstruir pela listagem já inclui este blob
+            rebuild_manifest(bucket)
+            return
+        if removed:
+            files.pop(filename, None)
+        else:
+            files[filename] = _manifest_entry(blob)
+        try:
+            save_manifest(bucket, files, if_generation_match=generation)
+            return
+        except PreconditionFailed:
+            continue
+    logger.warning(f"⚠️ Manifesto de dashboards não atualizado para {filename} (conflitos seguidos)")
+
+
+def sync_cache_from_manifest(bucket, cache, max_workers: int = 8) -> Dict[str, Any]:
+    """
+    Aquecer o cache local a partir do manifesto.
+
+    - Entradas já em cache na mesma geração são ignoradas;
+    - mesmo md5 com geração nova só atualiza a geração (sem download);
+    - os demais são baixados em paralelo, dos mais recentes para os mais antigos,
+      até o limite do orçamento do cache (o aquecimento não despeja nada).
+    """
+    started = time.time()
+    files, _ = load_manifest(bucket)
+    if files is None:
+        files = rebuild_manifest(bucket)
+
+    pending = []
+    adopted = 0
+    for filename, meta in files.items():
+        generation = meta.get("generation")
+        if cache.contains(filename, generation=generation):
+            continue
+        if cache.adopt_generation(filename, generation, meta.get("md5")):
+            adopted += 1
+            continue
+        pending.append((filename, meta))
+
+    # Os mais recentes primeiro: são os mais prováveis de serem acessados
+    pending.sort(key=lambda item: item[1].get("updated") or '', reverse=True)
+
+    planned = []
+    planned_bytes = 0
+    for filename, meta in pending:
+        size = int(meta.get("size") or 0)
+        if not cache.has_room(planned_bytes + size):
+            break
+        planned.append((filename, meta))
+        planned_bytes += size
+    skipped = len(pending) - len(planned)
+
+    def _download(filename: str, meta: Dict[str, Any]):
+        blob = bucket.blob(f"{DASHBOARDS_PREFIX}{filename}", generation=meta.get("generation"))
+        return call_with_retry(cache.put_from_blob, filename, blob, md5=meta.get("md5"))
+
+    downloaded = 0
+    failed = 0
+    if planned:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='dash-sync') as executor:
+            futures = {executor.submit(_download, filename, meta): filename for filename, meta in planned}
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    if future.result():
+                        downloaded += 1
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"⚠️ Falha ao sincronizar {filename}: {e}")
+
+    return {
+        "manifest_files": len(files),
+        "downloaded": downloaded,
+        "adopted": adopted,
+        "skipped_budget": skipped,
+        "failed": failed,
+        "elapsed_sec": round(time.time() - started, 2),
+    }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Slots de dados dos dashboards HTML.
+
+Os dashboards estáticos carregam seus dados em declarações JavaScript do tipo
+`const DAILY = [...];`, `const CONS = {...};`, `const PER = [...];` e
+`const FOOTFALL_POINTS = [...];`. Cada uma dessas declarações é um slot.
+
+Em vez de um `re.sub` (ou `str.index`) por slot sobre o arquivo inteiro, o
+documento é indexado uma única vez: os marcadores são localizados numa só
+varredura e o fim de cada literal é obtido decodificando-o como JSON (ou, se
+não for JSON estrito, casando colchetes/chaves fora de strings). A atualização monta o HTML novo em uma passada, intercalando os
+trechos preservados com o JSON serializado de cada slot, e grava o arquivo de
+forma atômica (arquivo temporário + rename).
+"""
+
+import os
+import re
+import copy
+import json
+import math
+import tempfile
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOTS = ('DAILY', 'CONS', 'PER', 'FOOTFALL_POINTS')
+
+# Strings JS (aspas duplas ou simples) são puladas inteiras; só colchetes/chaves contam
+_LITERAL_TOKEN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|[\[\]{}]')
+_CLOSING = {'[': ']', '{': '}'}
+_DECODER = json.JSONDecoder()
+
+
+class DashboardSlotError(ValueError):
+    """Slot ausente ou com literal malformado no HTML do dashboard."""
+
+
+def _marker_re(names: Iterable[str]):
+    alternatives = '|'.join(re.escape(name) for name in names)
+    # Sem \b no início: com o prefixo literal 'const' o re localiza candidatos muito mais rápido
+    return re.compile(r'const\s+(' + alternatives + r')\s*=\s*')
+
+
+def _literal_end(text: str, start: int, name: str) -> int:
+    """Posição logo após o literal (array/objeto) que começa em `start`."""
+    opener = text[start:start + 1]
+    if opener not in _CLOSING:
+        raise DashboardSlotError(f"Slot {name}: esperado '[' ou '{{' na posição {start}")
+    stack: List[str] = []
+    for token in _LITERAL_TOKEN_RE.finditer(text, start):
+        value = token.group()
+        if value in _CLOSING:
+            stack.append(_CLOSING[value])
+        elif value in (']', '}'):
+            if not stack or stack.pop() != value:
+                raise DashboardSlotError(f"Slot {name}: '{value}' inesperado na posição {token.start()}")
+            if not stack:
+                return token.end()
+    raise DashboardSlotError(f"Slot {name}: literal sem fechamento")
+
+
+def _finite(value: Any) -> Any:
+    """Trocar NaN/Infinity por None (não são JSON válido)."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    """Escalares numpy/pandas (ex.: int64 vindo de DataFrames) viram tipos nativos."""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Valor não serializável em slot: {type(value).__name__}")
+
+
+def serialize_slot_value(value: Any, indent: Optional[int] = None) -> str:
+    """Serializar o valor de um slot como JSON (NaN/Infinity viram null)."""
+    separators = (', ', ': ') if indent is None else (',', ': ')
+    try:
+        return json.dumps(value, ensure_ascii=False, indent=indent, separators=separators,
+                          allow_nan=False, default=_json_default)
+    except ValueError:
+        return json.dumps(_finite(value), ensure_ascii=False, indent=indent, separators=separators,
+                          default=lambda item: _finite(_json_default(item)))
+
+
+class SlotDocument:
+    """HTML de dashboard com o índice dos seus slots de dados."""
+
+    def __init__(self, text: str, slot_names: Iterable[str] = DEFAULT_SLOTS):
+        self.text = text
+        self.slot_names = tuple(slot_names)
+        # name -> (início da declaração, início do literal, fim da declaração incluindo ';')
+        self.slots: Dict[str, Tuple[int, int, int]] = {}
+        self._values: Dict[str, Any] = {}
+        self._index()
+
+    @classmethod
+    def load(cls, path: str, slot_names: Iterable[str] = DEFAULT_SLOTS) -> "SlotDocument":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read(), slot_names)
+
+    def _index(self):
+        pos = 0
+        for marker in _marker_re(self.slot_names).finditer(self.text):
+            if marker.start() < pos:
+                continue  # dentro do literal de um slot já indexado
+            previous = self.text[marker.start() - 1:marker.start()]
+            if previous and (previous.isalnum() or previous in '_$'):
+                continue  # parte de outro identificador (ex.: myconst)
+            name = marker.group(1)
+            if name in self.slots:
+                logger.debug(f"Slot {name} declarado mais de uma vez; usando a primeira declaração")
+                continue
+            literal_start = marker.end()
+            try:
+                # Caminho rápido: o literal é JSON (decodificado em C, já fica disponível para read_slot)
+                self._values[name], end = _DECODER.raw_decode(self.text, literal_start)
+            except json.JSONDecodeError:
+                end = _literal_end(self.text, literal_start, name)
+            # Consumir o ';' final (e espaços antes dele), como nas declarações originais
+            semicolon = self.text.find(';', end, end + 16)
+            if semicolon >= 0 and not self.text[end:semicolon].strip():
+                end = semicolon + 1
+            self.slots[name] = (marker.start(), literal_start, end)
+            pos = end
+
+    def has_slot(self, name: str) -> bool:
+        return name in self.slots
+
+    def literal(self, name: str) -> str:
+        """Texto do literal de um slot, sem `const NAME =` e sem ';'."""
+        if name not in self.slots:
+            raise DashboardSlotError(f"Slot {name} não encontrado")
+        _, literal_start, end = self.slots[name]
+        return self.text[literal_start:end].rstrip().rstrip(';').rstrip()
+
+    def read_slot(self, name: str) -> Any:
+        """Valor atual de um slot (o literal precisa ser JSON válido)."""
+        if name in self._values:
+            return copy.deepcopy(self._values[name])
+        try:
+            return json.loads(self.literal(name))
+        except json.JSONDecodeError as e:
+            raise DashboardSlotError(f"Slot {name} não é JSON válido: {e}") from e
+
+    def render(self, values: Dict[str, Any], indent: Union[int, None, Dict[str, Optional[int]]] = None,
+               insert_missing_after: Optional[str] = None) -> str:
+        """
+        Montar o HTML com os slots substituídos, numa única passada.
+
+        Args:
+            values: slot -> valor (serializado como JSON)
+            indent: Indentação do JSON (None = compacto, em uma linha), ou um dict por slot
+            insert_missing_after: Slot após o qual declarar os slots ausentes;
+                sem ele, um slot ausente gera DashboardSlotError
+        """
+        missing = [name for name in values if name not in self.slots]
+        if missing and (insert_missing_after is None or insert_missing_after not in self.slots):
+            raise DashboardSlotError(f"Slots não encontrados no dashboard: {', '.join(missing)}")
+
+        edits = []
+        for name, value in values.items():
+            slot_indent = indent.get(name) if isinstance(indent, dict) else indent
+            declaration = f"const {name} = {serialize_slot_value(value, slot_indent)};"
+            if name in self.slots:
+                start, _, end = self.slots[name]
+                edits.append((start, end, declaration))
+            else:
+                anchor = self.slots[insert_missing_after][2]
+                edits.append((anchor, anchor, "\n\n" + declaration))
+        edits.sort(key=lambda edit: edit[0])
+
+        parts = []
+        pos = 0
+        for start, end, replacement in edits:
+            parts.append(self.text[pos:start])
+            parts.append(replacement)
+            pos = end
+        parts.append(self.text[pos:])
+        return ''.join(parts)
+
+    def save(self, path: str, values: Dict[str, Any], indent: Union[int, None, Dict[str, Optional[int]]] = None,
+             insert_missing_after: Optional[str] = None) -> str:
+        """Substituir os slots e gravar o arquivo de forma atômica. Retorna o HTML gravado."""
+        html = self.render(values, indent=indent, insert_missing_after=insert_missing_after)
+        write_text_atomic(path, html)
+        # Reindexar: os offsets mudaram (e slots inseridos passam a existir)
+        self.text = html
+        self.slot_names = tuple(dict.fromkeys(self.slot_names + tuple(values)))
+        self.slots = {}
+        self._values = {}
+        self._index()
+        return html
+
+
+def write_text_atomic(path: str, text: str):
+    """Gravar texto via arquivo temporário no mesmo diretório + os.replace."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.tmp-")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def update_dashboard_slots(path: str, values: Dict[str, Any], indent: Union[int, None, Dict[str, Optional[int]]] = None,
+                           insert_missing_after: Optional[str] = None) -> SlotDocument:
+    """Atalho: indexar o arquivo, substituir os slots e gravar atomicamente."""
+    document = SlotDocument.load(path, slot_names=tuple(dict.fromkeys(DEFAULT_SLOTS + tuple(values))))
+    document.save(path, values, indent=indent, insert_missing_after=insert_missing_after)
+    return document
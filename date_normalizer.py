@@ -3,6 +3,11 @@
 Sistema de Normalização de Datas para Google Sheets
 Detecta automaticamente formatos brasileiro (DD/MM/YYYY) vs americano (MM/DD/YYYY)
 e normaliza para um padrão consistente
+
+A normalização de DataFrames detecta o formato da coluna uma única vez e
+converte os valores distintos com um único `pd.to_datetime(format=...)` por
+separador; só os valores que não se encaixam no formato detectado passam
+pela análise individual (`normalize_date`).
 """
 
 import re
@@ -15,6 +20,28 @@ import pandas as pd
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$')
+_DMY_DATE_RE = re.compile(r'^(?P<first>\d{1,2})(?P<sep>[/.-])(?P<second>\d{1,2})(?P=sep)(?P<year>\d{4})$')
+
+
+def _valid_ymd(year: pd.Series, month: pd.Series, day: pd.Series) -> pd.Series:
+    """Máscara de componentes que formam uma data de calendário válida."""
+    parts = pd.DataFrame({'year': year, 'month': month, 'day': day})
+    complete = parts.notna().all(axis=1)
+    valid = pd.Series(False, index=parts.index)
+    if complete.any():
+        parsed = pd.to_datetime(parts[complete].astype(int), errors='coerce')
+        valid[complete] = parsed.notna()
+    return valid
+
+
+def _in_accepted_range(parsed: pd.Series) -> pd.Series:
+    """Mesmo intervalo de _is_valid_date: 2020–2030 e no máximo 2 anos do ano corrente."""
+    years = parsed.dt.year
+    current_year = datetime.now().year
+    return parsed.notna() & years.between(2020, 2030) & ((years - current_year).abs() <= 2)
+
+
 class DateNormalizer:
     """Normalizador inteligente de formatos de data"""
     
@@ -41,6 +68,12 @@ class DateNormalizer:
         self.detected_format = None
         self.confidence_score = 0.0
         
+        # Padrões compilados usados na normalização individual (mesma ordem de date_patterns)
+        self._compiled_patterns = {
+            format_name: [re.compile(pattern) for pattern in patterns]
+            for format_name, patterns in self.date_patterns.items()
+        }
+        
     def analyze_date_column(self, dates: List[str]) -> Dict[str, Any]:
         """
         Analisa uma coluna de datas para detectar o formato predominante
@@ -157,13 +190,13 @@ class DateNormalizer:
         date_str = str(date_str).strip()
         
         # Se já está no formato ISO, retornar
-        if re.match(r'^\d{4}-\d{1,2}-\d{1,2}$', date_str):
+        if _ISO_DATE_RE.match(date_str):
             return date_str
         
         # Tentar detectar automaticamente com validação de data
-        for format_name, patterns in self.date_patterns.items():
+        for format_name, patterns in self._compiled_patterns.items():
             for pattern in patterns:
-                match = re.match(pattern, date_str)
+                match = pattern.match(date_str)
                 if match:
                     try:
                         parsed_date = self._parse_with_format(date_str, format_name)
@@ -177,10 +210,10 @@ class DateNormalizer:
     
     def _parse_with_format(self, date_str: str, format_name: str) -> Optional[str]:
         """Parse data com formato específico"""
-        patterns = self.date_patterns[format_name]
+        patterns = self._compiled_patterns[format_name]
         
         for pattern in patterns:
-            match = re.match(pattern, date_str)
+            match = pattern.match(date_str)
             if match:
                 try:
                     groups = match.groups()
@@ -252,9 +285,13 @@ class DateNormalizer:
         else:
             return 'brazilian'  # Default
     
-    def normalize_dataframe_dates(self, df: pd.DataFrame, date_column: str = 'date') -> pd.DataFrame:
+    def normalize_dataframe_dates(self, df: pd.DataFrame, date_column: str = 'date',
+                                  detected_format: Optional[str] = None) -> pd.DataFrame:
         """
         Normaliza coluna de datas em um DataFrame
+        
+        Com `detected_format` ('brazilian', 'american' ou 'iso') a detecção é pulada e o
+        formato informado é usado (ex.: linhas novas de uma aba cujo formato já é conhecido).
         """
         if date_column not in df.columns:
             logger.error(f"❌ Coluna '{date_column}' não encontrada no DataFrame")
@@ -262,29 +299,19 @@ class DateNormalizer:
         
         logger.info(f"🔄 Normalizando datas na coluna '{date_column}'...")
         
-        # Analisar formato da coluna
-        date_analysis = self.analyze_date_column(df[date_column].astype(str).tolist())
+        # Planilhas diárias repetem a mesma data em várias linhas: trabalhar só com os valores distintos
+        raw_values = df[date_column].astype(str).str.strip()
+        unique_values = pd.Series(pd.unique(raw_values), dtype=object)
         
-        if date_analysis['format'] == 'unknown':
-            logger.warning(f"⚠️ Formato de data não detectado, tentando detecção inteligente...")
-            smart_format = self._smart_format_detection(df[date_column].astype(str).tolist())
-            logger.info(f"🔍 Formato detectado inteligentemente: {smart_format}")
-            self.detected_format = smart_format
-        
-        # Normalizar cada data
-        normalized_dates = []
-        failed_dates = []
-        
-        for idx, date_val in df[date_column].items():
-            normalized = self.normalize_date(str(date_val))
-            if normalized:
-                normalized_dates.append(normalized)
-            else:
-                failed_dates.append(str(date_val))
-                normalized_dates.append(None)
+        if detected_format:
+            self.detected_format = detected_format
+        else:
+            self.detect_column_format(unique_values)
+        mapping = self._normalize_unique_values(unique_values)
         
         # Atualizar DataFrame
-        df[date_column] = normalized_dates
+        df[date_column] = raw_values.map(mapping)
+        failed_dates = [value for value, normalized in mapping.items() if normalized is None]
         
         # Remover linhas com datas inválidas
         original_count = len(df)
@@ -292,12 +319,79 @@ class DateNormalizer:
         final_count = len(df)
         
         if failed_dates:
-            logger.warning(f"⚠️ {len(failed_dates)} datas não puderam ser normalizadas: {failed_dates[:5]}")
+            logger.warning(f"⚠️ {len(failed_dates)} datas distintas não puderam ser normalizadas: {failed_dates[:5]}")
         
         logger.info(f"✅ Datas normalizadas: {original_count} → {final_count} (removidas {original_count - final_count})")
         
         return df
     
+    def detect_column_format(self, unique_values: pd.Series) -> Dict[str, Any]:
+        """
+        Detectar o formato predominante de uma coluna (vetorizado, sobre valores distintos).
+        
+        Mesmo critério de analyze_date_column: um valor conta para cada formato em que
+        forma uma data válida; em empate prevalece o brasileiro.
+        """
+        parts = unique_values.str.extract(_DMY_DATE_RE)
+        first = pd.to_numeric(parts['first'], errors='coerce')
+        second = pd.to_numeric(parts['second'], errors='coerce')
+        year = pd.to_numeric(parts['year'], errors='coerce')
+        
+        scores = {
+            'brazilian': int(_valid_ymd(year, second, first).sum()),
+            'american': int(_valid_ymd(year, first, second).sum()),
+            'iso': int(unique_values.str.match(_ISO_DATE_RE, na=False).sum()),
+        }
+        total = sum(scores.values())
+        if total == 0:
+            logger.warning("⚠️ Formato de data não detectado, usando brasileiro como padrão")
+            self.detected_format = 'brazilian'
+            self.confidence_score = 0.0
+            return {"format": "unknown", "confidence": 0.0, "scores": scores}
+        
+        best_format = max(scores, key=scores.get)
+        self.detected_format = best_format
+        self.confidence_score = scores[best_format] / total
+        
+        logger.info(f"📊 Formato detectado: {best_format.upper()} (confiança: {self.confidence_score:.1%})")
+        logger.info(f"📋 Scores: Brasileiro={scores['brazilian']}, Americano={scores['american']}, ISO={scores['iso']}")
+        
+        return {"format": best_format, "confidence": self.confidence_score, "scores": scores}
+    
+    def _normalize_unique_values(self, unique_values: pd.Series) -> Dict[str, Optional[str]]:
+        """
+        Converter valores distintos para YYYY-MM-DD usando o formato detectado.
+        
+        Datas ISO são mantidas como estão (como em normalize_date). As demais são
+        convertidas com um `pd.to_datetime(format=...)` por separador; valores que não
+        se encaixam no formato (ou fora do intervalo aceito) caem em normalize_date.
+        """
+        mapping: Dict[str, Optional[str]] = {}
+        
+        iso_mask = unique_values.str.match(_ISO_DATE_RE, na=False)
+        for value in unique_values[iso_mask]:
+            mapping[value] = value
+        
+        remaining = unique_values[~iso_mask]
+        separators = remaining.str.extract(_DMY_DATE_RE)['sep']
+        day_first = self.detected_format != 'american'
+        for sep in separators.dropna().unique():
+            values = remaining[separators == sep]
+            date_format = f'%d{sep}%m{sep}%Y' if day_first else f'%m{sep}%d{sep}%Y'
+            parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+            valid = _in_accepted_range(parsed)
+            formatted = parsed.dt.strftime('%Y-%m-%d')
+            for value, is_valid, normalized in zip(values, valid, formatted):
+                if is_valid:
+                    mapping[value] = normalized
+        
+        # Valores fora do formato detectado: análise individual (uma vez por valor distinto)
+        for value in unique_values:
+            if value not in mapping:
+                mapping[value] = self.normalize_date(value)
+        
+        return mapping
+    
     def validate_date_range(self, dates: List[str], expected_start: str = None, expected_end: str = None) -> Dict[str, Any]:
         """
         Valida se o range de datas faz sentido
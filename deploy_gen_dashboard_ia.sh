@@ -35,6 +35,21 @@ REQUIRED_FILES=(
     "config.py"
     "gunicorn.conf.py"
     "date_normalizer.py"
+    "numeric_parsing.py"
+    "dashboard_cache.py"
+    "gcs_artifact_reader.py"
+    "gcs_storage.py"
+    "dashboard_manifest.py"
+    "sheet_revisions.py"
+    "report_row_cache.py"
+    "daily_columns.py"
+    "json_payload.py"
+    "footfall_parsing.py"
+    "footfall_clusters.py"
+    "footfall_merge.py"
+    "user_lookup_index.py"
+    "app_metrics.py"
+    "request_tracing.py"
     "requirements.txt"
     "Dockerfile"
 )
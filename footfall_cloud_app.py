@@ -108,8 +108,10 @@ def trigger_footfall_update():
         # Importar e executar processador de footfall
         from footfall_processor import FootfallProcessor
         
+        # {"force": true} reprocessa mesmo sem alterações na planilha
+        payload = request.get_json(silent=True) or {}
         processor = FootfallProcessor()
-        success = processor.run_footfall_update()
+        success = processor.run_footfall_update(force=bool(payload.get("force")))
         
         last_run_status = {
             "status": "success" if success else "failed",
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Agrupamento espacial dos pontos de Footfall no servidor.
+
+Redes grandes de lojas têm milhares de pontos, e os dashboards recebiam todos
+eles inline (footfall_points / footfall_sources[].points) para agrupar no
+navegador. FootfallClusterIndex projeta os pontos em Web Mercator e
+pré-agrega uma grade por nível de zoom: cada célula de `cell_px` pixels vira
+um cluster com contagem, soma de usuários, taxa média ponderada por usuários e
+centróide. Os níveis são montados do zoom máximo para o mínimo, somando as
+células filhas (a célula do zoom z contém exatamente 4 células do zoom z+1).
+
+A consulta por bbox + zoom devolve só os clusters visíveis; acima do zoom
+máximo os pontos vão individualmente. Com `trim_footfall_payload`, o payload
+da campanha leva apenas um resumo (totais, limites, top lojas) quando a lista
+passa de `inline_max_points`.
+"""
+
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app_metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+# Limite de latitude da projeção Web Mercator
+MAX_MERCATOR_LAT = 85.05112878
+_TOP_STORES = 5
+
+
+def _mercator(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Coordenadas normalizadas [0, 1) da projeção Web Mercator (x para leste, y para o sul)."""
+    lat = np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    x = (lon + 180.0) / 360.0
+    sin = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+
+def _weighted_rate(rate_users: np.ndarray, users: np.ndarray, rate_sum: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """Taxa ponderada por usuários; média simples quando o grupo não tem usuários."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weighted = np.where(users > 0, rate_users / users, rate_sum / np.maximum(count, 1))
+    return weighted
+
+
+class _Level:
+    """Clusters de um nível de zoom (arrays alinhados; `first` = índice de um ponto do cluster)."""
+
+    __slots__ = ("cx", "cy", "count", "users", "rate_users", "rate_sum", "lat_sum", "lon_sum", "first")
+
+    def __init__(self, **arrays):
+        for name in self.__slots__:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    def grouped(self, cx: np.ndarray, cy: np.ndarray) -> "_Level":
+        """Agregar as linhas que caem na mesma célula (cx, cy)."""
+        keys = cx << 32 | cy
+        uniques, first_pos, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        size = len(uniques)
+
+        def summed(values: np.ndarray) -> np.ndarray:
+            return np.bincount(inverse, weights=values, minlength=size)
+
+        return _Level(
+            cx=cx[first_pos], cy=cy[first_pos],
+            count=np.rint(summed(self.count)).astype(np.int64),
+            users=summed(self.users), rate_users=summed(self.rate_users), rate_sum=summed(self.rate_sum),
+            lat_sum=summed(self.lat_sum), lon_sum=summed(self.lon_sum),
+            first=self.first[first_pos],
+        )
+
+    def parent(self) -> "_Level":
+        """Nível do zoom anterior: a célula (cx // 2, cy // 2) contém as 4 células filhas."""
+        return self.grouped(self.cx // 2, self.cy // 2)
+
+
+class FootfallClusterIndex:
+    """Grade de clusters pré-agregada por zoom para uma lista de pontos de Footfall."""
+
+    def __init__(self, points: Sequence[Dict[str, Any]], min_zoom: int = 2, max_zoom: int = 16, cell_px: int = 64):
+        self.min_zoom = int(min_zoom)
+        self.max_zoom = max(int(max_zoom), self.min_zoom)
+        self.cell_px = int(cell_px)
+
+        lat, lon, users, rate, names = _point_arrays(points)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        self.lat, self.lon = lat[valid], lon[valid]
+        self.users, self.rate = users[valid], rate[valid]
+        self.names = [name for name, ok in zip(names, valid.tolist()) if ok]
+
+        self.levels: Dict[int, _Level] = {}
+        if len(self.lat):
+            x, y = _mercator(self.lat, self.lon)
+            # Células do zoom máximo: 2^z * 256 / cell_px por eixo
+            cells = (2 ** self.max_zoom) * TILE_SIZE / self.cell_px
+            base = _Level(
+                cx=np.floor(x * cells).astype(np.int64), cy=np.floor(y * cells).astype(np.int64),
+                count=np.ones(len(self.lat), dtype=np.int64),
+                users=self.users.astype(np.float64), rate_users=self.rate * self.users, rate_sum=self.rate.copy(),
+                lat_sum=self.lat.copy(), lon_sum=self.lon.copy(),
+                first=np.arange(len(self.lat)),
+            )
+            level = base.grouped(base.cx, base.cy)
+            for zoom in range(self.max_zoom, self.min_zoom - 1, -1):
+                self.levels[zoom] = level
+                level = level.parent()
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def bounds(self) -> Optional[List[float]]:
+        """[sul, oeste, norte, leste] dos pontos (None se não houver pontos)."""
+        if not len(self.lat):
+            return None
+        return [float(self.lat.min()), float(self.lon.min()), float(self.lat.max()), float(self.lon.max())]
+
+    def query(self, bbox: Optional[Sequence[float]], zoom: float) -> Dict[str, Any]:
+        """
+        Clusters visíveis.
+
+        Args:
+            bbox: [oeste, sul, leste, norte] em graus (None = mundo inteiro); oeste > leste cruza o antimeridiano
+            zoom: Zoom do mapa (arredondado para baixo; acima de max_zoom os pontos vêm individualmente)
+
+        Returns:
+            {"zoom", "clusters": [...], "points": total de pontos visíveis, "users": soma de usuários visíveis}
+        """
+        zoom = int(math.floor(zoom))
+        if zoom > self.max_zoom:
+            return self._query_points(bbox, zoom)
+        level = self.levels.get(max(zoom, self.min_zoom))
+        if level is None:
+            return {"zoom": zoom, "clusters": [], "points": 0, "users": 0}
+
+        count = level.count
+        lat = level.lat_sum / count
+        lon = level.lon_sum / count
+        keep = np.flatnonzero(_in_bbox(lat, lon, bbox))
+        rate = _weighted_rate(level.rate_users, level.users, level.rate_sum, count)
+
+        clusters = []
+        for n, a, b, u, r, first in zip(count[keep].tolist(), lat[keep].tolist(), lon[keep].tolist(),
+                                         level.users[keep].tolist(), rate[keep].tolist(), level.first[keep].tolist()):
+            if n == 1:
+                clusters.append(self._point(first))
+            else:
+                clusters.append({"type": "cluster", "lat": a, "lon": b, "count": n, "users": int(round(u)), "rate": r})
+        return {
+            "zoom": zoom,
+            "clusters": clusters,
+            "points": int(count[keep].sum()),
+            "users": int(round(float(level.users[keep].sum()))),
+        }
+
+    def _query_points(self, bbox: Optional[Sequence[float]], zoom: int) -> Dict[str, Any]:
+        keep = np.flatnonzero(_in_bbox(self.lat, self.lon, bbox))
+        return {
+            "zoom": zoom,
+            "clusters": [self._point(i) for i in keep.tolist()],
+            "points": int(len(keep)),
+            "users": int(self.users[keep].sum()),
+        }
+
+    def _point(self, i: int) -> Dict[str, Any]:
+        return {
+            "type": "point", "lat": float(self.lat[i]), "lon": float(self.lon[i]), "count": 1,
+            "name": self.names[i], "users": int(self.users[i]), "rate": float(self.rate[i]),
+        }
+
+
+def _in_bbox(lat: np.ndarray, lon: np.ndarray, bbox: Optional[Sequence[float]]) -> np.ndarray:
+    if not bbox:
+        return np.ones(len(lat), dtype=bool)
+    west, south, east, north = (float(v) for v in bbox)
+    inside = (lat >= south) & (lat <= north)
+    if west <= east:
+        return inside & (lon >= west) & (lon <= east)
+    return inside & ((lon >= west) | (lon <= east))
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return number if math.isfinite(number) else default
+
+
+def _point_arrays(points: Sequence[Dict[str, Any]]):
+    lat = np.array([_number(p.get("lat"), np.nan) for p in points], dtype=np.float64)
+    lon = np.array([_number(p.get("lon"), np.nan) for p in points], dtype=np.float64)
+    users = np.array([_number(p.get("users")) for p in points], dtype=np.float64)
+    rate = np.array([_number(p.get("rate")) for p in points], dtype=np.float64)
+    names = [str(p.get("name") or "") for p in points]
+    return lat, lon, users, rate, names
+
+
+def points_fingerprint(points: Sequence[Dict[str, Any]]) -> str:
+    """Hash do conteúdo dos pontos (para reaproveitar o índice entre requisições)."""
+    lat, lon, users, rate, names = _point_arrays(points)
+    digest = hashlib.sha1()
+    for array in (lat, lon, users, rate):
+        digest.update(array.tobytes())
+    digest.update("\x00".join(names).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def footfall_summary(points: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Totais exibidos nos painéis de Footfall, calculados no servidor:
+    lojas com usuários, soma de usuários, taxa média, melhor loja (taxa), top lojas (usuários) e limites.
+    """
+    lat, lon, users, rate, names = _point_arrays(points)
+    located = np.isfinite(lat) & np.isfinite(lon)
+    with_users = np.flatnonzero(located & (users > 0))
+
+    def point(i: int) -> Dict[str, Any]:
+        return {"lat": float(lat[i]), "lon": float(lon[i]), "name": names[i], "users": int(users[i]), "rate": float(rate[i])}
+
+    best = with_users[np.argmax(rate[with_users])] if len(with_users) else None
+    top = with_users[np.argsort(-users[with_users], kind='stable')[:_TOP_STORES]]
+    bounds = None
+    if located.any():
+        bounds = [float(lat[located].min()), float(lon[located].min()), float(lat[located].max()), float(lon[located].max())]
+    return {
+        "points": int(located.sum()),
+        "stores_with_users": int(len(with_users)),
+        "total_users": int(users[with_users].sum()),
+        "avg_rate": float(rate[with_users].mean()) if len(with_users) else 0.0,
+        "best": point(int(best)) if best is not None else None,
+        "top": [point(int(i)) for i in top.tolist()],
+        "bounds": bounds,
+    }
+
+
+def trim_footfall_payload(data: Dict[str, Any], inline_max_points: int) -> Dict[str, Any]:
+    """
+    Cópia rasa do payload sem as listas de pontos maiores que `inline_max_points`.
+
+    Cada lista removida é trocada por um resumo (`footfall_summary` / `sources[].summary`)
+    e marcada com `clustered: true`; o mapa busca os clusters no endpoint de bbox + zoom.
+    """
+    result = dict(data)
+    points = data.get("footfall_points")
+    if isinstance(points, list) and len(points) > inline_max_points:
+        result["footfall_points"] = []
+        result["footfall_clustered"] = True
+        result["footfall_summary"] = footfall_summary(points)
+    sources = data.get("footfall_sources")
+    if isinstance(sources, list):
+        trimmed = []
+        for source in sources:
+            source_points = (source or {}).get("points")
+            if isinstance(source_points, list) and len(source_points) > inline_max_points:
+                source = dict(source, points=[], clustered=True, summary=footfall_summary(source_points))
+            trimmed.append(source)
+        result["footfall_sources"] = trimmed
+    return result
+
+
+def select_footfall_points(data: Dict[str, Any], source: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """Pontos do payload: todos (footfall_points) ou os de uma fonte multicanal (footfall_sources[].key)."""
+    if not source:
+        return data.get("footfall_points") or []
+    for item in data.get("footfall_sources") or []:
+        if str((item or {}).get("key")) == source:
+            return item.get("points") or []
+    return None
+
+
+class FootfallClusterCache:
+    """
+    Índices recentes por chave (campanha/fonte), reconstruídos quando os pontos mudam.
+
+    Durante `ttl_sec` depois de montado (ou confirmado), `lookup` devolve o índice
+    sem que o chamador precise recarregar os pontos da campanha.
+    """
+
+    def __init__(self, max_entries: int = 32, ttl_sec: float = 60, **index_options):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_sec = max(float(ttl_sec), 0.0)
+        self.index_options = index_options
+        self._entries: "OrderedDict[str, Tuple[str, FootfallClusterIndex, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> Optional[FootfallClusterIndex]:
+        """Índice ainda dentro do TTL, ou None (o chamador carrega os pontos e usa `get`)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[2] < self.ttl_sec:
+                self._entries.move_to_end(key)
+                record_cache("footfall_clusters", True)
+                return entry[1]
+        return None
+
+    def get(self, key: str, points: Sequence[Dict[str, Any]]) -> FootfallClusterIndex:
+        fingerprint = points_fingerprint(points)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == fingerprint:
+                self._entries[key] = (fingerprint, entry[1], time.monotonic())
+                self._entries.move_to_end(key)
+                record_cache("footfall_clusters", True)
+                return entry[1]
+        record_cache("footfall_clusters", False)
+        index = FootfallClusterIndex(points, **self.index_options)
+        with self._lock:
+            self._entries[key] = (fingerprint, index, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(f"🗺️ Índice de clusters de Footfall ({key}): {len(index)} pontos, zooms {index.min_zoom}-{index.max_zoom}")
+        return index
+
+
+_shared_cache: Optional[FootfallClusterCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_cluster_cache() -> FootfallClusterCache:
+    """Cache compartilhado pelo processo, configurado por FOOTFALL_CLUSTER_CONFIG."""
+    global _shared_cache
+    from config import FOOTFALL_CLUSTER_CONFIG
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FootfallClusterCache(
+                max_entries=FOOTFALL_CLUSTER_CONFIG['cache_entries'],
+                ttl_sec=FOOTFALL_CLUSTER_CONFIG['ttl_sec'],
+                min_zoom=FOOTFALL_CLUSTER_CONFIG['min_zoom'],
+                max_zoom=FOOTFALL_CLUSTER_CONFIG['max_zoom'],
+                cell_px=FOOTFALL_CLUSTER_CONFIG['cell_px'],
+            )
+        return _shared_cache
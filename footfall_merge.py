@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Consolidação dos pontos de Footfall de vários canais (multicanal).
+
+A consolidação deduplicava por `(name, float(lat), float(lon))` exatos: a
+mesma loja com coordenadas arredondadas de outro jeito ou com o nome escrito
+um pouco diferente continuava duplicada. Aqui cada ponto:
+
+1. tem as coordenadas "encaixadas" numa grade de `precision` casas decimais
+   (também encurta o JSON) e o nome normalizado (sem acentos, caixa e
+   pontuação);
+2. é comparado, por uma grade hash de células de `radius_m` metros, só com as
+   lojas já aceitas nas 9 células vizinhas — O(n) no total;
+3. se houver uma loja a até `radius_m` metros com nome equivalente, os dois
+   são agregados: usuários somados e taxa ponderada por usuários.
+
+Nomes equivalentes: iguais após normalização, ou com similaridade ≥
+`name_similarity` e os mesmos números ("Loja 101" nunca é "Loja 102"). Nome
+vazio só é agregado a outro ponto na mesma coordenada encaixada.
+
+Registros idênticos (mesmos usuários e taxa) da mesma loja — a mesma aba lida
+por dois canais — contam uma vez só, como na deduplicação exata anterior.
+"""
+
+import math
+import logging
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Metros por grau de latitude (aproximação equiretangular, suficiente para dezenas de metros)
+_METERS_PER_DEGREE = 111_320.0
+_NEIGHBORS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def normalize_store_name(name: Any) -> str:
+    """Nome comparável: sem acentos, minúsculo, só letras/dígitos separados por um espaço."""
+    text = unicodedata.normalize('NFKD', str(name or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in text).split())
+
+
+def _number_tokens(name_key: str) -> List[int]:
+    """Números do nome normalizado (número da loja, filial...), sem zeros à esquerda."""
+    return [int(token) for token in name_key.split() if token.isdigit()]
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class _Store:
+    """Loja consolidada (acumula os registros agregados)."""
+
+    __slots__ = ("point", "name_key", "x", "y", "users", "rate_users", "rate_sum", "records", "signatures")
+
+    def __init__(self, point: Dict[str, Any], name_key: str, x: float, y: float, users: float, rate: float):
+        self.point = point
+        self.name_key = name_key
+        self.x, self.y = x, y
+        self.users = users
+        self.rate_users = rate * users
+        self.rate_sum = rate
+        self.records = 1
+        self.signatures = {(users, rate)}
+
+    def add(self, users: float, rate: float) -> bool:
+        """Agregar um registro; False se for repetição idêntica de um já contado."""
+        if (users, rate) in self.signatures:
+            return False
+        self.signatures.add((users, rate))
+        self.users += users
+        self.rate_users += rate * users
+        self.rate_sum += rate
+        self.records += 1
+        return True
+
+    def result(self) -> Dict[str, Any]:
+        if self.records > 1:
+            self.point["users"] = int(round(self.users))
+            self.point["rate"] = self.rate_users / self.users if self.users > 0 else self.rate_sum / self.records
+        return self.point
+
+
+class FootfallMerger:
+    """Deduplicação espacial dos pontos de Footfall (ver docstring do módulo)."""
+
+    def __init__(self, precision: int = 6, radius_m: float = 15.0, name_similarity: float = 0.92):
+        self.precision = int(precision)
+        self.radius_m = max(float(radius_m), 0.0)
+        self.name_similarity = float(name_similarity)
+
+    def _same_store(self, a: str, b: str, same_coordinate: bool = False) -> bool:
+        if not a or not b:
+            # Nome vazio não é curinga: só a mesma coordenada identifica a loja
+            return same_coordinate
+        if a == b:
+            return True
+        if _number_tokens(a) != _number_tokens(b):
+            return False
+        return SequenceMatcher(None, a, b).ratio() >= self.name_similarity
+
+    def merge(self, points: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Consolidar os pontos (a ordem da primeira ocorrência é mantida).
+
+        Returns:
+            (pontos consolidados — dicts novos, a entrada não é alterada; contagens do que foi agregado)
+        """
+        stats = {"input": len(points), "invalid": 0, "exact": 0, "nearby": 0, "repeated": 0}
+        stores: List[_Store] = []
+        exact: Dict[Tuple[str, float, float], _Store] = {}
+        grid: Dict[Tuple[int, int], List[_Store]] = {}
+        cell = self.radius_m or 1.0
+
+        for p in points:
+            lat = _number(p.get("lat"))
+            lon = _number(p.get("lon"))
+            if lat is None or lon is None:
+                stats["invalid"] += 1
+                continue
+            lat, lon = round(lat, self.precision), round(lon, self.precision)
+            users = _number(p.get("users")) or 0.0
+            rate = _number(p.get("rate")) or 0.0
+            name_key = normalize_store_name(p.get("name"))
+
+            store = exact.get((name_key, lat, lon))
+            kind = "exact"
+            # Projeção local em metros para a busca por vizinhos
+            x = lon * _METERS_PER_DEGREE * math.cos(math.radians(lat))
+            y = lat * _METERS_PER_DEGREE
+            cx, cy = int(math.floor(x / cell)), int(math.floor(y / cell))
+            if store is None and self.radius_m > 0:
+                kind = "nearby"
+                best = None
+                for dx, dy in _NEIGHBORS:
+                    for candidate in grid.get((cx + dx, cy + dy), ()):
+                        distance = math.hypot(candidate.x - x, candidate.y - y)
+                        same_coordinate = candidate.point["lat"] == lat and candidate.point["lon"] == lon
+                        if distance <= self.radius_m and (best is None or distance < best[0]) \
+                                and self._same_store(candidate.name_key, name_key, same_coordinate):
+                            best = (distance, candidate)
+                store = best[1] if best else None
+
+            if store is not None:
+                stats[kind if store.add(users, rate) else "repeated"] += 1
+                if not store.point.get("name") and p.get("name"):
+                    store.point["name"] = p.get("name")
+                exact.setdefault((name_key, lat, lon), store)
+                continue
+
+            point = dict(p)
+            point["lat"], point["lon"] = lat, lon
+            store = _Store(point, name_key, x, y, users, rate)
+            stores.append(store)
+            exact[(name_key, lat, lon)] = store
+            grid.setdefault((cx, cy), []).append(store)
+
+        stats["output"] = len(stores)
+        return [store.result() for store in stores], stats
+
+
+def merge_footfall_points(points: Sequence[Dict[str, Any]], merger: Optional[FootfallMerger] = None) -> List[Dict[str, Any]]:
+    """Consolidar pontos de todos os canais com a configuração FOOTFALL_MERGE_CONFIG (um resumo no log)."""
+    if merger is None:
+        from config import FOOTFALL_MERGE_CONFIG
+        merger = FootfallMerger(
+            precision=FOOTFALL_MERGE_CONFIG['precision'],
+            radius_m=FOOTFALL_MERGE_CONFIG['radius_m'],
+            name_similarity=FOOTFALL_MERGE_CONFIG['name_similarity'],
+        )
+    merged, stats = merger.merge(points)
+    if stats["output"] != stats["input"]:
+        logger.info(
+            f"🧹 Footfall consolidado: {stats['input']} → {stats['output']} pontos "
+            f"(idênticos: {stats['repeated']}, mesma coordenada: {stats['exact']}, "
+            f"próximos: {stats['nearby']}, inválidos: {stats['invalid']})"
+        )
+    return merged
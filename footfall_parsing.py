@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Conversão dos pontos de Footfall vindos das planilhas (lat/lon, usuários, taxa)
+
+Opera sobre colunas inteiras: a limpeza de texto usa padrões pré-compilados
+aplicados à coluna e as heurísticas de escala rodam como operações NumPy sobre
+o vetor de coordenadas, em vez de uma função por célula.
+
+Estilos de coordenada:
+
+- "sheet" (padrão): heurísticas do extrator de planilhas. Aceita ponto ou
+  vírgula decimal e sinais de menos Unicode; números com vários pontos
+  (separadores de milhar, ex.: "-8.031.797.632.094.190") viram um inteiro que
+  é dividido por 10 até caber no intervalo (lat ±90, lon ±180). Para
+  latitudes (Brasil) ainda divide por 10 quando |lat| > 60, |lat| > 35 e,
+  se a célula tinha 3+ pontos, |lat| > 15.
+- "grouped": todos os separadores são removidos e o ponto decimal volta para
+  depois dos dois primeiros dígitos ("-19.907.788.289" → -19.907788289).
+
+Em vez de um aviso por linha, cada conversão devolve um diagnóstico com as
+contagens e exemplos das linhas descartadas.
+"""
+
+import re
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from numeric_parsing import parse_numeric_series
+
+logger = logging.getLogger(__name__)
+
+COORDINATE_LIMITS = {"lat": 90.0, "lon": 180.0}
+
+_MAX_SAMPLES = 5
+_MINUS_SIGNS = ("-", "−", "–", "—")
+_NOT_DIGIT_OR_DOT = re.compile(r"[^0-9.]")
+_NOT_DIGIT = re.compile(r"[^0-9]")
+_COUNT_SEPARATORS = re.compile(r"[.,\s]")
+
+Values = Union[pd.Series, Iterable[Any]]
+
+
+def _text(values: Values) -> List[str]:
+    """Valores como texto sem espaços nas pontas ('' para vazios/NaN)."""
+    if isinstance(values, pd.Series):
+        values = values.astype(object).where(values.notna(), None).tolist()
+    text = [str(value).strip() if value is not None else '' for value in values]
+    return [value if value.lower() != 'nan' else '' for value in text]
+
+
+def _samples(text: List[str], mask: np.ndarray) -> list:
+    return list(dict.fromkeys(text[i] for i in np.flatnonzero(mask)[:_MAX_SAMPLES * 4]))[:_MAX_SAMPLES]
+
+
+def _sheet_number(value: str) -> float:
+    """
+    Número bruto da célula (sem sinal): vírgula vira ponto quando é o único separador;
+    com vários pontos (separadores de milhar) os dígitos são lidos como inteiro.
+    """
+    if ',' in value and '.' not in value:
+        value = value.replace(',', '.')
+    cleaned = _NOT_DIGIT_OR_DOT.sub('', value)
+    if not cleaned.strip('.'):
+        return np.nan
+    if cleaned.count('.') > 1:
+        cleaned = cleaned.replace('.', '')
+    return float(cleaned)
+
+
+def _coordinates_sheet(text: List[str], max_abs: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Estilo "sheet". Retorna (valores com NaN nos inválidos, máscara de valores reescalados)."""
+    negative = np.fromiter((value[:1] in _MINUS_SIGNS for value in text), dtype=bool, count=len(text))
+    dots = np.fromiter((value.count('.') for value in text), dtype=np.int64, count=len(text))
+    # O sinal vem da célula original (negative)
+    num = np.fromiter((_sheet_number(value) for value in text), dtype=np.float64, count=len(text))
+    # Dígitos demais estouram para inf (inf / 10 continua inf): célula inválida
+    num[~np.isfinite(num)] = np.nan
+
+    # Micro/nano graus: dividir por 10 até caber no intervalo
+    rescaled = np.abs(num) > max_abs
+    over = rescaled.copy()
+    while over.any():
+        num[over] /= 10.0
+        over = np.abs(num) > max_abs
+
+    if max_abs == COORDINATE_LIMITS["lat"]:
+        # Latitudes do Brasil exportadas com uma casa a mais (cada regra vê o resultado da anterior)
+        for limit, only in ((60, None), (35, None), (15, dots >= 3)):
+            extra = np.abs(num) > limit
+            if only is not None:
+                extra &= only
+            num[extra] /= 10.0
+            rescaled |= extra
+
+    flip = negative & (num > 0)
+    num[flip] = -num[flip]
+    return num, rescaled
+
+
+def _coordinates_grouped(text: List[str]) -> np.ndarray:
+    """Estilo "grouped": dígitos com o ponto decimal depois dos dois primeiros."""
+    negative = np.fromiter((value.startswith('-') for value in text), dtype=bool, count=len(text))
+    digits = [_NOT_DIGIT.sub('', value) for value in text]
+    num = np.fromiter((float(f"{value[:2]}.{value[2:]}") if value else np.nan for value in digits),
+                      dtype=np.float64, count=len(digits))
+    return np.where(negative, -num, num)
+
+
+def parse_coordinate_series(values: Values, axis: str = "lat", style: str = "sheet",
+                            column: Optional[str] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Converter uma coluna de latitudes ou longitudes.
+
+    Args:
+        values: Série (ou iterável) com os valores brutos
+        axis: "lat" ou "lon" (define o intervalo válido)
+        style: "sheet" ou "grouped" (ver docstring do módulo)
+        column: Nome da coluna (apenas para o diagnóstico)
+
+    Returns:
+        (array float64 com NaN nas células vazias/inválidas/fora do globo, diagnóstico)
+    """
+    max_abs = COORDINATE_LIMITS[axis]
+    text = _text(values)
+    empty = np.fromiter((not value for value in text), dtype=bool, count=len(text))
+
+    if style == "sheet":
+        num, rescaled = _coordinates_sheet(text, max_abs)
+    elif style == "grouped":
+        num = _coordinates_grouped(text)
+        rescaled = np.zeros(len(text), dtype=bool)
+    else:
+        raise ValueError(f"Estilo de coordenada desconhecido: {style}")
+
+    num[empty] = np.nan
+    invalid = ~empty & np.isnan(num)
+    out_of_range = ~np.isnan(num) & (np.abs(num) > max_abs)
+    num[out_of_range] = np.nan
+
+    diagnostics = {
+        "column": column or axis,
+        "rows": int(len(text)),
+        "empty": int(empty.sum()),
+        "invalid": int(invalid.sum()),
+        "invalid_samples": _samples(text, invalid),
+        "out_of_range": int(out_of_range.sum()),
+        "out_of_range_samples": _samples(text, out_of_range),
+        "rescaled": int((rescaled & ~np.isnan(num)).sum()),
+    }
+    return num, diagnostics
+
+
+def parse_count_series(values: Values) -> np.ndarray:
+    """Contagens (usuários): separadores de milhar e espaços removidos; inválidos = 0."""
+    if isinstance(values, pd.Series) and pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # Já numérica (ex.: convertida por parse_numeric_series)
+        return np.trunc(values.fillna(0).to_numpy(dtype=np.float64)).astype(np.int64)
+    text = [_COUNT_SEPARATORS.sub('', value) or '0' for value in _text(values)]
+    counts = pd.to_numeric(pd.Series(text, dtype=object), errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    return np.trunc(counts).astype(np.int64)
+
+
+def parse_rate_series(values: Values) -> np.ndarray:
+    """Taxas em % ("9,5%", "9.5", "12"); inválidos = 0.0."""
+    text = [value.replace('%', '') for value in _text(values)]
+    rates, _ = parse_numeric_series(pd.Series(text, dtype=object), default=0.0)
+    return rates.to_numpy(dtype=np.float64)
+
+
+def build_footfall_points(names: Sequence[Any], lats: Values, lons: Values,
+                          users: Optional[Values] = None, rates: Optional[Values] = None,
+                          style: str = "sheet", require_name: bool = True, require_users: bool = False
+                          ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Montar os pontos {"lat", "lon", "name", "users", "rate"} a partir das colunas.
+
+    Linhas com coordenada vazia, inválida ou fora do globo (e, conforme `require_name`
+    e `require_users`, sem nome ou sem usuários) são descartadas; o diagnóstico traz as contagens.
+    """
+    name_text = _text(names)
+    size = len(name_text)
+    lat, lat_diag = parse_coordinate_series(lats, "lat", style)
+    lon, lon_diag = parse_coordinate_series(lons, "lon", style)
+    user_counts = parse_count_series(users) if users is not None else np.zeros(size, dtype=np.int64)
+    rate_values = parse_rate_series(rates) if rates is not None else np.zeros(size, dtype=np.float64)
+
+    named = np.fromiter((bool(name) for name in name_text), dtype=bool, count=size) if require_name \
+        else np.ones(size, dtype=bool)
+    located = ~np.isnan(lat) & ~np.isnan(lon)
+    valid = named & located
+    if require_users:
+        valid &= user_counts > 0
+
+    keep = np.flatnonzero(valid)
+    points = [
+        {"lat": a, "lon": b, "name": name, "users": u, "rate": r}
+        for a, b, name, u, r in zip(lat[keep].tolist(), lon[keep].tolist(), [name_text[i] for i in keep.tolist()],
+                                    user_counts[keep].tolist(), rate_values[keep].tolist())
+    ]
+    diagnostics = {
+        "rows": size,
+        "points": len(points),
+        "missing_name": int((~named).sum()),
+        "invalid_coordinates": int((named & ~located).sum()),
+        "without_users": int((named & located & ~valid).sum()),
+        "lat": lat_diag,
+        "lon": lon_diag,
+    }
+    return points, diagnostics
+
+
+def log_footfall_diagnostics(diagnostics: Dict[str, Any], source: str = "Footfall",
+                             log: Optional[logging.Logger] = None):
+    """Um único resumo das linhas descartadas (em vez de um aviso por linha)."""
+    log = log or logger
+    dropped = diagnostics["rows"] - diagnostics["points"]
+    if not dropped:
+        return
+    lat, lon = diagnostics["lat"], diagnostics["lon"]
+    log.info(
+        f"   {source}: {dropped} linhas descartadas de {diagnostics['rows']} "
+        f"(sem nome: {diagnostics['missing_name']}, coordenadas inválidas: {diagnostics['invalid_coordinates']}, "
+        f"sem usuários: {diagnostics['without_users']})"
+    )
+    for diag in (lat, lon):
+        if diag["invalid"] or diag["out_of_range"]:
+            log.warning(
+                f"⚠️ Coluna '{diag['column']}': {diag['invalid']} coordenadas inválidas {diag['invalid_samples']}, "
+                f"{diag['out_of_range']} fora do intervalo {diag['out_of_range_samples']}"
+            )
@@ -7,10 +7,11 @@ Separa a lógica de atualização da aba Footfall dos canais principais
 import os
 import json
 import logging
-import pandas as pd
 import requests
 from datetime import datetime
 from google_sheets_processor import GoogleSheetsProcessor
+from sheet_revisions import build_change_tracker, config_fingerprint
+from footfall_parsing import build_footfall_points, log_footfall_diagnostics
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,10 @@ class FootfallProcessor:
     
     def __init__(self):
         self.processor = None
+        # Revisão (Drive) da planilha de footfall na última atualização publicada
+        self.change_tracker = None
+        # "sheet" quando os pontos vieram da planilha, "static" no fallback
+        self.data_source = None
         
     def download_dashboard_from_github(self):
         """Baixa os arquivos do dashboard do GitHub"""
@@ -74,6 +79,7 @@ class FootfallProcessor:
             if not self.processor:
                 if not self.authenticate():
                     logger.warning("⚠️ Autenticação falhou, usando dados estáticos de footfall")
+                    self.data_source = "static"
                     return self.get_static_footfall_data()
             
             # Importar configuração real
@@ -94,68 +100,26 @@ class FootfallProcessor:
                     logger.info(f"🔍 Dados brutos - {len(footfall_data)} linhas encontradas")
                     logger.info(f"🔍 Primeira linha de dados: {footfall_data.iloc[0].tolist()}")
                     
-                    # Processar dados conforme configuração
-                    processed_data = []
-                    logger.info(f"🔍 Total de linhas para processar: {len(footfall_data)}")
-                    for index, row in footfall_data.iterrows():
-                        logger.info(f"🔍 Processando linha {index}: {row.tolist()}")
-                        
-                        # Verificar se é cabeçalho (se contém texto como "lat", "lon", etc.)
-                        first_col = str(row.iloc[0]).lower()
-                        if first_col in ['lat', 'latitude', 'coord', 'coordenadas']:
-                            logger.info(f"⏭️ Linha {index} pulada (cabeçalho detectado)")
-                            continue
-                        
-                        try:
-                            # Verificar se tem dados válidos
-                            if pd.isna(row.iloc[0]) or pd.isna(row.iloc[1]):
-                                logger.warning(f"⚠️ Linha {index} pulada - dados de coordenadas inválidos")
-                                continue
-                                
-                            # Corrigir formatação das coordenadas
-                            lat_str = str(row.iloc[0])
-                            lon_str = str(row.iloc[1])
-                            
-                            # Se tem muitos pontos, corrigir formatação
-                            if lat_str.count('.') > 1:
-                                # Manter apenas o primeiro ponto (decimal)
-                                lat_parts = lat_str.split('.')
-                                lat_str = lat_parts[0] + '.' + ''.join(lat_parts[1:])
-                            
-                            if lon_str.count('.') > 1:
-                                # Manter apenas o primeiro ponto (decimal)
-                                lon_parts = lon_str.split('.')
-                                lon_str = lon_parts[0] + '.' + ''.join(lon_parts[1:])
-                            
-                            # Converter para float e validar ranges
-                            lat_val = float(lat_str)
-                            lon_val = float(lon_str)
-                            
-                            # Ajustar longitude se estiver fora do range
-                            if lon_val < -180:
-                                # Para coordenadas do Brasil, ajustar para range válido
-                                if lon_val < -300:
-                                    lon_val = lon_val + 300  # Ajuste para longitude do Brasil
-                                else:
-                                    lon_val = lon_val + 34
-                            elif lon_val > 180:
-                                # Subtrair se necessário
-                                lon_val = lon_val - 34
-                            
-                            processed_data.append({
-                                "lat": lat_val,
-                                "lon": lon_val,
-                                "name": str(row.iloc[3]) if len(row) > 3 and not pd.isna(row.iloc[3]) else "",
-                                "users": int(row.iloc[4]) if len(row) > 4 and not pd.isna(row.iloc[4]) else 0,
-                                "rate": float(str(row.iloc[5]).replace(',', '.')) if len(row) > 5 and not pd.isna(row.iloc[5]) else 0.0
-                            })
-                            logger.info(f"✅ Linha {index} processada com sucesso - Users: {int(row.iloc[4]) if len(row) > 4 and not pd.isna(row.iloc[4]) else 0}")
-                        except (ValueError, IndexError) as e:
-                            logger.warning(f"⚠️ Erro ao processar linha {index}: {row.tolist()} - {e}")
-                            continue
+                    # Colunas: lat, lon, -, nome, usuários, taxa (convertidas por coluna)
+                    first_col = footfall_data.iloc[:, 0].astype(str).str.strip().str.lower()
+                    rows = footfall_data[~first_col.isin(['lat', 'latitude', 'coord', 'coordenadas'])]
+
+                    def column(i):
+                        return rows.iloc[:, i] if rows.shape[1] > i else [None] * len(rows)
+
+                    processed_data, diagnostics = build_footfall_points(
+                        names=column(3),
+                        lats=column(0),
+                        lons=column(1),
+                        users=column(4),
+                        rates=column(5),
+                        require_name=False,
+                    )
+                    log_footfall_diagnostics(diagnostics, source="Footfall Data", log=logger)
                     
                     if processed_data:
                         logger.info(f"✅ {len(processed_data)} pontos de footfall coletados da planilha")
+                        self.data_source = "sheet"
                         return processed_data
                 
             except Exception as e:
@@ -163,6 +127,7 @@ class FootfallProcessor:
             
             # Fallback para dados estáticos
             logger.warning("⚠️ Usando dados estáticos como fallback")
+            self.data_source = "static"
             footfall_data = self.get_static_footfall_data()
             
             logger.info(f"✅ {len(footfall_data)} pontos de footfall coletados")
@@ -297,11 +262,36 @@ class FootfallProcessor:
             logger.error(f"❌ Erro ao atualizar dashboard footfall: {e}")
             return False
     
-    def run_footfall_update(self):
-        """Executa atualização completa de footfall"""
+    def check_sheet_changes(self, force=False):
+        """Compara a revisão da planilha de footfall com a da última atualização publicada (None = atualizar)"""
+        try:
+            if not self.processor and not self.authenticate():
+                return None
+            if self.change_tracker is None:
+                self.change_tracker = build_change_tracker('footfall', credentials=self.processor.credentials)
+            if self.change_tracker is None:
+                return None
+            from footfall_config import FOOTFALL_SHEETS_CONFIG
+            footfall_config = FOOTFALL_SHEETS_CONFIG["Footfall Data"]
+            return self.change_tracker.check(
+                [footfall_config["sheet_id"]],
+                context=config_fingerprint(footfall_config),
+                force=force
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Detecção de mudanças indisponível, atualizando mesmo assim: {e}")
+            return None
+    
+    def run_footfall_update(self, force=False):
+        """Executa atualização completa de footfall (pulada se a planilha não mudou)"""
         try:
             logger.info("🗺️ Iniciando atualização de footfall...")
             
+            change_check = self.check_sheet_changes(force=force)
+            if change_check is not None and not change_check.should_run:
+                logger.info(f"⏭️ Planilha de footfall sem alterações ({change_check.summary()}), pulando")
+                return True
+            
             # Coletar dados
             footfall_data = self.get_footfall_data()
             if not footfall_data:
@@ -315,9 +305,14 @@ class FootfallProcessor:
             
             # Fazer commit e push
             try:
-                self.commit_and_push()
+                published = self.commit_and_push()
             except Exception as e:
                 logger.warning(f"⚠️ Erro no commit/push: {e}")
+                published = False
+            
+            # Só dados reais publicados dispensam as próximas execuções
+            if change_check is not None and published and self.data_source == "sheet":
+                self.change_tracker.record(change_check)
             
             logger.info("🎉 Atualização de footfall concluída com sucesso!")
             return True
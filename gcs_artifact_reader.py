@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Leitura de artefatos do Google Cloud Storage em streaming.
+
+Substitui o padrão `blob.exists()` + `blob.download_as_text()` (duas idas ao
+GCS e o corpo inteiro decodificado em memória) por um único GET condicional
+na API de mídia do GCS:
+
+- 404 é tratado como "não existe" (sem chamada extra de metadados);
+- com `if_generation_not_match`, 304 indica que a cópia local ainda é válida;
+- o corpo é lido em blocos, sem decodificar, preservando o Content-Encoding
+  armazenado (ex.: gzip) para ser repassado ao navegador.
+"""
+
+import zlib
+import logging
+from typing import Dict, Any, Iterable, Iterator, Optional
+from urllib.parse import quote
+
+from gcs_storage import call_with_retry, TransientStorageError, TRANSIENT_STATUS_CODES
+from app_metrics import timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_API_BASE_URL = "https://storage.googleapis.com"
+
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"
+STATUS_NOT_MODIFIED = "not_modified"
+
+
+class GcsArtifact:
+    """Resultado de um GET no GCS; o corpo é consumido uma única vez via iter_chunks()/read()."""
+
+    def __init__(self, status: str, response=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.status = status
+        self._response = response
+        self.chunk_size = chunk_size
+        headers = response.headers if response is not None else {}
+        generation = headers.get("x-goog-generation")
+        self.generation: Optional[int] = int(generation) if generation else None
+        self.content_type: str = headers.get("Content-Type") or "application/octet-stream"
+        self.content_encoding: Optional[str] = headers.get("Content-Encoding") or None
+        # x-goog-hash: "crc32c=...,md5=..." (md5 ausente em objetos compostos)
+        self.md5: Optional[str] = None
+        for part in (headers.get("x-goog-hash") or "").split(","):
+            algorithm, _, value = part.strip().partition("=")
+            if algorithm == "md5" and value:
+                self.md5 = value
+        length = headers.get("Content-Length")
+        self.size: Optional[int] = int(length) if length else None
+
+    @property
+    def exists(self) -> bool:
+        return self.status != STATUS_MISSING
+
+    def http_headers(self, decode: bool = False) -> Dict[str, Any]:
+        """
+        Cabeçalhos para repassar o artefato ao cliente.
+
+        Com `decode=True` (cliente sem suporte ao encoding armazenado) o corpo vai
+        descompactado (ver gunzip_chunks): sem Content-Encoding nem Content-Length.
+        """
+        headers = {"Content-Type": self.content_type}
+        if self.content_encoding:
+            headers["Vary"] = "Accept-Encoding"
+            if decode:
+                return headers
+            headers["Content-Encoding"] = self.content_encoding
+        if self.size is not None:
+            headers["Content-Length"] = str(self.size)
+        return headers
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Iterar o corpo em blocos (bytes como armazenados, sem descompressão)."""
+        if self._response is None:
+            return
+        try:
+            for chunk in self._response.raw.stream(self.chunk_size, decode_content=False):
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+
+    def read(self) -> bytes:
+        """Ler o corpo inteiro (para quem precisa inspecionar o conteúdo)."""
+        return b"".join(self.iter_chunks())
+
+    def read_text(self, encoding: str = "utf-8") -> str:
+        """Ler o corpo como texto, descompactando gzip se necessário."""
+        data = self.read()
+        if self.content_encoding == "gzip":
+            import gzip
+            data = gzip.decompress(data)
+        return data.decode(encoding)
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
+def gunzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Descompactar em streaming um corpo gzip lido em blocos."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def _media_url(bucket, gcs_path: str) -> str:
+    connection = getattr(bucket.client, "_connection", None)
+    base_url = getattr(connection, "API_BASE_URL", None) or DEFAULT_API_BASE_URL
+    return f"{base_url.rstrip('/')}/download/storage/v1/b/{bucket.name}/o/{quote(gcs_path, safe='')}"
+
+
+def get_artifact(bucket, gcs_path: str, if_generation_not_match: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, timeout: int = 60) -> GcsArtifact:
+    """
+    Fazer um único GET (condicional) de um objeto do GCS.
+
+    Retorna um GcsArtifact com status:
+    - "ok": corpo disponível em streaming;
+    - "missing": objeto não existe (404);
+    - "not_modified": geração igual a `if_generation_not_match` (304).
+    """
+    # Substituto local (STORAGE_BACKEND=local) atende o mesmo contrato sem HTTP
+    open_artifact = getattr(bucket, "open_artifact", None)
+    if open_artifact is not None:
+        return open_artifact(gcs_path, if_generation_not_match=if_generation_not_match, chunk_size=chunk_size)
+
+    params = {"alt": "media"}
+    if if_generation_not_match:
+        params["ifGenerationNotMatch"] = str(if_generation_not_match)
+
+    def _request():
+        response = bucket.client._http.request(
+            "GET",
+            _media_url(bucket, gcs_path),
+            params=params,
+            # Pedir gzip evita a descompressão no servidor e preserva o encoding armazenado
+            headers={"Accept-Encoding": "gzip"},
+            stream=True,
+            timeout=timeout,
+        )
+        if response.status_code in TRANSIENT_STATUS_CODES:
+            response.close()
+            raise TransientStorageError(f"GCS GET {gcs_path} retornou {response.status_code}")
+        return response
+
+    with timed("gcs_read"):
+        response = call_with_retry(_request)
+
+    if response.status_code == 404:
+        response.close()
+        return GcsArtifact(STATUS_MISSING)
+    if response.status_code == 304:
+        response.close()
+        return GcsArtifact(STATUS_NOT_MODIFIED)
+    if response.status_code != 200:
+        message = response.text[:200]
+        response.close()
+        raise RuntimeError(f"GCS GET {gcs_path} retornou {response.status_code}: {message}")
+
+    return GcsArtifact(STATUS_OK, response, chunk_size=chunk_size)
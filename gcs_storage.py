@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Camada única de acesso ao Google Cloud Storage.
+
+Cada `storage.Client()` criado ad hoc refaz a descoberta de credenciais e abre
+uma nova sessão HTTP. Aqui o processo mantém:
+
+- um único cliente, com sessão autenticada e pool de conexões dimensionado;
+- handles de bucket reaproveitados;
+- retentativas com backoff exponencial centralizadas (`call_with_retry`).
+
+Com STORAGE_BACKEND=local o mesmo contrato é atendido por um substituto em
+disco (LocalStorageClient), útil para testes e benchmarks offline.
+"""
+
+import os
+import time
+import base64
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config import GCS_STORAGE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DASHBOARDS_BUCKET = 'south-media-ia-database-452311'
+
+# Status HTTP que indicam falha transitória do GCS
+TRANSIENT_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class TransientStorageError(Exception):
+    """Falha transitória do storage (pode ser repetida)."""
+
+
+def _transient_exceptions() -> tuple:
+    errors = [TransientStorageError, ConnectionError, TimeoutError]
+    try:
+        import requests
+        errors += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    except ImportError:
+        pass
+    try:
+        from google.api_core import exceptions as api_exceptions
+        errors += [
+            api_exceptions.TooManyRequests,
+            api_exceptions.InternalServerError,
+            api_exceptions.BadGateway,
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.GatewayTimeout,
+        ]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+_TRANSIENT_EXCEPTIONS = _transient_exceptions()
+
+
+def call_with_retry(func: Callable, *args, attempts: Optional[int] = None,
+                    base_delay: Optional[float] = None, max_delay: Optional[float] = None, **kwargs):
+    """
+    Executar `func(*args, **kwargs)` repetindo falhas transitórias com backoff exponencial.
+
+    Erros não transitórios (404, 403, dados inválidos...) são propagados na hora.
+    """
+    attempts = max(1, attempts or GCS_STORAGE_CONFIG["retry_attempts"])
+    delay = GCS_STORAGE_CONFIG["retry_base_delay"] if base_delay is None else base_delay
+    max_delay = GCS_STORAGE_CONFIG["retry_max_delay"] if max_delay is None else max_delay
+
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except _TRANSIENT_EXCEPTIONS as e:
+            if attempt >= attempts:
+                raise
+            logger.warning(f"⚠️ GCS: tentativa {attempt}/{attempts} falhou ({e}), repetindo em {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+# ---------------------------------------------------------------------------
+# Cliente compartilhado
+# ---------------------------------------------------------------------------
+
+_client_lock = threading.Lock()
+_client: Any = None
+_client_pid: Optional[int] = None
+_buckets: Dict[str, Any] = {}
+
+
+def _create_gcs_client():
+    import google.auth
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage
+    from requests.adapters import HTTPAdapter
+
+    credentials, project = google.auth.default(
+        scopes=["https://www.googleapis.com/auth/devstorage.full_control"]
+    )
+    session = AuthorizedSession(credentials)
+    pool_size = GCS_STORAGE_CONFIG["pool_maxsize"]
+    # Retentativas ficam em call_with_retry; o adapter só dimensiona o pool
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+
+def get_storage_client():
+    """Obter o cliente de storage do processo (criado uma vez por processo)."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _client_lock:
+        # Com preload_app o módulo é importado antes do fork: cada worker cria sua própria sessão
+        if _client is None or _client_pid != pid:
+            if GCS_STORAGE_CONFIG["backend"] == "local":
+                _client = LocalStorageClient(GCS_STORAGE_CONFIG["local_root"])
+                logger.info(f"🗂️ Storage local em uso: {GCS_STORAGE_CONFIG['local_root']}")
+            else:
+                _client = _create_gcs_client()
+            _client_pid = pid
+            _buckets.clear()
+    return _client
+
+
+def get_bucket(name: str = DASHBOARDS_BUCKET):
+    """Obter handle de bucket reaproveitado (sem chamada de rede)."""
+    client = get_storage_client()
+    bucket = _buckets.get(name)
+    if bucket is None:
+        with _client_lock:
+            bucket = _buckets.get(name)
+            if bucket is None:
+                bucket = client.bucket(name)
+                _buckets[name] = bucket
+    return bucket
+
+
+def reset_storage_client():
+    """Descartar cliente e handles (ex.: após trocar STORAGE_BACKEND em testes)."""
+    global _client, _client_pid
+    with _client_lock:
+        _client = None
+        _client_pid = None
+        _buckets.clear()
+
+
+# ---------------------------------------------------------------------------
+# Substituto local (mesma interface usada pela aplicação)
+# ---------------------------------------------------------------------------
+
+class _LocalMediaStream:
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+
+    def stream(self, chunk_size: int, decode_content: bool = False) -> Iterator[bytes]:
+        while True:
+            chunk = self._file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _LocalMediaResponse:
+    """Imita a resposta HTTP de mídia do GCS consumida por GcsArtifact."""
+
+    def __init__(self, path: str, headers: Dict[str, str]):
+        self.headers = headers
+        self.raw = _LocalMediaStream(path)
+
+    def close(self):
+        self.raw._file.close()
+
+
+class LocalBlob:
+    """Objeto de storage gravado como arquivo em disco."""
+
+    def __init__(self, bucket: "LocalBucket", name: str, generation: Optional[int] = None):
+        self.bucket = bucket
+        self.name = name
+        self.content_type: Optional[str] = None
+        self.content_encoding: Optional[str] = None
+        self.size: Optional[int] = None
+        self.generation: Optional[int] = generation
+        self.md5_hash: Optional[str] = None
+        self.updated = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.bucket.path, *self.name.split('/'))
+
+    def exists(self, **kwargs) -> bool:
+        return os.path.isfile(self.path)
+
+    def reload(self, **kwargs):
+        if not self.exists():
+            from google.api_core.exceptions import NotFound
+            raise NotFound(f"{self.bucket.name}/{self.name}")
+        stat = os.stat(self.path)
+        from datetime import datetime, timezone
+        self.size = stat.st_size
+        self.generation = stat.st_mtime_ns
+        self.updated = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        with open(self.path, 'rb') as f:
+            self.md5_hash = base64.b64encode(hashlib.md5(f.read()).digest()).decode('ascii')
+
+    def _check_generation(self, if_generation_match: Optional[int]):
+        if if_generation_match is not None:
+            # 0 = o objeto não pode existir (mesma semântica do GCS)
+            current = None
+            if self.exists():
+                self.reload()
+                current = self.generation
+            if (current or 0) != if_generation_match:
+                from google.api_core.exceptions import PreconditionFailed
+                raise PreconditionFailed(f"{self.name}: geração {self.generation} != {if_generation_match}")
+
+    def _write(self, data: bytes, content_type: Optional[str] = None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+        if content_type:
+            self.content_type = content_type
+        self.reload()
+
+    def upload_from_string(self, data, content_type: Optional[str] = None,
+                           if_generation_match: Optional[int] = None, **kwargs):
+        self._check_generation(if_generation_match)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._write(data, content_type)
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None, **kwargs):
+        with open(filename, 'rb') as f:
+            self._write(f.read(), content_type)
+
+    def download_as_bytes(self, if_generation_match: Optional[int] = None, **kwargs) -> bytes:
+        self._check_generation(if_generation_match)
+        if not self.exists():
+            from google.api_core.exceptions import NotFound
+            raise NotFound(f"{self.bucket.name}/{self.name}")
+        self.reload()
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def download_as_text(self, encoding: str = 'utf-8', **kwargs) -> str:
+        return self.download_as_bytes(**kwargs).decode(encoding)
+
+    def download_to_filename(self, filename: str, if_generation_match: Optional[int] = None, **kwargs):
+        data = self.download_as_bytes(if_generation_match=if_generation_match)
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+    def delete(self, **kwargs):
+        if not self.exists():
+            from google.api_core.exceptions import NotFound
+            raise NotFound(f"{self.bucket.name}/{self.name}")
+        os.remove(self.path)
+
+
+class LocalBucket:
+    """Bucket mapeado para um diretório."""
+
+    def __init__(self, client: "LocalStorageClient", name: str):
+        self.client = client
+        self.name = name
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.client.root, self.name)
+
+    def blob(self, name: str, generation: Optional[int] = None) -> LocalBlob:
+        return LocalBlob(self, name, generation=generation)
+
+    def get_blob(self, name: str) -> Optional[LocalBlob]:
+        blob = LocalBlob(self, name)
+        if not blob.exists():
+            return None
+        blob.reload()
+        return blob
+
+    def list_blobs(self, prefix: str = '', **kwargs) -> Iterator[LocalBlob]:
+        if not os.path.isdir(self.path):
+            return iter(())
+        names = []
+        for root, _, files in os.walk(self.path):
+            for filename in files:
+                if '.tmp-' in filename:
+                    continue
+                rel = os.path.relpath(os.path.join(root, filename), self.path).replace(os.sep, '/')
+                if rel.startswith(prefix):
+                    names.append(rel)
+        return (self.get_blob(name) for name in sorted(names))
+
+    def open_artifact(self, gcs_path: str, if_generation_not_match: Optional[int] = None,
+                      chunk_size: Optional[int] = None):
+        """Equivalente local de gcs_artifact_reader.get_artifact (mesmos status)."""
+        from gcs_artifact_reader import GcsArtifact, STATUS_OK, STATUS_MISSING, STATUS_NOT_MODIFIED, DEFAULT_CHUNK_SIZE
+        blob = self.get_blob(gcs_path)
+        if blob is None:
+            return GcsArtifact(STATUS_MISSING)
+        if if_generation_not_match and blob.generation == if_generation_not_match:
+            return GcsArtifact(STATUS_NOT_MODIFIED)
+        headers = {
+            "x-goog-generation": str(blob.generation),
+            "Content-Type": blob.content_type or "text/html",
+            "Content-Length": str(blob.size),
+            "x-goog-hash": f"md5={blob.md5_hash}",
+        }
+        return GcsArtifact(STATUS_OK, _LocalMediaResponse(blob.path, headers),
+                           chunk_size=chunk_size or DEFAULT_CHUNK_SIZE)
+
+
+class LocalStorageClient:
+    """Substituto de `storage.Client` que grava em `root/<bucket>/<objeto>`."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def bucket(self, name: str) -> LocalBucket:
+        return LocalBucket(self, name)
+
+    def get_bucket(self, name: str) -> LocalBucket:
+        return LocalBucket(self, name)
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Fila de commits em lote para o Git Manager.
+
+Cada notificação de dashboard entra numa fila. Uma thread acumula as notificações
+por uma janela curta e processa o lote com um `git add` só, um commit e um push.
+Assim o custo em git cresce com o número de lotes, não com o número de arquivos.
+
+- Notificações repetidas do mesmo arquivo ainda na fila viram uma entrada só.
+- Arquivos ainda sendo escritos (tamanho instável) voltam para o próximo lote,
+  até `file_wait_timeout`.
+- Falhas de add/commit devolvem o lote para a fila com backoff exponencial, até
+  `max_retries` tentativas por arquivo.
+- Falhas de push mantêm os commits locais pendentes. A próxima tentativa faz
+  `pull --rebase --autostash` e um push só, que cobre todos os commits acumulados.
+- Com `max_pending` arquivos aguardando, `submit` levanta `CommitQueueFull`
+  (back-pressure: o endpoint responde 429).
+"""
+
+import os
+import time
+import logging
+import threading
+import subprocess
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CommitQueueFull(Exception):
+    """Fila cheia: o chamador deve tentar de novo mais tarde."""
+
+    def __init__(self, pending: int, retry_after: float):
+        super().__init__(f"Fila de commits cheia ({pending} arquivos pendentes)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+@dataclass
+class PendingFile:
+    path: Path
+    futures: List[Future] = field(default_factory=list)
+    notifications: int = 0
+    attempts: int = 0
+    first_seen: float = field(default_factory=time.monotonic)
+    queued_at: float = field(default_factory=time.monotonic)
+    last_error: Optional[str] = None
+    commit: Optional[str] = None
+
+
+class GitCommitQueue:
+    """Acumula notificações e faz um commit (e um push) por lote."""
+
+    def __init__(self, git_dir: Path, push: bool = False, remote: str = "origin", branch: str = "main",
+                 batch_window: float = 5.0, max_batch_files: int = 50, max_pending: int = 500,
+                 max_retries: int = 3, retry_delay: float = 2.0, file_wait_timeout: float = 30.0,
+                 stability_delay: float = 1.0):
+        self.git_dir = Path(git_dir)
+        self.push = push
+        self.remote = remote
+        self.branch = branch
+        self.batch_window = batch_window
+        self.max_batch_files = max(1, max_batch_files)
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.file_wait_timeout = file_wait_timeout
+        self.stability_delay = stability_delay
+
+        self._pending: Dict[Path, PendingFile] = {}
+        self._in_flight = 0
+        self._unpushed: List[PendingFile] = []
+        self._push_attempts = 0
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, Any] = {
+            "notifications": 0, "deduplicated": 0, "rejected": 0,
+            "batches": 0, "commits": 0, "pushes": 0, "files_committed": 0,
+            "files_failed": 0, "push_failures": 0, "last_error": None, "last_batch": None,
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def start(self):
+        with self._condition:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="git-commit-queue", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Parar a thread depois de processar o que já está na fila."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    def submit(self, file_path: Path) -> Future:
+        """Enfileirar um arquivo; o Future resolve com o resultado do lote em que ele entrar."""
+        file_path = Path(file_path)
+        future: Future = Future()
+        with self._condition:
+            self.stats["notifications"] += 1
+            entry = self._pending.get(file_path)
+            if entry is None:
+                backlog = len(self._pending) + self._in_flight
+                if backlog >= self.max_pending:
+                    self.stats["rejected"] += 1
+                    raise CommitQueueFull(backlog, retry_after=max(self.batch_window, self._retry_at - time.monotonic()))
+                entry = self._pending[file_path] = PendingFile(file_path)
+            else:
+                self.stats["deduplicated"] += 1
+            entry.notifications += 1
+            entry.futures.append(future)
+            self._condition.notify_all()
+        return future
+
+    def status(self) -> Dict[str, Any]:
+        with self._condition:
+            return dict(
+                self.stats,
+                pending=len(self._pending),
+                in_flight=self._in_flight,
+                unpushed=len(self._unpushed),
+                backoff_sec=round(max(0.0, self._retry_at - time.monotonic()), 1),
+                batch_window_sec=self.batch_window,
+                max_batch_files=self.max_batch_files,
+                max_pending=self.max_pending,
+            )
+
+    # ------------------------------------------------------------------
+    # Thread de processamento
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._process(batch)
+            except Exception as e:
+                logger.error(f"❌ Erro inesperado na fila de commits: {e}")
+                self._requeue_or_fail(batch, str(e))
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+
+    def _next_batch(self) -> Optional[List[PendingFile]]:
+        """Esperar a janela do lote (ou o backoff) e retirar até `max_batch_files` arquivos da fila."""
+        with self._condition:
+            while True:
+                if self._stopping and not self._pending and not self._unpushed:
+                    return None
+                if not self._pending and not self._unpushed:
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                if not self._stopping and self._retry_at > now:
+                    self._condition.wait(self._retry_at - now)
+                    continue
+                if self._pending and not self._stopping and len(self._pending) < self.max_batch_files:
+                    oldest = min(entry.queued_at for entry in self._pending.values())
+                    remaining = oldest + self.batch_window - now
+                    if remaining > 0:
+                        self._condition.wait(remaining)
+                        continue
+                batch = []
+                for path in list(self._pending)[:self.max_batch_files]:
+                    batch.append(self._pending.pop(path))
+                self._in_flight = len(batch)
+                return batch
+
+    def _process(self, batch: List[PendingFile]):
+        ready, waiting = self._split_ready(batch)
+        for entry in waiting:
+            if self._stopping or time.monotonic() - entry.first_seen >= self.file_wait_timeout:
+                logger.warning(f"⚠️ Timeout aguardando arquivo: {entry.path.name}")
+                self._resolve([entry], False, "Arquivo não encontrado após aguardar")
+            else:
+                self._requeue(entry)
+
+        if ready:
+            try:
+                sha = self._commit(ready)
+            except subprocess.CalledProcessError as e:
+                error = (e.stderr or str(e)).strip()
+                logger.error(f"❌ Erro no Git ({' '.join(e.cmd[:2])}): {error}")
+                self._requeue_or_fail(ready, error)
+                return
+            self._consecutive_failures = 0
+            if sha is None:
+                self._resolve(ready, True, "Nenhuma mudança para commitar")
+            elif self.push:
+                for entry in ready:
+                    entry.commit = sha
+                self._unpushed.extend(ready)
+            else:
+                self._resolve(ready, True, "Dashboard commitado com sucesso", commit=sha, batch_size=len(ready))
+
+        if self.push and self._unpushed:
+            self._push_unpushed()
+
+    def _split_ready(self, batch: List[PendingFile]):
+        """Uma checagem de estabilidade para o lote inteiro (tamanho igual antes e depois da pausa)."""
+        def size(path: Path) -> int:
+            try:
+                return path.stat().st_size if os.access(path, os.R_OK) else -1
+            except OSError:
+                return -1
+
+        sizes = {entry.path: size(entry.path) for entry in batch}
+        if any(value > 0 for value in sizes.values()) and self.stability_delay > 0:
+            time.sleep(self.stability_delay)
+        ready, waiting = [], []
+        for entry in batch:
+            before = sizes[entry.path]
+            (ready if before > 0 and size(entry.path) == before else waiting).append(entry)
+        return ready, waiting
+
+    def _git(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(['git', *args], check=True, capture_output=True, text=True, cwd=self.git_dir)
+
+    def _commit(self, entries: List[PendingFile]) -> Optional[str]:
+        """`git add` único + commit dos arquivos do lote; devolve o SHA (ou None sem mudanças)."""
+        paths = []
+        for entry in list(entries):
+            try:
+                paths.append(str(entry.path.relative_to(self.git_dir)))
+            except ValueError:
+                entries.remove(entry)
+                self._resolve([entry], False, f"Arquivo fora do repositório Git: {entry.path}")
+        if not paths:
+            return None
+
+        logger.info(f"🔧 Adicionando {len(paths)} arquivo(s) ao Git")
+        self._git('add', '--', *paths)
+        if subprocess.run(['git', 'diff', '--cached', '--quiet', '--', *paths],
+                          capture_output=True, cwd=self.git_dir).returncode == 0:
+            logger.info(f"ℹ️ Nenhuma mudança para commitar ({len(paths)} arquivo(s))")
+            return None
+
+        if len(entries) == 1:
+            message = f"feat: Add dashboard {entries[0].path.stem}"
+        else:
+            names = "\n".join(f"- {entry.path.stem}" for entry in entries)
+            message = f"feat: Add {len(entries)} dashboards\n\n{names}"
+        self._git('commit', '-m', message, '--', *paths)
+        sha = self._git('rev-parse', 'HEAD').stdout.strip()
+        with self._condition:
+            self.stats["commits"] += 1
+            self.stats["batches"] += 1
+            self.stats["last_batch"] = {
+                "files": len(entries), "commit": sha, "at": datetime.now().isoformat(),
+            }
+        logger.info(f"✅ Commit {sha[:8]} com {len(entries)} dashboard(s)")
+        return sha
+
+    def _push_unpushed(self):
+        """Um push para todos os commits pendentes; depois de uma falha, rebase antes de tentar de novo."""
+        entries = self._unpushed
+        try:
+            if self._push_attempts:
+                # Dashboards regenerados esperando na fila deixam static/ com mudanças não staged
+                self._git('pull', '--rebase', '--autostash', self.remote, self.branch)
+                self._remap_rebased_commits(entries)
+            self._git('push', self.remote, f'HEAD:{self.branch}')
+        except subprocess.CalledProcessError as e:
+            error = (e.stderr or str(e)).strip()
+            self._push_attempts += 1
+            with self._condition:
+                self.stats["push_failures"] += 1
+                self.stats["last_error"] = error
+            logger.error(f"❌ Falha no push ({self._push_attempts}/{self.max_retries}): {error}")
+            if self._push_attempts >= self.max_retries:
+                self._unpushed = []
+                self._push_attempts = 0
+                self._resolve(entries, False, f"Commit local feito, mas o push falhou: {error}")
+            else:
+                self._back_off()
+            return
+
+        logger.info(f"✅ Push realizado com {len(entries)} dashboard(s)")
+        with self._condition:
+            self.stats["pushes"] += 1
+        self._unpushed = []
+        self._push_attempts = 0
+        self._consecutive_failures = 0
+        for entry in entries:
+            self._resolve([entry], True, "Dashboard commitado com sucesso", commit=entry.commit, batch_size=len(entries))
+
+    def _remap_rebased_commits(self, entries: List[PendingFile]):
+        """Depois do rebase os commits locais ganham novos SHAs: são os últimos N de HEAD, na mesma ordem."""
+        old = list(dict.fromkeys(entry.commit for entry in entries if entry.commit))
+        if not old:
+            return
+        new = self._git('rev-list', '--reverse', '-n', str(len(old)), 'HEAD').stdout.split()
+        if len(new) == len(old):
+            mapping = dict(zip(old, new))
+            for entry in entries:
+                entry.commit = mapping.get(entry.commit, entry.commit)
+
+    # ------------------------------------------------------------------
+    # Estado de retentativa
+    # ------------------------------------------------------------------
+    def _back_off(self):
+        self._consecutive_failures += 1
+        delay = self.retry_delay * (2 ** (self._consecutive_failures - 1))
+        with self._condition:
+            self._retry_at = time.monotonic() + delay
+
+    def _requeue(self, entry: PendingFile):
+        """Devolver à fila; se o arquivo foi notificado de novo enquanto isso, juntar as duas entradas."""
+        with self._condition:
+            newer = self._pending.pop(entry.path, None)
+            if newer is not None:
+                entry.futures.extend(newer.futures)
+                entry.notifications += newer.notifications
+            entry.queued_at = time.monotonic()
+            self._pending[entry.path] = entry
+            self._condition.notify_all()
+
+    def _requeue_or_fail(self, entries: List[PendingFile], error: str):
+        with self._condition:
+            self.stats["last_error"] = error
+        self._back_off()
+        for entry in entries:
+            entry.attempts += 1
+            entry.last_error = error
+            if entry.attempts >= self.max_retries:
+                self._resolve([entry], False, f"Falha no commit após {entry.attempts} tentativas: {error}")
+            else:
+                self._requeue(entry)
+
+    def _resolve(self, entries: List[PendingFile], success: bool, message: str, **extra):
+        with self._condition:
+            self.stats["files_committed" if success else "files_failed"] += len(entries)
+        for entry in entries:
+            result = {
+                "success": success,
+                "message": message,
+                "file_path": str(entry.path),
+                "notifications": entry.notifications,
+                **extra,
+            }
+            if success:
+                result["file_committed"] = entry.path.name
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(result)
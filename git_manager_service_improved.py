@@ -7,16 +7,19 @@ Com retry logic e melhor tratamento de paths
 
 import os
 import sys
-import time
 import logging
 import subprocess
 import json
+import atexit
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 
+from git_commit_queue import CommitQueueFull, GitCommitQueue
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -51,10 +54,23 @@ class ImprovedGitManager:
         self.last_check = datetime.now()
         self.max_retries = 3
         self.retry_delay = 2  # segundos
+        self.commit_wait_timeout = float(os.environ.get('GIT_COMMIT_WAIT_TIMEOUT_SEC', '120'))
         
         # Configurar Git
         self._setup_git()
         
+        # Fila de commits: um add/commit/push por lote de notificações
+        self.commit_queue = GitCommitQueue(
+            self.git_dir,
+            push=os.path.exists('/app'),  # push apenas em produção (Cloud Run)
+            batch_window=float(os.environ.get('GIT_COMMIT_BATCH_WINDOW_SEC', '5')),
+            max_batch_files=int(os.environ.get('GIT_COMMIT_BATCH_MAX_FILES', '50')),
+            max_pending=int(os.environ.get('GIT_COMMIT_QUEUE_MAX_PENDING', '500')),
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+        ).start()
+        atexit.register(self.commit_queue.stop, 60)
+        
         logger.info("🚀 Git Manager Melhorado inicializado")
         logger.info(f"📁 Diretório Git: {self.git_dir}")
         logger.info(f"📁 Diretório Static: {self.static_dir}")
@@ -104,29 +120,6 @@ class ImprovedGitManager:
             logger.error(f"❌ Erro ao configurar Git: {e}")
             raise
     
-    def _wait_for_file(self, file_path: Path, max_wait: int = 30) -> bool:
-        """Aguardar arquivo existir com retry logic"""
-        wait_time = 0
-        while wait_time < max_wait:
-            if file_path.exists():
-                # Verificar se arquivo não está sendo escrito (tamanho estável)
-                try:
-                    size1 = file_path.stat().st_size
-                    time.sleep(1)
-                    size2 = file_path.stat().st_size
-                    if size1 == size2 and size1 > 0:
-                        logger.info(f"✅ Arquivo estável: {file_path.name} ({size1} bytes)")
-                        return True
-                except OSError:
-                    pass
-            
-            logger.info(f"⏳ Aguardando arquivo: {file_path.name} ({wait_time}s)")
-            time.sleep(2)
-            wait_time += 2
-        
-        logger.warning(f"⚠️ Timeout aguardando arquivo: {file_path.name}")
-        return False
-    
     def _normalize_path(self, file_path: str) -> Path:
         """Normalizar path do arquivo"""
         # Se é path absoluto, usar como está
@@ -140,111 +133,22 @@ class ImprovedGitManager:
             return self.static_dir / file_path
     
     def commit_file_with_retry(self, file_path: Path) -> bool:
-        """Fazer commit de um arquivo com retry logic"""
-        for attempt in range(self.max_retries):
-            try:
-                logger.info(f"🔄 Tentativa {attempt + 1}/{self.max_retries} para: {file_path.name}")
-                
-                # Aguardar arquivo existir
-                if not self._wait_for_file(file_path):
-                    logger.warning(f"⚠️ Arquivo não encontrado após aguardar: {file_path}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-                        continue
-                    return False
-                
-                # Verificar se o arquivo existe e é acessível
-                if not file_path.exists():
-                    logger.warning(f"⚠️ Arquivo não existe: {file_path}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-                        continue
-                    return False
-                
-                # Verificar permissões
-                if not os.access(file_path, os.R_OK):
-                    logger.warning(f"⚠️ Sem permissão de leitura: {file_path}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-                        continue
-                    return False
-                
-                # Tentar fazer commit
-                if self._commit_file_internal(file_path):
-                    logger.info(f"✅ Commit realizado com sucesso: {file_path.name}")
-                    self.processed_files.add(file_path.name)
-                    return True
-                else:
-                    logger.warning(f"⚠️ Falha no commit: {file_path.name}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-                        continue
-                    return False
-                    
-            except Exception as e:
-                logger.error(f"❌ Erro na tentativa {attempt + 1}: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-                    continue
-                return False
-        
-        logger.error(f"❌ Todas as tentativas falharam para: {file_path.name}")
-        return False
-    
-    def _commit_file_internal(self, file_path: Path) -> bool:
-        """Fazer commit interno de um arquivo"""
+        """Fazer commit de um arquivo (pela fila de lotes, com retry) e aguardar o resultado"""
         try:
-            relative_path = file_path.relative_to(self.git_dir)
-            
-            # Adicionar arquivo ao Git
-            logger.info(f"🔧 Adicionando arquivo: {relative_path}")
-            result = subprocess.run([
-                'git', 'add', str(relative_path)
-            ], check=True, capture_output=True, text=True, cwd=self.git_dir)
-            
-            # Verificar se há mudanças para commitar
-            result = subprocess.run([
-                'git', 'diff', '--cached', '--quiet'
-            ], capture_output=True, cwd=self.git_dir)
-            
-            if result.returncode == 0:
-                logger.info(f"ℹ️ Nenhuma mudança para commitar: {relative_path}")
-                return True
-            
-            # Fazer commit
-            commit_message = f"feat: Add dashboard {file_path.stem}"
-            logger.info(f"🔧 Fazendo commit: {commit_message}")
-            
-            result = subprocess.run([
-                'git', 'commit', '-m', commit_message
-            ], check=True, capture_output=True, text=True, cwd=self.git_dir)
-            
-            logger.info(f"✅ Commit realizado: {result.stdout.strip()}")
-            
-            # Fazer push (apenas em produção)
-            if os.path.exists('/app'):  # Ambiente Cloud Run
-                logger.info(f"🔧 Fazendo push...")
-                result = subprocess.run([
-                    'git', 'push', 'origin', 'main'
-                ], check=True, capture_output=True, text=True, cwd=self.git_dir)
-                
-                logger.info(f"✅ Push realizado com sucesso: {result.stdout.strip()}")
-            else:
-                logger.info("ℹ️ Ambiente local - pulando push")
-            
-            return True
-            
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr if e.stderr else str(e)
-            logger.error(f"❌ Erro no Git: {error_msg}")
-            logger.error(f"❌ Comando que falhou: {e.cmd}")
+            result = self.commit_queue.submit(file_path).result(timeout=self.commit_wait_timeout)
+        except CommitQueueFull as e:
+            logger.warning(f"⚠️ {e}")
             return False
-        except Exception as e:
-            logger.error(f"❌ Erro inesperado: {e}")
+        except FutureTimeoutError:
+            logger.warning(f"⚠️ Commit ainda na fila após {self.commit_wait_timeout}s: {file_path.name}")
             return False
+        if result["success"]:
+            self.processed_files.add(file_path.name)
+        return result["success"]
     
-    def notify_dashboard_created(self, file_path: str, campaign_key: str, client: str, campaign_name: str) -> Dict[str, any]:
-        """Notificar que um novo dashboard foi criado - versão melhorada"""
+    def notify_dashboard_created(self, file_path: str, campaign_key: str, client: str, campaign_name: str,
+                                 wait: bool = True) -> Dict[str, any]:
+        """Notificar que um novo dashboard foi criado - entra no próximo lote de commit"""
         try:
             logger.info(f"🔔 Notificação recebida: Dashboard criado para {client} - {campaign_name}")
             logger.info(f"📄 Arquivo: {file_path}")
@@ -253,22 +157,42 @@ class ImprovedGitManager:
             normalized_path = self._normalize_path(file_path)
             logger.info(f"📁 Path normalizado: {normalized_path}")
             
-            # Tentar fazer commit com retry
-            if self.commit_file_with_retry(normalized_path):
-                logger.info(f"✅ Commit realizado com sucesso para: {normalized_path.name}")
+            try:
+                future = self.commit_queue.submit(normalized_path)
+            except CommitQueueFull as e:
+                logger.warning(f"⚠️ {e}")
+                return {
+                    "success": False,
+                    "queue_full": True,
+                    "retry_after": int(e.retry_after) + 1,
+                    "message": str(e),
+                    "file_path": str(normalized_path)
+                }
+            
+            if not wait:
                 return {
                     "success": True,
-                    "message": "Dashboard commitado com sucesso",
-                    "file_committed": normalized_path.name,
+                    "queued": True,
+                    "message": "Dashboard na fila de commit",
                     "file_path": str(normalized_path)
                 }
-            else:
-                logger.warning(f"⚠️ Falha no commit para: {normalized_path.name}")
+            
+            try:
+                result = future.result(timeout=self.commit_wait_timeout)
+            except FutureTimeoutError:
                 return {
                     "success": False,
-                    "message": "Falha no commit após todas as tentativas",
+                    "queued": True,
+                    "message": f"Commit ainda na fila após {self.commit_wait_timeout}s",
                     "file_path": str(normalized_path)
                 }
+            
+            if result["success"]:
+                self.processed_files.add(normalized_path.name)
+                logger.info(f"✅ Commit realizado com sucesso para: {normalized_path.name}")
+            else:
+                logger.warning(f"⚠️ Falha no commit para: {normalized_path.name} ({result['message']})")
+            return result
                 
         except Exception as e:
             logger.error(f"❌ Erro ao processar notificação: {e}")
@@ -291,7 +215,8 @@ def health_check():
         "version": "2.0",
         "git_dir": str(improved_git_manager.git_dir),
         "static_dir": str(improved_git_manager.static_dir),
-        "environment": "production" if os.path.exists('/app') else "development"
+        "environment": "production" if os.path.exists('/app') else "development",
+        "commit_queue": improved_git_manager.commit_queue.status()
     })
 
 @app.route('/notify', methods=['POST'])
@@ -310,9 +235,15 @@ def notify_dashboard_created():
             campaign_name = data.get('campaign_name')
             
             result = improved_git_manager.notify_dashboard_created(
-                file_path, campaign_key, client, campaign_name
+                file_path, campaign_key, client, campaign_name,
+                wait=data.get('wait', True) is not False
             )
             
+            if result.get('queue_full'):
+                response = jsonify(result)
+                response.status_code = 429
+                response.headers['Retry-After'] = str(result['retry_after'])
+                return response
             return jsonify(result)
         
         return jsonify({
@@ -10,9 +10,12 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import logging
-from config import GOOGLE_SHEETS_CONFIG
+from config import GOOGLE_SHEETS_CONFIG, AUTOMATION_CONFIG
+from numeric_parsing import parse_numeric_column, parse_number_value, SUSPICIOUS_CURRENCY_ABOVE
 
 # Configuração de logging
 logging.basicConfig(
@@ -35,6 +38,9 @@ class GoogleSheetsProcessor:
         else:
             self.credentials_file = credentials_file
         self.service = None
+        self.credentials = None
+        # httplib2 não é thread-safe: cada thread do pool usa sua própria conexão autenticada
+        self._thread_local = threading.local()
         self.authenticate()
     
     def authenticate(self):
@@ -134,6 +140,7 @@ class GoogleSheetsProcessor:
                             with open('token.pickle', 'wb') as token:
                                 pickle.dump(creds, token)
             
+            self.credentials = creds
             self.service = build('sheets', 'v4', credentials=creds)
             logger.info("✅ Autenticação com Google Sheets realizada com sucesso")
             
@@ -141,20 +148,35 @@ class GoogleSheetsProcessor:
             logger.error(f"❌ Erro na autenticação: {e}")
             raise
     
+    def _execute(self, request):
+        """Executa uma requisição da API usando a conexão HTTP da thread atual"""
+        if self.credentials is None:
+            return request.execute()
+        local = getattr(self, '_thread_local', None)
+        if local is None:
+            local = self._thread_local = threading.local()
+        http = getattr(local, 'http', None)
+        if http is None:
+            import httplib2
+            import google_auth_httplib2
+            http = local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return request.execute(http=http)
+    
+    def get_sheet_titles(self, sheet_id):
+        """Obtém o mapa GID -> nome de todas as abas da planilha (uma chamada de metadados)"""
+        metadata = self._execute(self.service.spreadsheets().get(
+            spreadsheetId=sheet_id,
+            fields='sheets.properties(sheetId,title)'
+        ))
+        return {
+            str(sheet['properties']['sheetId']): sheet['properties']['title']
+            for sheet in metadata.get('sheets', [])
+        }
+    
     def get_sheet_name_by_gid(self, sheet_id, gid):
         """Converte GID para nome da aba"""
         try:
-            # Obter metadados da planilha
-            metadata = self.service.spreadsheets().get(spreadsheetId=sheet_id).execute()
-            sheets = metadata.get('sheets', [])
-            
-            # Procurar pela aba com o GID correspondente
-            for sheet in sheets:
-                if str(sheet['properties']['sheetId']) == str(gid):
-                    return sheet['properties']['title']
-            
-            return None
-            
+            return self.get_sheet_titles(sheet_id).get(str(gid))
         except Exception as e:
             logger.error(f"❌ Erro ao buscar nome da aba por GID {gid}: {e}")
             return None
@@ -172,15 +194,57 @@ class GoogleSheetsProcessor:
             elif not range_name:
                 range_name = f"'{sheet_name}'!A:Z" if sheet_name else "A:Z"
             
-            result = self.service.spreadsheets().values().get(
+            result = self._execute(self.service.spreadsheets().values().get(
                 spreadsheetId=sheet_id,
                 range=range_name
-            ).execute()
+            ))
             
-            values = result.get('values', [])
+            return self._values_to_dataframe(result.get('values', []), sheet_name or gid)
             
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler planilha {sheet_name or gid}: {e}")
+            return pd.DataFrame()
+    
+    def read_spreadsheet_channels(self, sheet_id, channels):
+        """
+        Lê as abas de vários canais da mesma planilha com uma chamada de metadados
+        e um único batchGet. Retorna {nome_do_canal: DataFrame}.
+        """
+        frames = {}
+        titles = {}
+        if any(channel_config.get('gid') for _, channel_config in channels):
+            titles = self.get_sheet_titles(sheet_id)
+        
+        requested = []
+        for channel_name, channel_config in channels:
+            gid = channel_config.get('gid')
+            sheet_name = channel_config.get('sheet_name')
+            if gid:
+                sheet_name = titles.get(str(gid))
+                if not sheet_name:
+                    logger.warning(f"⚠️ Não foi possível encontrar aba com GID {gid} ({channel_name})")
+                    frames[channel_name] = pd.DataFrame()
+                    continue
+            range_name = f"'{sheet_name}'!A:Z" if sheet_name else "A:Z"
+            requested.append((channel_name, range_name, sheet_name or gid))
+        
+        if requested:
+            result = self._execute(self.service.spreadsheets().values().batchGet(
+                spreadsheetId=sheet_id,
+                ranges=[range_name for _, range_name, _ in requested]
+            ))
+            value_ranges = result.get('valueRanges', [])
+            for position, (channel_name, _, label) in enumerate(requested):
+                values = value_ranges[position].get('values', []) if position < len(value_ranges) else []
+                frames[channel_name] = self._values_to_dataframe(values, label)
+        
+        return frames
+    
+    def _values_to_dataframe(self, values, label):
+        """Monta o DataFrame a partir das linhas brutas, detectando a linha de cabeçalho"""
+        try:
             if not values:
-                logger.warning(f"⚠️ Nenhum dado encontrado na planilha {sheet_name or gid}")
+                logger.warning(f"⚠️ Nenhum dado encontrado na planilha {label}")
                 return pd.DataFrame()
             
             # Log dos dados brutos para debug
@@ -252,26 +316,27 @@ class GoogleSheetsProcessor:
                 else:
                     logger.warning("⚠️ Não foi possível encontrar cabeçalho válido")
                     return pd.DataFrame()
-            logger.info(f"✅ {len(df)} registros lidos da planilha {sheet_name or gid}")
+            logger.info(f"✅ {len(df)} registros lidos da planilha {label}")
             
             return df
             
         except Exception as e:
-            logger.error(f"❌ Erro ao ler planilha {sheet_name or gid}: {e}")
+            logger.error(f"❌ Erro ao ler planilha {label}: {e}")
             return pd.DataFrame()
     
-    def process_channel_data(self, channel_name, channel_config):
-        """Processa dados de um canal específico"""
+    def process_channel_data(self, channel_name, channel_config, df=None):
+        """Processa dados de um canal específico (df já lido pode ser informado)"""
         try:
             logger.info(f"📊 Processando dados do canal: {channel_name}")
             logger.info(f"🔍 Configuração: {channel_config}")
             
             # Lê dados da planilha
-            df = self.read_sheet_data(
-                channel_config['sheet_id'],
-                sheet_name=channel_config.get('sheet_name'),
-                gid=channel_config.get('gid')
-            )
+            if df is None:
+                df = self.read_sheet_data(
+                    channel_config['sheet_id'],
+                    sheet_name=channel_config.get('sheet_name'),
+                    gid=channel_config.get('gid')
+                )
             
             if df.empty:
                 logger.warning(f"⚠️ Nenhum dado encontrado para {channel_name}")
@@ -287,15 +352,22 @@ class GoogleSheetsProcessor:
             
             # Tratamento especial para Footfall Data (dados geográficos estáticos)
             if channel_name == "Footfall Data":
-                for _, row in df.iterrows():
+                # Colunas numéricas convertidas de uma vez (um diagnóstico por coluna)
+                lats = self._number_column(df, columns['lat'])
+                lons = self._number_column(df, columns['lon'])
+                proximities = self._number_column(df, columns['proximity'])
+                users_values = self._number_column(df, columns['users'])
+                rates = self._number_column(df, columns['rate'])
+                
+                for pos, (_, row) in enumerate(df.iterrows()):
                     try:
                         # Processa dados geográficos
-                        lat = self.parse_number(row.get(columns['lat'], 0))
-                        lon = self.parse_number(row.get(columns['lon'], 0))
-                        proximity = self.parse_number(row.get(columns['proximity'], 0))
+                        lat = lats[pos]
+                        lon = lons[pos]
+                        proximity = proximities[pos]
                         name = str(row.get(columns['name'], ''))
-                        users = self.parse_number(row.get(columns['users'], 0))
-                        rate = self.parse_number(row.get(columns['rate'], 0))
+                        users = users_values[pos]
+                        rate = rates[pos]
                         
                         if not name or users == 0:
                             logger.warning(f"⚠️ Pulando linha Footfall: name='{name}', users={users}")
@@ -433,10 +505,62 @@ class GoogleSheetsProcessor:
                 q75_col = columns.get('q75', '')
                 q100_col = columns.get('q100', '')
             
+            # Colunas resolvidas uma vez por canal (detecção automática se não configuradas)
+            spend_key = columns.get('spend', '')
+            if not spend_key or spend_key not in df.columns:
+                for col in df.columns:
+                    col_str = str(col).strip().lower()
+                    if 'valor investido' in col_str or 'spend' in col_str or 'investido' in col_str:
+                        spend_key = col
+                        break
+            
+            creative_key = columns.get('creative', '')
+            if not creative_key or creative_key not in df.columns:
+                for col in df.columns:
+                    col_str = str(col).strip().lower()
+                    if 'creative' in col_str or 'criativo' in col_str:
+                        creative_key = col
+                        break
+            
+            # Impressions e clicks podem não existir em alguns canais (ex: Netflix)
+            impressions_key = columns.get('impressions', '')
+            if impressions_key and impressions_key not in df.columns:
+                for col in df.columns:
+                    col_str = str(col).strip().lower()
+                    if 'impressions' in col_str or 'imps' in col_str:
+                        impressions_key = col
+                        break
+            
+            clicks_key = columns.get('clicks', '')
+            if clicks_key and clicks_key not in df.columns:
+                for col in df.columns:
+                    col_str = str(col).strip().lower()
+                    if 'clicks' in col_str:
+                        clicks_key = col
+                        break
+            
+            visits_key = columns.get('visits', '')
+            
+            # Para YouTube, usa TrueViews se disponível, senão usa Video Starts
+            if channel_name == "YouTube" and starts_column:
+                starts_key = starts_column
+            else:
+                starts_key = columns.get('starts', '')
+            
+            # Colunas numéricas convertidas de uma vez (um diagnóstico por coluna, sem aviso por linha)
+            spend_values = self._currency_column(df, spend_key)
+            impressions_values = self._number_column(df, impressions_key)
+            clicks_values = self._number_column(df, clicks_key)
+            starts_values = self._number_column(df, starts_key)
+            q25_values = self._number_column(df, q25_col)
+            q50_values = self._number_column(df, q50_col)
+            q75_values = self._number_column(df, q75_col)
+            q100_values = self._number_column(df, q100_col)
+            
             skipped_count = 0
             skip_reasons = {}
             
-            for idx, row in df.iterrows():
+            for pos, (idx, row) in enumerate(df.iterrows()):
                 try:
                     # Processa data
                     date_str = str(row.get(date_column, ''))
@@ -456,65 +580,16 @@ class GoogleSheetsProcessor:
                             logger.warning(f"⚠️ Linha {idx + 1}: Data não formatada: '{date_str}'")
                         continue
                     
-                    # Processa valor investido (detecção automática se não configurado)
-                    spend_key = columns.get('spend', '')
-                    if not spend_key or spend_key not in df.columns:
-                        # Tenta detectar automaticamente
-                        for col in df.columns:
-                            col_str = str(col).strip().lower()
-                            if 'valor investido' in col_str or 'spend' in col_str or 'investido' in col_str:
-                                spend_key = col
-                                break
-                    spend_str = str(row.get(spend_key, '0')) if spend_key else '0'
-                    spend = self.parse_currency(spend_str)
-                    
-                    # Processa outros campos (detecção automática de creative)
-                    creative_key = columns.get('creative', '')
-                    if not creative_key or creative_key not in df.columns:
-                        # Tenta detectar automaticamente
-                        for col in df.columns:
-                            col_str = str(col).strip().lower()
-                            if 'creative' in col_str or 'criativo' in col_str:
-                                creative_key = col
-                                break
+                    spend = spend_values[pos]
                     creative = str(row.get(creative_key, '')) if creative_key else ''
-                    
-                    # Impressions e clicks podem não existir em alguns canais (ex: Netflix)
-                    impressions_key = columns.get('impressions', '')
-                    if impressions_key and impressions_key not in df.columns:
-                        # Tenta detectar automaticamente
-                        for col in df.columns:
-                            col_str = str(col).strip().lower()
-                            if 'impressions' in col_str or 'imps' in col_str:
-                                impressions_key = col
-                                break
-                    impressions = self.parse_number(row.get(impressions_key, 0)) if impressions_key else 0
-                    
-                    clicks_key = columns.get('clicks', '')
-                    if clicks_key and clicks_key not in df.columns:
-                        # Tenta detectar automaticamente
-                        for col in df.columns:
-                            col_str = str(col).strip().lower()
-                            if 'clicks' in col_str:
-                                clicks_key = col
-                                break
-                    clicks = self.parse_number(row.get(clicks_key, 0)) if clicks_key else 0
-                    
-                    visits_key = columns.get('visits', '')
+                    impressions = impressions_values[pos]
+                    clicks = clicks_values[pos]
                     visits = str(row.get(visits_key, '')) if visits_key else ''
-                    
-                    # Processa campos específicos do YouTube e Netflix
-                    # Para YouTube, usa TrueViews se disponível, senão usa Video Starts
-                    if channel_name == "YouTube" and starts_column:
-                        starts = self.parse_number(row.get(starts_column, 0))
-                    else:
-                        starts = self.parse_number(row.get(columns.get('starts', ''), 0))
-                    
-                    # Usa as colunas de quartis detectadas (já foram detectadas antes do loop)
-                    q25 = self.parse_number(row.get(q25_col, 0)) if q25_col else 0
-                    q50 = self.parse_number(row.get(q50_col, 0)) if q50_col else 0
-                    q75 = self.parse_number(row.get(q75_col, 0)) if q75_col else 0
-                    q100 = self.parse_number(row.get(q100_col, 0)) if q100_col else 0
+                    starts = starts_values[pos]
+                    q25 = q25_values[pos]
+                    q50 = q50_values[pos]
+                    q75 = q75_values[pos]
+                    q100 = q100_values[pos]
                     
                     # Cria registro
                     record = {
@@ -597,94 +672,41 @@ class GoogleSheetsProcessor:
     
     def parse_currency(self, value_str):
         """Converte string monetária para float"""
-        try:
-            if not value_str or str(value_str).lower() in ['nan', 'none', '']:
-                return 0.0
-            
-            # Remove caracteres não numéricos exceto vírgula e ponto
-            clean_str = str(value_str).replace('R$', '').replace(' ', '').strip()
-            
-            # Se tem vírgula e ponto, assume formato brasileiro (1.234,56 ou 1.234,5678)
-            if ',' in clean_str and '.' in clean_str:
-                # Formato brasileiro: ponto para milhares, vírgula para decimais
-                clean_str = clean_str.replace('.', '').replace(',', '.')
-            elif ',' in clean_str and '.' not in clean_str:
-                # Se só tem vírgula, verificar se é decimal brasileiro
-                parts = clean_str.split(',')
-                if len(parts) == 2:
-                    decimal_part = parts[1]
-                    # Se a parte decimal tem até 4 dígitos, é decimal brasileiro
-                    # (alguns valores podem ter mais de 2 casas decimais na planilha)
-                    if len(decimal_part) <= 4:
-                        clean_str = clean_str.replace(',', '.')
-                    else:
-                        # Mais de 4 dígitos após vírgula provavelmente é separador de milhares
-                        clean_str = clean_str.replace(',', '')
-                else:
-                    # Múltiplas vírgulas ou sem parte decimal clara
-                    clean_str = clean_str.replace(',', '')
-            
-            result = float(clean_str)
-            
-            # Validação: se o resultado for muito grande (mais de 10 milhões), 
-            # provavelmente houve erro de parsing
-            if result > 10000000:
-                logger.warning(f"⚠️ Valor monetário suspeitamente alto: {value_str} -> {result}")
-                # Tentar novamente assumindo formato brasileiro com vírgula decimal
-                if ',' in str(value_str) and '.' not in str(value_str):
-                    parts = str(value_str).replace('R$', '').replace(' ', '').strip().split(',')
-                    if len(parts) == 2:
-                        result = float(parts[0].replace('.', '') + '.' + parts[1])
-            
-            return result
-            
-        except (ValueError, AttributeError, IndexError) as e:
-            logger.warning(f"⚠️ Erro ao converter valor monetário: {value_str} - {e}")
-            return 0.0
+        return parse_number_value(value_str, default=0.0)
     
     def parse_number(self, value):
         """Converte string numérica para int"""
+        return int(parse_number_value(value, integer=True, default=0))
+    
+    def _currency_column(self, df, key):
+        """Converte uma coluna monetária inteira (0.0 se a coluna não existe)"""
+        if not key or key not in df.columns:
+            return [0.0] * len(df)
+        return parse_numeric_column(
+            df[key], default=0.0, suspicious_above=SUSPICIOUS_CURRENCY_ABOVE, column=str(key), log=logger
+        ).tolist()
+    
+    def _number_column(self, df, key):
+        """Converte uma coluna numérica inteira para int (0 se a coluna não existe)"""
+        if not key or key not in df.columns:
+            return [0] * len(df)
+        return parse_numeric_column(
+            df[key], integer=True, default=0, column=str(key), log=logger
+        ).astype('int64').tolist()
+    
+    def _collect_spreadsheet(self, sheet_id, channels):
+        """Lê uma planilha (uma vez) e processa todos os canais que dependem dela"""
         try:
-            if not value or str(value).lower() in ['nan', 'none', '']:
-                return 0
-            
-            clean_str = str(value).strip()
-            
-            # Se tem vírgula e ponto, assume formato brasileiro (1.234,56)
-            # Para números inteiros, precisamos remover a parte decimal
-            if ',' in clean_str and '.' in clean_str:
-                # Formato brasileiro: ponto para milhares, vírgula para decimais
-                # Para inteiros, usar apenas a parte inteira antes da vírgula
-                clean_str = clean_str.replace('.', '').split(',')[0]
-            elif ',' in clean_str and '.' not in clean_str:
-                # Se só tem vírgula, pode ser decimal brasileiro
-                parts = clean_str.split(',')
-                if len(parts) == 2:
-                    decimal_part = parts[1]
-                    # Se a parte decimal tem até 4 dígitos, é decimal brasileiro
-                    # Para inteiros, usar apenas a parte inteira
-                    if len(decimal_part) <= 4:
-                        clean_str = parts[0]
-                    else:
-                        # Mais de 4 dígitos provavelmente é separador de milhares
-                        clean_str = clean_str.replace(',', '')
-                else:
-                    # Múltiplas vírgulas - usar apenas primeira parte
-                    clean_str = parts[0] if parts else clean_str.replace(',', '')
-            else:
-                # Remover pontos de milhares se houver
-                if '.' in clean_str:
-                    # Verificar se é formato numérico com pontos de milhares
-                    parts = clean_str.split('.')
-                    # Se a última parte tem mais de 3 dígitos, provavelmente não é separador de milhares
-                    if len(parts) > 1 and len(parts[-1]) <= 3:
-                        clean_str = clean_str.replace('.', '')
-            
-            return int(float(clean_str))
-            
-        except (ValueError, AttributeError, IndexError) as e:
-            logger.warning(f"⚠️ Erro ao converter número: {value} - {e}")
-            return 0
+            frames = self.read_spreadsheet_channels(sheet_id, channels)
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler planilha {sheet_id[:20]}...: {e}")
+            frames = {}
+        
+        results = {}
+        for channel_name, channel_config in channels:
+            df = frames.get(channel_name, pd.DataFrame())
+            results[channel_name] = self.process_channel_data(channel_name, channel_config, df=df)
+        return results
     
     def get_all_channels_data(self):
         """Obtém dados de todos os canais"""
@@ -694,32 +716,47 @@ class GoogleSheetsProcessor:
         successful_channels = 0
         failed_channels = []
         
+        # Agrupar canais por planilha: uma leitura (metadados + batchGet) por sheet_id
+        channels_by_sheet = {}
         for channel_name, channel_config in GOOGLE_SHEETS_CONFIG.items():
-            try:
-                # Verificar se sheet_id está configurado
-                sheet_id = channel_config.get('sheet_id', '').strip()
-                if not sheet_id:
-                    logger.warning(f"⚠️ Canal {channel_name} não tem sheet_id configurado, pulando...")
-                    failed_channels.append(f"{channel_name} (sem sheet_id)")
-                    continue
-                
-                logger.info(f"📊 Processando canal: {channel_name} (sheet_id: {sheet_id[:20]}...)")
-                channel_data = self.process_channel_data(channel_name, channel_config)
-                
-                if channel_data:
-                    all_daily_data.extend(channel_data)
-                    successful_channels += 1
-                    logger.info(f"✅ Canal {channel_name}: {len(channel_data)} registros coletados")
-                else:
-                    logger.warning(f"⚠️ Canal {channel_name}: nenhum dado coletado")
-                    failed_channels.append(f"{channel_name} (sem dados)")
-                    
-            except Exception as e:
-                logger.error(f"❌ Erro no canal {channel_name}: {e}")
-                import traceback
-                logger.error(f"   Traceback: {traceback.format_exc()}")
-                failed_channels.append(f"{channel_name} (erro: {str(e)[:50]})")
+            # Verificar se sheet_id está configurado
+            sheet_id = channel_config.get('sheet_id', '').strip()
+            if not sheet_id:
+                logger.warning(f"⚠️ Canal {channel_name} não tem sheet_id configurado, pulando...")
+                failed_channels.append(f"{channel_name} (sem sheet_id)")
+                continue
+            channels_by_sheet.setdefault(sheet_id, []).append((channel_name, channel_config))
+        
+        results = {}
+        max_workers = max(1, min(AUTOMATION_CONFIG.get('channel_workers', 4), len(channels_by_sheet) or 1))
+        logger.info(f"📊 {sum(len(c) for c in channels_by_sheet.values())} canais em {len(channels_by_sheet)} planilhas ({max_workers} workers)")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sheets') as executor:
+            futures = {
+                executor.submit(self._collect_spreadsheet, sheet_id, channels): channels
+                for sheet_id, channels in channels_by_sheet.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    logger.error(f"❌ Erro ao coletar planilha: {e}")
+                    import traceback
+                    logger.error(f"   Traceback: {traceback.format_exc()}")
+                    for channel_name, _ in futures[future]:
+                        failed_channels.append(f"{channel_name} (erro: {str(e)[:50]})")
+        
+        # Consolidar na ordem da configuração
+        for channel_name in GOOGLE_SHEETS_CONFIG:
+            if channel_name not in results:
                 continue
+            channel_data = results[channel_name]
+            if channel_data:
+                all_daily_data.extend(channel_data)
+                successful_channels += 1
+                logger.info(f"✅ Canal {channel_name}: {len(channel_data)} registros coletados")
+            else:
+                logger.warning(f"⚠️ Canal {channel_name}: nenhum dado coletado")
+                failed_channels.append(f"{channel_name} (sem dados)")
         
         logger.info(f"✅ Coleta concluída: {successful_channels}/{len(GOOGLE_SHEETS_CONFIG)} canais processados com sucesso")
         if failed_channels:
@@ -58,6 +58,7 @@ class GoogleSheetsService:
 
     def __init__(self) -> None:
         self._service = None
+        self._credentials = None
         self._auth_error: Optional[Exception] = None
         self._credentials_source: Optional[str] = None
 
@@ -82,6 +83,7 @@ class GoogleSheetsService:
                 )
                 return
 
+            self._credentials = credentials
             logger.info(f"🔧 Criando serviço Google Sheets com credenciais de {self._credentials_source}")
             self._service = build(
                 "sheets",
@@ -202,19 +204,18 @@ class GoogleSheetsService:
         # Try to download credentials from Google Cloud Storage (for Cloud Run)
         try:
             logger.info("🔄 Tentando baixar credenciais do Google Cloud Storage...")
-            import google.cloud.storage
+            from gcs_storage import get_bucket, call_with_retry
             bucket_name = "south-media-credentials"
             blob_name = "service-account-key.json"
             
-            logger.info(f"🪣 Criando cliente do Storage para bucket: {bucket_name}")
-            storage_client = google.cloud.storage.Client()
-            bucket = storage_client.bucket(bucket_name)
+            logger.info(f"🪣 Usando cliente compartilhado do Storage para bucket: {bucket_name}")
+            bucket = get_bucket(bucket_name)
             blob = bucket.blob(blob_name)
             
             # Download to a temporary file
             temp_credentials_path = "/tmp/service-account-key.json"
             logger.info(f"⬇️ Baixando {blob_name} para {temp_credentials_path}")
-            blob.download_to_filename(temp_credentials_path)
+            call_with_retry(blob.download_to_filename, temp_credentials_path)
             
             self._credentials_source = f"gcs:{bucket_name}/{blob_name}"
             logger.info(f"✅ Usando credenciais do Google Cloud Storage: {bucket_name}/{blob_name}")
@@ -248,6 +249,12 @@ class GoogleSheetsService:
         """Return ``True`` when the service is authenticated and ready."""
 
         return self._service is not None
+
+    @property
+    def credentials(self):
+        """Credentials used by the service (``None`` when not configured)."""
+
+        return self._credentials if self._service is not None else None
     
     def test_connection(self) -> str:
         """Check the connectivity with Google Sheets.
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Serialização JSON dos payloads de campanha.
+
+Os dados extraídos (contrato, resumo, milhares de registros diários, pontos de
+footfall) são serializados em três lugares: embutidos no HTML do dashboard
+(`window.EMBEDDED_CAMPAIGN_DATA`), nas constantes do modelo multicanal
+(`const DAILY = ...`) e na resposta de `/api/<campaign_key>/data`. Este módulo
+concentra esse caminho:
+
+- backend plugável: orjson quando instalado (arrays/escalares NumPy nativos),
+  json da biblioteca padrão como fallback; escolhido por JSON_SERIALIZER_CONFIG;
+- saída sempre compacta (sem indentação nem espaços após separadores);
+- `script_json` escapa `</` para o payload poder ser embutido em `<script>`;
+- `columnar_daily` troca a lista de dicts de `daily_data` por uma lista por
+  campo, que repete os nomes das chaves uma vez só (opt-in na API).
+
+Valores sem representação JSON (datetime, Decimal, ...) viram `str(valor)`,
+como no `default=str` usado antes.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value: Any) -> Any:
+    """Conversão dos tipos que o encoder não conhece (NumPy nativo; o resto como texto)."""
+    if hasattr(value, 'tolist') and hasattr(value, 'dtype'):
+        # Escalares e arrays NumPy
+        return value.tolist()
+    return str(value)
+
+
+class StdlibSerializer:
+    """json da biblioteca padrão, em modo compacto."""
+
+    name = "stdlib"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+class OrjsonSerializer:
+    """orjson (Rust): serializa dicts/listas/NumPy sem passar pelo encoder Python."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson não está instalado")
+        # Datetimes passam pelo default (str), mantendo o formato do json.dumps(default=str)
+        self._options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        self._fallback = StdlibSerializer()
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, default=_default, option=self._options)
+        except orjson.JSONEncodeError as e:
+            # Ex.: inteiros acima de 64 bits, subclasses de str/dict exóticas
+            logger.debug(f"orjson recusou o payload ({e}); usando json da biblioteca padrão")
+            return self._fallback.dumps(obj)
+
+
+SERIALIZERS = {
+    "orjson": OrjsonSerializer,
+    "stdlib": StdlibSerializer,
+}
+
+_serializer = None
+_serializer_lock = threading.Lock()
+
+
+def get_serializer(name: Optional[str] = None):
+    """
+    Serializador configurado (JSON_SERIALIZER_CONFIG["backend"]: auto, orjson ou stdlib).
+    Com `name`, cria uma instância daquele backend (útil para comparar saídas).
+    """
+    global _serializer
+    if name:
+        return SERIALIZERS[name]()
+    with _serializer_lock:
+        if _serializer is None:
+            from config import JSON_SERIALIZER_CONFIG
+            backend = (JSON_SERIALIZER_CONFIG.get('backend') or 'auto').lower()
+            if backend == 'auto':
+                backend = 'orjson' if orjson is not None else 'stdlib'
+            try:
+                _serializer = SERIALIZERS[backend]()
+            except (KeyError, ImportError) as e:
+                logger.warning(f"⚠️ Serializador JSON '{backend}' indisponível ({e}); usando stdlib")
+                _serializer = StdlibSerializer()
+            logger.info(f"🧾 Serializador JSON: {_serializer.name}")
+        return _serializer
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """JSON compacto em UTF-8."""
+    return get_serializer().dumps(obj)
+
+
+def dumps(obj: Any) -> str:
+    """JSON compacto como texto."""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+def script_json(obj: Any) -> str:
+    """
+    JSON compacto para embutir em `<script>`.
+    `</` só aparece dentro de strings JSON, onde `<\\/` é equivalente e não fecha a tag.
+    """
+    return dumps(obj).replace('</', '<\\/')
+
+
+def columnar_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Lista de dicts -> {"format": "columns", "length": n, "columns": {campo: [valores]}}."""
+    fields: Dict[str, None] = {}
+    for record in records:
+        fields.update(dict.fromkeys(record))
+    return {
+        "format": "columns",
+        "length": len(records),
+        "columns": {name: [record.get(name) for record in records] for name in fields},
+    }
+
+
+def columnar_daily(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia rasa do payload com `daily_data` em formato colunar (os demais campos intactos)."""
+    records = data.get("daily_data")
+    if not isinstance(records, list):
+        return data
+    result = dict(data)
+    result["daily_data"] = columnar_records(records)
+    return result
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Resposta Flask com o payload serializado pelo backend configurado (substitui jsonify)."""
+    return Response(dumps_bytes(payload), status=status, mimetype='application/json')
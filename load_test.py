@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Teste de carga HTTP do app (gunicorn + load_test_app), sem acessar Google/GCP.
+
+Sobe o gunicorn com o `gunicorn.conf.py` do repositório (só o bind, o número de
+workers e o pidfile mudam), dispara usuários virtuais com um mix de tráfego
+configurável e reporta p50/p95/p99 por tipo de requisição, vazão e RSS por worker.
+
+Exemplos:
+    python3 load_test.py
+    python3 load_test.py --workers 2 --concurrency 16 --duration 60 --mix viewer
+    python3 load_test.py --mix dashboard=5,data=3,login=2 --sheets-latency-ms 80
+    python3 load_test.py --url http://127.0.0.1:8080   # servidor já em execução
+
+Ver LOAD_TEST.md.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import signal
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+import load_test_app as target
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Pesos por tipo de requisição
+MIX_PRESETS: Dict[str, Dict[str, int]] = {
+    "viewer": {"dashboard": 50, "data": 35, "portal": 15},
+    "mixed": {"dashboard": 40, "data": 30, "portal": 15, "login": 10, "generation": 5},
+    "generation": {"generation": 70, "data": 30},
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    if value in MIX_PRESETS:
+        return dict(MIX_PRESETS[value])
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"tipo desconhecido: {kind} (use {', '.join(ACTIONS)})")
+        mix[kind] = int(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix sem peso positivo")
+    return mix
+
+
+# ---------------------------------------------------------------------------
+# Usuários virtuais
+# ---------------------------------------------------------------------------
+
+class VirtualUser:
+    """Um navegador: sessão de cliente (leitura) e, se preciso, sessão de superadmin (geração)."""
+
+    def __init__(self, base_url: str, user_id: int, campaigns: List[str], timeout: float):
+        self.base_url = base_url
+        self.user_id = user_id
+        self.campaigns = campaigns
+        self.timeout = timeout
+        self.client_session = self._login(target.CLIENT_EMAIL)
+        self._admin_session: Optional[requests.Session] = None
+        self._generated = 0
+
+    def _login(self, email: str, session: Optional[requests.Session] = None) -> requests.Session:
+        session = session or requests.Session()
+        response = session.post(f"{self.base_url}/api/auth/login", timeout=self.timeout,
+                                json={"email": email, "password": target.LOAD_TEST_PASSWORD})
+        response.raise_for_status()
+        return session
+
+    @property
+    def admin_session(self) -> requests.Session:
+        if self._admin_session is None:
+            self._admin_session = self._login(target.ADMIN_EMAIL)
+        return self._admin_session
+
+    def dashboard(self) -> requests.Response:
+        key = random.choice(self.campaigns)
+        return self.client_session.get(f"{self.base_url}/api/dashboard/{key}", timeout=self.timeout)
+
+    def data(self) -> requests.Response:
+        key = random.choice(self.campaigns + [target.MULTICANAL_KEY])
+        return self.client_session.get(f"{self.base_url}/api/{key}/data", timeout=self.timeout)
+
+    def portal(self) -> requests.Response:
+        return self.client_session.get(f"{self.base_url}/api/clients/{target.CLIENT_ID}/dashboards",
+                                       timeout=self.timeout)
+
+    def login(self) -> requests.Response:
+        return requests.post(f"{self.base_url}/api/auth/login", timeout=self.timeout,
+                             json={"email": target.CLIENT_EMAIL, "password": target.LOAD_TEST_PASSWORD})
+
+    def generation(self) -> requests.Response:
+        self._generated += 1
+        key = random.choice(self.campaigns)
+        return self.admin_session.post(f"{self.base_url}/api/generate-dashboard", timeout=self.timeout, json={
+            "client": target.CLIENT_NAME,
+            "client_id": target.CLIENT_ID,
+            "campaign_name": f"Carga {self.user_id:03d}-{self._generated:05d}",
+            "sheet_id": target.sheet_id_for(key),
+            "channel": "Video Programática",
+            "kpi": "CPV",
+        })
+
+
+ACTIONS: Dict[str, Callable[[VirtualUser], requests.Response]] = {
+    "dashboard": VirtualUser.dashboard,
+    "data": VirtualUser.data,
+    "portal": VirtualUser.portal,
+    "login": VirtualUser.login,
+    "generation": VirtualUser.generation,
+}
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.elapsed = 0.0
+
+    def record(self, kind: str, elapsed_ms: float, error: Optional[str]):
+        with self._lock:
+            self.latencies[kind].append(elapsed_ms)
+            if error:
+                self.errors[kind][error] += 1
+
+
+def run_user(user: VirtualUser, mix: Dict[str, int], deadline: float, results: Optional[Results],
+             stop: threading.Event):
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    weights = [mix[kind] for kind in kinds]
+    while not stop.is_set() and time.monotonic() < deadline:
+        kind = random.choices(kinds, weights)[0]
+        started = time.perf_counter()
+        error = None
+        try:
+            response = ACTIONS[kind](user)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = type(e).__name__
+        if results is not None:
+            results.record(kind, (time.perf_counter() - started) * 1000, error)
+
+
+def drive(base_url: str, args, mix: Dict[str, int]) -> Results:
+    campaigns = target.campaign_keys(args.campaigns)
+    users = [VirtualUser(base_url, i, campaigns, args.timeout) for i in range(args.concurrency)]
+    stop = threading.Event()
+
+    def phase(seconds: float, results: Optional[Results]):
+        deadline = time.monotonic() + seconds
+        threads = [threading.Thread(target=run_user, args=(user, mix, deadline, results, stop), daemon=True)
+                   for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    try:
+        if args.warmup > 0:
+            phase(args.warmup, None)
+        results = Results()
+        started = time.perf_counter()
+        phase(args.duration, results)
+        results.elapsed = time.perf_counter() - started
+    except KeyboardInterrupt:
+        stop.set()
+        raise
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Servidor e memória
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir: str):
+    port = args.port or _free_port()
+    env = dict(os.environ)
+    env.update({
+        "STORAGE_BACKEND": "local",
+        "STORAGE_LOCAL_ROOT": os.path.join(workdir, "gcs"),
+        "REPORT_ROW_CACHE_DIR": os.path.join(workdir, "report_row_cache"),
+        "DASHBOARD_CACHE_DIR": os.path.join(workdir, "dashboard_cache"),
+        "GUNICORN_WORKERS": str(args.workers),
+        "LOAD_TEST_CAMPAIGNS": str(args.campaigns),
+        "LOAD_TEST_ROWS": str(args.rows),
+        "LOAD_TEST_SHEETS_LATENCY_MS": str(args.sheets_latency_ms),
+    })
+    command = [
+        sys.executable, "-m", "gunicorn", "-c", os.path.join(REPO_DIR, "gunicorn.conf.py"),
+        "-b", f"127.0.0.1:{port}", "--workers", str(args.workers),
+        "--pid", os.path.join(workdir, "gunicorn.pid"),
+        "load_test_app:create_app()",
+    ]
+    log_path = os.path.join(workdir, "gunicorn.log")
+    log_file = open(log_path, "wb")
+    process = subprocess.Popen(command, cwd=REPO_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return process, base_url, log_path, log_file
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    stop_server(process, log_file)
+    raise RuntimeError(f"gunicorn não respondeu em /health (log: {log_path})")
+
+
+def stop_server(process: subprocess.Popen, log_file):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    log_file.close()
+
+
+def _process_table() -> Dict[int, Dict[str, int]]:
+    """pid -> {ppid, rss_kb}; `ps` funciona no Linux e no macOS."""
+    output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], capture_output=True, text=True).stdout
+    table = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and all(part.isdigit() for part in parts):
+            table[int(parts[0])] = {"ppid": int(parts[1]), "rss_kb": int(parts[2])}
+    return table
+
+
+class MemorySampler(threading.Thread):
+    """Amostra o RSS do mestre e dos workers do gunicorn em intervalos fixos."""
+
+    def __init__(self, master_pid: int, interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peak_mb: Dict[str, float] = {}
+        self.last_mb: Dict[str, float] = {}
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        table = _process_table()
+        processes = {"master": self.master_pid}
+        processes.update({f"worker {pid}": pid for pid, info in table.items() if info["ppid"] == self.master_pid})
+        for name, pid in processes.items():
+            if pid in table:
+                rss_mb = table[pid]["rss_kb"] / 1024
+                self.last_mb[name] = rss_mb
+                self.peak_mb[name] = max(self.peak_mb.get(name, 0.0), rss_mb)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+# ---------------------------------------------------------------------------
+# Relatório
+# ---------------------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank: o menor valor com pelo menos pct% das amostras até ele
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[index]
+
+
+def _stats(values: List[float], errors: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    return {
+        "requests": len(values),
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50), 1),
+        "p95_ms": round(percentile(values, 95), 1),
+        "p99_ms": round(percentile(values, 99), 1),
+        "max_ms": round(max(values), 1) if values else 0.0,
+    }
+
+
+def build_report(results: Results, memory: Optional[MemorySampler], args, mix) -> Dict[str, Any]:
+    kinds = {kind: _stats(values, results.errors.get(kind, {}), results.elapsed)
+             for kind, values in sorted(results.latencies.items())}
+    all_values = [value for values in results.latencies.values() for value in values]
+    all_errors: Dict[str, int] = defaultdict(int)
+    for errors in results.errors.values():
+        for error, count in errors.items():
+            all_errors[error] += count
+    report = {
+        "config": {
+            "workers": args.workers, "concurrency": args.concurrency, "duration_s": args.duration,
+            "campaigns": args.campaigns, "rows": args.rows, "sheets_latency_ms": args.sheets_latency_ms,
+            "mix": mix,
+        },
+        "elapsed_s": round(results.elapsed, 2),
+        "total": _stats(all_values, all_errors, results.elapsed),
+        "kinds": kinds,
+    }
+    if memory is not None:
+        report["memory_mb"] = {
+            name: {"peak": round(memory.peak_mb[name], 1), "final": round(memory.last_mb.get(name, 0.0), 1)}
+            for name in sorted(memory.peak_mb)
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    config = report["config"]
+    print(f"\n🧪 {config['workers']} worker(s), {config['concurrency']} usuários, "
+          f"{report['elapsed_s']:.1f}s, mix {config['mix']}")
+    header = f"{'tipo':<12} {'req':>7} {'erros':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["kinds"].items()) + [("TOTAL", report["total"])]
+    for kind, stats in rows:
+        print(f"{kind:<12} {stats['requests']:>7} {stats['errors']:>6} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms {stats['max_ms']:>7.1f}ms")
+    for kind, stats in report["kinds"].items():
+        if stats["error_types"]:
+            print(f"⚠️ {kind}: {stats['error_types']}")
+    if "memory_mb" in report:
+        print("\nRSS (MB)")
+        for name, values in report["memory_mb"].items():
+            print(f"  {name:<16} pico {values['peak']:>7.1f}   final {values['final']:>7.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga HTTP com Sheets/GCS/Firestore locais")
+    parser.add_argument("--url", help="usar um servidor já em execução (não sobe o gunicorn nem mede RSS)")
+    parser.add_argument("--port", type=int, default=0, help="porta do gunicorn (padrão: uma livre)")
+    parser.add_argument("--workers", type=int, default=1, help="workers do gunicorn")
+    parser.add_argument("--concurrency", type=int, default=8, help="usuários virtuais simultâneos")
+    parser.add_argument("--duration", type=float, default=30, help="duração da medição, em segundos")
+    parser.add_argument("--warmup", type=float, default=5, help="aquecimento não medido, em segundos")
+    parser.add_argument("--mix", type=parse_mix, default="mixed",
+                        help=f"preset ({', '.join(MIX_PRESETS)}) ou pesos tipo=peso,...")
+    parser.add_argument("--campaigns", type=int, default=5, help="campanhas semeadas")
+    parser.add_argument("--rows", type=int, default=1000, help="linhas da aba Report de cada planilha")
+    parser.add_argument("--sheets-latency-ms", type=float, default=0, help="latência simulada por chamada ao Sheets")
+    parser.add_argument("--timeout", type=float, default=60, help="timeout por requisição, em segundos")
+    parser.add_argument("--startup-timeout", type=float, default=120, help="espera pelo /health, em segundos")
+    parser.add_argument("--seed", type=int, default=0, help="semente da escolha de requisições")
+    parser.add_argument("--output", help="gravar o relatório em JSON")
+    args = parser.parse_args(argv)
+    mix = args.mix if isinstance(args.mix, dict) else parse_mix(args.mix)
+    random.seed(args.seed)
+
+    if args.url:
+        results = drive(args.url.rstrip("/"), args, mix)
+        report = build_report(results, None, args, mix)
+    else:
+        workdir = tempfile.mkdtemp(prefix="loadtest_")
+        process, base_url, log_path, log_file = start_server(args, workdir)
+        print(f"🚀 gunicorn em {base_url} (log: {log_path})")
+        memory = MemorySampler(process.pid)
+        memory.start()
+        try:
+            results = drive(base_url, args, mix)
+        finally:
+            memory.stop()
+            stop_server(process, log_file)
+        report = build_report(results, memory, args, mix)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Relatório salvo em {args.output}")
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+App de teste de carga: o mesmo `cloud_run_mvp:app`, com dependências externas locais.
+
+- Google Sheets: `sheets_fixtures.FakeSheetsService` com planilhas sintéticas
+  (latência configurável, para simular a ida e volta da API);
+- GCS: `STORAGE_BACKEND=local` (LocalStorageClient de gcs_storage);
+- Firestore/BigQuery: `local_firestore` (em memória).
+
+Os dados (cliente, usuários, campanhas, dashboards) são semeados em `create_app()`,
+que o gunicorn chama no processo mestre (`preload_app = True`), antes do fork:
+
+    gunicorn -c gunicorn.conf.py 'load_test_app:create_app()'
+
+Normalmente quem sobe o servidor é o `load_test.py`. Importar este módulo não tem
+efeitos colaterais: o driver usa as constantes abaixo para montar as requisições.
+"""
+
+import os
+import logging
+import tempfile
+from unittest import mock
+
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_PASSWORD = os.environ.get("LOAD_TEST_PASSWORD", "loadtest#senha")
+ADMIN_EMAIL = "loadtest-admin@example.com"
+CLIENT_EMAIL = "loadtest-client@example.com"
+CLIENT_NAME = "Cliente Teste de Carga"
+CLIENT_ID = "cliente-teste-de-carga"
+MULTICANAL_KEY = "loadtest_multicanal"
+
+
+def campaign_keys(count: int):
+    return [f"loadtest_campaign_{i:03d}" for i in range(count)]
+
+
+def sheet_id_for(campaign_key: str) -> str:
+    return campaign_key.replace("loadtest_campaign_", "loadtest-sheet-")
+
+
+def _settings():
+    return {
+        "campaigns": int(os.environ.get("LOAD_TEST_CAMPAIGNS", "5")),
+        "rows": int(os.environ.get("LOAD_TEST_ROWS", "1000")),
+        "latency_ms": float(os.environ.get("LOAD_TEST_SHEETS_LATENCY_MS", "0")),
+    }
+
+
+def _build_workbooks(settings):
+    from sheets_fixtures import synthetic_campaign_workbook
+
+    workbooks = {}
+    for index, key in enumerate(campaign_keys(settings["campaigns"])):
+        sheet_id = sheet_id_for(key)
+        workbooks[sheet_id] = synthetic_campaign_workbook(sheet_id, settings["rows"], seed=index)
+    for channel in _multicanal_channels():
+        sheet_id = channel["sheet_id"]
+        workbooks[sheet_id] = synthetic_campaign_workbook(
+            sheet_id, settings["rows"], seed=len(workbooks),
+            footfall_points=min(settings["rows"], 500) if channel.get("use_footfall") else 0,
+        )
+    return workbooks
+
+
+def _multicanal_channels():
+    return [
+        {"channel_name": "YouTube", "action_description": "Vídeo", "kpi": "CPV", "sheet_id": "loadtest-youtube"},
+        {"channel_name": "HHS", "action_description": "Display", "sheet_id": "loadtest-hhs", "use_footfall": 1},
+    ]
+
+
+def _patch_external_services(workbooks, latency_ms: float):
+    """Troca Sheets/Firestore/BigQuery pelos substitutos locais (patches ficam ativos no processo)."""
+    import bigquery_firestore_manager
+    import google_sheets_service
+    import real_google_sheets_extractor
+    from local_firestore import LocalBigQueryClient, LocalFirestoreClient
+    from sheets_fixtures import FakeSheetsService
+
+    sheets = FakeSheetsService(workbooks, latency_sec=latency_ms / 1000)
+
+    def authenticate(service):
+        service._service = sheets
+        service._credentials = None
+        service._credentials_source = "load_test"
+
+    patches = [
+        mock.patch.object(bigquery_firestore_manager.firestore, "Client", LocalFirestoreClient),
+        mock.patch.object(bigquery_firestore_manager.bigquery, "Client", LocalBigQueryClient),
+        mock.patch.object(google_sheets_service.GoogleSheetsService, "_authenticate", authenticate),
+        mock.patch.object(real_google_sheets_extractor, "GOOGLE_AVAILABLE", True),
+    ]
+    for patcher in patches:
+        patcher.start()
+    return sheets
+
+
+def _seed(manager, settings):
+    manager.ensure_superadmin_user(ADMIN_EMAIL, LOAD_TEST_PASSWORD, name="Admin Teste de Carga")
+    client_id = manager.create_client(CLIENT_NAME, slug=CLIENT_ID)
+    manager.add_client_user(client_id, CLIENT_EMAIL, name="Cliente Teste de Carga",
+                            role="viewer", password=LOAD_TEST_PASSWORD)
+
+    for index, key in enumerate(campaign_keys(settings["campaigns"])):
+        campaign_name = f"Campanha {index:03d}"
+        manager.save_campaign(key, CLIENT_NAME, campaign_name, sheet_id_for(key), "Video Programática", "CPV")
+        manager.save_dashboard(
+            dashboard_id=key, campaign_key=key, dashboard_name=f"{CLIENT_NAME} - {campaign_name}",
+            dashboard_url=f"/api/dashboard/{key}", file_path=f"/api/dashboard/{key}",
+            client=CLIENT_NAME, campaign_name=campaign_name, channel="Video Programática", kpi="CPV",
+        )
+        manager.set_dashboard_client(key, client_id)
+
+    manager.save_campaign(MULTICANAL_KEY, CLIENT_NAME, "Campanha Multicanal", "", "Multicanal", "CPM")
+    manager.fs_client.collection(manager.campaigns_collection).document(MULTICANAL_KEY).set(
+        {"multicanal_channels": _multicanal_channels()}, merge=True)
+    manager.set_dashboard_client(MULTICANAL_KEY, client_id)
+    return client_id
+
+
+_app = None
+
+
+def create_app():
+    """Montar o app com os substitutos locais e os dados semeados (idempotente)."""
+    global _app
+    if _app is not None:
+        return _app
+
+    settings = _settings()
+    os.environ.setdefault("STORAGE_BACKEND", "local")
+    os.environ.setdefault("STORAGE_LOCAL_ROOT", tempfile.mkdtemp(prefix="loadtest_gcs_"))
+
+    _patch_external_services(_build_workbooks(settings), settings["latency_ms"])
+
+    import cloud_run_mvp
+
+    if cloud_run_mvp.bq_fs_manager is None:
+        raise RuntimeError("BigQueryFirestoreManager não inicializou com o Firestore local")
+    client_id = _seed(cloud_run_mvp.bq_fs_manager, settings)
+    logger.info(
+        f"🧪 App de teste de carga pronto: {settings['campaigns']} campanhas de {settings['rows']} linhas "
+        f"(cliente {client_id}, latência Sheets {settings['latency_ms']:.0f} ms)"
+    )
+    _app = cloud_run_mvp.app
+    return _app
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Substitutos locais (em memória) dos clientes do Firestore e do BigQuery.
+
+Cobrem só a parte da API usada pelo BigQueryFirestoreManager e pelo app:
+`collection().document().get/set/update/delete`, `where(campo, "==" | "in", valor)`,
+`limit`, `select` e `stream`; no BigQuery, as chamadas de provisionamento e
+`insert_rows_json` (aceitas e descartadas) e `query` (sem linhas).
+
+Servem para testes de carga e benchmarks offline (load_test_app.py), no mesmo
+espírito do LocalStorageClient de gcs_storage. Os dados vivem no processo: com
+vários workers do gunicorn cada um tem a sua cópia (a semeada antes do fork é
+comum a todos).
+"""
+
+import copy
+import uuid
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from google.cloud.firestore import DELETE_FIELD
+except ImportError:  # pragma: no cover - ambiente sem google-cloud-firestore
+    DELETE_FIELD = object()
+
+
+def _not_found(path: str) -> Exception:
+    try:
+        from google.api_core.exceptions import NotFound
+        return NotFound(f"No document to update: {path}")
+    except ImportError:  # pragma: no cover
+        return KeyError(path)
+
+
+class LocalDocumentSnapshot:
+    def __init__(self, reference: 'LocalDocumentReference', data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field: str) -> Any:
+        return (self._data or {}).get(field)
+
+
+class LocalDocumentReference:
+    def __init__(self, client: 'LocalFirestoreClient', collection: str, doc_id: str):
+        self._client = client
+        self.collection_name = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection_name}/{self.id}"
+
+    def get(self, *args, **kwargs) -> LocalDocumentSnapshot:
+        with self._client._lock:
+            data = self._client._collection(self.collection_name).get(self.id)
+            return LocalDocumentSnapshot(self, copy.deepcopy(data))
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        with self._client._lock:
+            documents = self._client._collection(self.collection_name)
+            current = dict(documents.get(self.id) or {}) if merge else {}
+            for key, value in data.items():
+                if value is DELETE_FIELD:
+                    current.pop(key, None)
+                else:
+                    current[key] = copy.deepcopy(value)
+            documents[self.id] = current
+
+    def update(self, data: Dict[str, Any]):
+        with self._client._lock:
+            if self.id not in self._client._collection(self.collection_name):
+                raise _not_found(self.path)
+        self.set(data, merge=True)
+
+    def delete(self):
+        with self._client._lock:
+            self._client._collection(self.collection_name).pop(self.id, None)
+
+
+class LocalQuery:
+    def __init__(self, client: 'LocalFirestoreClient', collection: str,
+                 filters: Tuple = (), limit: Optional[int] = None, fields: Optional[List[str]] = None):
+        self._client = client
+        self._collection_name = collection
+        self._filters = filters
+        self._limit = limit
+        self._fields = fields
+
+    def _copy(self, **changes) -> 'LocalQuery':
+        state = dict(filters=self._filters, limit=self._limit, fields=self._fields)
+        state.update(changes)
+        return LocalQuery(self._client, self._collection_name, **state)
+
+    def where(self, field: str, op: str, value: Any) -> 'LocalQuery':
+        if op not in ("==", "in"):
+            raise NotImplementedError(f"Operador não suportado no Firestore local: {op}")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def limit(self, count: int) -> 'LocalQuery':
+        return self._copy(limit=count)
+
+    def select(self, field_paths: Iterable[str]) -> 'LocalQuery':
+        return self._copy(fields=list(field_paths))
+
+    def _matches(self, data: Dict[str, Any]) -> bool:
+        for field, op, value in self._filters:
+            current = data.get(field)
+            if op == "==" and current != value:
+                return False
+            if op == "in" and current not in value:
+                return False
+        return True
+
+    def stream(self, *args, **kwargs) -> Iterator[LocalDocumentSnapshot]:
+        with self._client._lock:
+            items = list(self._client._collection(self._collection_name).items())
+        results = []
+        for doc_id, data in items:
+            if not self._matches(data):
+                continue
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            reference = LocalDocumentReference(self._client, self._collection_name, doc_id)
+            results.append(LocalDocumentSnapshot(reference, copy.deepcopy(data)))
+            if self._limit is not None and len(results) >= self._limit:
+                break
+        return iter(results)
+
+    def get(self, *args, **kwargs) -> List[LocalDocumentSnapshot]:
+        return list(self.stream())
+
+
+class LocalCollectionReference(LocalQuery):
+    def __init__(self, client: 'LocalFirestoreClient', collection: str):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, doc_id: Optional[str] = None) -> LocalDocumentReference:
+        return LocalDocumentReference(self._client, self._collection_name, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict[str, Any]):
+        reference = self.document()
+        reference.set(data)
+        return None, reference
+
+
+class LocalFirestoreClient:
+    """Substituto de `firestore.Client` em memória (thread-safe)."""
+
+    def __init__(self, project: Optional[str] = None, **kwargs):
+        self.project = project
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+
+    def _collection(self, name: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.setdefault(name, {})
+
+    def collection(self, name: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self, name)
+
+    def seed(self, collection: str, documents: Dict[str, Dict[str, Any]]):
+        """Gravar vários documentos de uma vez (dados iniciais de testes)."""
+        with self._lock:
+            self._collection(collection).update(copy.deepcopy(documents))
+
+
+class _LocalQueryJob:
+    def result(self, *args, **kwargs) -> List[Any]:
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+
+class LocalBigQueryClient:
+    """Substituto de `bigquery.Client`: provisionamento aceito, inserções descartadas, consultas vazias."""
+
+    def __init__(self, project: Optional[str] = None, **kwargs):
+        self.project = project
+        self.inserted_rows = 0
+        self._lock = threading.Lock()
+
+    def get_dataset(self, dataset_ref, *args, **kwargs):
+        return dataset_ref
+
+    def create_dataset(self, dataset, *args, **kwargs):
+        return dataset
+
+    def get_table(self, table_ref, *args, **kwargs):
+        return table_ref
+
+    def create_table(self, table, *args, **kwargs):
+        return table
+
+    def insert_rows_json(self, table_ref, rows, *args, **kwargs) -> List[Any]:
+        with self._lock:
+            self.inserted_rows += len(rows)
+        return []
+
+    def query(self, query: str, *args, **kwargs) -> _LocalQueryJob:
+        return _LocalQueryJob()
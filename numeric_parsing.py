@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Conversão de números e valores monetários vindos das planilhas (BR/US)
+
+Opera sobre colunas inteiras (cada valor distinto é analisado uma vez) e aplica
+as mesmas heurísticas em todo o projeto:
+
+- "R$", espaços e NBSP são ignorados;
+- vírgula e ponto juntos: o último separador é o decimal
+  ("1.234,56" → 1234.56, "1,234.56" → 1234.56);
+- só vírgula: uma vírgula é decimal ("20,80" → 20.8); várias são milhar;
+- só ponto: vários pontos são milhar ("1.234.567"); um ponto seguido de
+  exatamente 3 dígitos é milhar ("301.166" → 301166); caso contrário, decimal;
+- números já numéricos (API do Sheets) são usados como estão.
+
+Em vez de um aviso por valor, cada coluna devolve um diagnóstico com as
+contagens e exemplos de valores inválidos, ambíguos ou suspeitos.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Limite a partir do qual um valor monetário é considerado suspeito (provável erro de parsing)
+SUSPICIOUS_CURRENCY_ABOVE = 10_000_000
+
+_EMPTY_TOKENS = frozenset(('', 'nan', 'none', 'null', '-'))
+_MAX_SAMPLES = 5
+
+# Classificação de cada valor distinto
+_OK, _EMPTY, _INVALID, _AMBIGUOUS = 0, 1, 2, 3
+
+
+def _parse_text(raw: str) -> Tuple[float, int]:
+    """Aplicar as heurísticas BR/US a um valor textual. Retorna (valor, classificação)."""
+    s = raw.replace('R$', '')
+    s = ''.join(s.split())  # remove espaços, tabs e NBSP
+    if s.lower() in _EMPTY_TOKENS:
+        return np.nan, _EMPTY
+
+    flag = _OK
+    comma = s.rfind(',')
+    dot = s.rfind('.')
+    if comma >= 0 and dot >= 0:
+        # Vírgula e ponto: o último é o decimal
+        if comma > dot:
+            s = s.replace('.', '').replace(',', '.')
+        else:
+            s = s.replace(',', '')
+    elif comma >= 0:
+        # Só vírgula: uma é decimal, várias são milhar
+        if s.count(',') == 1:
+            if len(s) - comma == 4 and s[:comma].lstrip('-').isdigit() and len(s[:comma].lstrip('-')) <= 3:
+                flag = _AMBIGUOUS  # "1,234": decimal BR ou milhar US
+            s = s.replace(',', '.')
+        else:
+            s = s.replace(',', '')
+    elif dot >= 0:
+        # Só ponto: vários (ou um seguido de exatamente 3 dígitos) são milhar
+        if s.count('.') > 1:
+            s = s.replace('.', '')
+        elif len(s) - dot == 4 and s[dot + 1:].isdigit() and 0 < len(s[:dot].lstrip('-')) <= 3 and s[:dot].lstrip('-').isdigit():
+            flag = _AMBIGUOUS  # "301.166": milhar BR ou decimal US
+            s = s.replace('.', '')
+
+    try:
+        return float(s), flag
+    except ValueError:
+        return np.nan, _INVALID
+
+
+def _parse_value(value: Any) -> Tuple[float, int]:
+    if isinstance(value, str):
+        return _parse_text(value)
+    if value is None or isinstance(value, bool):
+        return np.nan, _EMPTY
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return np.nan, _INVALID
+    return number, (_EMPTY if np.isnan(number) else _OK)
+
+
+def _samples(values: pd.Series) -> list:
+    return [str(v) for v in pd.unique(values)[:_MAX_SAMPLES]]
+
+
+def parse_numeric_series(values: Union[pd.Series, Iterable[Any]], integer: bool = False,
+                         default: float = np.nan, suspicious_above: Optional[float] = None,
+                         column: Optional[str] = None) -> Tuple[pd.Series, Dict[str, Any]]:
+    """
+    Converter uma coluna de valores (strings BR/US ou números) para float.
+
+    Cada valor distinto é analisado uma única vez (planilhas repetem muito os mesmos
+    valores) e o resultado é expandido para a coluna inteira.
+
+    Args:
+        values: Série (ou iterável) com os valores brutos
+        integer: Truncar para a parte inteira (contagens: impressões, cliques...)
+        default: Valor para células vazias ou inválidas
+        suspicious_above: Marcar no diagnóstico valores acima deste limite
+        column: Nome da coluna (apenas para o diagnóstico)
+
+    Returns:
+        (série convertida com o mesmo índice, diagnóstico da coluna)
+    """
+    ser = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+
+    if pd.api.types.is_numeric_dtype(ser) and not pd.api.types.is_bool_dtype(ser):
+        result = ser.astype('float64')
+        flags = np.where(result.isna().to_numpy(), _EMPTY, _OK)
+    else:
+        codes, uniques = pd.factorize(ser, use_na_sentinel=True)
+        parsed = [_parse_value(value) for value in uniques]
+        unique_values = np.array([value for value, _ in parsed] + [np.nan], dtype='float64')
+        unique_flags = np.array([flag for _, flag in parsed] + [_EMPTY], dtype='int8')
+        # Código -1 (NaN/None) aponta para a última posição: vazio
+        result = pd.Series(unique_values[codes], index=ser.index)
+        flags = unique_flags[codes]
+
+    if integer:
+        result = np.trunc(result)
+
+    invalid = flags == _INVALID
+    ambiguous = flags == _AMBIGUOUS
+    suspicious = np.zeros(len(ser), dtype=bool)
+    if suspicious_above is not None:
+        suspicious = (result > suspicious_above).to_numpy()
+
+    diagnostics = {
+        "column": column,
+        "rows": int(len(ser)),
+        "empty": int((flags == _EMPTY).sum()),
+        "invalid": int(invalid.sum()),
+        "invalid_samples": _samples(ser[invalid]),
+        "ambiguous": int(ambiguous.sum()),
+        "ambiguous_samples": _samples(ser[ambiguous]),
+        "suspicious": int(suspicious.sum()),
+        "suspicious_samples": _samples(ser[suspicious]),
+    }
+
+    if not pd.isna(default):
+        result = result.fillna(default)
+    return result, diagnostics
+
+
+def parse_numeric_column(values: Union[pd.Series, Iterable[Any]], integer: bool = False,
+                         default: float = np.nan, suspicious_above: Optional[float] = None,
+                         column: Optional[str] = None, log: Optional[logging.Logger] = None) -> pd.Series:
+    """Converter uma coluna e registrar um único resumo de diagnóstico (se houver problemas)."""
+    result, diagnostics = parse_numeric_series(values, integer=integer, default=default,
+                                               suspicious_above=suspicious_above, column=column)
+    log_parse_diagnostics(diagnostics, log=log)
+    return result
+
+
+def log_parse_diagnostics(diagnostics: Dict[str, Any], log: Optional[logging.Logger] = None):
+    """Resumo por coluna: um aviso para inválidos/suspeitos, debug para ambíguos."""
+    log = log or logger
+    column = diagnostics.get("column") or "?"
+    if diagnostics["invalid"] or diagnostics["suspicious"]:
+        log.warning(
+            f"⚠️ Coluna '{column}': {diagnostics['invalid']} valores inválidos {diagnostics['invalid_samples']}, "
+            f"{diagnostics['suspicious']} suspeitos {diagnostics['suspicious_samples']} "
+            f"(de {diagnostics['rows']} linhas)"
+        )
+    if diagnostics["ambiguous"]:
+        log.debug(
+            f"🔍 Coluna '{column}': {diagnostics['ambiguous']} valores com separador ambíguo "
+            f"{diagnostics['ambiguous_samples']}"
+        )
+
+
+def parse_number_value(value: Any, integer: bool = False, default: float = 0.0) -> float:
+    """Converter um único valor com as mesmas regras (para scripts que processam linha a linha)."""
+    result, _ = parse_numeric_series([value], integer=integer, default=default)
+    return float(result.iloc[0])
@@ -6,11 +6,18 @@ Versão que carrega dados reais ou falha com erro claro
 
 import os
 import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 import logging
-import re
+
+from numeric_parsing import parse_numeric_column, SUSPICIOUS_CURRENCY_ABOVE
+from sheet_revisions import get_extraction_memo, config_fingerprint
+from report_row_cache import get_report_row_cache, a1_prefix
+from daily_columns import DailyColumns, StringColumn
+from footfall_parsing import build_footfall_points, log_footfall_diagnostics
+from app_metrics import instrument_sheets_service, record_cache, timed
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +41,7 @@ class RealGoogleSheetsExtractor:
     def __init__(self, config):
         self.config = config
         self.service = None
+        self.credentials = None
         logger.info(f"🔧 Inicializando extrator REAL para {config.client}")
         
         if not GOOGLE_AVAILABLE:
@@ -50,7 +58,11 @@ class RealGoogleSheetsExtractor:
             if not sheets_service.is_configured():
                 raise Exception("GoogleSheetsService não configurado")
             
-            self.service = sheets_service._service
+            # Chamadas contadas por campanha (cota) e medidas por tipo (metadados/valores)
+            self.service = instrument_sheets_service(
+                sheets_service._service, getattr(self.config, 'campaign_key', None) or self.config.sheet_id
+            )
+            self.credentials = sheets_service.credentials
             logger.info("✅ Serviço Google Sheets inicializado via GoogleSheetsService")
             
         except Exception as e:
@@ -58,7 +70,42 @@ class RealGoogleSheetsExtractor:
             raise Exception(f"Não foi possível conectar ao Google Sheets: {e}")
     
     def extract_data(self) -> Optional[Dict[str, Any]]:
-        """Extrair dados REAIS do Google Sheets"""
+        """
+        Extrair dados REAIS do Google Sheets.
+
+        Se a planilha não foi editada desde a última extração com a mesma
+        configuração (revisão do Drive), o resultado anterior é reaproveitado.
+        """
+        probe, memo = get_extraction_memo(self.credentials)
+        if probe is None:
+            with timed("extraction"):
+                return self._to_api_result(self._extract_fresh())
+        
+        # Revisão consultada antes da extração: uma edição durante a leitura invalida o resultado na próxima vez
+        fingerprint = probe.fingerprint(self.config.sheet_id)
+        memo_key = (self.config.sheet_id, config_fingerprint(vars(self.config)))
+        cached = memo.get(memo_key, fingerprint)
+        record_cache("extraction_memo", cached is not None)
+        if cached is not None:
+            logger.info(f"♻️ Planilha sem alterações (revisão {fingerprint}), reaproveitando extração de {self.config.client}")
+            return self._to_api_result(cached)
+        
+        # Memorizado em colunas (bem menor que a lista de dicts)
+        with timed("extraction"):
+            result = self._extract_fresh()
+        if result:
+            memo.put(memo_key, fingerprint, result)
+        return self._to_api_result(result)
+    
+    @staticmethod
+    def _to_api_result(result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Resultado no formato da API: daily_data como lista de dicts"""
+        if result and isinstance(result.get("daily_data"), DailyColumns):
+            result = dict(result, daily_data=result["daily_data"].to_records())
+        return result
+    
+    def _extract_fresh(self) -> Optional[Dict[str, Any]]:
+        """Extração completa (todas as abas) da planilha; daily_data em colunas (DailyColumns)"""
         try:
             logger.info(f"🔄 Iniciando extração REAL para {self.config.client}")
             logger.info(f"📊 Sheet ID: {self.config.sheet_id}")
@@ -74,7 +121,8 @@ class RealGoogleSheetsExtractor:
                 raise Exception("Falha ao extrair dados de contrato da aba 'Informações de contrato'")
             
             # 3. Calcular métricas totais
-            total_metrics = self._calculate_metrics(daily_data, contract_data)
+            with timed("metrics_calc"):
+                total_metrics = self._calculate_metrics(daily_data, contract_data)
             
             # 4. Preparar dados finais
             result = {
@@ -106,8 +154,8 @@ class RealGoogleSheetsExtractor:
             logger.error(f"❌ Erro na extração REAL: {e}")
             raise Exception(f"Falha na extração de dados: {e}")
     
-    def _extract_daily_data(self) -> Optional[list]:
-        """Extrair dados diários da aba 'Report'"""
+    def _extract_daily_data(self) -> Optional[DailyColumns]:
+        """Extrair dados diários da aba 'Report' (em colunas)"""
         try:
             logger.info("📊 Extraindo dados diários da aba 'Report'")
             
@@ -162,194 +210,243 @@ class RealGoogleSheetsExtractor:
                 available_sheets = [sheet['properties']['title'] for sheet in sheets]
                 raise Exception(f"Nenhuma aba de dados encontrada. Abas disponíveis: {available_sheets}")
             
-            # Nome da aba com aspas se tiver espaço (ex.: 'Dados Diários'!A:Z)
-            range_name = f"'{report_sheet}'!A:Z" if ' ' in report_sheet else f"{report_sheet}!A:Z"
+            daily = self._read_report_records(report_sheet)
             
-            # Ler os dados da aba encontrada
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.config.sheet_id,
-                range=range_name
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values:
-                raise Exception("Aba 'Report' está vazia")
-            
-            logger.info(f"📊 Encontradas {len(values)} linhas na aba Report")
-            
-            # Converter para DataFrame
-            df = pd.DataFrame(values[1:], columns=values[0])  # Primeira linha como header
-            
-            # Mapear colunas para nomes padronizados (inglês + português / variações)
-            column_mapping = {
-                'Day': 'date',
-                'Data': 'date',
-                'Date': 'date',
-                'Dia': 'date',
-                'Line Item': 'line_item',
-                'Creative': 'creative',
-                'Valor investido': 'spend',
-                'VALOR DO INVESTIMENTO': 'spend',
-                'Spend': 'spend',
-                'Imps': 'impressions',
-                'Impressões': 'impressions',
-                'Impressions': 'impressions',
-                'Disparos': 'disparos',
-                'Clicks': 'clicks',
-                'Cliques': 'clicks',
-                'CPV': 'cpv',
-                'CPC': 'cpc',
-                'CTR %': 'ctr',
-                'CTR': 'ctr',
-                'Click Rate (CTR)': 'ctr',
-                '25% Video Complete': 'video_25',
-                '50% Video Complete': 'video_50',
-                '75% Video Complete': 'video_75',
-                '100% Complete': 'video_completions',
-                'Video Starts': 'video_starts',
-                'Visualizações completas': 'video_completions',
-                # Variações comuns em templates/exportações
-                'Starts': 'video_starts',
-                'Start': 'video_starts',
-                'Inícios': 'video_starts',
-                'Inicios': 'video_starts',
-                '25%': 'video_25',
-                '50%': 'video_50',
-                '75%': 'video_75',
-                '100%': 'video_completions',
-                '100% Video Complete': 'video_completions',
-                'Quartil 25%': 'video_25',
-                'Quartil 50%': 'video_50',
-                'Quartil 75%': 'video_75',
-                'Quartil 100%': 'video_completions',
-            }
-            # Aplicar mapeamento (case-insensitive: planilha pode ter "Day" ou "day" ou "DAY")
-            rename_map = {}
-            col_lower = {str(c).strip().lower(): str(c).strip() for c in df.columns}
-            for k, v in column_mapping.items():
-                k_lower = k.lower()
-                if k_lower in col_lower:
-                    rename_map[col_lower[k_lower]] = v
-            df = df.rename(columns=rename_map)
-            
-            # Excluir linhas sem data (totais/resumos) para não inflar soma de VCs/impr
-            if 'date' in df.columns:
-                before = len(df)
-                df['date'] = df['date'].astype(str).str.strip()
-                df = df[df['date'].notna() & (df['date'] != '') & (df['date'].str.lower() != 'nan')]
-                if len(df) < before:
-                    logger.info(f"📋 Removidas {before - len(df)} linhas sem data (totais/resumo)")
-            
-            # Converter tipos de dados: API pode retornar número (301166.0) ou string com milhar (ex.: "301.166")
-            def _parse_num_br(ser):
-                def _one(val):
-                    if pd.isna(val):
-                        return float('nan')
-                    s = str(val).strip().replace('R$', '').replace(' ', '')
-                    if not s or s.lower() == 'nan':
-                        return float('nan')
-                    # Se tem vírgula, é decimal BR: 1.234,56 -> remover ponto, trocar vírgula
-                    if ',' in s:
-                        s = s.replace('.', '').replace(',', '.')
-                        try:
-                            return float(s)
-                        except ValueError:
-                            return float('nan')
-                    # Se termina com .0 ou .00 (número da API), usar float direto
-                    if s.endswith('.0') or ('.' in s and s.split('.')[-1].replace('0', '') == ''):
-                        try:
-                            return float(s)
-                        except ValueError:
-                            pass
-                    # Ponto como milhar (ex.: 1.234 ou 301.166) vs decimal (1.5)
-                    if '.' in s:
-                        parts = s.split('.')
-                        if len(parts) == 2 and len(parts[1]) == 3 and parts[1].isdigit():
-                            return float(s.replace('.', ''))  # milhar
-                        try:
-                            return float(s)
-                        except ValueError:
-                            return float('nan')
-                    try:
-                        return float(s)
-                    except ValueError:
-                        return float('nan')
-                return ser.map(_one)
-            for col in ['spend', 'impressions', 'disparos', 'clicks', 'cpv', 'cpc', 'ctr',
-                       'video_25', 'video_50', 'video_75', 'video_completions', 'video_starts']:
-                if col in df.columns:
-                    df[col] = _parse_num_br(df[col])
-            
-            # Converter data com correção de formato
-            if 'date' in df.columns:
-                logger.info("🔧 Aplicando correção de datas...")
-                
-                # Importar normalizador de datas
-                try:
-                    from date_normalizer import DateNormalizer
-                    date_normalizer = DateNormalizer()
-                    
-                    # Aplicar normalização inteligente de datas
-                    df = date_normalizer.normalize_dataframe_dates(df, 'date')
-                    logger.info(f"✅ Datas corrigidas: {len(df)} registros processados")
-                    
-                except ImportError:
-                    logger.warning("⚠️ DateNormalizer não disponível, usando conversão padrão")
-                    df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
-                    df = df.dropna(subset=['date'])
-                except Exception as e:
-                    logger.warning(f"⚠️ Erro na normalização de datas: {e}, usando conversão padrão")
-                    df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
-                    df = df.dropna(subset=['date'])
-            
-            # Converter para lista de dicionários e calcular métricas
-            daily_data = []
-            for _, row in df.iterrows():
-                spend = float(row.get('spend', 0)) if pd.notna(row.get('spend')) else 0.0
-                # Para campanhas CPD (como Push), pode não existir coluna de impressões.
-                # Nesse caso, usamos "disparos" como proxy de impressões.
-                raw_imps = row.get('impressions', row.get('disparos', 0))
-                impressions = int(raw_imps) if pd.notna(raw_imps) else 0
-                clicks = int(row.get('clicks', 0)) if pd.notna(row.get('clicks')) else 0
-                video_completions = int(row.get('video_completions', 0)) if pd.notna(row.get('video_completions')) else 0
-                video_75 = int(row.get('video_75', 0)) if pd.notna(row.get('video_75')) else 0
-                # Não zerar video_completions quando 100% > 75%: a planilha pode reportar assim (definições diferentes).
-                # Total VC Entregue deve bater com a soma da coluna 100% Complete na planilha.
-                disparos = int(row.get('disparos', video_completions)) if pd.notna(row.get('disparos', video_completions)) else 0
-                
-                # Calcular métricas dinamicamente
-                cpv = spend / video_completions if video_completions > 0 else 0.0
-                cpc = spend / clicks if clicks > 0 else 0.0
-                ctr = (clicks / impressions * 100) if impressions > 0 else 0.0
-                cpd = spend / disparos if disparos > 0 else 0.0
-                
-                daily_data.append({
-                    "date": str(row.get('date', '')),
-                    "line_item": str(row.get('line_item', '')),
-                    "creative": str(row.get('creative', '')),
-                    "spend": spend,
-                    "impressions": impressions,
-                    "disparos": disparos,
-                    "clicks": clicks,
-                    "cpv": round(cpv, 4),
-                    "cpc": round(cpc, 2),
-                    "cpd": round(cpd, 4),
-                    "ctr": round(ctr, 2),
-                    "video_25": int(row.get('video_25', 0)) if pd.notna(row.get('video_25')) else 0,
-                    "video_50": int(row.get('video_50', 0)) if pd.notna(row.get('video_50')) else 0,
-                    "video_75": int(row.get('video_75', 0)) if pd.notna(row.get('video_75')) else 0,
-                    "video_completions": video_completions,
-                    "video_starts": int(row.get('video_starts', 0)) if pd.notna(row.get('video_starts')) else 0
-                })
-            
-            total_vc = sum(d.get('video_completions', 0) for d in daily_data)
-            logger.info(f"✅ Dados diários extraídos: {len(daily_data)} registros | Soma VC (100% Complete): {total_vc}")
-            return daily_data
+            total_vc = daily.totals(("video_completions",))["video_completions"]
+            logger.info(f"✅ Dados diários extraídos: {len(daily)} registros | Soma VC (100% Complete): {total_vc}")
+            return daily
             
         except Exception as e:
             logger.error(f"❌ Erro ao extrair dados diários: {e}", exc_info=True)
             return None
     
+    def _read_report_records(self, report_sheet: str) -> DailyColumns:
+        """
+        Linhas da aba Report convertidas em registros diários (em colunas).
+        
+        Com o cache incremental, só a janela final da aba é lida (mais cabeçalho e
+        amostras do histórico para conferir continuidade); se o histórico mudou,
+        a aba inteira é relida.
+        """
+        sheet_id = self.config.sheet_id
+        cache = get_report_row_cache()
+        plan = cache.plan(sheet_id, report_sheet) if cache else None
+        if plan is not None:
+            result = self.service.spreadsheets().values().batchGet(
+                spreadsheetId=sheet_id,
+                ranges=plan.ranges
+            ).execute()
+            value_ranges = [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+            new_rows = plan.verify(value_ranges)
+            record_cache("report_rows", new_rows is not None)
+            if new_rows is not None:
+                with timed("report_parse"):
+                    new_daily, new_positions, _ = self._parse_daily_rows(
+                        plan.entry['header'], new_rows,
+                        first_position=plan.settled, date_format=plan.entry.get('date_format')
+                    )
+                cached_daily, cached_positions = cache.cached_columns(plan)
+                daily = DailyColumns.concat([cached_daily, new_daily])
+                positions = np.concatenate([cached_positions, new_positions])
+                logger.info(f"📊 Leitura incremental da aba Report: {plan.settled} linhas em cache + {len(new_rows)} lidas")
+                self._store_report_cache(cache, report_sheet, plan.entry['header'], new_rows, daily, positions, None, plan)
+                return daily
+            logger.info("🔁 Histórico da aba Report mudou, relendo a aba inteira")
+        
+        # Ler os dados da aba encontrada
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=sheet_id,
+            range=f"{a1_prefix(report_sheet)}A:Z"
+        ).execute()
+        
+        values = result.get('values', [])
+        if not values:
+            raise Exception("Aba 'Report' está vazia")
+        
+        logger.info(f"📊 Encontradas {len(values)} linhas na aba Report")
+        
+        with timed("report_parse"):
+            daily, positions, date_format = self._parse_daily_rows(values[0], values[1:])
+        if cache:
+            self._store_report_cache(cache, report_sheet, values[0], values[1:], daily, positions, date_format, None)
+        return daily
+    
+    def _store_report_cache(self, cache, report_sheet, header, rows, daily, positions, date_format, plan):
+        try:
+            cache.store(self.config.sheet_id, report_sheet, header, rows, daily, positions, date_format, plan=plan)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar o cache da aba Report: {e}")
+    
+    def _parse_daily_rows(self, header: list, rows: list, first_position: int = 0,
+                          date_format: Optional[str] = None):
+        """
+        Converter linhas brutas da aba Report em registros diários.
+        
+        Args:
+            header: Cabeçalho da aba
+            rows: Linhas de dados (sem o cabeçalho)
+            first_position: Posição da primeira linha de `rows` na aba (0 = logo após o cabeçalho)
+            date_format: Formato de data já conhecido da aba (None = detectar nestas linhas)
+        
+        Returns:
+            (DailyColumns, posição de cada registro na aba, formato de data detectado)
+        """
+        if not rows:
+            return DailyColumns.empty(), np.zeros(0, dtype=np.int64), date_format
+        
+        # Converter para DataFrame
+        df = pd.DataFrame(rows, columns=header)  # Primeira linha como header
+        df.index = range(first_position, first_position + len(df))
+        
+        # Mapear colunas para nomes padronizados (inglês + português / variações)
+        column_mapping = {
+            'Day': 'date',
+            'Data': 'date',
+            'Date': 'date',
+            'Dia': 'date',
+            'Line Item': 'line_item',
+            'Creative': 'creative',
+            'Valor investido': 'spend',
+            'VALOR DO INVESTIMENTO': 'spend',
+            'Spend': 'spend',
+            'Imps': 'impressions',
+            'Impressões': 'impressions',
+            'Impressions': 'impressions',
+            'Disparos': 'disparos',
+            'Clicks': 'clicks',
+            'Cliques': 'clicks',
+            'CPV': 'cpv',
+            'CPC': 'cpc',
+            'CTR %': 'ctr',
+            'CTR': 'ctr',
+            'Click Rate (CTR)': 'ctr',
+            '25% Video Complete': 'video_25',
+            '50% Video Complete': 'video_50',
+            '75% Video Complete': 'video_75',
+            '100% Complete': 'video_completions',
+            'Video Starts': 'video_starts',
+            'Visualizações completas': 'video_completions',
+            # Variações comuns em templates/exportações
+            'Starts': 'video_starts',
+            'Start': 'video_starts',
+            'Inícios': 'video_starts',
+            'Inicios': 'video_starts',
+            '25%': 'video_25',
+            '50%': 'video_50',
+            '75%': 'video_75',
+            '100%': 'video_completions',
+            '100% Video Complete': 'video_completions',
+            'Quartil 25%': 'video_25',
+            'Quartil 50%': 'video_50',
+            'Quartil 75%': 'video_75',
+            'Quartil 100%': 'video_completions',
+        }
+        # Aplicar mapeamento (case-insensitive: planilha pode ter "Day" ou "day" ou "DAY")
+        rename_map = {}
+        col_lower = {str(c).strip().lower(): str(c).strip() for c in df.columns}
+        for k, v in column_mapping.items():
+            k_lower = k.lower()
+            if k_lower in col_lower:
+                rename_map[col_lower[k_lower]] = v
+        df = df.rename(columns=rename_map)
+        
+        # Excluir linhas sem data (totais/resumos) para não inflar soma de VCs/impr
+        if 'date' in df.columns:
+            before = len(df)
+            df['date'] = df['date'].astype(str).str.strip()
+            df = df[df['date'].notna() & (df['date'] != '') & (df['date'].str.lower() != 'nan')]
+            if len(df) < before:
+                logger.info(f"📋 Removidas {before - len(df)} linhas sem data (totais/resumo)")
+        
+        # Converter tipos de dados: API pode retornar número (301166.0) ou string com milhar (ex.: "301.166")
+        for col in ['spend', 'impressions', 'disparos', 'clicks', 'cpv', 'cpc', 'ctr',
+                   'video_25', 'video_50', 'video_75', 'video_completions', 'video_starts']:
+            if col in df.columns:
+                df[col] = parse_numeric_column(
+                    df[col], column=col, log=logger,
+                    suspicious_above=SUSPICIOUS_CURRENCY_ABOVE if col == 'spend' else None
+                )
+        
+        # Converter data com correção de formato
+        if 'date' in df.columns:
+            logger.info("🔧 Aplicando correção de datas...")
+            
+            # Importar normalizador de datas
+            try:
+                from date_normalizer import DateNormalizer
+                date_normalizer = DateNormalizer()
+                
+                # Aplicar normalização inteligente de datas
+                with timed("date_normalization"):
+                    df = date_normalizer.normalize_dataframe_dates(df, 'date', detected_format=date_format)
+                date_format = date_normalizer.detected_format
+                logger.info(f"✅ Datas corrigidas: {len(df)} registros processados")
+                
+            except ImportError:
+                logger.warning("⚠️ DateNormalizer não disponível, usando conversão padrão")
+                df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+                df = df.dropna(subset=['date'])
+            except Exception as e:
+                logger.warning(f"⚠️ Erro na normalização de datas: {e}, usando conversão padrão")
+                df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+                df = df.dropna(subset=['date'])
+        
+        # Métricas por linha, vetorizadas (mesmas regras da conversão linha a linha)
+        length = len(df)
+        zeros = np.zeros(length)
+        
+        def numeric(name):
+            if name not in df.columns:
+                return zeros
+            values = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+        
+        def integer(name):
+            return np.trunc(numeric(name)).astype(np.int64)
+        
+        def text(name):
+            return df[name].map(str).tolist() if name in df.columns else [''] * length
+        
+        def ratio(numerator, denominator, digits, scale=1.0):
+            result = np.zeros(length)
+            np.divide(numerator, denominator, out=result, where=denominator > 0)
+            result *= scale
+            # round() do Python (arredondamento do valor binário exato), como na conversão linha a linha;
+            # np.round escala antes de arredondar e diverge em alguns centavos
+            return np.array([round(value, digits) for value in result.tolist()], dtype=np.float64)
+        
+        spend = numeric('spend')
+        # Para campanhas CPD (como Push), pode não existir coluna de impressões.
+        # Nesse caso, usamos "disparos" como proxy de impressões.
+        impressions = integer('impressions' if 'impressions' in df.columns else 'disparos')
+        clicks = integer('clicks')
+        video_completions = integer('video_completions')
+        # Não zerar video_completions quando 100% > 75%: a planilha pode reportar assim (definições diferentes).
+        # Total VC Entregue deve bater com a soma da coluna 100% Complete na planilha.
+        disparos = integer('disparos') if 'disparos' in df.columns else video_completions
+        
+        daily = DailyColumns({
+            "date": StringColumn.encode(text('date')),
+            "line_item": StringColumn.encode(text('line_item')),
+            "creative": StringColumn.encode(text('creative')),
+            "spend": spend,
+            "impressions": impressions,
+            "disparos": disparos,
+            "clicks": clicks,
+            # Calcular métricas dinamicamente
+            "cpv": ratio(spend, video_completions, 4),
+            "cpc": ratio(spend, clicks, 2),
+            "cpd": ratio(spend, disparos, 4),
+            "ctr": ratio(clicks, impressions, 2, scale=100.0),
+            "video_25": integer('video_25'),
+            "video_50": integer('video_50'),
+            "video_75": integer('video_75'),
+            "video_completions": video_completions,
+            "video_starts": integer('video_starts'),
+        }, length)
+        
+        return daily, df.index.to_numpy(dtype=np.int64), date_format
+    
     def _extract_contract_data(self) -> Optional[Dict[str, Any]]:
         """Extrair dados de contrato da aba 'Informações de contrato'"""
         try:
@@ -778,106 +875,19 @@ class RealGoogleSheetsExtractor:
                     if rate_i >= 0:
                         break
 
-            def safe_get(row, i: int) -> str:
-                return str(row[i]).strip() if i >= 0 and i < len(row) and row[i] is not None else ""
-
-            def parse_coord(val: str, max_abs: float):
-                try:
-                    s = str(val).strip()
-                    if not s or s.lower() == "nan":
-                        return None
-                    negative_hint = s[:1] in ("-", "−", "–", "—")
-                    dot_hint = s.count(".")
-                    # Normalizar: aceitar números com separadores de milhar (ex.: -8.031.797.632.094.190)
-                    # e também formatos usuais com ponto decimal (ex.: -8.0317).
-                    s = s.replace(" ", "")
-                    # Alguns Sheets podem usar sinal de menos Unicode (U+2212) etc.
-                    s = s.replace("−", "-").replace("–", "-").replace("—", "-")
-                    if "," in s and "." not in s:
-                        # Decimal com vírgula
-                        s = s.replace(",", ".")
-
-                    # Se parece um inteiro gigantesco com separadores, remover tudo exceto dígitos, sinal e ponto
-                    cleaned = re.sub(r"[^0-9\\-\\.]", "", s)
-                    if not cleaned or cleaned in ("-", "."):
-                        return None
-
-                    # Tentar float direto primeiro
-                    try:
-                        num = float(cleaned)
-                    except Exception:
-                        # Se ainda falhar (ex.: múltiplos pontos), remover pontos e tratar como inteiro
-                        digits = re.sub(r"[^0-9\\-]", "", cleaned)
-                        if digits in ("", "-"):
-                            return None
-                        num = float(int(digits))
-
-                    # Se veio em escala (micro/nano graus), reduzir até caber no range de graus
-                    # (lat ~ [-90,90], lon ~ [-180,180])
-                    while abs(num) > max_abs:
-                        num /= 10.0
-                        # Evitar loop infinito caso algo esteja muito fora
-                        if abs(num) < 1e-12:
-                            return None
-                    # Heurística adicional para latitudes: alguns exports vêm "1 casa a mais" (ex.: -80.317... deveria ser -8.031...).
-                    if max_abs == 90.0 and abs(num) > 60:
-                        num /= 10.0
-                    # Heurística adicional (Brasil): alguns exports ficam 10x maiores (ex.: -58.19 deveria ser -5.819; -32.01 deveria ser -3.201).
-                    # Isso acontece quando o valor original era um inteiro com separadores e o parser mantém uma casa a mais.
-                    if max_abs == 90.0 and abs(num) > 35:
-                        num /= 10.0
-                    # Se a string tinha muitos separadores (milhares), é comum precisar de mais uma casa (ex.: -32 -> -3.2).
-                    if max_abs == 90.0 and dot_hint >= 3 and abs(num) > 15:
-                        num /= 10.0
-                    # Blindagem: se a string original tinha sinal negativo, preservar o sinal
-                    if negative_hint and num > 0:
-                        num = -num
-                    return num
-                except Exception:
-                    return None
-
-            points = []
-            for row in values[1:]:
-                if not any(row):
-                    continue
-                name = safe_get(row, name_i)
-                if not name:
-                    continue
-
-                users_raw = safe_get(row, users_i)
-                rate_raw = safe_get(row, rate_i)
-                lat_raw = safe_get(row, lat_i)
-                lon_raw = safe_get(row, lon_i)
-
-                try:
-                    users = int(re.sub(r"[.,\\s]", "", users_raw) or "0")
-                except Exception:
-                    users = 0
+            rows = [row for row in values[1:] if any(row)]
 
-                try:
-                    rate = float(
-                        str(rate_raw)
-                        .replace("%", "")
-                        .replace(" ", "")
-                        .replace(".", "")
-                        .replace(",", ".")
-                        or "0"
-                    )
-                except Exception:
-                    rate = 0.0
+            def column(i: int) -> list:
+                return [row[i] if 0 <= i < len(row) else None for row in rows]
 
-                lat = parse_coord(lat_raw, 90.0)
-                lon = parse_coord(lon_raw, 180.0)
-                if lat is None or lon is None:
-                    continue
-
-                points.append({
-                    "lat": lat,
-                    "lon": lon,
-                    "name": name,
-                    "users": users,
-                    "rate": rate,
-                })
+            points, diagnostics = build_footfall_points(
+                names=column(name_i),
+                lats=column(lat_i),
+                lons=column(lon_i),
+                users=column(users_i),
+                rates=column(rate_i),
+            )
+            log_footfall_diagnostics(diagnostics, source=footfall_sheet, log=logger)
 
             logger.info(f"✅ Footfall ({footfall_sheet}): {len(points)} pontos")
             return points
@@ -886,33 +896,20 @@ class RealGoogleSheetsExtractor:
             logger.warning(f"⚠️ Falha ao extrair Footfall: {e}", exc_info=True)
             return []
     
-    def _calculate_metrics(self, daily_data: list, contract_data: Dict) -> Dict[str, Any]:
+    def _calculate_metrics(self, daily: DailyColumns, contract_data: Dict) -> Dict[str, Any]:
         """Calcular métricas totais"""
-        if not daily_data:
+        if not len(daily):
             raise Exception("Nenhum dado diário disponível para cálculo de métricas")
         
-        df = pd.DataFrame(daily_data)
-        
-        total_spend = df['spend'].sum()
-        # Em campanhas CPD, não há coluna de impressões; usamos disparos como proxy.
-        if 'impressions' in df.columns:
-            total_impressions = df['impressions'].sum()
-        elif 'disparos' in df.columns:
-            total_impressions = df['disparos'].sum()
-        else:
-            total_impressions = 0
-        total_clicks = df['clicks'].sum()
-        total_completions = df['video_completions'].sum() if 'video_completions' in df.columns else 0
-        total_starts = df['video_starts'].sum() if 'video_starts' in df.columns else 0
-        
-        # Para campanhas CPD, podemos ter uma coluna explícita de disparos; se não tiver,
-        # reusamos video_completions como proxy para disparos.
-        if 'disparos' in df.columns:
-            total_disparos = df['disparos'].sum()
-        elif 'video_completions' in df.columns:
-            total_disparos = df['video_completions'].sum()
-        else:
-            total_disparos = 0
+        totals = daily.totals()
+        total_spend = totals['spend']
+        # Em campanhas CPD, não há coluna de impressões; os registros já trazem disparos como proxy.
+        total_impressions = totals['impressions']
+        total_clicks = totals['clicks']
+        total_completions = totals['video_completions']
+        total_starts = totals['video_starts']
+        # Sem coluna de disparos, os registros já reusam video_completions como proxy.
+        total_disparos = totals['disparos']
         
         cpv = total_spend / total_completions if total_completions > 0 else 0
         cpd = total_spend / total_disparos if total_disparos > 0 else 0
@@ -951,6 +948,9 @@ class RealGoogleSheetsExtractor:
             "total_video_completions": int(total_completions),
             "total_video_starts": int(total_starts),
             "total_disparos": int(total_disparos),
+            "total_video_25": int(totals['video_25']),
+            "total_video_50": int(totals['video_50']),
+            "total_video_75": int(totals['video_75']),
             "cpv": float(cpv),
             "cpd": float(cpd),
             "ctr": float(ctr),
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Cache incremental das linhas da aba Report (dados diários).
+
+Campanhas longas acumulam milhares de linhas na aba Report, mas só os últimos
+dias mudam. Em vez de ler `Report!A:Z` inteira a cada extração, o cache guarda
+o prefixo "assentado" da aba (todas as linhas menos as `tail_rows` finais):
+
+- o hash de cada linha bruta (para verificar continuidade);
+- os registros diários já convertidos dessas linhas, em formato colunar
+  (DailyColumns: uma lista por campo, JSON + gzip);
+- o cabeçalho e o formato de data detectado na última leitura completa.
+
+Na extração seguinte basta ler, num único batchGet, o cabeçalho, algumas
+linhas sorteadas do prefixo e a janela final a partir de `overlap_rows` linhas
+antes do fim do prefixo (`A{n-k}:Z`). Se o cabeçalho, as amostras ou a
+sobreposição não batem com os hashes guardados (histórico editado, linhas
+inseridas ou removidas), a extração volta à leitura completa. Uma leitura
+completa também é feita a cada `full_refresh_hours`, cobrindo edições antigas
+que as amostras não pegaram.
+"""
+
+import os
+import gzip
+import json
+import random
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from daily_columns import DailyColumns
+
+logger = logging.getLogger(__name__)
+
+# Mudanças na conversão das linhas invalidam os caches gravados por versões anteriores
+CACHE_FORMAT_VERSION = 1
+# Linha 1 é o cabeçalho: a linha de dados na posição p fica na linha p + 2 da planilha
+_FIRST_DATA_ROW = 2
+
+
+def row_hash(row: Sequence[Any]) -> str:
+    """Hash curto do conteúdo de uma linha bruta da planilha."""
+    payload = json.dumps(list(row), ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def a1_prefix(tab: str) -> str:
+    """Prefixo A1 da aba, sempre entre aspas (aceito pela API para qualquer nome)."""
+    return "'" + tab.replace("'", "''") + "'!"
+
+
+class ReportReadPlan:
+    """Intervalos a ler para uma extração incremental."""
+
+    def __init__(self, entry: Dict[str, Any], tab: str, window_start: int, samples: List[int]):
+        self.entry = entry
+        self.tab = tab
+        # Posição (linha de dados) onde começa a janela lida; as linhas até `settled` são sobreposição
+        self.window_start = window_start
+        self.samples = samples
+
+    @property
+    def settled(self) -> int:
+        return len(self.entry["row_hashes"])
+
+    @property
+    def ranges(self) -> List[str]:
+        prefix = a1_prefix(self.tab)
+        ranges = [f"{prefix}A1:Z1"]
+        ranges += [f"{prefix}A{pos + _FIRST_DATA_ROW}:Z{pos + _FIRST_DATA_ROW}" for pos in self.samples]
+        ranges.append(f"{prefix}A{self.window_start + _FIRST_DATA_ROW}:Z")
+        return ranges
+
+    def verify(self, value_ranges: List[List[List[Any]]]) -> Optional[List[List[Any]]]:
+        """
+        Conferir cabeçalho, amostras e sobreposição com os hashes do cache.
+        Retorna as linhas novas (após o prefixo assentado) ou None se o histórico mudou.
+        """
+        if len(value_ranges) != len(self.samples) + 2:
+            return None
+        header = value_ranges[0][0] if value_ranges[0] else []
+        if list(header) != self.entry["header"]:
+            logger.info("🔁 Cabeçalho da aba Report mudou")
+            return None
+        hashes = self.entry["row_hashes"]
+        for pos, values in zip(self.samples, value_ranges[1:-1]):
+            if row_hash(values[0] if values else []) != hashes[pos]:
+                logger.info(f"🔁 Linha {pos + _FIRST_DATA_ROW} da aba Report foi editada")
+                return None
+        window = value_ranges[-1]
+        overlap = self.settled - self.window_start
+        if len(window) < overlap:
+            logger.info("🔁 Aba Report tem menos linhas que o prefixo em cache")
+            return None
+        for offset in range(overlap):
+            if row_hash(window[offset]) != hashes[self.window_start + offset]:
+                logger.info(f"🔁 Linha {self.window_start + offset + _FIRST_DATA_ROW} da aba Report foi editada")
+                return None
+        return window[overlap:]
+
+
+class ReportRowCache:
+    """Prefixo assentado da aba Report por planilha, em disco."""
+
+    def __init__(self, cache_dir: str, tail_rows: int = 300, overlap_rows: int = 5, sample_rows: int = 3,
+                 full_refresh_hours: float = 24):
+        self.cache_dir = cache_dir
+        self.tail_rows = max(0, int(tail_rows))
+        self.overlap_rows = max(1, int(overlap_rows))
+        self.sample_rows = max(0, int(sample_rows))
+        self.full_refresh_hours = full_refresh_hours
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, sheet_id: str, tab: str) -> str:
+        key = hashlib.sha1(f"{sheet_id}\x00{tab}".encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.cache_dir, f"report_{key}.json.gz")
+
+    def load(self, sheet_id: str, tab: str) -> Optional[Dict[str, Any]]:
+        path = self._path(sheet_id, tab)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Cache da aba Report ilegível ({path}), ignorando: {e}")
+            return None
+        if entry.get("version") != CACHE_FORMAT_VERSION or entry.get("sheet_id") != sheet_id or entry.get("tab") != tab:
+            return None
+        return entry
+
+    def plan(self, sheet_id: str, tab: str) -> Optional[ReportReadPlan]:
+        """Plano de leitura incremental, ou None se é preciso ler a aba inteira."""
+        entry = self.load(sheet_id, tab)
+        if not entry or not entry.get("row_hashes"):
+            return None
+        if self.full_refresh_hours:
+            try:
+                age_hours = (datetime.now() - datetime.fromisoformat(entry["full_read_at"])).total_seconds() / 3600
+            except (KeyError, TypeError, ValueError):
+                return None
+            if age_hours >= self.full_refresh_hours:
+                return None
+        settled = len(entry["row_hashes"])
+        window_start = max(0, settled - self.overlap_rows)
+        samples = sorted(random.sample(range(window_start), min(self.sample_rows, window_start)))
+        return ReportReadPlan(entry, tab, window_start, samples)
+
+    def store(self, sheet_id: str, tab: str, header: List[Any], rows: List[List[Any]],
+              daily: DailyColumns, positions: np.ndarray, date_format: Optional[str],
+              plan: Optional[ReportReadPlan] = None):
+        """
+        Gravar o novo prefixo assentado.
+
+        Args:
+            rows: Linhas brutas lidas agora (todas, na leitura completa; só as novas, com `plan`)
+            daily: Registros de todas as linhas da aba
+            positions: Posição (linha de dados) de cada registro de `daily`
+            plan: Plano da leitura incremental que produziu `rows` (None = leitura completa)
+        """
+        base = plan.settled if plan else 0
+        total = base + len(rows)
+        settled = max(base, total - self.tail_rows)
+
+        if plan:
+            row_hashes = plan.entry["row_hashes"] + [row_hash(row) for row in rows[:settled - base]]
+            full_read_at = plan.entry["full_read_at"]
+            date_format = plan.entry.get("date_format")
+        else:
+            row_hashes = [row_hash(row) for row in rows[:settled]]
+            full_read_at = datetime.now().isoformat(timespec='seconds')
+
+        keep = np.asarray(positions) < settled
+        records = daily.take(keep).to_lists()
+        records["_row"] = np.asarray(positions)[keep].tolist()
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "sheet_id": sheet_id,
+            "tab": tab,
+            "header": list(header),
+            "date_format": date_format,
+            "full_read_at": full_read_at,
+            "row_hashes": row_hashes,
+            "records": records,
+        }
+        self._write(self._path(sheet_id, tab), entry)
+
+    def cached_columns(self, plan: ReportReadPlan) -> Tuple[DailyColumns, np.ndarray]:
+        """Registros do prefixo assentado e a posição (linha de dados) de cada um."""
+        records = dict(plan.entry.get("records") or {})
+        positions = np.asarray(records.pop("_row", []), dtype=np.int64)
+        daily = DailyColumns.from_lists(records) if records else DailyColumns.empty()
+        return daily, positions
+
+    def invalidate(self, sheet_id: str, tab: str):
+        try:
+            os.remove(self._path(sheet_id, tab))
+        except FileNotFoundError:
+            pass
+
+    def _write(self, path: str, entry: Dict[str, Any]):
+        data = gzip.compress(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), compresslevel=5)
+        with self._lock:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+
+_shared_cache: Optional[ReportRowCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_report_row_cache() -> Optional[ReportRowCache]:
+    """Cache compartilhado pelo processo, configurado por REPORT_ROW_CACHE_CONFIG (None se desligado)."""
+    global _shared_cache
+    from config import REPORT_ROW_CACHE_CONFIG
+    if not REPORT_ROW_CACHE_CONFIG.get('enabled', True):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = ReportRowCache(
+                    REPORT_ROW_CACHE_CONFIG['cache_dir'],
+                    tail_rows=REPORT_ROW_CACHE_CONFIG['tail_rows'],
+                    overlap_rows=REPORT_ROW_CACHE_CONFIG['overlap_rows'],
+                    sample_rows=REPORT_ROW_CACHE_CONFIG['sample_rows'],
+                    full_refresh_hours=REPORT_ROW_CACHE_CONFIG['full_refresh_hours'],
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Cache incremental da aba Report indisponível: {e}")
+                return None
+        return _shared_cache
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Trace por requisição: spans de cada chamada externa e estágio de processamento.
+
+Cada requisição HTTP abre um trace; `span(name)` (e `app_metrics.timed`, que já
+envolve Sheets, GCS, Firestore, SQLite e os estágios de extração/render) grava
+um span filho do span corrente. Os spans seguem o modelo do OpenTelemetry
+(trace_id de 32 hex, span_id de 16 hex, tempos em ns desde a época, atributos)
+e `Trace.to_dict()` produz o mesmo formato de campos do OTLP/JSON — só que o
+"exporter" é local: traces acima de `slow_ms` vão para um buffer circular em
+memória, consultado em /api/admin/traces.
+
+Custo: sem trace ativo, `span()` é uma leitura de ContextVar; com trace, um
+objeto e dois `time_ns()` por span (limitado a `max_spans` por trace). Uma
+fração configurável das requisições (`profile_rate`) roda com cProfile; o
+perfil só é guardado se a requisição ficar lenta.
+
+Spans abertos em threads de um ThreadPoolExecutor só entram no trace se a
+tarefa for submetida com `contextvars.copy_context().run`.
+"""
+
+import io
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    """Intervalo nomeado dentro de um trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns or time.time_ns(),
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": {key: value if isinstance(value, (str, int, float, bool)) else str(value)
+                           for key, value in self.attributes.items()},
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class Trace:
+    """Spans de uma requisição (o primeiro é a raiz)."""
+
+    def __init__(self, name: str, max_spans: int = 500, **attributes):
+        self.trace_id = _new_id(16)
+        self.max_spans = max_spans
+        self.root = Span(self.trace_id, None, name, attributes)
+        self.spans: List[Span] = [self.root]
+        self.dropped = 0
+        self.started_at = datetime.now()
+        self.profiler = None
+
+    def add(self, span: Span) -> bool:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return False
+        self.spans.append(span)
+        return True
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Tempo total e contagem por nome de span (onde o tempo da requisição foi gasto).
+
+        Lista do maior para o menor total_ms: um dict seria reordenado por chave no jsonify.
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans[1:]:
+            entry = totals.setdefault(span.name, {"name": span.name, "count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + span.duration_ms, 3)
+        return sorted(totals.values(), key=lambda entry: -entry["total_ms"])
+
+    def to_dict(self, include_spans: bool = True) -> Dict[str, Any]:
+        data = {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.root.duration_ms, 3),
+            "attributes": self.root.to_dict()["attributes"],
+            "span_count": len(self.spans),
+            "dropped_spans": self.dropped,
+            "summary": self.summary(),
+        }
+        if include_spans:
+            data["spans"] = [span.to_dict() for span in self.spans]
+        return data
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("south_media_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("south_media_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Span filho do span corrente (sem trace ativo não faz nada)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get() or trace.root
+    current = Span(trace.trace_id, parent.span_id, name, attributes)
+    if not trace.add(current):
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class SlowTraceBuffer:
+    """Buffer circular com os traces mais recentes acima do limite."""
+
+    def __init__(self, size: int = 50):
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+
+    def add(self, trace: Dict[str, Any]):
+        with self._lock:
+            self._traces.append(trace)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Mais recentes primeiro, sem os spans."""
+        with self._lock:
+            traces = list(self._traces)
+        return [{key: value for key, value in trace.items() if key not in ("spans", "profile")}
+                for trace in reversed(traces)]
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for trace in self._traces:
+                if trace["trace_id"] == trace_id:
+                    return trace
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+def _profile_text(profiler, limit: int = 30) -> str:
+    import pstats
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class RequestTracer:
+    """Abre um trace por requisição e guarda os lentos no buffer."""
+
+    def __init__(self, slow_ms: float = 1000.0, buffer_size: int = 50, max_spans: int = 500,
+                 profile_rate: float = 0.0, enabled: bool = True):
+        self.slow_ms = slow_ms
+        self.max_spans = max_spans
+        self.profile_rate = profile_rate
+        self.enabled = enabled
+        self.buffer = SlowTraceBuffer(buffer_size)
+
+    def start(self, name: str, **attributes):
+        """Iniciar o trace da requisição corrente; devolve o token para `finish`."""
+        if not self.enabled:
+            return None
+        trace = Trace(name, max_spans=self.max_spans, **attributes)
+        if self.profile_rate > 0 and random.random() < self.profile_rate:
+            try:
+                import cProfile
+                trace.profiler = cProfile.Profile()
+                trace.profiler.enable()
+            except Exception as e:
+                # Ex.: outro profiler já ativo nesta thread
+                trace.profiler = None
+                logger.debug(f"cProfile indisponível para {name}: {e}")
+        return _current_trace.set(trace), _current_span.set(None)
+
+    def finish(self, token, **attributes) -> Optional[Trace]:
+        """Encerrar o trace; se passou de `slow_ms`, guardar no buffer."""
+        if token is None:
+            return None
+        trace = _current_trace.get()
+        _current_trace.reset(token[0])
+        _current_span.reset(token[1])
+        if trace is None:
+            return None
+        if trace.profiler is not None:
+            trace.profiler.disable()
+        trace.root.end_ns = time.time_ns()
+        trace.root.attributes.update(attributes)
+        if trace.root.duration_ms >= self.slow_ms:
+            data = trace.to_dict()
+            data["profile"] = _profile_text(trace.profiler) if trace.profiler is not None else None
+            self.buffer.add(data)
+            logger.info(f"🐢 Requisição lenta: {trace.root.name} em {trace.root.duration_ms:.0f} ms "
+                        f"(trace {trace.trace_id}, {len(trace.spans)} spans)")
+        return trace
+
+
+_tracer: Optional[RequestTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> RequestTracer:
+    """Tracer do processo, configurado por TRACING_CONFIG."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from config import TRACING_CONFIG
+                _tracer = RequestTracer(
+                    slow_ms=TRACING_CONFIG["slow_ms"],
+                    buffer_size=TRACING_CONFIG["buffer_size"],
+                    max_spans=TRACING_CONFIG["max_spans"],
+                    profile_rate=TRACING_CONFIG["profile_rate"],
+                    enabled=TRACING_CONFIG["enabled"],
+                )
+    return _tracer
+
+
+def init_app(app, tracer: Optional[RequestTracer] = None):
+    """Registrar os hooks do Flask que abrem e fecham o trace de cada requisição."""
+    from flask import g, request
+
+    tracer = tracer or get_tracer()
+
+    @app.before_request
+    def _start_request_trace():
+        g._trace_token = tracer.start(f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+                                      **{"http.method": request.method, "http.target": request.path})
+
+    @app.after_request
+    def _record_response_status(response):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.root.attributes["http.status_code"] = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_trace(exc):
+        token = g.pop("_trace_token", None)
+        tracer.finish(token, **({"error": type(exc).__name__} if exc else {}))
+
+    return tracer
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Detecção de mudanças em planilhas pela revisão do Google Drive.
+
+A maioria das planilhas muda uma vez por dia, mas as atualizações rodam de
+hora em hora. Antes de baixar e processar abas inteiras, uma sondagem barata de
+metadados (Drive `files.get` com `fields=id,modifiedTime,version`, em lote)
+diz se a planilha mudou desde a última execução bem-sucedida:
+
+- SheetRevisionProbe: consulta as revisões (com TTL opcional por planilha);
+- SheetChangeTracker: guarda, por escopo (ex.: "dashboard_automation"), a
+  revisão processada por último num arquivo JSON e decide se a execução pode
+  ser pulada;
+- RevisionMemo: memoriza em memória o resultado de extrações sob demanda,
+  válido enquanto a revisão da planilha não mudar.
+
+Falhas na sondagem nunca bloqueiam uma atualização: planilha sem revisão
+conhecida é tratada como alterada.
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DRIVE_METADATA_SCOPE = 'https://www.googleapis.com/auth/drive.metadata.readonly'
+_REVISION_FIELDS = 'id,modifiedTime,version'
+# Limite de requisições por lote da API do Drive
+_MAX_BATCH = 100
+
+
+def drive_credentials(credentials):
+    """Mesmas credenciais, acrescidas do escopo de metadados do Drive (quando suportado)."""
+    with_scopes = getattr(credentials, 'with_scopes', None)
+    if with_scopes is None:
+        return credentials
+    scopes = tuple(getattr(credentials, 'scopes', None) or ())
+    if DRIVE_METADATA_SCOPE in scopes:
+        return credentials
+    try:
+        return with_scopes(scopes + (DRIVE_METADATA_SCOPE,))
+    except Exception as e:
+        logger.debug(f"Credenciais sem suporte a novos escopos: {e}")
+        return credentials
+
+
+def revision_fingerprint(metadata: Dict[str, Any]) -> Optional[str]:
+    """Identificador da revisão: `version` do Drive (muda a cada edição) + modifiedTime."""
+    version = metadata.get('version')
+    modified_time = metadata.get('modifiedTime')
+    if version is None and modified_time is None:
+        return None
+    return f"{version}:{modified_time}"
+
+
+def config_fingerprint(value: Any) -> str:
+    """Hash estável de uma configuração (mudanças nela forçam reprocessamento)."""
+    payload = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class SheetRevisionProbe:
+    """Sondagem das revisões de planilhas via API do Drive."""
+
+    def __init__(self, credentials=None, service=None, ttl_sec: float = 0):
+        """
+        Args:
+            credentials: Credenciais Google (o escopo de metadados do Drive é acrescentado)
+            service: Serviço Drive v3 já construído (ex.: substituto local em testes)
+            ttl_sec: Reaproveitar uma revisão consultada há menos de ttl_sec segundos
+        """
+        self.credentials = drive_credentials(credentials) if credentials is not None else None
+        self.ttl_sec = max(0.0, float(ttl_sec))
+        self._service = service
+        self._service_lock = threading.Lock()
+        # httplib2 não é thread-safe: cada thread usa sua própria conexão autenticada
+        self._thread_local = threading.local()
+        # sheet_id -> (consultado em, metadados)
+        self._recent: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def _get_service(self):
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    from googleapiclient.discovery import build
+                    self._service = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
+        return self._service
+
+    def _execute(self, request):
+        if self.credentials is None:
+            return request.execute()
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            import httplib2
+            import google_auth_httplib2
+            http = self._thread_local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return request.execute(http=http)
+
+    def _files_get(self, service, sheet_id: str):
+        return service.files().get(fileId=sheet_id, fields=_REVISION_FIELDS, supportsAllDrives=True)
+
+    def _fetch_remote(self, sheet_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        service = self._get_service()
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        if len(sheet_ids) == 1:
+            sheet_id = sheet_ids[0]
+            self.requests += 1
+            try:
+                results[sheet_id] = self._execute(self._files_get(service, sheet_id))
+            except Exception as e:
+                logger.warning(f"⚠️ Revisão indisponível para planilha {sheet_id[:20]}...: {e}")
+                results[sheet_id] = None
+            return results
+
+        def _callback(request_id, response, exception):
+            if exception is not None:
+                logger.warning(f"⚠️ Revisão indisponível para planilha {request_id[:20]}...: {exception}")
+                results[request_id] = None
+            else:
+                results[request_id] = response
+
+        for offset in range(0, len(sheet_ids), _MAX_BATCH):
+            chunk = sheet_ids[offset:offset + _MAX_BATCH]
+            batch = service.new_batch_http_request(callback=_callback)
+            for sheet_id in chunk:
+                batch.add(self._files_get(service, sheet_id), request_id=sheet_id)
+            self.requests += 1
+            try:
+                self._execute(batch)
+            except Exception as e:
+                logger.warning(f"⚠️ Falha na consulta de revisões em lote: {e}")
+            for sheet_id in chunk:
+                results.setdefault(sheet_id, None)
+        return results
+
+    def fetch(self, sheet_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Revisões atuais das planilhas: {sheet_id: {"modified_time", "version", "fingerprint"}}.
+        Planilhas cuja revisão não pôde ser consultada ficam com None.
+        """
+        wanted = list(dict.fromkeys(sheet_id for sheet_id in sheet_ids if sheet_id))
+        now = time.monotonic()
+        revisions: Dict[str, Optional[Dict[str, Any]]] = {}
+        to_query = []
+        with self._lock:
+            for sheet_id in wanted:
+                recent = self._recent.get(sheet_id)
+                if recent and self.ttl_sec and now - recent[0] < self.ttl_sec:
+                    revisions[sheet_id] = recent[1]
+                else:
+                    to_query.append(sheet_id)
+
+        if to_query:
+            try:
+                remote = self._fetch_remote(to_query)
+            except Exception as e:
+                logger.warning(f"⚠️ Sondagem de revisões indisponível: {e}")
+                remote = {}
+            checked_at = time.monotonic()
+            for sheet_id in to_query:
+                metadata = remote.get(sheet_id)
+                fingerprint = revision_fingerprint(metadata) if metadata else None
+                revision = None
+                if fingerprint:
+                    revision = {
+                        "modified_time": metadata.get('modifiedTime'),
+                        "version": metadata.get('version'),
+                        "fingerprint": fingerprint,
+                    }
+                    with self._lock:
+                        self._recent[sheet_id] = (checked_at, revision)
+                revisions[sheet_id] = revision
+        return revisions
+
+    def fingerprint(self, sheet_id: str) -> Optional[str]:
+        revision = self.fetch([sheet_id]).get(sheet_id)
+        return revision["fingerprint"] if revision else None
+
+
+class ChangeCheck:
+    """Resultado de SheetChangeTracker.check."""
+
+    def __init__(self, scope: str, revisions: Dict[str, Optional[Dict[str, Any]]], changed: List[str],
+                 unknown: List[str], context: Optional[str], reason: Optional[str] = None):
+        self.scope = scope
+        self.revisions = revisions
+        self.changed = changed
+        self.unknown = unknown
+        self.context = context
+        # Motivo para reprocessar tudo (contexto novo, última execução antiga, forçado)
+        self.reason = reason
+
+    @property
+    def unchanged(self) -> List[str]:
+        skip = set(self.changed) | set(self.unknown)
+        return [sheet_id for sheet_id in self.revisions if sheet_id not in skip]
+
+    @property
+    def should_run(self) -> bool:
+        return bool(self.reason or self.changed or self.unknown)
+
+    def summary(self) -> str:
+        if self.reason:
+            return self.reason
+        return (f"{len(self.changed)} alteradas, {len(self.unknown)} sem revisão, "
+                f"{len(self.unchanged)} sem mudanças")
+
+
+class SheetChangeTracker:
+    """Revisões processadas por último, por escopo, persistidas num arquivo JSON."""
+
+    def __init__(self, scope: str, probe: SheetRevisionProbe, state_file: str, max_skip_hours: float = 24):
+        self.scope = scope
+        self.probe = probe
+        self.state_file = state_file
+        self.max_skip_hours = max_skip_hours
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Estado de revisões ilegível ({self.state_file}), ignorando: {e}")
+            return {}
+
+    def _save_state(self, state: Dict[str, Any]):
+        from dashboard_slots import write_text_atomic
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        os.makedirs(directory, exist_ok=True)
+        write_text_atomic(self.state_file, json.dumps(state, indent=2, sort_keys=True, ensure_ascii=False))
+
+    def check(self, sheet_ids: Iterable[str], context: Optional[str] = None, force: bool = False) -> ChangeCheck:
+        """
+        Comparar as revisões atuais com as da última execução bem-sucedida.
+
+        Args:
+            sheet_ids: Planilhas de que a execução depende
+            context: Hash da configuração da execução; se mudou, tudo é reprocessado
+            force: Reprocessar independentemente das revisões
+        """
+        revisions = self.probe.fetch(sheet_ids)
+        with self._lock:
+            recorded = self._load_state().get(self.scope, {})
+
+        reason = None
+        if force:
+            reason = "execução forçada"
+        elif context is not None and recorded.get("context") != context:
+            reason = "configuração alterada (ou primeira execução)"
+        elif self.max_skip_hours:
+            last_run = recorded.get("recorded_at")
+            try:
+                age_hours = (datetime.now() - datetime.fromisoformat(last_run)).total_seconds() / 3600
+            except (TypeError, ValueError):
+                age_hours = None
+            if age_hours is None or age_hours >= self.max_skip_hours:
+                reason = f"última execução completa há mais de {self.max_skip_hours}h"
+
+        sheets = recorded.get("sheets", {})
+        changed, unknown = [], []
+        for sheet_id, revision in revisions.items():
+            if revision is None:
+                unknown.append(sheet_id)
+            elif (sheets.get(sheet_id) or {}).get("fingerprint") != revision["fingerprint"]:
+                changed.append(sheet_id)
+        return ChangeCheck(self.scope, revisions, changed, unknown, context, reason)
+
+    def record(self, check: ChangeCheck):
+        """Registrar as revisões de uma execução concluída com sucesso."""
+        with self._lock:
+            state = self._load_state()
+            scope_state = state.get(self.scope, {})
+            sheets = scope_state.get("sheets", {})
+            for sheet_id, revision in check.revisions.items():
+                if revision is None:
+                    sheets.pop(sheet_id, None)  # revisão desconhecida: reprocessar na próxima
+                else:
+                    sheets[sheet_id] = revision
+            state[self.scope] = {
+                "context": check.context,
+                "recorded_at": datetime.now().isoformat(timespec='seconds'),
+                "sheets": sheets,
+            }
+            try:
+                self._save_state(state)
+            except Exception as e:
+                logger.warning(f"⚠️ Não foi possível gravar o estado de revisões ({self.state_file}): {e}")
+
+
+class RevisionMemo:
+    """Memória LRU de resultados de extração, válidos enquanto a revisão não muda."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max(0, int(max_entries))
+        # key -> (fingerprint, valor)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, fingerprint: Optional[str]) -> Optional[Any]:
+        """Cópia do valor memorizado para esta revisão (None se ausente ou desatualizado)."""
+        if not fingerprint:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, fingerprint: Optional[str], value: Any):
+        if not fingerprint or not self.max_entries:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (fingerprint, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def build_change_tracker(scope: str, credentials=None, service=None) -> Optional[SheetChangeTracker]:
+    """Tracker configurado por SHEET_CHANGE_CONFIG (None se a detecção estiver desligada)."""
+    from config import SHEET_CHANGE_CONFIG
+    if not SHEET_CHANGE_CONFIG.get('enabled', True):
+        return None
+    if credentials is None and service is None:
+        return None
+    probe = SheetRevisionProbe(credentials=credentials, service=service)
+    return SheetChangeTracker(
+        scope,
+        probe,
+        state_file=SHEET_CHANGE_CONFIG.get('state_file', 'logs/sheet_revisions.json'),
+        max_skip_hours=SHEET_CHANGE_CONFIG.get('max_skip_hours', 24),
+    )
+
+
+_shared_probe: Optional[SheetRevisionProbe] = None
+_shared_memo: Optional[RevisionMemo] = None
+_shared_lock = threading.Lock()
+
+
+def get_extraction_memo(credentials=None):
+    """
+    Sondagem e memória compartilhadas pelo processo para extrações sob demanda.
+    Retorna (probe, memo), ou (None, None) se a detecção estiver desligada.
+    """
+    global _shared_probe, _shared_memo
+    from config import SHEET_CHANGE_CONFIG
+    if not SHEET_CHANGE_CONFIG.get('enabled', True) or not SHEET_CHANGE_CONFIG.get('memo_entries', 0):
+        return None, None
+    with _shared_lock:
+        if _shared_probe is None:
+            if credentials is None:
+                return None, None
+            _shared_probe = SheetRevisionProbe(
+                credentials=credentials,
+                ttl_sec=SHEET_CHANGE_CONFIG.get('probe_ttl_sec', 30),
+            )
+            _shared_memo = RevisionMemo(max_entries=SHEET_CHANGE_CONFIG['memo_entries'])
+        return _shared_probe, _shared_memo
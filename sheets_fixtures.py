@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Planilhas de teste (sintéticas ou gravadas) e um substituto local do serviço do Sheets.
+
+Uma "pasta de trabalho" é um dicionário serializável em JSON:
+
+    {
+        "spreadsheetId": "...",
+        "sheets": [{"title": "Report", "sheetId": 0}, ...],
+        "values": {"Report": [[cabeçalho...], [linha...], ...], ...}
+    }
+
+`FakeSheetsService` responde `spreadsheets().get`, `values().get` e
+`values().batchGet` a partir dessas pastas, resolvendo os intervalos A1 usados
+pelo código (`'Aba'!A:Z`, `Aba!A:D`, `A1:Z2000`, `A120:Z`, `A:Z` sem aba), e
+conta as chamadas por método. `record_workbook` grava uma planilha real no
+mesmo formato, para repetir a extração depois sem acessar a API.
+
+`FakeDriveService` responde `files().get` (id, modifiedTime, version) e
+`new_batch_http_request`, para a sondagem de revisões de sheet_revisions.py;
+`touch` simula uma edição na planilha.
+
+As planilhas sintéticas seguem os modelos usados em produção (aba Report com
+quartis de vídeo, contrato, publishers, estratégias e footfall; abas por GID
+dos canais de GOOGLE_SHEETS_CONFIG), com números formatados como a API
+devolve por padrão ("R$ 1.234,56", "12.345").
+"""
+
+import re
+import json
+import time
+import random
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Workbook = Dict[str, Any]
+
+_A1_CELL = re.compile(r'^([A-Za-z]*)(\d*)$')
+
+
+def column_index(letters: str) -> int:
+    """Índice (base 0) da coluna A1: A → 0, Z → 25, AA → 26."""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+
+def parse_a1(range_name: str, default_tab: str) -> Tuple[str, int, Optional[int], int, Optional[int]]:
+    """
+    Intervalo A1 → (aba, primeira coluna, última coluna, primeira linha, última linha).
+    Colunas e linhas em base 0; None = até o fim.
+    """
+    tab, cells = default_tab, range_name
+    if '!' in range_name:
+        tab, cells = range_name.rsplit('!', 1)
+        if len(tab) >= 2 and tab[0] == tab[-1] == "'":
+            tab = tab[1:-1].replace("''", "'")
+
+    start, _, end = cells.partition(':')
+    start_match = _A1_CELL.match(start) or _A1_CELL.match('')
+    end_match = _A1_CELL.match(end) or _A1_CELL.match('')
+    start_col, start_row = start_match.groups()
+    end_col, end_row = end_match.groups()
+    if not end:
+        # Célula única ("A5") ou aba inteira ("")
+        end_col, end_row = (start_col, start_row) if start else ('', '')
+    return (
+        tab,
+        column_index(start_col) if start_col else 0,
+        column_index(end_col) if end_col else None,
+        int(start_row) - 1 if start_row else 0,
+        int(end_row) - 1 if end_row else None,
+    )
+
+
+def read_range(workbook: Workbook, range_name: str) -> Dict[str, Any]:
+    """Resposta de `values().get` para um intervalo (linhas copiadas, sem células vazias no fim)."""
+    sheets = workbook.get('sheets') or []
+    default_tab = sheets[0]['title'] if sheets else ''
+    if '!' not in range_name and range_name in workbook.get('values', {}):
+        # Só o nome da aba
+        range_name = "'" + range_name.replace("'", "''") + "'!A:ZZ"
+    tab, first_col, last_col, first_row, last_row = parse_a1(range_name, default_tab)
+    if tab not in workbook.get('values', {}):
+        raise KeyError(f"Unable to parse range: {range_name}")
+    rows = workbook['values'][tab]
+    selected = rows[first_row:None if last_row is None else last_row + 1]
+    col_end = None if last_col is None else last_col + 1
+    values = []
+    for row in selected:
+        cells = list(row[first_col:col_end])
+        while cells and cells[-1] in ('', None):
+            cells.pop()
+        values.append(cells)
+    # A API omite as linhas vazias do fim do intervalo
+    while values and not values[-1]:
+        values.pop()
+    response = {'range': range_name, 'majorDimension': 'ROWS'}
+    if values:
+        response['values'] = values
+    return response
+
+
+class _CallCounter:
+    """Contagem de chamadas por método e latência simulada, comum aos substitutos."""
+
+    def __init__(self, latency_sec: float = 0.0):
+        self.latency_sec = max(0.0, float(latency_sec))
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, method: str):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+
+    def reset_calls(self) -> Dict[str, int]:
+        """Zerar os contadores; devolve os valores anteriores."""
+        with self._lock:
+            calls, self.calls = self.calls, {}
+        return calls
+
+
+class _FakeRequest:
+    def __init__(self, service: _CallCounter, method: str, handler):
+        self._service = service
+        self._method = method
+        self._handler = handler
+
+    def execute(self, *args, **kwargs):
+        self._service._record(self._method)
+        return self._handler()
+
+
+class _FakeValues:
+    def __init__(self, service: 'FakeSheetsService'):
+        self._service = service
+
+    def get(self, spreadsheetId: str, range: str, **kwargs):
+        workbook = self._service.workbook(spreadsheetId)
+        return _FakeRequest(self._service, 'values.get', lambda: read_range(workbook, range))
+
+    def batchGet(self, spreadsheetId: str, ranges: Iterable[str], **kwargs):
+        workbook = self._service.workbook(spreadsheetId)
+        ranges = list(ranges)
+        return _FakeRequest(self._service, 'values.batchGet', lambda: {
+            'spreadsheetId': spreadsheetId,
+            'valueRanges': [read_range(workbook, range_name) for range_name in ranges],
+        })
+
+
+class _FakeSpreadsheets:
+    def __init__(self, service: 'FakeSheetsService'):
+        self._service = service
+
+    def get(self, spreadsheetId: str, **kwargs):
+        workbook = self._service.workbook(spreadsheetId)
+        return _FakeRequest(self._service, 'spreadsheets.get', lambda: {
+            'spreadsheetId': spreadsheetId,
+            'sheets': [{'properties': {'sheetId': sheet['sheetId'], 'title': sheet['title']}}
+                       for sheet in workbook.get('sheets', [])],
+        })
+
+    def values(self):
+        return _FakeValues(self._service)
+
+
+class FakeSheetsService(_CallCounter):
+    """Substituto local do serviço `googleapiclient` do Sheets v4 (somente leitura)."""
+
+    def __init__(self, workbooks: Dict[str, Workbook], latency_sec: float = 0.0):
+        """
+        Args:
+            workbooks: spreadsheetId → pasta de trabalho
+            latency_sec: Espera por chamada (simula a ida e volta da API)
+        """
+        super().__init__(latency_sec)
+        self.workbooks = workbooks
+
+    def workbook(self, spreadsheet_id: str) -> Workbook:
+        workbook = self.workbooks.get(spreadsheet_id)
+        if workbook is None:
+            raise KeyError(f"Requested entity was not found: {spreadsheet_id}")
+        return workbook
+
+    def spreadsheets(self):
+        return _FakeSpreadsheets(self)
+
+
+class _FakeFiles:
+    def __init__(self, service: 'FakeDriveService'):
+        self._service = service
+
+    def get(self, fileId: str, fields: Optional[str] = None, **kwargs):
+        return _FakeRequest(self._service, 'files.get', lambda: self._service.metadata(fileId))
+
+
+class _FakeBatch:
+    """Lote do Drive: uma ida e volta, um callback por requisição (como BatchHttpRequest)."""
+
+    def __init__(self, service: 'FakeDriveService', callback):
+        self._service = service
+        self._callback = callback
+        self._requests: List[Tuple[str, _FakeRequest]] = []
+
+    def add(self, request: _FakeRequest, request_id: Optional[str] = None, callback=None):
+        self._requests.append((request_id or str(len(self._requests)), request))
+
+    def execute(self, *args, **kwargs):
+        self._service._record('batch')
+        for request_id, request in self._requests:
+            try:
+                response, exception = request._handler(), None
+            except Exception as e:
+                response, exception = None, e
+            if self._callback is not None:
+                self._callback(request_id, response, exception)
+
+
+class FakeDriveService(_CallCounter):
+    """Substituto local do Drive v3 para a sondagem de revisões (metadados das planilhas)."""
+
+    def __init__(self, sheet_ids: Iterable[str] = (), latency_sec: float = 0.0):
+        """
+        Args:
+            sheet_ids: Planilhas conhecidas (as demais respondem "não encontrado")
+            latency_sec: Espera por chamada (simula a ida e volta da API)
+        """
+        super().__init__(latency_sec)
+        self.files_metadata: Dict[str, Dict[str, Any]] = {}
+        # Planilhas cuja consulta falha (ex.: sem permissão), mesmo sendo conhecidas
+        self.failing: set = set()
+        for sheet_id in sheet_ids:
+            self.touch(sheet_id)
+
+    def touch(self, sheet_id: str):
+        """Simular uma edição: nova `version` e novo modifiedTime."""
+        with self._lock:
+            previous = self.files_metadata.get(sheet_id, {})
+            self.files_metadata[sheet_id] = {
+                'id': sheet_id,
+                'version': str(int(previous.get('version', 0)) + 1),
+                'modifiedTime': datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            }
+
+    def metadata(self, file_id: str) -> Dict[str, Any]:
+        with self._lock:
+            metadata = self.files_metadata.get(file_id)
+            if metadata is None or file_id in self.failing:
+                raise KeyError(f"File not found: {file_id}")
+            return dict(metadata)
+
+    def files(self):
+        return _FakeFiles(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatch(self, callback)
+
+
+# ---------------------------------------------------------------------------
+# Gravação
+# ---------------------------------------------------------------------------
+
+def record_workbook(service, spreadsheet_id: str, columns: str = 'A:Z') -> Workbook:
+    """Gravar todas as abas de uma planilha real (metadados + um batchGet)."""
+    metadata = service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields='sheets.properties(sheetId,title)'
+    ).execute()
+    sheets = [{'title': sheet['properties']['title'], 'sheetId': sheet['properties']['sheetId']}
+              for sheet in metadata.get('sheets', [])]
+    result = service.spreadsheets().values().batchGet(
+        spreadsheetId=spreadsheet_id,
+        ranges=["'" + sheet['title'].replace("'", "''") + "'!" + columns for sheet in sheets]
+    ).execute()
+    value_ranges = result.get('valueRanges', [])
+    return {
+        'spreadsheetId': spreadsheet_id,
+        'sheets': sheets,
+        'values': {sheet['title']: (value_ranges[i].get('values', []) if i < len(value_ranges) else [])
+                   for i, sheet in enumerate(sheets)},
+    }
+
+
+def save_workbooks(path: str, workbooks: Dict[str, Workbook]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(workbooks, f, ensure_ascii=False)
+
+
+def load_workbooks(path: str) -> Dict[str, Workbook]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------------------------
+# Planilhas sintéticas
+# ---------------------------------------------------------------------------
+
+REPORT_HEADER = [
+    'Day', 'Line Item', 'Creative', 'Valor investido', 'Imps', 'Clicks', 'Video Starts',
+    '25% Video Complete', '50% Video Complete', '75% Video Complete', '100% Complete',
+]
+
+
+def _br_number(value: float, decimals: int = 0) -> str:
+    """Número no formato de exibição pt-BR ("12.345" / "1.234,56")."""
+    text = f"{value:,.{decimals}f}"
+    return text.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def _money(value: float) -> str:
+    return f"R$ {_br_number(value, 2)}"
+
+
+def _report_rows(rows: int, rng: random.Random, start: date, line_items: int) -> List[List[str]]:
+    creatives = [f"Criativo {i:02d}" for i in range(1, 7)]
+    out = []
+    for i in range(rows):
+        impressions = rng.randint(1_000, 60_000)
+        starts = int(impressions * rng.uniform(0.6, 0.95))
+        q25 = int(starts * rng.uniform(0.8, 0.95))
+        q50 = int(q25 * rng.uniform(0.8, 0.95))
+        q75 = int(q50 * rng.uniform(0.8, 0.95))
+        q100 = int(q75 * rng.uniform(0.8, 0.95))
+        out.append([
+            (start + timedelta(days=i // line_items)).strftime('%d/%m/%Y'),
+            f"LI {i % line_items:03d}",
+            creatives[i % len(creatives)],
+            _money(impressions * rng.uniform(0.01, 0.04)),
+            _br_number(impressions),
+            _br_number(int(impressions * rng.uniform(0.001, 0.02))),
+            _br_number(starts),
+            _br_number(q25),
+            _br_number(q50),
+            _br_number(q75),
+            _br_number(q100),
+        ])
+    return out
+
+
+def _footfall_rows(points: int, rng: random.Random) -> List[List[str]]:
+    rows = [['name', 'lat', 'long', 'Footfall Users', 'Footfall Rate %']]
+    for i in range(points):
+        rows.append([
+            f"Loja {i:05d}",
+            f"{-23.55 + rng.uniform(-1.5, 1.5):.6f}",
+            f"{-46.63 + rng.uniform(-1.5, 1.5):.6f}",
+            _br_number(rng.randint(50, 20_000)),
+            f"{rng.uniform(0.5, 25):.2f}%".replace('.', ','),
+        ])
+    return rows
+
+
+def synthetic_campaign_workbook(spreadsheet_id: str, rows: int, seed: int = 0, footfall_points: int = 0,
+                                line_items: int = 0, start: date = date(2024, 1, 1)) -> Workbook:
+    """
+    Planilha de campanha no modelo lido por RealGoogleSheetsExtractor.
+
+    Args:
+        rows: Linhas de dados da aba Report
+        footfall_points: Linhas da aba Footfall (0 = sem aba)
+        line_items: Linhas por dia (0 = escolher para cobrir no máximo ~2 anos)
+    """
+    rng = random.Random(f"{spreadsheet_id}:{seed}")
+    line_items = line_items or max(1, -(-rows // 730))
+    values = {
+        'Report': [list(REPORT_HEADER)] + _report_rows(rows, rng, start, line_items),
+        'Informações de contrato': [
+            ['Cliente:', 'Benchmark'],
+            ['Campanha:', spreadsheet_id],
+            ['Canal:', 'Programática'],
+            ['Tipo de criativo:', 'Video'],
+            ['Investimento:', _money(250_000)],
+            ['CPV contratado:', 'R$ 0,08'],
+            ['Complete Views Contrado', _br_number(3_000_000)],
+            ['Periodo de veiculação', start.strftime('%d/%m/%Y'),
+             (start + timedelta(days=rows // line_items)).strftime('%d/%m/%Y')],
+        ],
+        'Lista de publishers': [['Nome', 'App/URL']] + [
+            [f"Publisher {i:03d}", f"https://publisher{i:03d}.example.com"] for i in range(40)
+        ],
+        'Estratégias': [['Estratégia', 'Tipo', 'Investimento', 'Impressões']] + [
+            [f"Segmentação {i:02d}", 'Contextual' if i % 2 else 'Comportamental',
+             _br_number(rng.uniform(1_000, 50_000), 2), _br_number(rng.randint(10_000, 900_000))]
+            for i in range(12)
+        ],
+    }
+    if footfall_points:
+        values['Footfall'] = _footfall_rows(footfall_points, rng)
+    return {
+        'spreadsheetId': spreadsheet_id,
+        'sheets': [{'title': title, 'sheetId': index} for index, title in enumerate(values)],
+        'values': values,
+    }
+
+
+def _channel_cell(key: str, i: int, day: date, rng: random.Random) -> str:
+    if key == 'date':
+        return day.strftime('%d/%m/%Y')
+    if key in ('creative', 'name'):
+        return f"{key.title()} {i % 12:02d}"
+    if key == 'spend':
+        return _money(rng.uniform(50, 2_500))
+    if key in ('lat', 'lon'):
+        return f"{(-23.55 if key == 'lat' else -46.63) + rng.uniform(-1.5, 1.5):.6f}"
+    if key == 'rate':
+        return f"{rng.uniform(0.5, 25):.2f}".replace('.', ',')
+    return _br_number(rng.randint(100, 90_000))
+
+
+def synthetic_channel_workbooks(channels: Dict[str, Dict[str, Any]], rows: int,
+                                seed: int = 0) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Workbook]]:
+    """
+    Planilhas por canal no modelo de GOOGLE_SHEETS_CONFIG (lido por GoogleSheetsProcessor).
+
+    Cada sheet_id da configuração vira uma planilha sintética (canais que
+    compartilham planilha continuam compartilhando), com uma aba por GID e o
+    cabeçalho montado a partir das colunas configuradas.
+
+    Returns:
+        (configuração com os sheet_ids sintéticos, pastas de trabalho)
+    """
+    synthetic_ids: Dict[str, str] = {}
+    workbooks: Dict[str, Workbook] = {}
+    config: Dict[str, Dict[str, Any]] = {}
+    for position, (channel_name, channel_config) in enumerate(channels.items()):
+        original_id = (channel_config.get('sheet_id') or '').strip()
+        sheet_id = synthetic_ids.setdefault(original_id, f"bench-sheet-{len(synthetic_ids):02d}")
+        workbook = workbooks.setdefault(sheet_id, {'spreadsheetId': sheet_id, 'sheets': [], 'values': {}})
+        gid = channel_config.get('gid')
+        config[channel_name] = dict(channel_config, sheet_id=sheet_id)
+        # Mesmo GID (ou nome de aba) na mesma planilha = mesma aba
+        existing = [sheet for sheet in workbook['sheets']
+                    if (gid and str(sheet['sheetId']) == str(gid)) or sheet['title'] == channel_config.get('sheet_name')]
+        if existing:
+            continue
+        title = channel_config.get('sheet_name') or f"{channel_name} ({gid or position})"
+
+        columns = [(key, name) for key, name in channel_config.get('columns', {}).items()
+                   if name or key == 'date']
+        # Data na primeira coluna (modelos sem nome de cabeçalho para a data, como CTV)
+        columns.sort(key=lambda item: item[0] != 'date')
+        rng = random.Random(f"{sheet_id}:{title}:{seed}")
+        start = date(2024, 1, 1)
+        per_day = max(1, -(-rows // 730))
+        values = [[name for _, name in columns]]
+        for i in range(rows):
+            day = start + timedelta(days=i // per_day)
+            values.append([_channel_cell(key, i, day, rng) for key, _ in columns])
+        workbook['values'][title] = values
+        workbook['sheets'].append({
+            'title': title,
+            'sheetId': int(gid) if str(gid or '').isdigit() else len(workbook['sheets']),
+        })
+    return config, workbooks
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Índice de login: e-mail → (coleção, documento, esquema do hash da senha).
+
+O login consultava até quatro coleções de usuários em sequência (a do ambiente
+e as legadas "users", "users_hml", "users_staging") e, a cada documento
+encontrado, tentava werkzeug, sha256, texto plano e bcrypt. O índice é montado
+uma vez por processo (lendo só os campos de login das coleções) e renovado a
+cada `ttl_sec`; escritas de usuários atualizam ou descartam as entradas. Com o
+índice, o login custa uma leitura de documento e uma verificação de hash, no
+esquema detectado no próprio documento.
+
+Senhas em esquemas legados (sha256, bcrypt, texto plano) são regravadas no
+esquema atual (werkzeug) no primeiro login bem-sucedido.
+"""
+
+import hmac
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from werkzeug.security import check_password_hash
+
+logger = logging.getLogger(__name__)
+
+SCHEME_WERKZEUG = "werkzeug"
+SCHEME_BCRYPT = "bcrypt"
+SCHEME_SHA256 = "sha256"
+SCHEME_PLAINTEXT = "plaintext"
+# Sem password_hash: senha em texto plano no campo "password"
+SCHEME_PASSWORD_FIELD = "password_field"
+SCHEME_NONE = "none"
+
+_HEX = frozenset("0123456789abcdef")
+# Campos lidos ao montar o índice
+LOGIN_FIELDS = ["email", "password_hash", "password"]
+
+
+def detect_hash_scheme(user: Dict[str, Any]) -> str:
+    """Esquema da senha armazenada num documento de usuário."""
+    stored = user.get("password_hash") or ""
+    if not stored:
+        return SCHEME_PASSWORD_FIELD if user.get("password") else SCHEME_NONE
+    if stored.startswith(("pbkdf2:", "scrypt:")):
+        return SCHEME_WERKZEUG
+    if stored.startswith("$2"):
+        return SCHEME_BCRYPT
+    if len(stored) == 64 and set(stored.lower()) <= _HEX:
+        return SCHEME_SHA256
+    return SCHEME_PLAINTEXT
+
+
+def _verify_scheme(scheme: str, user: Dict[str, Any], password: str) -> bool:
+    stored = user.get("password_hash") or ""
+    if scheme == SCHEME_WERKZEUG:
+        return check_password_hash(stored, password)
+    if scheme == SCHEME_BCRYPT:
+        import bcrypt  # type: ignore
+        return bcrypt.checkpw(password.encode("utf-8"), stored.encode("utf-8"))
+    if scheme == SCHEME_SHA256:
+        return hmac.compare_digest(hashlib.sha256(password.encode("utf-8")).hexdigest(), stored)
+    if scheme == SCHEME_PLAINTEXT:
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+    return False
+
+
+def match_password(user: Dict[str, Any], password: str) -> Optional[str]:
+    """
+    Verificar a senha no esquema do documento (uma única verificação de hash).
+
+    Como no login anterior, o campo legado "password" (texto plano) ainda vale
+    quando o hash não confere.
+
+    Returns:
+        Esquema que validou a senha, ou None
+    """
+    password = password or ""
+    scheme = detect_hash_scheme(user)
+    try:
+        if _verify_scheme(scheme, user, password):
+            return scheme
+    except Exception as e:
+        logger.warning(f"⚠️ Falha ao verificar senha ({scheme}): {e}")
+    plain = str(user.get("password") or "")
+    if plain and hmac.compare_digest(plain.encode("utf-8"), password.encode("utf-8")):
+        return SCHEME_PASSWORD_FIELD
+    return None
+
+
+class UserLocation(NamedTuple):
+    collection: str
+    doc_id: str
+    scheme: str
+
+
+class UserLookupIndex:
+    """
+    Índice e-mail → UserLocation, compartilhado pelo processo.
+
+    Um e-mail presente em mais de uma coleção (migrações antigas) guarda todas as
+    localizações, na ordem de prioridade das coleções.
+    """
+
+    def __init__(self, fs_client, collections: Callable[[], Iterable[str]], normalize: Callable[[str], str],
+                 ttl_sec: float = 600):
+        self.fs_client = fs_client
+        self._collections = collections
+        self._normalize = normalize
+        self.ttl_sec = ttl_sec
+        self._entries: Dict[str, List[UserLocation]] = {}
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Só uma thread remonta o índice por vez
+        self._rebuild_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Montagem
+    # ------------------------------------------------------------------
+    def _stale(self) -> bool:
+        return self._built_at is None or (self.ttl_sec > 0 and time.monotonic() - self._built_at >= self.ttl_sec)
+
+    def rebuild(self):
+        """Ler os campos de login de todas as coleções de usuários."""
+        entries: Dict[str, List[UserLocation]] = {}
+        started = time.monotonic()
+        # Ordem das coleções = ordem em que o login as tenta
+        for collection_name in self._collections():
+            try:
+                docs = self.fs_client.collection(collection_name).select(LOGIN_FIELDS).stream()
+                for doc in docs:
+                    user = doc.to_dict() or {}
+                    email = self._normalize(user.get("email") or "")
+                    if email:
+                        entries.setdefault(email, []).append(UserLocation(collection_name, doc.id, detect_hash_scheme(user)))
+            except Exception as e:
+                logger.warning(f"⚠️ Índice de login: falha ao ler {collection_name}: {e}")
+        with self._lock:
+            self._entries = entries
+            self._built_at = time.monotonic()
+        logger.info(f"🔑 Índice de login montado: {len(entries)} usuários em {(time.monotonic() - started) * 1000:.0f} ms")
+
+    def _refresh(self):
+        """
+        Remontar o índice vencido. Na primeira montagem todos esperam por ela; nas
+        renovações uma thread remonta e as demais seguem com as entradas antigas.
+        """
+        if not self._rebuild_lock.acquire(blocking=self._built_at is None):
+            return
+        try:
+            if self._stale():
+                self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def lookup(self, email: str) -> Optional[List[UserLocation]]:
+        """Localizações do e-mail, ou None se ele não está no índice."""
+        if self._stale():
+            self._refresh()
+        with self._lock:
+            locations = self._entries.get(self._normalize(email))
+            return list(locations) if locations else None
+
+    # ------------------------------------------------------------------
+    # Manutenção (escritas de usuários)
+    # ------------------------------------------------------------------
+    def put(self, email: str, collection: str, doc_id: str, scheme: str):
+        """Registrar (ou atualizar) a localização de um usuário."""
+        location = UserLocation(collection, doc_id, scheme)
+        with self._lock:
+            locations = [entry for entry in self._entries.get(self._normalize(email), [])
+                         if (entry.collection, entry.doc_id) != (collection, doc_id)]
+            self._entries[self._normalize(email)] = [location] + locations
+
+    def forget(self, email: Optional[str] = None, doc_id: Optional[str] = None):
+        """Descartar a entrada de um e-mail ou de um documento (a próxima consulta relê do Firestore)."""
+        with self._lock:
+            if email:
+                self._entries.pop(self._normalize(email), None)
+            if doc_id:
+                for key in [key for key, entries in self._entries.items() if any(e.doc_id == doc_id for e in entries)]:
+                    self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)